@@ -0,0 +1,147 @@
+"""
+End-to-end throughput benchmark of the node (v6_k8s_node.py), driven by the stand-in server.
+
+Start simple_sio_server.py, point the node to it (server_url/port/api_path in the node config),
+and run e.g.:
+
+    python node_benchmark.py --server http://192.168.178.185:5000 --tasks 200 --rates 5 20 0
+
+For each rate (tasks per second; 0 injects all the tasks at once) the server state is reset, the
+tasks are injected, and the report of the server (p50/p95/p99 of queue wait, job creation, time to
+Running and time to result upload, plus tasks per second) is collected once all the runs finished
+or the timeout expired. The reports are saved as JSON, and can be compared with the ones of a
+previous version of the node with --compare.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import requests
+
+# Seconds between checks of the progress of a benchmark round
+POLL_INTERVAL_SECONDS = 1
+
+# Percentiles compared between two benchmark results
+COMPARED_PERCENTILES = ("p50", "p95", "p99")
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_round(server: str, tasks: int, rate: float, timeout: float, image: str | None = None) -> dict:
+    """
+    Inject 'tasks' tasks at 'rate' tasks per second and wait for their results
+    """
+    response = requests.post(f"{server}/bench/reset")
+    response.raise_for_status()
+    if not response.json()["node_connected"]:
+        print("Warning: the node is not connected to the server (yet)")
+
+    payload = {"tasks": tasks, "rate": rate}
+    if image:
+        payload["image"] = image
+    requests.post(f"{server}/bench/inject", json=payload).raise_for_status()
+
+    deadline = time.monotonic() + timeout
+    while True:
+        time.sleep(POLL_INTERVAL_SECONDS)
+        report = requests.get(f"{server}/bench/report").json()
+        print(f"rate={rate}: {report['finished']}/{tasks} runs finished", end="\r")
+        if not report["injecting"] and report["finished"] >= tasks:
+            break
+        if time.monotonic() > deadline:
+            print(f"\nTimeout: {tasks - report['finished']} runs did not finish in {timeout}s")
+            report["timed_out"] = True
+            break
+    print()
+    report["rate"] = rate
+    return report
+
+
+def print_report(report: dict) -> None:
+    tps = report["tasks_per_second"]
+    throughput = f"{tps:.2f} tasks/s" if tps else "no throughput"
+    print(f"rate={report['rate']}/s: {report['finished']}/{report['tasks']} finished, {throughput}, "
+          f"statuses: {report['statuses']}")
+    for name, latency in report["latencies"].items():
+        if latency["count"]:
+            print(f"  {name:<16} n={latency['count']:<5} " + " ".join(
+                f"{p}={latency[p]:.3f}s" for p in (*COMPARED_PERCENTILES, "max")))
+        else:
+            print(f"  {name:<16} n=0")
+
+
+def compare(baseline: dict, current: dict) -> None:
+    """
+    Print the relative change of the throughput and latency percentiles of the rounds with the
+    same rate in two benchmark results
+    """
+    print(f"Comparing with {baseline.get('label') or baseline.get('revision')} "
+          f"({baseline.get('started_at')})")
+    baseline_rounds = {r["rate"]: r for r in baseline["rounds"]}
+
+    def change(old, new) -> str:
+        if old is None or new is None:
+            return "n/a"
+        return f"{old:.3f} -> {new:.3f} ({(new - old) / old * 100 if old else 0:+.1f}%)"
+
+    for current_round in current["rounds"]:
+        old_round = baseline_rounds.get(current_round["rate"])
+        if old_round is None:
+            continue
+        print(f"rate={current_round['rate']}/s")
+        print(f"  {'tasks_per_second':<16} "
+              f"{change(old_round['tasks_per_second'], current_round['tasks_per_second'])}")
+        for name, latency in current_round["latencies"].items():
+            old_latency = old_round["latencies"].get(name, {})
+            print(f"  {name:<16} " + "  ".join(
+                f"{p}: {change(old_latency.get(p), latency[p])}" for p in COMPARED_PERCENTILES))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end throughput benchmark of the v6 node")
+    parser.add_argument("--server", default="http://localhost:5000", help="URL of simple_sio_server.py")
+    parser.add_argument("--tasks", type=int, default=100, help="tasks injected in each round")
+    parser.add_argument("--rates", type=float, nargs="+", default=[0],
+                        help="injection rates (tasks per second) of the rounds; 0: all at once")
+    parser.add_argument("--image", help="algorithm image (default: the one in server_config.yaml)")
+    parser.add_argument("--timeout", type=float, default=600, help="max. seconds of each round")
+    parser.add_argument("--label", help="label of this benchmark result (e.g. the node version)")
+    parser.add_argument("--output", help="JSON file for the results (default: benchmark-<timestamp>.json)")
+    parser.add_argument("--compare", help="JSON file of a previous result to compare with")
+    args = parser.parse_args()
+
+    started_at = datetime.now(timezone.utc)
+    result = {
+        "label": args.label,
+        "revision": git_revision(),
+        "started_at": started_at.isoformat(),
+        "tasks": args.tasks,
+        "image": args.image,
+        "rounds": [],
+    }
+    for rate in args.rates:
+        report = run_round(args.server, args.tasks, rate, args.timeout, args.image)
+        print_report(report)
+        result["rounds"].append(report)
+
+    output = args.output or f"benchmark-{started_at.strftime('%Y%m%dT%H%M%S')}.json"
+    with open(output, "w") as file:
+        json.dump(result, file, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), result)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,317 @@
-import socketio
+"""
+Stand-in for the vantage6 server, used to test and benchmark the node without a real server.
+
+Besides the original 'node_connection_request'/'command_request' socket.io events, it serves the
+subset of the vantage6 REST and socket API used by v6_k8s_node.py (node authentication, /run,
+/task, /organization, /collaboration, /token/container and the /tasks socket.io namespace), and
+the /bench endpoints used by node_benchmark.py to inject tasks and collect the timings of their
+runs:
+
+    injected     the task was created and 'new_task' was emitted to the node
+    initializing the node PATCHed the run as 'initializing' (dispatched from its queue)
+    token        the node requested the container token of the task
+    created      the node reported the job as created (algorithm_status_change)
+    active       the node PATCHed the run as 'active' (algorithm POD running)
+    result       the node PATCHed the run with its result
+
+Requests are served by eventlet green threads, so the state below is only modified by code that
+does not yield, and needs no locking.
+
+Its dependencies (and the ones of node_benchmark.py) are listed on requirements.txt, in this folder.
+"""
+import base64
+import json
+import time
+from datetime import datetime, timezone
+
 import eventlet
-import threading
+import jwt
+import socketio
 import yaml
+from flask import Flask, abort, jsonify, request
+
+# Secret of the (fake) tokens issued to the node and to its algorithm containers
+TOKEN_SECRET = "v6-dummy-server-secret"
+
+# Lifetime (seconds) of the node access tokens
+ACCESS_TOKEN_LIFETIME = 6 * 3600
+
+# Statuses of a finished run (see vantage6.common.task_status.TaskStatus)
+FINISHED_STATUSES = ("completed", "failed", "start failed", "non-existing Docker image",
+                     "crashed", "killed by user", "not allowed", "unknown error")
+
+# Default node identity and task settings, overridable in server_config.yaml
+DEFAULT_NODE = {"id": 1, "name": "benchmark-node", "organization_id": 1, "collaboration_id": 1}
+DEFAULT_BENCHMARK = {
+    "image": "harbor2.vantage6.ai/demo/average",
+    "input": {"method": "partial_average", "kwargs": {"column_name": "col_a"}},
+    "databases": [{"label": "default", "parameters": "{}"}],
+}
+
+# Latencies reported by the benchmark: name -> (start stage, end stage)
+LATENCIES = {
+    "queue_wait": ("injected", "initializing"),
+    "job_creation": ("token", "created"),
+    "time_to_running": ("injected", "active"),
+    "time_to_result": ("injected", "result"),
+}
 
 # create a Socket.IO server
 sio = socketio.Server()
+app = Flask(__name__)
 
 node_client_sid = -1
 
+settings = {"node": dict(DEFAULT_NODE), "benchmark": dict(DEFAULT_BENCHMARK)}
+
+# In-memory server state: tasks and runs by id, and the timestamps of the stages of each run
+state = {"tasks": {}, "runs": {}, "timings": {}, "node_sid": None, "injecting": False}
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def percentile(values: list, q: float) -> float | None:
+    """
+    q-th percentile (0-100) of the values, linearly interpolated between the closest ranks
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    rank = (len(values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def record_stage(run_id: int, stage: str) -> None:
+    """Record the time a run reached a stage (only its first occurrence is kept)"""
+    timings = state["timings"].get(run_id)
+    if timings is not None:
+        timings.setdefault(stage, time.time())
+
+
+def reset() -> None:
+    state["tasks"].clear()
+    state["runs"].clear()
+    state["timings"].clear()
+
+
+def create_task(image: str, input_: dict, databases: list) -> dict:
+    """
+    Create a task with a single run for the node, as the server does when a user creates a task
+    """
+    node = settings["node"]
+    task_id = len(state["tasks"]) + 1
+    task = {
+        "id": task_id,
+        "job_id": task_id,
+        "name": f"benchmark-{task_id}",
+        "description": "",
+        "image": image,
+        "status": "pending",
+        "parent": None,
+        "databases": databases,
+        "init_org": {"id": node["organization_id"]},
+        "init_user": {"id": 1},
+        "collaboration": {"id": node["collaboration_id"]},
+        "created_at": now_iso(),
+    }
+    run = {
+        "id": task_id,
+        "status": "pending",
+        # without encryption, the input is only base64 encoded (see DummyCryptor)
+        "input": base64.b64encode(json.dumps(input_).encode()).decode(),
+        "node": {"id": node["id"]},
+        "organization": {"id": node["organization_id"]},
+        "assigned_at": now_iso(),
+        "started_at": None,
+        "finished_at": None,
+        "log": None,
+        "result": None,
+    }
+    state["tasks"][task_id] = task
+    state["runs"][task_id] = run
+    state["timings"][task_id] = {"injected": time.time()}
+    return task
+
+
+def inject_tasks(count: int, rate: float, image: str, input_: dict, databases: list) -> None:
+    """
+    Create 'count' tasks, at 'rate' tasks per second (all at once when rate is 0), notifying the
+    node of each of them with a 'new_task' event
+    """
+    state["injecting"] = True
+    try:
+        for _ in range(count):
+            task = create_task(image, input_, databases)
+            sio.emit("new_task", {"id": task["id"], "parent_id": None}, namespace="/tasks")
+            sio.sleep(1 / rate if rate > 0 else 0)
+    finally:
+        state["injecting"] = False
+
+
+def report() -> dict:
+    """
+    Latency percentiles (seconds) of the runs, and throughput of the node
+    """
+    timings = list(state["timings"].values())
+    statuses = {}
+    for run in state["runs"].values():
+        statuses[run["status"]] = statuses.get(run["status"], 0) + 1
+
+    latencies = {}
+    for name, (start, end) in LATENCIES.items():
+        values = [t[end] - t[start] for t in timings if start in t and end in t]
+        latencies[name] = {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": max(values) if values else None,
+        }
+
+    results = [t["result"] for t in timings if "result" in t]
+    duration = max(results) - min(t["injected"] for t in timings) if results else None
+    return {
+        "tasks": len(timings),
+        "finished": len(results),
+        "injecting": state["injecting"],
+        "node_connected": state["node_sid"] is not None,
+        "statuses": statuses,
+        "duration_seconds": duration,
+        "tasks_per_second": len(results) / duration if duration else None,
+        "latencies": latencies,
+    }
+
+
+def issue_node_tokens() -> dict:
+    node_id = settings["node"]["id"]
+    access_token = jwt.encode(
+        {"sub": node_id, "exp": int(time.time()) + ACCESS_TOKEN_LIFETIME, "client_type": "node"},
+        TOKEN_SECRET, algorithm="HS256")
+    return {
+        "access_token": access_token,
+        "refresh_token": jwt.encode({"sub": node_id, "type": "refresh"}, TOKEN_SECRET, algorithm="HS256"),
+        "refresh_url": f"{settings['api_path']}/token/refresh",
+        "node_url": f"{settings['api_path']}/node/{node_id}",
+    }
+
+
+def register_api_routes(api_path: str) -> None:
+    """
+    REST endpoints of the vantage6 server used by the node, under the 'api_path' prefix
+    """
+
+    @app.post(f"{api_path}/token/node")
+    def token_node():
+        return jsonify(issue_node_tokens())
+
+    @app.post(f"{api_path}/token/refresh")
+    def token_refresh():
+        return jsonify(issue_node_tokens())
+
+    @app.post(f"{api_path}/token/container")
+    def token_container():
+        data = request.get_json()
+        task = state["tasks"].get(data.get("task_id"))
+        if task is None:
+            abort(400)
+        record_stage(task["id"], "token")
+        node = settings["node"]
+        identity = {"client_type": "container", "node_id": node["id"],
+                    "organization_id": node["organization_id"],
+                    "collaboration_id": node["collaboration_id"],
+                    "task_id": task["id"], "image": data.get("image")}
+        return jsonify({"container_token": jwt.encode({"sub": identity}, TOKEN_SECRET, algorithm="HS256")})
+
+    @app.get(f"{api_path}/node/<int:id_>")
+    def get_node(id_):
+        node = settings["node"]
+        return jsonify({"id": id_, "name": node["name"],
+                        "organization": {"id": node["organization_id"]},
+                        "collaboration": {"id": node["collaboration_id"]}})
+
+    @app.get(f"{api_path}/organization/<int:id_>")
+    def get_organization(id_):
+        return jsonify({"id": id_, "name": f"organization-{id_}", "public_key": ""})
+
+    @app.get(f"{api_path}/collaboration/<int:id_>")
+    def get_collaboration(id_):
+        return jsonify({"id": id_, "name": f"collaboration-{id_}", "encrypted": 0})
+
+    @app.get(f"{api_path}/task/<int:id_>")
+    def get_task(id_):
+        task = state["tasks"].get(id_)
+        if task is None:
+            abort(404)
+        return jsonify(task)
+
+    @app.get(f"{api_path}/run")
+    def list_runs():
+        args = request.args
+        runs = list(state["runs"].values())
+        if args.get("task_id"):
+            runs = [r for r in runs if r["id"] == int(args["task_id"])]
+        if args.get("state") == "open":
+            runs = [r for r in runs if r["status"] not in FINISHED_STATUSES]
+        if args.get("include") == "task":
+            runs = [{**r, "task": state["tasks"][r["id"]]} for r in runs]
+        # all the runs are returned on a single page
+        return jsonify({"data": runs, "links": {}})
+
+    @app.patch(f"{api_path}/run/<int:id_>")
+    def patch_run(id_):
+        run = state["runs"].get(id_)
+        if run is None:
+            abort(404)
+        data = request.get_json()
+        run.update(data)
+        if "result" in data:
+            record_stage(id_, "result")
+        elif data.get("status") == "initializing":
+            record_stage(id_, "initializing")
+        elif data.get("status") == "active":
+            record_stage(id_, "active")
+        return jsonify(run)
+
+    @app.route(f"{api_path}/port", methods=["POST", "DELETE"])
+    def port():
+        return jsonify({})
+
+
+@app.post("/bench/reset")
+def bench_reset():
+    if state["injecting"]:
+        abort(409)
+    reset()
+    return jsonify(report())
+
+
+@app.post("/bench/inject")
+def bench_inject():
+    data = request.get_json() or {}
+    defaults = settings["benchmark"]
+    sio.start_background_task(
+        inject_tasks,
+        int(data.get("tasks", 1)),
+        float(data.get("rate", 0)),
+        data.get("image", defaults["image"]),
+        data.get("input", defaults["input"]),
+        data.get("databases", defaults["databases"]),
+    )
+    return jsonify({"tasks": data.get("tasks", 1)})
+
+
+@app.get("/bench/report")
+def bench_report():
+    return jsonify(report())
+
+
 @sio.event
 def connect(sid, environ):
-    print("Client connected: ", sid)       
+    print("Client connected: ", sid)
 
 @sio.event
 def disconnect(sid):
@@ -27,7 +328,38 @@ def node_connection_request(sid, data):
 def command_request(sid, data):
     global node_client_sid
     print("Command request from ", sid, " - Sending command to ", node_client_sid)
-    sio.emit('command', data, room=node_client_sid)    
+    sio.emit('command', data, room=node_client_sid)
+
+
+@sio.on("connect", namespace="/tasks")
+def tasks_connect(sid, environ):
+    print("Node connected to /tasks: ", sid)
+    state["node_sid"] = sid
+    # as the vantage6 server does, ask the node to fetch its open runs
+    sio.emit("sync", room=sid, namespace="/tasks")
+
+
+@sio.on("disconnect", namespace="/tasks")
+def tasks_disconnect(sid):
+    if state["node_sid"] == sid:
+        state["node_sid"] = None
+
+
+@sio.on("algorithm_status_change", namespace="/tasks")
+def algorithm_status_change(sid, data):
+    # first notification after the container token was issued: the job was created
+    if "token" in state["timings"].get(data.get("run_id"), {}):
+        record_stage(data["run_id"], "created")
+
+
+@sio.on("node_info_update", namespace="/tasks")
+def node_info_update(sid, data):
+    print("Node configuration: ", data)
+
+
+@sio.on("ping", namespace="/tasks")
+def ping(sid):
+    pass
 
 
 if __name__ == '__main__':
@@ -36,7 +368,11 @@ if __name__ == '__main__':
         v6_config = yaml.safe_load(file)
         print(f'v6 dummy server settings:{v6_config}')
 
+    settings["api_path"] = v6_config.get("api_path", "/api")
+    settings["node"].update(v6_config.get("node") or {})
+    settings["benchmark"].update(v6_config.get("benchmark") or {})
+    register_api_routes(settings["api_path"])
 
-    app = socketio.WSGIApp(sio)
-    eventlet.wsgi.server(eventlet.listen((v6_config['server_ip'],v6_config['port'])), app)
-    print('Socket.io server running')
\ No newline at end of file
+    wsgi_app = socketio.WSGIApp(sio, app)
+    print('Socket.io server running')
+    eventlet.wsgi.server(eventlet.listen((v6_config['server_ip'],v6_config['port'])), wsgi_app)
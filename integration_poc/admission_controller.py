@@ -0,0 +1,259 @@
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+from kubernetes.utils import parse_quantity
+from vantage6.common import logger_name
+from job_informer import JobInformer
+from decimal import Decimal
+from typing import NamedTuple
+
+import logging
+import threading
+import time
+
+
+# Seconds between refreshes of the cluster capacity (nodes, PODs of other namespaces
+# and resource quotas)
+CAPACITY_REFRESH_INTERVAL = 30
+
+# Seconds an admitted run keeps its capacity reserved while its POD has not shown up
+RESERVATION_TIMEOUT = 180
+
+CPU = "cpu"
+MEMORY = "memory"
+RESOURCES = (CPU, MEMORY)
+
+
+class Reservation(NamedTuple):
+    """Data class to store the capacity reserved by an admitted run"""
+
+    requests: dict[str, Decimal]
+    expires_at: float
+
+
+def parse_resources(resources: dict | None) -> dict[str, Decimal]:
+    """
+    Parse a K8S resource list (e.g., {'cpu': '500m', 'memory': '1Gi'}) into cpu cores and
+    memory bytes. Missing resources are taken as zero.
+    """
+    resources = resources or {}
+    return {r: parse_quantity(resources[r]) if r in resources else Decimal(0) for r in RESOURCES}
+
+
+def pod_requests(pod: client.V1Pod) -> dict[str, Decimal]:
+    """
+    Sum of the resource requests of the containers of a POD
+    """
+    total = {r: Decimal(0) for r in RESOURCES}
+    for container in pod.spec.containers or []:
+        requests = parse_resources(container.resources.requests if container.resources else None)
+        for r in RESOURCES:
+            total[r] += requests[r]
+    return total
+
+
+def is_pod_terminated(pod: client.V1Pod) -> bool:
+    return bool(pod.status) and pod.status.phase in ("Succeeded", "Failed")
+
+
+class AdmissionController:
+    """
+    Capacity-aware admission of algorithm runs.
+
+    A run is admitted only when its resource requests fit (1) in the free allocatable
+    capacity of the cluster, both in aggregate and on at least one cluster node, and
+    (2) in the free part of the ResourceQuota(s) of the jobs namespace. Otherwise the
+    run is held in the node's queue instead of creating a Job that would stay Pending.
+
+    The allocatable capacity of the cluster nodes, the requests of the PODs of other
+    namespaces and the quotas are refreshed every CAPACITY_REFRESH_INTERVAL seconds, on a
+    background thread (see start). The requests of the PODs of the jobs namespace are taken
+    from the informer's cache, plus the capacity reserved by the runs admitted whose POD has
+    not shown up yet. Hence, try_admit only reads local state, and doesn't block the node's
+    queue (from which it is called) on the K8S API.
+    """
+
+    def __init__(self, core_api: client.CoreV1Api, informer: JobInformer, namespace: str = "v6-jobs",
+                 refresh_interval: float = CAPACITY_REFRESH_INTERVAL):
+
+        self.log = logging.getLogger(logger_name(__name__))
+
+        self.core_api = core_api
+        self.informer = informer
+        self.namespace = namespace
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.Lock()
+        self._refreshed = threading.Event()
+        # node name -> allocatable resources
+        self._allocatable: dict[str, dict[str, Decimal]] = {}
+        # node name -> requests of the (non terminated) PODs of other namespaces
+        self._others_requests: dict[str, dict[str, Decimal]] = {}
+        # Hard limits of the namespace quotas on requests ('requests.cpu', 'cpu', ...)
+        self._quota_hard: dict[str, Decimal] = {}
+        # run_id -> reservation of the admitted runs
+        self._reservations: dict[str, Reservation] = {}
+
+
+    def start(self) -> None:
+        threading.Thread(target=self.__refresh_worker, name="admission-refresh", daemon=True).start()
+
+
+    def wait_until_refreshed(self, timeout: float | None = None) -> bool:
+        """
+        Block until the cluster capacity was read once (or the timeout expires). Until then,
+        all the runs are admitted.
+        """
+        return self._refreshed.wait(timeout)
+
+
+    def try_admit(self, run_id, requests: dict | None) -> bool:
+        """
+        Admit a run if its resource requests fit on the cluster and namespace quota,
+        reserving them until its POD shows up on the informer's cache.
+
+        Parameters
+        ----------
+        run_id: int | str
+            Identifier of the run
+        requests: dict | None
+            Resource requests of the run's algorithm container (K8S resource list)
+
+        Returns
+        -------
+        bool
+            Whether the run was admitted
+        """
+        wanted = parse_resources(requests)
+
+        with self._lock:
+            if str(run_id) in self._reservations:
+                return True
+
+            if not self._allocatable:
+                # The cluster capacity couldn't be obtained yet: leave it to the K8S scheduler
+                return True
+            free_by_node, quota_free = self.__free_capacity()
+
+            fits_quota = all(wanted[r] <= quota_free[r] for r in RESOURCES if r in quota_free)
+            fits_cluster = all(wanted[r] <= sum(free[r] for free in free_by_node.values()) for r in RESOURCES)
+            fits_node = any(all(wanted[r] <= free[r] for r in RESOURCES) for free in free_by_node.values())
+
+            if not (fits_quota and fits_cluster and fits_node):
+                self.log.debug(f"Run {run_id} (requests: {requests}) doesn't fit yet: quota={fits_quota}, "
+                               f"cluster={fits_cluster}, node={fits_node}")
+                return False
+
+            self._reservations[str(run_id)] = Reservation(requests=wanted, expires_at=time.time() + RESERVATION_TIMEOUT)
+            return True
+
+
+    def release(self, run_id) -> None:
+        """
+        Drop the reservation of a run (e.g., it was not started)
+        """
+        with self._lock:
+            self._reservations.pop(str(run_id), None)
+
+
+    def __free_capacity(self) -> tuple[dict[str, dict[str, Decimal]], dict[str, Decimal]]:
+        """
+        Free capacity per cluster node, and free capacity of the namespace quota (only for
+        the resources limited by it)
+        """
+        free_by_node = {
+            node: {r: allocatable[r] - self._others_requests.get(node, {}).get(r, Decimal(0)) for r in RESOURCES}
+            for node, allocatable in self._allocatable.items()
+        }
+        namespace_used = {r: Decimal(0) for r in RESOURCES}
+        reserved = {r: Decimal(0) for r in RESOURCES}
+        unbound = {r: Decimal(0) for r in RESOURCES}
+
+        now = time.time()
+        for run_id, reservation in list(self._reservations.items()):
+            if reservation.expires_at < now or self.informer.get_run_pods(run_id):
+                del self._reservations[run_id]
+            else:
+                for r in RESOURCES:
+                    reserved[r] += reservation.requests[r]
+
+        for pod in self.informer.get_pods():
+            if is_pod_terminated(pod):
+                continue
+            requests = pod_requests(pod)
+            node = pod.spec.node_name
+            for r in RESOURCES:
+                namespace_used[r] += requests[r]
+                if node in free_by_node:
+                    free_by_node[node][r] -= requests[r]
+                else:
+                    unbound[r] += requests[r]
+
+        # Capacity reserved by admitted runs, or requested by PODs not bound yet, may end up on any node.
+        # It is taken from the aggregate by charging it to the nodes with most free capacity first.
+        for r in RESOURCES:
+            pending = reserved[r] + unbound[r]
+            for free in sorted(free_by_node.values(), key=lambda f: f[r], reverse=True):
+                taken = min(pending, max(free[r], Decimal(0)))
+                free[r] -= taken
+                pending -= taken
+
+            namespace_used[r] += reserved[r]
+
+        quota_free = {}
+        for r in RESOURCES:
+            hard = [self._quota_hard[k] for k in (f"requests.{r}", r) if k in self._quota_hard]
+            if hard:
+                quota_free[r] = min(hard) - namespace_used[r]
+
+        return free_by_node, quota_free
+
+
+    def __refresh_worker(self) -> None:
+        while True:
+            self.__refresh()
+            time.sleep(self.refresh_interval)
+
+
+    def __refresh(self) -> None:
+        """
+        Read the allocatable capacity of the cluster nodes, the requests of the PODs of other
+        namespaces and the quotas of the jobs namespace. The previous ones are kept if these
+        can't be read.
+        """
+        try:
+            allocatable = {}
+            for node in self.core_api.list_node().items:
+                if node.spec.unschedulable:
+                    continue
+                allocatable[node.metadata.name] = parse_resources(node.status.allocatable)
+
+            others_requests: dict[str, dict[str, Decimal]] = {}
+            pods = self.core_api.list_pod_for_all_namespaces(
+                field_selector="status.phase!=Succeeded,status.phase!=Failed"
+            )
+            for pod in pods.items:
+                if pod.metadata.namespace == self.namespace or not pod.spec.node_name:
+                    continue
+                node_requests = others_requests.setdefault(pod.spec.node_name, {r: Decimal(0) for r in RESOURCES})
+                for r, value in pod_requests(pod).items():
+                    node_requests[r] += value
+
+            quota_hard: dict[str, Decimal] = {}
+            for quota in self.core_api.list_namespaced_resource_quota(self.namespace).items:
+                for key, value in ((quota.status.hard if quota.status else None) or {}).items():
+                    value = parse_quantity(value)
+                    quota_hard[key] = min(value, quota_hard.get(key, value))
+
+        except ApiException as e:
+            self.log.warning(f"Couldn't refresh the cluster capacity (status {e.status}), using the previous one")
+            return
+        except Exception:
+            self.log.exception("Couldn't refresh the cluster capacity, using the previous one")
+            return
+
+        with self._lock:
+            self._allocatable = allocatable
+            self._others_requests = others_requests
+            self._quota_hard = quota_hard
+        self._refreshed.set()
+        self.log.debug(f"Cluster capacity refreshed: allocatable={allocatable}, quota={quota_hard}")
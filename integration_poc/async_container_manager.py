@@ -0,0 +1,654 @@
+from kubernetes import client
+from vantage6.common.task_status import TaskStatus
+from vantage6.cli.context.node import NodeContext
+from vantage6.common import logger_name
+from vantage6.common.tracing import TRACER, KIND_CLIENT
+from vantage6.node.util import get_parent_id
+from container_manager import (JobSpecBuilder, Result, RunStatusChange, StartingRun, ToBeKilled, KilledRun, IndexedRun,
+                               is_job_finished, get_job_finished_at, get_pod_start_failure, set_io_owner,
+                               POD_START_TIMEOUT, POD_START_CHECK_INTERVAL, POD_START_SECONDS, HARVEST_SECONDS)
+from job_gc import DEFAULT_JOB_TTL_SECONDS
+from job_informer import WATCH_TIMEOUT_SECONDS, WATCH_REQUEST_TIMEOUT_SECONDS, WATCH_RETRY_INTERVAL, JOB, POD
+from typing import Callable, List
+
+import asyncio
+import concurrent.futures
+import datetime
+import functools
+import logging
+import os
+import shutil
+import threading
+import time
+import yaml
+import pod_node_constants
+
+# Optional dependency: only needed when the node is configured with the asyncio container manager
+try:
+    from kubernetes_asyncio import client as async_client, config as async_config, watch as async_watch
+    from kubernetes_asyncio.client.rest import ApiException as AsyncApiException
+except ImportError:
+    async_client = async_config = async_watch = AsyncApiException = None
+
+
+# Default maximum number of concurrent requests to the K8S API server (creates, log reads, deletes)
+DEFAULT_MAX_CONCURRENT_REQUESTS = 50
+
+# Default number of finished jobs harvested concurrently
+DEFAULT_HARVEST_CONCURRENCY = 16
+
+# Seconds the (threaded) callers of the bridge wait for the event loop to be ready
+BRIDGE_START_TIMEOUT = 60
+
+
+class AsyncContainerManager(JobSpecBuilder):
+    """
+    asyncio implementation of the ContainerManager, on the kubernetes_asyncio client: the
+    watches of the Jobs and PODs (the local cache from which is_running and the completions
+    are answered), the launches and the harvests of all the runs are multiplexed on a single
+    event loop, instead of holding a thread each.
+
+    It has the same public surface as ContainerManager (run, is_running, get_results,
+    get_status_changes and kill_tasks, as coroutines), and the same job definition (see
+    JobSpecBuilder). It only runs on a real K8S cluster, without the warm pool, image
+    pre-puller, admission control and log streaming of the threaded ContainerManager.
+    The threaded NodePod uses it through a ContainerManagerBridge.
+    """
+
+    def __init__(self, ctx: NodeContext):
+        """
+        Parameters
+        ----------
+        ctx: NodeContext
+            Context of the node, from which the v6-node configuration file is read
+        """
+        if async_client is None:
+            raise ImportError("The asyncio container manager requires the 'kubernetes_asyncio' package")
+
+        self.log = logging.getLogger(logger_name(__name__))
+
+        #Load v6-node configuration file
+        with open(ctx.config_file, 'r') as file:
+            self.v6_config: dict = yaml.safe_load(file)
+
+        manager_config = self.v6_config.get("container_manager") or {}
+        self.max_concurrent_requests = manager_config.get("max_concurrent_requests", DEFAULT_MAX_CONCURRENT_REQUESTS)
+        self.harvest_concurrency = manager_config.get("harvest_concurrency", DEFAULT_HARVEST_CONCURRENCY)
+        self.job_ttl_seconds = (self.v6_config.get("job_gc") or {}).get(
+            "ttl_seconds_after_finished", DEFAULT_JOB_TTL_SECONDS)
+        self.namespace = "v6-jobs"
+
+        #minik8s config, by default in the user's home directory root (or mounted on the node POD)
+        self._kube_config_file_path = os.path.join(os.path.expanduser('~'), '.kube', 'config')
+        self.running_on_guest_env = not os.path.exists(self._kube_config_file_path)
+        if self.running_on_guest_env:
+            self._kube_config_file_path = pod_node_constants.KUBE_CONFIG_FILE_PATH
+
+        # Serializes the (synchronous client) job definitions into request bodies
+        self._serializer = client.ApiClient()
+
+        # Local cache of the Jobs and PODs on the jobs namespace (by name), filled by the watches
+        self._jobs: dict[str, client.V1Job] = {}
+        self._pods: dict[str, client.V1Pod] = {}
+        # Runs whose job was created, but whose POD has not reported a running phase yet (by run_id)
+        self._starting_runs: dict[str, StartingRun] = {}
+        # Finished jobs already queued to be harvested (until their deletion is reported)
+        self._queued_jobs: set[str] = set()
+
+        # Created on the event loop (see start)
+        self._synced: dict[str, asyncio.Event] = {}
+        self._completed_jobs: asyncio.Queue[str] | None = None
+        self._status_changes: asyncio.Queue[RunStatusChange] | None = None
+        self._api_slots: asyncio.Semaphore | None = None
+        self._harvest_slots: asyncio.Semaphore | None = None
+        self._tasks: List[asyncio.Task] = []
+        # Removals of the jobs that failed to start (referenced until they are done)
+        self._removals: set[asyncio.Task] = set()
+
+
+    async def start(self) -> None:
+        """
+        Connect to the K8S API server, and start the watches and the pod start timeout checks.
+        Returns once the local cache is synced.
+        """
+        await async_config.load_kube_config(self._kube_config_file_path)
+        self.log.info(f'>>> Loading K8S configuration file from {self._kube_config_file_path} (asyncio client)')
+        self._api_client = async_client.ApiClient()
+        self.batch_api = async_client.BatchV1Api(self._api_client)
+        self.core_api = async_client.CoreV1Api(self._api_client)
+
+        self._synced = {JOB: asyncio.Event(), POD: asyncio.Event()}
+        self._completed_jobs = asyncio.Queue()
+        self._status_changes = asyncio.Queue()
+        self._api_slots = asyncio.Semaphore(self.max_concurrent_requests)
+        self._harvest_slots = asyncio.Semaphore(self.harvest_concurrency)
+
+        self._tasks = [
+            asyncio.create_task(self.__watch(JOB, self.batch_api.list_namespaced_job)),
+            asyncio.create_task(self.__watch(POD, self.core_api.list_namespaced_pod)),
+            asyncio.create_task(self.__failed_start_checker()),
+        ]
+        await asyncio.gather(*(event.wait() for event in self._synced.values()))
+
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._api_client.close()
+
+
+    async def _run_in_executor(self, func: Callable, *args, **kwargs):
+        """Run a blocking (file system) operation off the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+    def _uses_result_upload(self) -> bool:
+        # The uploads are only spooled by the threaded ContainerManager: the outputs are read from the tasks folder
+        return False
+
+
+    async def run(self, run_id: int, task_info: dict, image: str,
+                  docker_input: bytes, tmp_vol_name: str, token: str,
+                  databases_to_use: list[str]
+        ) -> tuple[TaskStatus, list[dict] | None]:
+        """
+        Create the job of a run (see ContainerManager.run). Returns TaskStatus.INITIALIZING once
+        the job is accepted by K8S: the transition to ACTIVE (or to a failure to start) is
+        reported through get_status_changes.
+        """
+        if not self.is_docker_image_allowed(image, task_info):
+            self.log.critical(f"Docker image {image} is not allowed on this Node!")
+            return TaskStatus.NOT_ALLOWED, None
+
+        if await self.is_running(run_id):
+            self.log.warn(f"Task is already being executed, discarding run_id={run_id}")
+            return TaskStatus.ACTIVE, None
+
+        if self._has_undefined_databases(databases_to_use):
+            return TaskStatus.START_FAILED, None
+
+        str_task_id = str(task_info["id"])
+        str_run_id = str(run_id)
+        parent_id = str(get_parent_id(task_info))
+
+        # The input, token and output files are written while the job is defined
+        io_objects = self._uses_io_objects(str_run_id, docker_input)
+        job = await self._run_in_executor(
+            self._build_job, run_id=str_run_id, task_id=str_task_id, parent_id=parent_id, image=image,
+            docker_input=docker_input, token=token, databases_to_use=databases_to_use, io_objects=io_objects,
+        )
+
+        self.log.info(f"Creating namedspaced K8S job for task_id={str_task_id} and run_id={str_run_id}.")
+        try:
+            with TRACER.span("create_namespaced_job", parent=TRACER.get_run_context(run_id), kind=KIND_CLIENT):
+                async with self._api_slots:
+                    created_job = await self.batch_api.create_namespaced_job(
+                        namespace=self.namespace, body=self._serializer.sanitize_for_serialization(job))
+        except AsyncApiException as e:
+            # Jobs are named after the run_id: the run was already launched
+            if e.status == 409:
+                self.log.warn(f"A job for run_id={str_run_id} already exists, discarding task")
+                return TaskStatus.ACTIVE, None
+            raise
+
+        # The input/token objects are owned by the job, so they are created once it exists
+        if io_objects:
+            try:
+                await self.__create_io_objects(self._build_io_objects(str_run_id, docker_input, token), created_job)
+            except Exception:
+                await self.__remove_job(str_run_id)
+                raise
+
+        launched_at = time.time()
+        self._starting_runs[str_run_id] = StartingRun(
+            task_id=task_info["id"],
+            parent_id=get_parent_id(task_info),
+            launched_at=launched_at,
+            deadline=launched_at + POD_START_TIMEOUT,
+        )
+        # The POD may have been reported before the run was registered as starting
+        for pod in self.__get_pods(app=str_run_id):
+            self.__track_pod_phase(pod)
+
+        return TaskStatus.INITIALIZING, None
+
+
+    async def __create_io_objects(self, io_objects: list, job) -> None:
+        """
+        Create the input/token ConfigMap/Secret objects of a run (see JobSpecBuilder._build_io_objects)
+        """
+        set_io_owner(io_objects, job)
+        with TRACER.span("create_io_objects", parent=TRACER.get_run_context(job.metadata.name), kind=KIND_CLIENT):
+            for io_object in io_objects:
+                body = self._serializer.sanitize_for_serialization(io_object)
+                async with self._api_slots:
+                    if isinstance(io_object, client.V1Secret):
+                        await self.core_api.create_namespaced_secret(namespace=self.namespace, body=body)
+                    else:
+                        await self.core_api.create_namespaced_config_map(namespace=self.namespace, body=body)
+
+
+    async def is_running(self, run_id: int) -> bool:
+        """
+        Whether a job (or POD) exists for <run_id>, according to the local cache
+        """
+        for event in self._synced.values():
+            await event.wait()
+        return str(run_id) in self._jobs or bool(self.__get_pods(app=str(run_id)))
+
+
+    async def get_results(self, timeout: float | None = None) -> List[Result]:
+        """
+        Harvest all the finished jobs (see ContainerManager.get_results): waits until at least one
+        job has finished (or the timeout expires), and harvests concurrently all the completions
+        reported so far.
+        """
+        try:
+            job_ids = [await asyncio.wait_for(self._completed_jobs.get(), timeout)]
+        except asyncio.TimeoutError:
+            return []
+        while not self._completed_jobs.empty():
+            job_ids.append(self._completed_jobs.get_nowait())
+
+        jobs = [self._jobs[job_id] for job_id in job_ids if job_id in self._jobs]
+        harvests = await asyncio.gather(*(self.__harvest_job(job) for job in jobs), return_exceptions=True)
+        results = []
+        for job, harvest in zip(jobs, harvests):
+            if isinstance(harvest, BaseException):
+                self.log.error(f"Error while harvesting the results of job {job.metadata.name}: {harvest!r}")
+            else:
+                results.append(harvest)
+        return results
+
+
+    async def get_status_changes(self, timeout: float | None = None) -> List[RunStatusChange]:
+        """
+        Status changes of the launched runs detected since the last call. Waits until at least one
+        change is available (or the timeout expires).
+        """
+        try:
+            changes = [await asyncio.wait_for(self._status_changes.get(), timeout)]
+        except asyncio.TimeoutError:
+            return []
+        while not self._status_changes.empty():
+            changes.append(self._status_changes.get_nowait())
+        return changes
+
+
+    async def kill_tasks(
+        self, org_id: int, kill_list: list[ToBeKilled] = None
+    ) -> list[KilledRun]:
+        """
+        Kill the runs of a kill list on this node (or all of them, if no list is given), by removing
+        their jobs and PODs
+
+        Returns
+        -------
+        list[KilledRun]
+            List with information on killed tasks
+        """
+        if kill_list:
+            run_ids = [str(k["run_id"]) for k in kill_list if k["organization_id"] == org_id]
+        else:
+            self.log.warn("Received instruction from server to kill all algorithms running on this node. "
+                          "Executing that now...")
+            run_ids = [name for name, job in self._jobs.items() if not is_job_finished(job)]
+
+        killed = await asyncio.gather(*(self.__kill(run_id) for run_id in run_ids))
+        return [killed_run for killed_run in killed if killed_run is not None]
+
+
+    async def __kill(self, run_id: str) -> KilledRun | None:
+        job = self._jobs.get(run_id)
+        if job is None or "run_id" not in (job.metadata.annotations or {}):
+            self.log.warn(f"Received instruction to kill run_id={run_id}, but it was not found running on this node.")
+            return None
+        self.log.info(f"Killing job and PODs of run_id={run_id}")
+        self._starting_runs.pop(run_id, None)
+        # Not harvested: the job is removed before it is reported as finished
+        self._queued_jobs.add(run_id)
+        await self.__remove_job(run_id)
+        parent_id = job.metadata.annotations.get("task_parent_id")
+        return KilledRun(
+            run_id=int(run_id),
+            task_id=int(job.metadata.annotations["task_id"]),
+            parent_id=int(parent_id) if parent_id not in (None, "None") else None,
+        )
+
+
+    async def __harvest_job(self, job: client.V1Job) -> Result:
+        """
+        Collect the output and logs of a finished job, and remove the job, its PODs and task folder
+        """
+        async with self._harvest_slots:
+            job_id = job.metadata.name
+            annotations = job.metadata.annotations
+            self._starting_runs.pop(annotations["run_id"], None)
+            finished_at = get_job_finished_at(job)
+            if finished_at is not None:
+                HARVEST_SECONDS.observe(
+                    max(0.0, (datetime.datetime.now(datetime.timezone.utc) - finished_at).total_seconds()),
+                    stage="wait")
+
+            with TRACER.span("harvest", parent=TRACER.get_run_context(annotations["run_id"]),
+                             attributes={"k8s.job.name": job_id}):
+                data = b""
+                if job.status.succeeded:
+                    self.log.info(f"Found a completed job with a (k8s) Succeded status: {job_id}")
+                    with HARVEST_SECONDS.time(stage="output"):
+                        data = await self._run_in_executor(self.__read_output, job_id)
+                else:
+                    self.log.info(f"Found a completed job with a (k8s) Failed status: {job_id}")
+
+                with HARVEST_SECONDS.time(stage="logs"):
+                    logs = await self.__get_job_pod_logs(job_id)
+
+                with HARVEST_SECONDS.time(stage="cleanup"):
+                    await self.__remove_job(job_id)
+
+            return Result(
+                run_id=annotations["run_id"],
+                task_id=annotations["task_id"],
+                logs=logs,
+                data=data,
+                status=TaskStatus.COMPLETED if job.status.succeeded else TaskStatus.CRASHED,
+                parent_id=annotations["task_parent_id"],
+            )
+
+
+    def __read_output(self, job_id: str) -> bytes:
+        with open(os.path.join(self._get_task_base_path(), job_id, 'output'), "rb") as fp:
+            return fp.read()
+
+
+    async def __get_job_pod_logs(self, job_id: str) -> List[str]:
+        """
+        Logs of the PODs created by a job (e.g., the retries of a failed algorithm), read concurrently
+        """
+        pods = sorted(self.__get_pods(**{"job-name": job_id}), key=lambda pod: pod.metadata.name)
+
+        async def read_log(pod_name: str) -> str:
+            try:
+                async with self._api_slots:
+                    log = await self.core_api.read_namespaced_pod_log(name=pod_name, namespace=self.namespace)
+            except AsyncApiException as e:
+                log = f"(log not available: {e.status} {e.reason})"
+            return f"LOGS of POD {pod_name} (created by job {job_id}) \n {log}"
+
+        return list(await asyncio.gather(*(read_log(pod.metadata.name) for pod in pods)))
+
+
+    async def __remove_job(self, job_id: str) -> None:
+        """
+        Delete a job (its PODs are removed by K8S in the background) and its task folder
+        """
+        try:
+            async with self._api_slots:
+                await self.batch_api.delete_namespaced_job(name=job_id, namespace=self.namespace,
+                                                           propagation_policy="Background")
+        except AsyncApiException as e:
+            if e.status != 404:
+                self.log.warning(f"Could not delete job {job_id} ({e.status}), it will be removed after its TTL")
+        task_folder = os.path.join(self._get_task_base_path(), job_id)
+        await self._run_in_executor(shutil.rmtree, task_folder, ignore_errors=True)
+
+
+    def __get_pods(self, **labels) -> List[client.V1Pod]:
+        return [pod for pod in self._pods.values()
+                if all((pod.metadata.labels or {}).get(k) == v for k, v in labels.items())]
+
+
+    async def __watch(self, kind: str, list_func: Callable) -> None:
+        """
+        List the resources of a kind once, and keep watching them from the last seen resourceVersion
+        (as JobInformer, on the event loop)
+        """
+        cache = self._jobs if kind == JOB else self._pods
+        resource_version = None
+        while True:
+            try:
+                if resource_version is None:
+                    listing = await list_func(namespace=self.namespace)
+                    resource_version = listing.metadata.resource_version
+                    cache.clear()
+                    cache.update({obj.metadata.name: obj for obj in listing.items})
+                    self._synced[kind].set()
+                    for obj in listing.items:
+                        self.__on_event(kind, "ADDED", obj)
+
+                w = async_watch.Watch()
+                async with w.stream(list_func, namespace=self.namespace, resource_version=resource_version,
+                                    allow_watch_bookmarks=True, timeout_seconds=WATCH_TIMEOUT_SECONDS,
+                                    _request_timeout=WATCH_REQUEST_TIMEOUT_SECONDS) as stream:
+                    async for event in stream:
+                        event_type = event["type"]
+                        if event_type == "BOOKMARK":
+                            resource_version = event["raw_object"]["metadata"]["resourceVersion"]
+                            continue
+                        obj = event["object"]
+                        resource_version = obj.metadata.resource_version
+                        if event_type in ("ADDED", "MODIFIED"):
+                            cache[obj.metadata.name] = obj
+                        elif event_type == "DELETED":
+                            cache.pop(obj.metadata.name, None)
+                        else:
+                            continue
+                        self.__on_event(kind, event_type, obj)
+
+            except asyncio.CancelledError:
+                raise
+            except AsyncApiException as e:
+                if e.status == 410:
+                    self.log.info(f"resourceVersion {resource_version} of {kind}s expired, re-listing")
+                    resource_version = None
+                else:
+                    self.log.warning(f"{kind} watch failed with status {e.status}, retrying")
+                    await asyncio.sleep(WATCH_RETRY_INTERVAL)
+            except Exception:
+                self.log.exception(f"Unexpected error while watching {kind}s, retrying")
+                await asyncio.sleep(WATCH_RETRY_INTERVAL)
+
+
+    def __on_event(self, kind: str, event_type: str, obj) -> None:
+        """
+        Follows the phase of the PODs of the starting runs, and queues the jobs that reach a
+        finished state, once per job
+        """
+        if kind == POD:
+            if event_type != "DELETED":
+                self.__track_pod_phase(obj)
+            return
+
+        job_id = obj.metadata.name
+        if event_type == "DELETED":
+            self._queued_jobs.discard(job_id)
+            return
+        if is_job_finished(obj) and job_id not in self._queued_jobs and "run_id" in (obj.metadata.annotations or {}):
+            self._queued_jobs.add(job_id)
+            self._completed_jobs.put_nowait(job_id)
+
+
+    def __track_pod_phase(self, pod: client.V1Pod) -> None:
+        """
+        Report a starting run as ACTIVE once its POD leaves the 'Pending' phase, or as failed to
+        start as soon as its 'Pending' POD is known not to be able to start
+        """
+        run_id = (pod.metadata.labels or {}).get("app")
+        phase = pod.status.phase if pod.status else None
+        if run_id is None or phase in (None, "Unknown"):
+            return
+
+        failure = get_pod_start_failure(pod) if phase == "Pending" else None
+        if phase == "Pending" and failure is None:
+            return
+
+        starting_run = self._starting_runs.pop(run_id, None)
+        if starting_run is None:
+            if failure is not None:
+                # E.g., the POD that retries a run already reported as ACTIVE can't pull its image
+                self.__fail_started_run(pod, *failure)
+            return
+
+        if failure is None:
+            self.log.info(f"Job POD with label app={run_id} is now on a {phase} state.")
+            status = TaskStatus.ACTIVE
+        else:
+            status, description = failure
+            self.log.error(f"Job POD {pod.metadata.name} of run_id={run_id} failed to start: {description}")
+            self.__discard_job(run_id)
+        self.__report_start(run_id, starting_run, status)
+
+
+    def __fail_started_run(self, pod: client.V1Pod, status: TaskStatus, description: str) -> None:
+        """
+        Report as failed the run of a 'Pending' POD that is not going to start, once the run is no
+        longer starting (e.g., the POD retries a run that crashed), and remove its job without
+        harvesting it (see ContainerManager.__fail_started_run)
+        """
+        job_id = (pod.metadata.labels or {}).get("job-name")
+        job = self._jobs.get(job_id) if job_id else None
+        if job is None or is_job_finished(job) or job_id in self._queued_jobs:
+            return
+        annotations = job.metadata.annotations or {}
+        if "run_id" not in annotations:
+            return
+
+        run_id = annotations["run_id"]
+        self.log.error(f"Job POD {pod.metadata.name} of run_id={run_id} failed to start: {description}")
+        self.__discard_job(job_id)
+        parent_id = annotations.get("task_parent_id")
+        self._status_changes.put_nowait(RunStatusChange(
+            run_id=int(run_id),
+            task_id=int(annotations["task_id"]),
+            parent_id=int(parent_id) if parent_id not in (None, "None") else None,
+            status=status,
+        ))
+
+
+    async def __failed_start_checker(self) -> None:
+        """
+        Report as failed to start the runs whose POD has not reported a running state within
+        POD_START_TIMEOUT seconds, and the runs no longer starting whose (retry) POD has been
+        'Pending' for as long, and remove their jobs
+        """
+        while True:
+            await asyncio.sleep(POD_START_CHECK_INTERVAL)
+            now = time.time()
+            for run_id in [run_id for run_id, r in self._starting_runs.items() if r.deadline < now]:
+                self.log.error(f"Timeout while waiting Job POD with label app={run_id} to report a running state.")
+                starting_run = self._starting_runs.pop(run_id)
+                self.__discard_job(run_id)
+                self.__report_start(run_id, starting_run, TaskStatus.START_FAILED)
+
+            for pod in list(self._pods.values()):
+                if (pod.status is None or pod.status.phase != "Pending" or pod.metadata.creation_timestamp is None
+                        or (pod.metadata.labels or {}).get("app") in self._starting_runs):
+                    continue
+                if now - pod.metadata.creation_timestamp.timestamp() > POD_START_TIMEOUT:
+                    self.__fail_started_run(pod, TaskStatus.START_FAILED, f"POD not running after {POD_START_TIMEOUT}s")
+
+
+    def __discard_job(self, job_id: str) -> None:
+        """Remove a job that won't be harvested, in the background"""
+        self._queued_jobs.add(job_id)
+        removal = asyncio.create_task(self.__remove_job(job_id))
+        self._removals.add(removal)
+        removal.add_done_callback(self._removals.discard)
+
+
+    def __report_start(self, run_id: str, starting_run: StartingRun, status: TaskStatus) -> None:
+        POD_START_SECONDS.observe(time.time() - starting_run.launched_at, status=status)
+        self._status_changes.put_nowait(RunStatusChange(
+            run_id=int(run_id),
+            task_id=starting_run.task_id,
+            parent_id=starting_run.parent_id,
+            status=status,
+        ))
+
+
+
+class ContainerManagerBridge:
+    """
+    Thread-safe, synchronous facade of an AsyncContainerManager, for the threaded NodePod: the
+    manager runs on an event loop of its own (on a daemon thread), and each call is submitted
+    to it and waited for. Calls from several threads (e.g., the dispatch workers and the result
+    polling thread) are multiplexed on the same loop.
+    """
+
+    def __init__(self, ctx: NodeContext):
+        self.log = logging.getLogger(logger_name(__name__))
+        self.manager = AsyncContainerManager(ctx)
+        self.running_on_guest_env = self.manager.running_on_guest_env
+
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="container-manager-loop", daemon=True).start()
+        self._call(self.manager.start(), timeout=BRIDGE_START_TIMEOUT)
+        self.log.info("Asyncio container manager started")
+
+
+    def _call(self, coroutine, timeout: float | None = None):
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+
+    def run(self, run_id: int, task_info: dict, image: str, docker_input: bytes, tmp_vol_name: str,
+            token: str, databases_to_use: list[str]) -> tuple[TaskStatus, list[dict] | None]:
+        return self._call(self.manager.run(run_id, task_info, image, docker_input, tmp_vol_name, token,
+                                           databases_to_use))
+
+
+    def run_indexed(self, runs: List[IndexedRun], image: str, databases_to_use: list[str]) -> dict[int, TaskStatus]:
+        """
+        Fan-out jobs are not supported by the asyncio container manager yet: the runs are started
+        on a job each (concurrently). A run whose start raises is reported as START_FAILED, without
+        affecting its siblings.
+        """
+        async def run_all():
+            outcomes = await asyncio.gather(*(
+                self.manager.run(run.run_id, run.task_info, image, run.docker_input, "", run.token, databases_to_use)
+                for run in runs
+            ), return_exceptions=True)
+            statuses = {}
+            for run, outcome in zip(runs, outcomes):
+                if isinstance(outcome, BaseException):
+                    self.log.error(f"Error while starting run_id={run.run_id}: {outcome!r}")
+                    statuses[run.run_id] = TaskStatus.START_FAILED
+                else:
+                    statuses[run.run_id] = outcome[0]
+            return statuses
+        return self._call(run_all())
+
+
+    def is_running(self, run_id: int) -> bool:
+        return self._call(self.manager.is_running(run_id))
+
+
+    def get_results(self, timeout: float | None = None) -> List[Result]:
+        return self._call(self.manager.get_results(timeout))
+
+
+    def get_status_changes(self, timeout: float | None = None) -> List[RunStatusChange]:
+        return self._call(self.manager.get_status_changes(timeout))
+
+
+    def kill_tasks(self, org_id: int, kill_list: list[ToBeKilled] = None) -> list[KilledRun]:
+        return self._call(self.manager.kill_tasks(org_id, kill_list))
+
+
+    def admit(self, task_incl_run: dict) -> bool:
+        """No admission control: every run can be started"""
+        return True
+
+
+    def release_admission(self, run_id: int) -> None:
+        pass
+
+
+    def close(self) -> None:
+        self._call(self.manager.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
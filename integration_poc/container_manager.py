@@ -6,10 +6,25 @@ from vantage6.cli.context.node import NodeContext
 from typing import Tuple, List
 from vantage6.common.task_status import TaskStatus, has_task_failed
 from vantage6.common import logger_name
+from vantage6.common.metrics import Histogram
+from vantage6.common.tracing import TRACER, Span, SpanContext, KIND_CLIENT
 from vantage6.node.util import get_parent_id
 from typing import NamedTuple
 from enum import Enum
 from pathlib import Path
+from job_informer import JobInformer
+from admission_controller import AdmissionController
+from warm_pool import WarmPool, WARM_IMAGE_ANNOTATION, WARM_RUNNER_ROLE
+from image_prepuller import ImagePrePuller
+from job_gc import JobGarbageCollector, DEFAULT_JOB_TTL_SECONDS
+from pod_log_capture import PodLogCapture
+from data_locality import DataLocality
+from database_mounts import DatabaseMountPlanner, get_database_labels
+from result_spool import ResultSpool, DEFAULT_MAX_RESULT_BYTES, RESULT_UPLOADER_NAME, DEFAULT_RESULT_UPLOADER_IMAGE, RESULT_UPLOAD_SCRIPT
+from indexed_jobs import (FANOUT_RUNS_ANNOTATION, COMPLETION_INDEX_ANNOTATION, FANOUT_JOB_PREFIX, FANOUT_INDEX_ENV_VAR,
+                          get_fanout_runs, get_completion_index, parse_indexes, get_fanout_key, split_fanout_key)
+from execution_backend import ExecutionBackend, create_backend
+from k8s_api import ApiRateLimiter, ThrottledApi
 
 import pod_node_constants
 import pod_job_constants
@@ -20,57 +35,873 @@ import logging
 import time
 import json
 import pprint
+import queue
+import threading
+import hashlib
+import uuid
+import datetime
+import concurrent.futures
+import functools
+import base64
 
 
 #logging.basicConfig(level=logging.INFO)
 #log = logging.getLogger(logger_name(__name__))
 
+# Maximum number of finished jobs waiting to be harvested. When the queue is full, further
+# completions are picked up from the informer's cache on the next harvesting pass.
+COMPLETION_QUEUE_SIZE = 1000
+
+# Seconds a launched job has to get its POD running before the run is reported as failed to start
+POD_START_TIMEOUT = 180
+
+# Interval (seconds) at which the launching runs are checked for a start timeout, and the jobs that
+# failed to start are cleaned up
+POD_START_CHECK_INTERVAL = 1
+
+# Default number of finished jobs harvested (output read, logs fetched and cleanup queued) in parallel
+HARVEST_WORKERS = 4
+
+# Stages of the harvest of a finished job, whose duration is recorded: the time the job waited to be
+# harvested after finishing, the read of its output file, the fetch of its PODs logs, and the
+# hand-over of its resources to the job GC
+HARVEST_STAGES = ("wait", "output", "logs", "cleanup")
+
+POD_START_SECONDS = Histogram(
+    "v6_node_pod_start_seconds",
+    "Time from the creation of a run's job until its POD runs (or is known not to be able to start)",
+    ["status"],
+)
+HARVEST_SECONDS = Histogram(
+    "v6_node_harvest_seconds", "Duration of the stages of the harvest of the finished jobs", ["stage"],
+)
+
+# Container waiting reasons for which the POD of a run is not going to start, with the status
+# reported for the run
+POD_START_FAILURE_REASONS = {
+    "ErrImagePull": TaskStatus.NO_DOCKER_IMAGE,
+    "ImagePullBackOff": TaskStatus.NO_DOCKER_IMAGE,
+    "InvalidImageName": TaskStatus.NO_DOCKER_IMAGE,
+    "CreateContainerConfigError": TaskStatus.START_FAILED,
+}
+
+# Delivery of the input and token of the runs to their PODs (see the 'io_delivery' configuration): files
+# on the tasks folder mounted as hostPath volumes (default), or ConfigMap/Secret objects owned by the job
+IO_DELIVERY_HOSTPATH = "hostpath"
+IO_DELIVERY_OBJECTS = "objects"
+
+# Maximum size (bytes) of the input delivered on a ConfigMap/Secret (the API server rejects objects over
+# 1MiB). Larger inputs are delivered through the tasks folder.
+MAX_IO_OBJECT_BYTES = 1000000
+
+# Default seconds the result uploader has to upload the output once the algorithm exited
+DEFAULT_RESULT_UPLOAD_GRACE_SECONDS = 120
+
 # Taken from docker_manager.py
 class Result(NamedTuple):
     """
     Data class to store the result of the docker image.
 
-    Attributes
-    ----------
-    run_id: int
-        ID of the current algorithm run
-    logs: str
-        Logs attached to current algorithm run
-    data: str
-        Output data of the algorithm
-    status_code: int
-        Status code of the algorithm run
-    """
+    Attributes
+    ----------
+    run_id: int
+        ID of the current algorithm run
+    logs: str
+        Logs attached to current algorithm run
+    data: str
+        Output data of the algorithm
+    status_code: int
+        Status code of the algorithm run
+    """
+
+    run_id: int
+    task_id: int
+    logs: str
+    data: str
+    status: str
+    parent_id: int | None
+
+class RunStatusChange(NamedTuple):
+    """
+    Data class to store a status change of a launched run, detected in the background
+    after ContainerManager.run returned (e.g., its POD started running, or failed to start)
+    """
+
+    run_id: int
+    task_id: int
+    parent_id: int | None
+    status: TaskStatus
+
+
+class StartingRun(NamedTuple):
+    """
+    Data class to store a launched run whose POD has not started running yet (and, for the runs
+    of a fan-out job, the name of the job and the completion index of the run)
+    """
+
+    task_id: int
+    parent_id: int | None
+    launched_at: float
+    deadline: float
+    fanout_job: str | None = None
+    fanout_index: int | None = None
+
+
+class IndexedRun(NamedTuple):
+    """Data class to store a run to be started as a completion index of a fan-out job"""
+
+    run_id: int
+    task_info: dict
+    docker_input: bytes
+    token: str
+
+
+# Taken from docker_manager.py
+class ToBeKilled(NamedTuple):
+    """Data class to store which tasks should be killed"""
+
+    task_id: int
+    run_id: int
+    organization_id: int
+
+# Taken from docker_manager.py
+class KilledRun(NamedTuple):
+    """Data class to store which algorithms have been killed"""
+
+    run_id: int
+    task_id: int
+    parent_id: int
+
+
+
+def is_job_finished(job: client.V1Job) -> bool:
+    """
+    Whether a job reached a final state: either succeeded, or failed after the last retry
+    (K8S reports the latter with a 'Failed' condition, while job.status.failed counts every
+    failed POD, including the ones that are still going to be retried).
+    """
+    if not job.status:
+        return False
+    # The Indexed jobs count the succeeded PODs of every index (see the fan-out jobs)
+    if job.status.succeeded and not (job.spec and job.spec.completion_mode == "Indexed"):
+        return True
+    return any(c.type in ("Complete", "Failed") and c.status == "True" for c in (job.status.conditions or []))
+
+
+
+def get_job_finished_at(job: client.V1Job) -> datetime.datetime | None:
+    """
+    Time at which a job reached its final state (from its 'Complete' or 'Failed' condition)
+    """
+    if job.status and job.status.completion_time:
+        return job.status.completion_time
+    return next(
+        (c.last_transition_time for c in (job.status.conditions if job.status else None) or []
+         if c.type in ("Complete", "Failed") and c.status == "True"),
+        None
+    )
+
+
+
+def set_io_owner(io_objects: list, job: client.V1Job) -> None:
+    """
+    Make the (created) job of a run the owner of its input/token objects, so that K8S removes them
+    along with the job
+    """
+    for io_object in io_objects:
+        io_object.metadata.owner_references = [client.V1OwnerReference(
+            api_version="batch/v1", kind="Job", name=job.metadata.name, uid=job.metadata.uid,
+        )]
+
+
+def get_pod_start_failure(pod: client.V1Pod) -> tuple[TaskStatus, str] | None:
+    """
+    Classify a 'Pending' POD that is not going to start: either one of its containers is waiting
+    for one of the POD_START_FAILURE_REASONS (e.g., the image can't be pulled), or the POD can't
+    be scheduled on any cluster node (PodScheduled=False).
+
+    Returns
+    -------
+    tuple[TaskStatus, str] | None
+        The status to report for the run and a description of the failure, or None if the
+        POD may still start
+    """
+    if not pod.status:
+        return None
+
+    for container_status in pod.status.container_statuses or []:
+        waiting = container_status.state.waiting if container_status.state else None
+        if waiting and waiting.reason in POD_START_FAILURE_REASONS:
+            return (POD_START_FAILURE_REASONS[waiting.reason],
+                    f"container {container_status.name} is waiting with reason {waiting.reason}: {waiting.message}")
+
+    for condition in pod.status.conditions or []:
+        if condition.type == "PodScheduled" and condition.status == "False":
+            return (TaskStatus.START_FAILED,
+                    f"POD can't be scheduled ({condition.reason}): {condition.message}")
+
+    return None
+
+
+
+class JobSpecBuilder:
+    """
+    Definition of the algorithm jobs from the v6-node configuration ('v6_config'), shared by the
+    container managers (see also async_container_manager.AsyncContainerManager), and the checks on
+    the runs' images. Subclasses set 'log', 'v6_config', 'running_on_guest_env' and 'job_ttl_seconds'.
+    """
+
+    log: logging.Logger
+    v6_config: dict
+    running_on_guest_env: bool
+    job_ttl_seconds: int
+
+
+    def _build_job(self, run_id: str, task_id: str, parent_id: str, image: str, docker_input: bytes,
+                   token: str, databases_to_use: list[dict], image_ref: str | None = None,
+                   io_objects: bool = False, affinity: client.V1Affinity | None = None) -> client.V1Job:
+        """
+        Define the job of a run: its input, token and output files (created on the tasks folder), the
+        mounts of these files and of the requested databases, and the environment variables of the
+        algorithm container.
+
+        Parameters
+        ----------
+        image_ref: str, optional
+            Reference of the image used by the container (e.g., pinned to its digest), if it isn't 'image'
+        io_objects: bool, optional
+            Whether the input and token are mounted from the ConfigMap/Secret objects of the run (see
+            _build_io_objects) instead of from the tasks folder
+        affinity: client.V1Affinity, optional
+            Affinity of the job's POD (e.g., to the cluster nodes that hold its data, see DataLocality)
+        """
+        str_run_id, str_task_id = run_id, task_id
+        image_ref = image_ref or image
+
+        _io_related_env_variables: List[V1EnvVar]
+
+        _volumes, _volume_mounts, _io_related_env_variables = self._create_volume_mounts(run_id=str_run_id,docker_input=docker_input,token=token,databases_to_use=databases_to_use,io_objects=io_objects)
+        
+        # Setting the environment variables required by V6 algorithms.
+        #   As these environment variables are used within the container/POD environment, file paths are relative 
+        #   to the mount paths (i.e., the container's file system) created by the method _crate_volume_mounts
+        #   
+        env_vars: List[V1EnvVar] = self._create_proxy_env_vars()
+        
+        env_vars.extend(_io_related_env_variables)
+
+        # Trace context of the run, for the algorithms that propagate it on their requests to the proxy
+        run_context = TRACER.get_run_context(run_id)
+        if run_context is not None:
+            env_vars.append(client.V1EnvVar(name="TRACEPARENT", value=run_context.traceparent))
+
+        container = client.V1Container(
+                            name=str_run_id,
+                            image=image_ref,
+                            image_pull_policy=self._image_pull_policy(image_ref),
+                            tty = True,
+                            volume_mounts=_volume_mounts,
+                            env=env_vars,
+                            resources=self._create_resource_requirements(image),
+                        )
+
+        # The output is uploaded to the node by a sidecar, sharing the output and token mounts
+        result_upload_config = self.v6_config.get("result_upload") or {}
+        init_containers = None
+        if self._uses_result_upload():
+            init_containers = [self._create_result_uploader(_volume_mounts, env_vars)]
+
+        job_metadata = client.V1ObjectMeta(
+            name=str_run_id,
+            annotations={"run_id": str_run_id, 
+                         "task_id": str_task_id,
+                         "task_parent_id": parent_id
+                        },
+        )
+
+        # Define the job
+        job = client.V1Job(
+            api_version="batch/v1",
+            kind="Job",
+            metadata=job_metadata,
+            spec=client.V1JobSpec(
+                template=client.V1PodTemplateSpec(
+                    metadata=client.V1ObjectMeta(labels={"app": str_run_id,"role":"v6_alg_runner"}),
+                    spec=client.V1PodSpec(
+                        containers=[container],
+                        init_containers=init_containers,
+                        volumes=_volumes,
+                        restart_policy="Never",
+                        affinity=affinity,
+                        termination_grace_period_seconds=result_upload_config.get(
+                            "grace_period_seconds", DEFAULT_RESULT_UPLOAD_GRACE_SECONDS) if init_containers else None,
+                    ),
+                ),
+                backoff_limit=3,
+                ttl_seconds_after_finished=self.job_ttl_seconds,
+            ),
+        )
+        return job
+
+
+    def _build_indexed_job(self, job_name: str, runs: List[IndexedRun], image: str, databases_to_use: list[dict],
+                           image_ref: str | None = None, affinity: client.V1Affinity | None = None) -> client.V1Job:
+        """
+        Define a fan-out job: an Indexed job that runs each of the given (sibling) runs on one completion
+        index. The input, token and output files and the temporary folder of each run are created on a
+        sub-folder of the job's task folder named after its index, which is the only one mounted (through
+        a subPathExpr on FANOUT_INDEX_ENV_VAR) on the PODs of that index. The runs of each index are given
+        on the FANOUT_RUNS_ANNOTATION of the job.
+        """
+        image_ref = image_ref or image
+        task_base_path = self._get_task_base_path()
+        for index, run in enumerate(runs):
+            run_path = os.path.join(task_base_path, job_name, str(index))
+            self._create_io_files(
+                alg_input_file_path=os.path.join(run_path, 'input'),
+                docker_input=run.docker_input,
+                token_file_path=os.path.join(run_path, 'token'),
+                token=run.token,
+                output_file_path=os.path.join(run_path, 'output'),
+            )
+            Path(os.path.join(run_path, 'tmp')).mkdir(parents=True, exist_ok=True)
+
+        run_path = pod_job_constants.JOB_POD_FANOUT_RUN_PATH
+        volumes = [client.V1Volume(
+            name=f'{job_name}-runs',
+            host_path=client.V1HostPathVolumeSource(path=os.path.join(self.v6_config['task_dir'], job_name)),
+        )]
+        vol_mounts = [client.V1VolumeMount(name=f'{job_name}-runs', mount_path=run_path,
+                                           sub_path_expr=f"$({FANOUT_INDEX_ENV_VAR})")]
+        # The completion index is defined first, as the mount and the other variables depend on it
+        env_vars = [client.V1EnvVar(
+            name=FANOUT_INDEX_ENV_VAR,
+            value_from=client.V1EnvVarSource(field_ref=client.V1ObjectFieldSelector(
+                field_path=f"metadata.annotations['{COMPLETION_INDEX_ANNOTATION}']")),
+        )]
+        env_vars.extend(self._create_proxy_env_vars())
+        env_vars.extend([
+            client.V1EnvVar(name="INPUT_FILE", value=f"{run_path}/input"),
+            client.V1EnvVar(name="OUTPUT_FILE", value=f"{run_path}/output"),
+            client.V1EnvVar(name="TOKEN_FILE", value=f"{run_path}/token"),
+            client.V1EnvVar(name="TEMPORARY_FOLDER", value=f"{run_path}/tmp"),
+        ])
+
+        _db_volumes, _db_volume_mounts, _db_env_vars = self._create_database_mounts(databases_to_use=databases_to_use)
+        volumes.extend(_db_volumes)
+        vol_mounts.extend(_db_volume_mounts)
+        env_vars.extend(_db_env_vars)
+
+        container = client.V1Container(
+            name=job_name,
+            image=image_ref,
+            image_pull_policy=self._image_pull_policy(image_ref),
+            tty=True,
+            volume_mounts=vol_mounts,
+            env=env_vars,
+            resources=self._create_resource_requirements(image),
+        )
+
+        fanout_runs = [{"run_id": run.run_id,
+                        "task_id": run.task_info["id"],
+                        "task_parent_id": str(get_parent_id(run.task_info))} for run in runs]
+
+        return client.V1Job(
+            api_version="batch/v1",
+            kind="Job",
+            metadata=client.V1ObjectMeta(name=job_name, annotations={FANOUT_RUNS_ANNOTATION: json.dumps(fanout_runs)}),
+            spec=client.V1JobSpec(
+                completion_mode="Indexed",
+                completions=len(runs),
+                parallelism=len(runs),
+                template=client.V1PodTemplateSpec(
+                    metadata=client.V1ObjectMeta(labels={"app": job_name, "role": "v6_alg_runner"}),
+                    spec=client.V1PodSpec(
+                        containers=[container],
+                        volumes=volumes,
+                        restart_policy="Never",
+                        affinity=affinity,
+                    ),
+                ),
+                # Each index (run) is retried on its own: a run that keeps failing is reported on the
+                # job's failedIndexes, without using up the retries of its siblings
+                backoff_limit_per_index=3,
+                ttl_seconds_after_finished=self.job_ttl_seconds,
+            ),
+        )
+
+
+    def _uses_result_upload(self) -> bool:
+        """
+        Whether the output of the (single run) jobs is uploaded to the node proxy by a sidecar, instead
+        of being read from the tasks folder (see the 'result_upload' configuration)
+        """
+        return (self.v6_config.get("result_upload") or {}).get("enabled", False)
+
+
+    def _create_output_mount(self, run_id: str) -> Tuple[client.V1Volume, client.V1VolumeMount, V1EnvVar]:
+        """
+        Define the mount of the output file of a run: on the tasks folder (hostPath), from which it is
+        read once the job finishes, or else on an emptyDir volume shared with the result uploader
+        """
+        if self._uses_result_upload():
+            return (
+                client.V1Volume(name=f'task-{run_id}-output', empty_dir=client.V1EmptyDirVolumeSource()),
+                client.V1VolumeMount(name=f'task-{run_id}-output', mount_path=pod_job_constants.JOB_POD_OUTPUT_FOLDER_PATH),
+                client.V1EnvVar(name="OUTPUT_FILE", value=f"{pod_job_constants.JOB_POD_OUTPUT_FOLDER_PATH}/output"),
+            )
+        return (
+            client.V1Volume(name=f'task-{run_id}-output',
+                            host_path=client.V1HostPathVolumeSource(
+                                path=os.path.join(self.v6_config['task_dir'], run_id, 'output'))),
+            client.V1VolumeMount(name=f'task-{run_id}-output', mount_path=pod_job_constants.JOB_POD_OUTPUT_PATH),
+            client.V1EnvVar(name="OUTPUT_FILE", value=pod_job_constants.JOB_POD_OUTPUT_PATH),
+        )
+
+
+    def _create_result_uploader(self, volume_mounts: List[client.V1VolumeMount], env_vars: List[V1EnvVar]) -> client.V1Container:
+        """
+        Define the sidecar that uploads the output file of the algorithm to the node proxy, authenticated
+        with the run's container token (see RESULT_UPLOAD_SCRIPT), given the mounts and environment
+        variables of the algorithm container
+        """
+        result_upload_config = self.v6_config.get("result_upload") or {}
+        shared_paths = (pod_job_constants.JOB_POD_OUTPUT_FOLDER_PATH, pod_job_constants.JOB_POD_TOKEN_PATH)
+        shared_env_vars = ("OUTPUT_FILE", "TOKEN_FILE", "HOST", "PORT")
+        resources = result_upload_config.get("resources") or {"requests": {"cpu": "10m", "memory": "16Mi"},
+                                                             "limits": {"memory": "64Mi"}}
+        return client.V1Container(
+            name=RESULT_UPLOADER_NAME,
+            image=result_upload_config.get("image", DEFAULT_RESULT_UPLOADER_IMAGE),
+            restart_policy="Always",
+            command=["/bin/sh", "-c", RESULT_UPLOAD_SCRIPT],
+            volume_mounts=[mount for mount in volume_mounts if mount.mount_path in shared_paths],
+            env=[env_var for env_var in env_vars if env_var.name in shared_env_vars],
+            resources=client.V1ResourceRequirements(requests=resources.get("requests"), limits=resources.get("limits")),
+        )
+
+
+    def _uses_io_objects(self, run_id: str, docker_input: bytes) -> bool:
+        """
+        Whether the input and token of a run are delivered on ConfigMap/Secret objects (see the
+        'io_delivery' configuration), given the size of its input
+        """
+        io_config = self.v6_config.get("io_delivery") or {}
+        if io_config.get("mode", IO_DELIVERY_HOSTPATH) != IO_DELIVERY_OBJECTS:
+            return False
+        if len(docker_input) > MAX_IO_OBJECT_BYTES:
+            self.log.warning(f"Input of run_id={run_id} is too large ({len(docker_input)} bytes) for a "
+                             f"ConfigMap/Secret, delivering it through the tasks folder")
+            return False
+        return True
+
+
+    def _is_input_secret(self, docker_input: bytes) -> bool:
+        """
+        Whether the input of a run is delivered on a Secret (instead of on a ConfigMap): if the inputs
+        are sensitive ('sensitive_input'), or this one is at least 'input_secret_min_bytes' long
+        """
+        io_config = self.v6_config.get("io_delivery") or {}
+        input_secret_min_bytes = io_config.get("input_secret_min_bytes")
+        return io_config.get("sensitive_input", False) or (
+            input_secret_min_bytes is not None and len(docker_input) >= input_secret_min_bytes)
+
+
+    def _build_io_objects(self, run_id: str, docker_input: bytes, token: str) -> List[client.V1ConfigMap | client.V1Secret]:
+        """
+        Define the objects that deliver the input and token of a run to its POD (mounted by
+        _create_volume_mounts): a Secret with the token, and a ConfigMap (or a Secret, see
+        _is_input_secret) with the input. The objects must be owned by the run's job (see set_io_owner), to be removed with it.
+        """
+        labels = {"app": run_id, "role": "v6_alg_io"}
+        input_data = {"input": base64.b64encode(docker_input).decode("ascii")}
+        if self._is_input_secret(docker_input):
+            input_object = client.V1Secret(
+                api_version="v1", kind="Secret", type="Opaque", data=input_data,
+                metadata=client.V1ObjectMeta(name=f"{run_id}-input", labels=labels),
+            )
+        else:
+            input_object = client.V1ConfigMap(
+                api_version="v1", kind="ConfigMap", binary_data=input_data,
+                metadata=client.V1ObjectMeta(name=f"{run_id}-input", labels=labels),
+            )
+        token_object = client.V1Secret(
+            api_version="v1", kind="Secret", type="Opaque",
+            data={"token": base64.b64encode(token.encode("ascii")).decode("ascii")},
+            metadata=client.V1ObjectMeta(name=f"{run_id}-token", labels=labels),
+        )
+        return [input_object, token_object]
+
+
+    def _create_io_files(self,alg_input_file_path: str, docker_input: bytes, token_file_path: str, token: str, output_file_path:str):
+        """
+        Create the files required by the algorithms, which will be bound to the PODs through a volume mount:
+        'docker_input' as the 'input' file, and 'token' 
+        """
+        self.log.info(f"Creating {alg_input_file_path} and {token_file_path}")
+
+        # Check if the files already exist
+        #if Path(alg_input_file_path).exists() or Path(token_file_path).exists():
+        #    raise Exception(f"Input file {alg_input_file_path} or Token file {token_file_path} already exist. Cannot overwrite.")
+
+        # Create the directories if they don't exist (if there are no writing rights this will rise)
+        alg_input_dir = Path(alg_input_file_path).parent
+        token_dir = Path(token_file_path).parent
+        output_dir = Path(token_file_path).parent
+        
+        alg_input_dir.mkdir(parents=True, exist_ok=True)
+        token_dir.mkdir(parents=True, exist_ok=True)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        with open(alg_input_file_path, 'wb') as alg_input_file:
+            alg_input_file.write(docker_input)
+            
+        with open(token_file_path, 'wb') as token_file:
+            token_file.write(token.encode("ascii"))
+
+        with open(output_file_path, 'wb') as token_file:
+            token_file.write(b"")
+
+
+
+
+
+
+    def _create_volume_mounts(self,run_id:str,docker_input:bytes,token:str,databases_to_use:list[str],io_objects:bool=False)-> Tuple[  List[client.V1Volume], List[client.V1VolumeMount], List[V1EnvVar]   ]:
+        """
+        Define all the mounts required by the algorithm/job: input files (csv), output, and temporal data
+
+        Returns: a tuple with (1) the created volume names and their corresponding volume mounts and (2) the list
+        of the environment variables required by the algorithms to use such mounts.
+
+        With 'io_objects', the input and token are mounted from the objects of the run (see _build_io_objects)
+        and the temporary folder is an emptyDir, so that only the output file is created on the tasks folder.
+
+         Note: in the following Volume-claims could be used insted of 'host_path' volumes to decouple vantage6 file
+          management from the storage provider (NFS, GCP, etc). However, persitent-volumes (from which 
+          volume-claims are be created), present a risk when used on local file systems. In particular,
+          if two VC are created from the same PV, both would end sharing the same files. 
+
+          e.g. : Define the volume for temporal data 
+          tmp_volume = client.V1Volume(
+            name=f'task-{str_run_id}-tmp',
+            persistent_volume_claim=client.V1PersistentVolumeClaimVolumeSource(claim_name=tmp_vol_name)
+          )
+
+        """
+        volumes :List[client.V1Volume] = []
+        vol_mounts:List[client.V1VolumeMount] = []
+        io_env_vars:List[V1EnvVar] = []
+        
+        # This method creates the folders required for the required tasks (subfolders
+        # of the 'tasks-dir' defined in the v6 node configuration file), and then
+        # bind these as host-volume mounts. The folder is created from the context
+        # of the running node, so the target folder dependes on whether the node
+        # is running from the host or from a POD.
+
+        task_base_path = self._get_task_base_path()
+
+        _input_file_path = os.path.join(task_base_path,run_id,'input')
+        _token_file_path = os.path.join(task_base_path,run_id,'token')
+        _output_file_path = os.path.join(task_base_path,run_id,'output')
+        
+        if io_objects:
+            return self._create_io_object_mounts(run_id=run_id, docker_input=docker_input,
+                                                 output_file_path=_output_file_path,
+                                                 databases_to_use=databases_to_use)
+
+        #Create algorithm's input and token files before creating volume mounts with them (relative to the node's file system: POD or host)
+        self._create_io_files(
+            alg_input_file_path=_input_file_path,
+            docker_input=docker_input,
+            token_file_path=_token_file_path,
+            token=token,
+            output_file_path=_output_file_path
+        )
+
+
+        # Binding the required files and folders to the Job POD as HostPathVolume (using actual host path folder 
+        # as this is made by the K8S server).
+
+        host_task_base_path = self.v6_config['task_dir']
+
+        _host_input_file_path = os.path.join(host_task_base_path,run_id,'input')
+        _host_token_file_path = os.path.join(host_task_base_path,run_id,'token')
+        _host_tmp_folder_path = os.path.join(host_task_base_path,run_id,'tmp')
+
+        # Define a volume for input/output for this run. Following v6 convention, this is a volume bind to a
+        # sub-folder created for the given run_id (i.e., the content will be shared by all the
+        # algorithm instances of the same 'run' within this node).
+
+        # Files or folders will be automatically created as described on https://kubernetes.io/docs/concepts/storage/volumes/#hostpath-volume-types
+
+        ##### Volume for the output file (this creates an empty file, unless the output is uploaded by the POD)
+        # Volume mount path for i/o data (/app is the WORKDIR path of v6-node's container)
+        output_volume, output_volume_mount, output_env_var = self._create_output_mount(run_id)
+        volumes.append(output_volume)
+        vol_mounts.append(output_volume_mount)
+        io_env_vars.append(output_env_var)
+
+        ##### Volume for the INPUT file (this creates an empty file, in which the input parameters user by the algorithm
+        # will be written before starting the task.
+
+        alg_input_volume = client.V1Volume(
+            name=f'task-{run_id}-input',                    
+            host_path=client.V1HostPathVolumeSource(path=_host_input_file_path),
+        )
+        volumes.append(alg_input_volume)
+                
+        alg_input_volume_mount = client.V1VolumeMount(
+            #standard containers volume mount location
+            name=f'task-{run_id}-input',
+            mount_path=pod_job_constants.JOB_POD_INPUT_PATH
+        )
+
+        vol_mounts.append(alg_input_volume_mount)
+        io_env_vars.append(client.V1EnvVar(name="INPUT_FILE", value=pod_job_constants.JOB_POD_INPUT_PATH))
+
+
+        ####### Volume and volume mount for the TOKEN file. This creates an empty file first, 
+        # the Token should be written on it before launching the Job
+
+        token_volume = client.V1Volume(
+            name=f'token-{run_id}-input',                    
+            host_path=client.V1HostPathVolumeSource(path=_host_token_file_path),
+        )
+        volumes.append(token_volume)
+                
+        token_volume_mount = client.V1VolumeMount(
+            #standard containers volume mount location
+            name=f'token-{run_id}-input',
+            mount_path=pod_job_constants.JOB_POD_TOKEN_PATH
+        )
+
+        vol_mounts.append(token_volume_mount)
+        io_env_vars.append(client.V1EnvVar(name="TOKEN_FILE", value=pod_job_constants.JOB_POD_TOKEN_PATH))
+
+
+        ######## Volume for temporal data folder        
+        tmp_volume = client.V1Volume(
+            name=f'task-{run_id}-tmp',
+            host_path=client.V1HostPathVolumeSource(path=_host_tmp_folder_path),
+        )
+
+        volumes.append(tmp_volume)
 
-    run_id: int
-    task_id: int
-    logs: str
-    data: str
-    status: str
-    parent_id: int | None
+        tmp_volume_mount = client.V1VolumeMount(
+            #standard containers volume mount location
+            name=f'task-{run_id}-tmp',
+            mount_path=pod_job_constants.JOB_POD_TMP_FOLDER_PATH
+        )
 
-# Taken from docker_manager.py
-class ToBeKilled(NamedTuple):
-    """Data class to store which tasks should be killed"""
+        vol_mounts.append(tmp_volume_mount)
 
-    task_id: int
-    run_id: int
-    organization_id: int
+        io_env_vars.append(client.V1EnvVar(name="TEMPORARY_FOLDER", value=pod_job_constants.JOB_POD_TMP_FOLDER_PATH))
 
-# Taken from docker_manager.py
-class KilledRun(NamedTuple):
-    """Data class to store which algorithms have been killed"""
 
-    run_id: int
-    task_id: int
-    parent_id: int
+        _db_volumes, _db_volume_mounts, _db_env_vars = self._create_database_mounts(databases_to_use=databases_to_use)
+        volumes.extend(_db_volumes)
+        vol_mounts.extend(_db_volume_mounts)
+        io_env_vars.extend(_db_env_vars)
+
+        return volumes,vol_mounts,io_env_vars
+
+
+    def _create_io_object_mounts(self, run_id: str, docker_input: bytes, output_file_path: str,
+                                 databases_to_use: list[dict]) -> Tuple[List[client.V1Volume], List[client.V1VolumeMount], List[V1EnvVar]]:
+        """
+        Define the mounts of a run whose input and token are delivered on ConfigMap/Secret objects (see
+        _build_io_objects): the input and token files are mounted (read only) from the objects, the
+        output file as given by _create_output_mount, and the temporary folder is
+        an emptyDir volume, on memory (tmpfs) with the 'tmp_medium: Memory' setting and bounded by
+        'tmp_size_limit' (e.g., '1Gi').
+        """
+        io_config = self.v6_config.get("io_delivery") or {}
+
+        # Only the (empty) output file is created on the tasks folder, unless the output is uploaded
+        if not self._uses_result_upload():
+            Path(output_file_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(output_file_path, 'wb') as output_file:
+                output_file.write(b"")
+
+        output_volume, output_volume_mount, output_env_var = self._create_output_mount(run_id)
+        if self._is_input_secret(docker_input):
+            input_source = {"secret": client.V1SecretVolumeSource(secret_name=f"{run_id}-input")}
+        else:
+            input_source = {"config_map": client.V1ConfigMapVolumeSource(name=f"{run_id}-input")}
+
+        volumes = [
+            client.V1Volume(name=f'task-{run_id}-input', **input_source),
+            client.V1Volume(name=f'token-{run_id}-input',
+                            secret=client.V1SecretVolumeSource(secret_name=f"{run_id}-token")),
+            output_volume,
+            client.V1Volume(name=f'task-{run_id}-tmp',
+                            empty_dir=client.V1EmptyDirVolumeSource(medium=io_config.get("tmp_medium"),
+                                                                    size_limit=io_config.get("tmp_size_limit"))),
+        ]
+        # The input and token files are single keys of their objects' volumes
+        vol_mounts = [
+            client.V1VolumeMount(name=f'task-{run_id}-input', mount_path=pod_job_constants.JOB_POD_INPUT_PATH,
+                                 sub_path="input", read_only=True),
+            client.V1VolumeMount(name=f'token-{run_id}-input', mount_path=pod_job_constants.JOB_POD_TOKEN_PATH,
+                                 sub_path="token", read_only=True),
+            output_volume_mount,
+            client.V1VolumeMount(name=f'task-{run_id}-tmp', mount_path=pod_job_constants.JOB_POD_TMP_FOLDER_PATH),
+        ]
+        io_env_vars = [
+            output_env_var,
+            client.V1EnvVar(name="INPUT_FILE", value=pod_job_constants.JOB_POD_INPUT_PATH),
+            client.V1EnvVar(name="TOKEN_FILE", value=pod_job_constants.JOB_POD_TOKEN_PATH),
+            client.V1EnvVar(name="TEMPORARY_FOLDER", value=pod_job_constants.JOB_POD_TMP_FOLDER_PATH),
+        ]
+
+        _db_volumes, _db_volume_mounts, _db_env_vars = self._create_database_mounts(databases_to_use=databases_to_use)
+        volumes.extend(_db_volumes)
+        vol_mounts.extend(_db_volume_mounts)
+        io_env_vars.extend(_db_env_vars)
+
+        return volumes, vol_mounts, io_env_vars
+    
+
+    
+    @functools.cached_property
+    def database_mount_planner(self) -> DatabaseMountPlanner:
+        """
+        Mount plans of the node databases requested by the runs (cached by requested labels)
+        """
+        return DatabaseMountPlanner(self.v6_config.get("databases"))
+
+
+    def _has_undefined_databases(self, databases_to_use: list) -> bool:
+        """
+        Whether a run requests databases that are not defined on this node (it can't be started)
+        """
+        undefined = self.database_mount_planner.get_undefined_labels(databases_to_use)
+        if undefined:
+            self.log.error(f"Requested databases {undefined} are not defined on this node")
+        return bool(undefined)
+
+
+    def _create_database_mounts(self, databases_to_use:list[dict])-> Tuple[  List[client.V1Volume], List[client.V1VolumeMount], List[V1EnvVar]   ]:
+        """
+        Define the (read only) mounts of the node databases requested by the algorithm (only those), and the
+        environment variables that describe them (see DatabaseMountPlanner).
+
+        Returns: a tuple with the volumes, their volume mounts, and the environment variables.
+        """
+        database_mounts = self.database_mount_planner.get_mounts(databases_to_use)
+        return list(database_mounts.volumes), list(database_mounts.volume_mounts), list(database_mounts.env_vars)
+
+
+    def _create_proxy_env_vars(self) -> List[V1EnvVar]:
+        """
+        Environment variables with the location of the node proxy, used by the algorithms to reach the server
+        """
+        return [            
+            client.V1EnvVar(name="HOST", value=os.environ.get("PROXY_SERVER_HOST",pod_node_constants.V6_NODE_FQDN)),
+            client.V1EnvVar(name="PORT", value=os.environ.get("PROXY_SERVER_PORT", str(pod_node_constants.V6_NODE_PROXY_PORT))),
+            #TODO This environment variable correspond to the API PATH of the PROXY (not to be confused of the one of the
+            # actual server). This variable should be eventually removed, as it is not being used to setup such PATH, so if
+            # it is changed to a value different than empty, it leads to an error.
+            client.V1EnvVar(name="API_PATH", value=""),    
+        ]
+
+
+    def _create_resource_requirements(self, image: str) -> client.V1ResourceRequirements | None:
+        """
+        CPU/memory requests and limits of the algorithm container, so that the algorithm PODs are not BestEffort
+        (i.e., the first ones to be evicted) and the K8S scheduler doesn't overpack the cluster nodes
+        """
+        resources = self.get_algorithm_resources(image)
+        if not resources:
+            return None
+        return client.V1ResourceRequirements(requests=resources.get("requests"), limits=resources.get("limits"))
+
+
+    def _image_pull_policy(self, image_ref: str) -> str | None:
+        """
+        Pull policy of the algorithm container: the images pinned to a digest are only pulled if not present
+        on the cluster node, the others follow the K8S default
+        """
+        return "IfNotPresent" if "@" in image_ref else None
+
+
+    def _get_task_base_path(self) -> str:
+        """
+        Root of the tasks folders, relative to the node's file system
+        """
+        # If running whithin the POD, use the tas
+        if (self.running_on_guest_env):        
+            return pod_node_constants.TASK_FILES_ROOT
+        # If running withn the host, use the value defined by the v6-config file
+        else:            
+            return self.v6_config['task_dir']
+
+
+    def get_algorithm_resources(self, image: str) -> dict | None:
+        """
+        Get the resource requests and limits for the algorithm container of the given image, as
+        defined on the 'algorithm_resources' section of the configuration file: the first entry
+        of 'images' whose regular expression matches the image name, or the 'default' entry.
+
+        Parameters
+        ----------
+        image: str
+            Docker image name
+
+        Returns
+        -------
+        dict | None
+            Dictionary with the 'requests' and/or 'limits' K8S resource lists (e.g., {'cpu': '500m',
+            'memory': '1Gi'}), or None if no resources are defined
+        """
+        resources_config = self.v6_config.get("algorithm_resources") or {}
+
+        for entry in resources_config.get("images", []):
+            if re.match(entry["image"], image):
+                return entry
+        return resources_config.get("default")
+
+
+    def is_docker_image_allowed(self, docker_image_name: str, task_info: dict) -> bool:
+        """
+        Checks the docker image name.
+
+        Against a list of regular expressions as defined in the configuration
+        file. If no expressions are defined, all docker images are accepted.
+
+        Parameters
+        ----------
+        docker_image_name: str
+            uri to the docker image
+        task_info: dict
+            Dictionary with information about the task
+
+        Returns
+        -------
+        bool
+            Whether docker image is allowed or not
+        """
+        
+        #TODO use original v6 implementation
+        
+        return True
 
 
 
-class ContainerManager:
+class ContainerManager(JobSpecBuilder):
 
 
-    def __init__(self, ctx: NodeContext):
+    def __init__(self, ctx: NodeContext, backend: ExecutionBackend | None = None):
+        """
+        Parameters
+        ----------
+        ctx: NodeContext
+            Context of the node, from which the v6-node configuration file is read
+        backend: ExecutionBackend | None
+            Backend on which the jobs are run. If not given, it is created from the
+            'execution_backend' section of the configuration (see create_backend)
+        """
         
         self.log = logging.getLogger(logger_name(__name__))
 
@@ -85,37 +916,110 @@ class ContainerManager:
 
         self.log.info(f'v6-K8S Node - loaded v6 settings:{self.v6_config}')
 
-        #minik8s config, by default in the user's home directory root
-        home_dir = os.path.expanduser('~')
-        kube_config_file_path = os.path.join(home_dir, '.kube', 'config')
-
-        #Instanced within the host
-        if os.path.exists(kube_config_file_path):
-
-            self.running_on_guest_env = False
-            #default microk8s config
-            config.load_kube_config(kube_config_file_path)            
-            self.log.info('>>> Loading K8S configuration file from the host filesystem (Node running on a regular host)')
-            #pprint.pp(self.v6_config)          
-        
-        #Instanced within a pod
-        elif os.path.exists(pod_node_constants.KUBE_CONFIG_FILE_PATH):
-
-            self.running_on_guest_env = True
-            #Default mount location defined on POD configuration                
-            config.load_kube_config(pod_node_constants.KUBE_CONFIG_FILE_PATH)            
-            self.log.info('>>> Loading K8S configuration file from a hostPath volume (Node running within a POD)')
+        # K8S cluster (or simulated cluster) on which the jobs are run
+        self.backend = backend if backend is not None else create_backend(self.v6_config)
+        self.running_on_guest_env = self.backend.running_on_guest_env
         
         # before a task is executed it gets exposed to these policies
         self._policies = self._setup_policies(config)
 
 
+        # All the requests to the K8S API server (of the container manager and of the components it
+        # creates) are rate limited, and retried with backoff on throttling and transient errors
+        self.api_limiter = ApiRateLimiter(self.v6_config.get("kubernetes_api"))
         # K8S Batch API instance
-        self.batch_api = client.BatchV1Api()
+        self.batch_api = ThrottledApi(self.backend.batch_api, self.api_limiter)
         # K8S Core API instance
-        self.core_api = client.CoreV1Api()
+        self.core_api = ThrottledApi(self.backend.core_api, self.api_limiter)
+        # K8S Apps API instance
+        self.apps_api = ThrottledApi(self.backend.apps_api, self.api_limiter)
+
+        # Finished jobs (names) reported by the informer, waiting to be harvested
+        self._completed_jobs: queue.Queue[str] = queue.Queue(maxsize=COMPLETION_QUEUE_SIZE)
+        # Names of the finished jobs that were already queued (or harvested), but whose
+        # deletion has not been reported yet by the informer.
+        self._queued_jobs: set[str] = set()
+        self._queued_jobs_lock = threading.Lock()
+
+        # Runs whose job was created, but whose POD has not reported a running phase yet (by run_id)
+        self._starting_runs: dict[str, StartingRun] = {}
+        self._starting_runs_lock = threading.Lock()
+        # Status changes of the launched runs, detected in the background, to be reported to the server
+        self._status_changes: queue.Queue[RunStatusChange] = queue.Queue()
+        # Open 'algorithm' spans (from the POD running until the job finishes) by run_id
+        self._algorithm_spans: dict[str, Span] = {}
+        # Completion indexes of the fan-out jobs whose run has not been harvested (or failed to start)
+        # yet, by job name (guarded by _queued_jobs_lock). The job is removed once none is left.
+        self._fanout_pending: dict[str, set[int]] = {}
+
+        # Local (watch-backed) cache of the Jobs and PODs on the jobs namespace. All the
+        # queries on the jobs/PODs status are answered from it instead of the API server.
+        self.informer = JobInformer(self.batch_api, self.core_api, namespace="v6-jobs",
+                                    watch_factory=self.backend.new_watch)
+        self.informer.add_listener(self.__on_informer_event)
+        self.informer.start()
+
+        # Streams the logs of the algorithm PODs while they run, keeping a bounded excerpt in memory
+        self.log_capture = PodLogCapture(self.core_api, self.informer, self._get_task_base_path(),
+                                         self.v6_config.get("pod_logs") or {}, namespace="v6-jobs")
+
+        # Finished jobs are harvested in parallel, on a bounded pool of workers
+        self._harvest_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.v6_config.get("harvest_workers", HARVEST_WORKERS), thread_name_prefix="harvest"
+        )
 
-        
+        # Results uploaded by the algorithm PODs to the node proxy, kept until harvested (optional)
+        result_upload_config = self.v6_config.get("result_upload") or {}
+        self.result_spool: ResultSpool | None = None
+        if self._uses_result_upload():
+            self.result_spool = ResultSpool(
+                result_upload_config.get("spool_dir") or os.path.join(self._get_task_base_path(), "_results"),
+                max_bytes=result_upload_config.get("max_bytes", DEFAULT_MAX_RESULT_BYTES),
+            )
+
+        # Removes the harvested (or failed to start) jobs, their PODs and task folders in the background
+        job_gc_config = self.v6_config.get("job_gc") or {}
+        self.job_ttl_seconds = job_gc_config.get("ttl_seconds_after_finished", DEFAULT_JOB_TTL_SECONDS)
+        self.job_gc = JobGarbageCollector(self.batch_api, self.core_api, self.informer,
+                                          task_base_path=self._get_task_base_path(), namespace="v6-jobs",
+                                          batch_size=job_gc_config.get("batch_size", 50))
+        self.job_gc.start()
+
+        # Places the algorithm PODs on the cluster nodes that hold the databases they use (optional)
+        data_locality_config = self.v6_config.get("data_locality") or {}
+        self.data_locality: DataLocality | None = None
+        if data_locality_config.get("enabled", False):
+            self.data_locality = DataLocality(self.core_api, data_locality_config, self.v6_config.get("databases"))
+
+        # Holds the runs that don't fit on the cluster (or namespace quota) in the node's queue
+        admission_config = self.v6_config.get("admission_control") or {}
+        self.admission: AdmissionController | None = None
+        if admission_config.get("enabled", False):
+            self.admission = AdmissionController(
+                self.core_api, self.informer, namespace="v6-jobs",
+                refresh_interval=admission_config.get("refresh_interval", 30),
+            )
+            self.admission.start()
+
+        # Pre-started runner PODs for the frequently used images (optional)
+        warm_pool_config = self.v6_config.get("warm_pool") or {}
+        self.warm_pool: WarmPool | None = None
+        if warm_pool_config.get("enabled", False):
+            self.warm_pool = WarmPool(self.informer, warm_pool_config,
+                                      create_runner=self._create_warm_job,
+                                      delete_runner=self._delete_warm_job)
+            self.warm_pool.start()
+
+        # Keeps the recently used images on every cluster node, and pins the jobs to their digest (optional)
+        image_prepull_config = self.v6_config.get("image_prepull") or {}
+        self.image_prepuller: ImagePrePuller | None = None
+        if image_prepull_config.get("enabled", False):
+            self.image_prepuller = ImagePrePuller(self.apps_api, self.informer, image_prepull_config,
+                                                  namespace="v6-jobs")
+            self.image_prepuller.start()
+
+        # Reports the launched runs whose POD doesn't get to run on time as failed to start
+        threading.Thread(target=self.__failed_start_worker, name="pod-start-failures", daemon=True).start()
 
 
     def version(self)->str:
@@ -179,7 +1083,10 @@ class ContainerManager:
         TaskStatus, list[dict] | None
             Returns a tuple with the status of the task and a description of
             each port on the VPN client that forwards traffic to the algorithm
-            container (``None`` if VPN is not set up).
+            container (``None`` if VPN is not set up). Once the job is accepted
+            by K8S the status is TaskStatus.INITIALIZING: the transition to
+            ACTIVE (or to a failure to start) is tracked in the background and
+            reported through get_status_changes.
         """
 
         """
@@ -236,63 +1143,66 @@ class ContainerManager:
         str_task_id = str(task_info["id"])
         str_run_id  = str(run_id)
         parent_id = str(get_parent_id(task_info))
-        
-        _io_related_env_variables: List[V1EnvVar]
 
-        _volumes, _volume_mounts, _io_related_env_variables = self._create_volume_mounts(run_id=str_run_id,docker_input=docker_input,token=token,databases_to_use=databases_to_use)
-        
-        # Setting the environment variables required by V6 algorithms.
-        #   As these environment variables are used within the container/POD environment, file paths are relative 
-        #   to the mount paths (i.e., the container's file system) created by the method _crate_volume_mounts
-        #   
-        env_vars: List[V1EnvVar] = [            
-            client.V1EnvVar(name="HOST", value=os.environ.get("PROXY_SERVER_HOST",pod_node_constants.V6_NODE_FQDN)),
-            client.V1EnvVar(name="PORT", value=os.environ.get("PROXY_SERVER_PORT", str(pod_node_constants.V6_NODE_PROXY_PORT))),
-            #TODO This environment variable correspond to the API PATH of the PROXY (not to be confused of the one of the
-            # actual server). This variable should be eventually removed, as it is not being used to setup such PATH, so if
-            # it is changed to a value different than empty, it leads to an error.
-            client.V1EnvVar(name="API_PATH", value=""),    
-        ]
+        if self._has_undefined_databases(databases_to_use):
+            return TaskStatus.START_FAILED, None
+
+        placeable, affinity = self.__get_data_affinity(databases_to_use)
+        if not placeable:
+            return TaskStatus.START_FAILED, None
+
+        # Hand the run to an idle warm runner of the image, if there is one (its POD is already running,
+        # with the databases of the warm pool mounted, so not for the runs that request other databases or
+        # must be placed next to their data)
+        if (self.warm_pool and affinity is None
+                and get_database_labels(databases_to_use) == self.__get_warm_databases()):
+            self.warm_pool.record_demand(image)
+            warm_job_name = self.warm_pool.acquire(image)
+            if warm_job_name and self.__assign_warm_job(warm_job_name, str_run_id, str_task_id, parent_id,
+                                                        docker_input, token):
+                return TaskStatus.ACTIVE, None
         
-        env_vars.extend(_io_related_env_variables)
-
-        container = client.V1Container(
-                            name=str_run_id,
-                            image=image,
-                            tty = True,
-                            volume_mounts=_volume_mounts,
-                            env=env_vars
-                        )
-
-        job_metadata = client.V1ObjectMeta(
-            name=str_run_id,
-            annotations={"run_id": str_run_id, 
-                         "task_id": str_task_id,
-                         "task_parent_id": parent_id
-                        },
-        )
-
-        # Define the job
-        job = client.V1Job(
-            api_version="batch/v1",
-            kind="Job",
-            metadata=job_metadata,
-            spec=client.V1JobSpec(
-                template=client.V1PodTemplateSpec(
-                    metadata=client.V1ObjectMeta(labels={"app": str_run_id,"role":"v6_alg_runner"}),
-                    spec=client.V1PodSpec(
-                        containers=[container],
-                        volumes=_volumes,
-                        restart_policy="Never",
-                    ),
-                ),
-                backoff_limit=3,
-            ),
-        )
+        # Pinned to the image digest (once known), so that the copy kept on the cluster nodes by the
+        # pre-puller is used without checking the registry
+        image_ref = self.image_prepuller.resolve(image) if self.image_prepuller else image
+
+        io_objects = self._uses_io_objects(str_run_id, docker_input)
+        # The upload of the output is accepted from the POD (with the run's token) as soon as it exists
+        if self.result_spool:
+            self.result_spool.register(str_run_id, token)
+        job = self._build_job(run_id=str_run_id, task_id=str_task_id, parent_id=parent_id, image=image,
+                              docker_input=docker_input, token=token, databases_to_use=databases_to_use,
+                              image_ref=image_ref, io_objects=io_objects, affinity=affinity)
+        run_context = TRACER.get_run_context(run_id)
 
         self.log.info(f"Creating namedspaced K8S job for task_id={str_task_id} and run_id={str_run_id}.")
 
-        self.batch_api.create_namespaced_job(namespace="v6-jobs", body=job)
+        try:
+            with TRACER.span("create_namespaced_job", parent=run_context, kind=KIND_CLIENT):
+                created_job = self.batch_api.create_namespaced_job(namespace="v6-jobs", body=job)
+        except Exception as e:
+            # Jobs are named after the run_id, so a conflict means that the run was already
+            # launched (e.g., by another dispatch worker) but not yet seen by the informer.
+            if isinstance(e, ApiException) and e.status == 409:
+                self.log.warn(f"A job for run_id={str_run_id} already exists, discarding task")
+                return TaskStatus.ACTIVE, None
+            if self.result_spool:
+                self.result_spool.release(str_run_id)
+            # The job may have been created despite the error (e.g., a 5xx or a dropped connection)
+            self.job_gc.collect(str_run_id)
+            raise
+
+        # The input/token objects are created once the job (their owner) exists. Meanwhile, its POD
+        # waits for them to be mounted.
+        if io_objects:
+            try:
+                self.__create_io_objects(self._build_io_objects(str_run_id, docker_input, token), created_job,
+                                         run_context)
+            except Exception:
+                if self.result_spool:
+                    self.result_spool.release(str_run_id)
+                self.job_gc.collect(str_run_id)
+                raise
 
         #Based on
         #https://stackoverflow.com/questions/57563359/how-to-properly-update-the-status-of-a-job
@@ -302,287 +1212,487 @@ class ContainerManager:
         Pending, Running, Succeeded, Failed, Unknown
         Kubernetes will automatically retry the job N times (backoff_limit value above). According
         to the Pod's backoff failure policy, it will have a failed status only after the last failed retry.
-        """
-        
-        interval = 1
-        timeout = 60
-
-        start_time = time.time()
-        
-        #the create_namespaced_job() method is asynchronous, so evaluating the pod execution status
-        #requires first polling the K8S API until the new job/POD shows up.
-        while True:
-            pods = self.core_api.list_namespaced_pod(namespace="v6-jobs", label_selector=f"app={run_id}")
-            if pods.items:
-                #The container was created. Now wait until it reports either an 'active' or 'failed' status
-                # Pod-creation -> Pending -> Running -> Failed
-                #What should be done in the case of a timeout while checking this?
-                self.log.info(f"{len(pods.items)} Job POD with label app={run_id} created successfuly on v6-jobs namespace. Waiting until it has a (k8S) running state.")
-                status = self.__wait_until_pod_running(f"app={run_id}")
-                self.log.info(f"Job POD with label app={run_id} is now on a running state.")
-
-                return status, None
-                
-            elif time.time() - start_time > timeout:
-                self.log.error(f"Timeoit while waiting Job POD with label app={run_id} to report a running state.")
-                #The job could still start after the timeout
-                return TaskStatus.UNKNOWN_ERROR
-                
-            else:            
-                time.sleep(interval)
-
-
-    def __wait_until_pod_running(self,run_id_label_selector:str)->TaskStatus:
-        """
-        This method execution gets blocked until the POD with the given label selector (which corresponds
-        to the task's 'run_id') reports a 'Running' state. This method is expected to be used right
-        after the job's creation request. Once this request is done, the POD has two initial statuses:
-        'Pending' and then 'Running'. 
-
-        Returns:
-        Either TaskStatus.ACTIVE when the POD status is 'Running' (the POD container was kicked off), 
-                          or TaskStatus.UNKNOWN_ERROR if there is a timeout while waiting for
-                           reaching such 'Running' status (due to other errors)
-        
-
-        *Question: where are the failures detected on v6? : error code of command
 
-        Wait for the POD to start
-                                                              / Succeded
-        Potential statuses of a Job POD: Pending -> Running - - Failed
-                                                              \ Unknown
+        The create_namespaced_job() method is asynchronous: the job's POD is created and started afterwards.
+        Instead of waiting for it here (which would stall the dispatch of the next tasks while, e.g., the image
+        is pulled), the POD phase transitions are followed from the informer's events (see __on_informer_event).
         """
+        with self._starting_runs_lock:
+            launched_at = time.time()
+            self._starting_runs[str_run_id] = StartingRun(
+                task_id=task_info["id"],
+                parent_id=get_parent_id(task_info),
+                launched_at=launched_at,
+                deadline=launched_at + POD_START_TIMEOUT,
+            )
 
-        # Start watching for events on the pod
-        w = watch.Watch()
-        
+        # The POD may have been reported before the run was registered as starting
+        for pod in self.informer.get_pods_by_run_id(str_run_id):
+            self.__track_pod_phase(pod)
 
-        for event in w.stream(func=self.core_api.list_namespaced_pod,
-                            namespace="v6-jobs",
-                            label_selector=run_id_label_selector,
-                            timeout_seconds=120):
-            
-            pod_phase = event['object'].status.phase
+        return TaskStatus.INITIALIZING, None
 
-            if pod_phase == "Running":
-                w.stop()
-                return TaskStatus.ACTIVE
-                            
-        #This point is reached after timeout 
-        return TaskStatus.UNKNOWN_ERROR    
-    
 
-    def _create_io_files(self,alg_input_file_path: str, docker_input: bytes, token_file_path: str, token: str, output_file_path:str):
+    def __get_data_affinity(self, databases_to_use: list) -> tuple[bool, client.V1Affinity | None]:
         """
-        Create the files required by the algorithms, which will be bound to the PODs through a volume mount:
-        'docker_input' as the 'input' file, and 'token' 
+        Whether a run can be started given the placement of the databases it requests (i.e., some cluster
+        node holds all of them, or the placement is only preferred), and the affinity of its PODs to such
+        nodes (None if not constrained)
         """
-        self.log.info(f"Creating {alg_input_file_path} and {token_file_path}")
-
-        # Check if the files already exist
-        #if Path(alg_input_file_path).exists() or Path(token_file_path).exists():
-        #    raise Exception(f"Input file {alg_input_file_path} or Token file {token_file_path} already exist. Cannot overwrite.")
-
-        # Create the directories if they don't exist (if there are no writing rights this will rise)
-        alg_input_dir = Path(alg_input_file_path).parent
-        token_dir = Path(token_file_path).parent
-        output_dir = Path(token_file_path).parent
-        
-        alg_input_dir.mkdir(parents=True, exist_ok=True)
-        token_dir.mkdir(parents=True, exist_ok=True)
-        output_dir.mkdir(parents=True, exist_ok=True)
-        
-        with open(alg_input_file_path, 'wb') as alg_input_file:
-            alg_input_file.write(docker_input)
-            
-        with open(token_file_path, 'wb') as token_file:
-            token_file.write(token.encode("ascii"))
-
-        with open(output_file_path, 'wb') as token_file:
-            token_file.write(b"")
-
-
+        if not self.data_locality:
+            return True, None
+        candidates = self.data_locality.get_candidate_nodes(databases_to_use)
+        if candidates is not None and not candidates:
+            labels = self.data_locality.get_local_labels(databases_to_use)
+            if self.data_locality.required:
+                self.log.error(f"No cluster node holds all the databases {labels} requested by the run")
+                return False, None
+            self.log.warning(f"No cluster node holds all the databases {labels} requested by the run, "
+                             f"starting it without a node affinity")
+            return True, None
+        return True, self.data_locality.get_affinity(databases_to_use)
+
+
+    def __create_io_objects(self, io_objects: list, job: client.V1Job, run_context: SpanContext | None) -> None:
+        """
+        Create the input/token ConfigMap/Secret objects of a run (see _build_io_objects), owned by its job
+        """
+        set_io_owner(io_objects, job)
+        with TRACER.span("create_io_objects", parent=run_context, kind=KIND_CLIENT):
+            for io_object in io_objects:
+                if isinstance(io_object, client.V1Secret):
+                    self.core_api.create_namespaced_secret(namespace="v6-jobs", body=io_object)
+                else:
+                    self.core_api.create_namespaced_config_map(namespace="v6-jobs", body=io_object)
 
 
+    def run_indexed(self, runs: List[IndexedRun], image: str, databases_to_use: list[str]) -> dict[int, TaskStatus]:
+        """
+        Start sibling runs (runs of tasks with the same parent, image and databases, see
+        TaskScheduler.take_siblings) as the completion indexes of a single Indexed job: a single
+        job creation, and a single job to watch and remove, for a wide fan-out of subtasks. Each
+        run is tracked (start, completion and harvest) on its own, as the ones started with run.
 
+        Parameters
+        ----------
+        runs: List[IndexedRun]
+            Runs to be started, with their task information, input and container token
+        image: str
+            Docker image name (shared by all the runs)
+        databases_to_use: list[str]
+            Labels of the databases to use (shared by all the runs)
 
-    def _create_volume_mounts(self,run_id:str,docker_input:bytes,token:str,databases_to_use:list[str])-> Tuple[  List[client.V1Volume], List[client.V1VolumeMount], List[V1EnvVar]   ]:
+        Returns
+        -------
+        dict[int, TaskStatus]
+            Status of each run (by run_id), as returned by run
         """
-        Define all the mounts required by the algorithm/job: input files (csv), output, and temporal data
+        if not self.is_docker_image_allowed(image, runs[0].task_info):
+            self.log.critical(f"Docker image {image} is not allowed on this Node!")
+            return {run.run_id: TaskStatus.NOT_ALLOWED for run in runs}
+
+        statuses = {}
+        for run in runs:
+            if self.is_running(run.run_id):
+                self.log.warn(f"Task is already being executed, discarding run_id={run.run_id}")
+                statuses[run.run_id] = TaskStatus.ACTIVE
+        runs = [run for run in runs if run.run_id not in statuses]
+        if len(runs) == 1:
+            run = runs[0]
+            statuses[run.run_id], _ = self.run(run_id=run.run_id, task_info=run.task_info, image=image,
+                                               docker_input=run.docker_input, tmp_vol_name="", token=run.token,
+                                               databases_to_use=databases_to_use)
+        if len(runs) <= 1:
+            return statuses
+
+        if self._has_undefined_databases(databases_to_use):
+            statuses.update({run.run_id: TaskStatus.START_FAILED for run in runs})
+            return statuses
+
+        placeable, affinity = self.__get_data_affinity(databases_to_use)
+        if not placeable:
+            statuses.update({run.run_id: TaskStatus.START_FAILED for run in runs})
+            return statuses
+
+        job_name = f"{FANOUT_JOB_PREFIX}{runs[0].run_id}"
+        image_ref = self.image_prepuller.resolve(image) if self.image_prepuller else image
+        job = self._build_indexed_job(job_name, runs, image, databases_to_use, image_ref=image_ref, affinity=affinity)
+
+        self.log.info(f"Creating namedspaced K8S fan-out job {job_name} for run_ids {[run.run_id for run in runs]}.")
+        with self._queued_jobs_lock:
+            self._fanout_pending[job_name] = set(range(len(runs)))
+        try:
+            with TRACER.span("create_namespaced_job", parent=TRACER.get_run_context(runs[0].run_id), kind=KIND_CLIENT,
+                             attributes={"k8s.job.name": job_name, "v6.fanout.size": len(runs)}):
+                self.batch_api.create_namespaced_job(namespace="v6-jobs", body=job)
+        except Exception as e:
+            if isinstance(e, ApiException) and e.status == 409:
+                self.log.warn(f"Fan-out job {job_name} already exists, discarding its runs")
+                statuses.update({run.run_id: TaskStatus.ACTIVE for run in runs})
+                return statuses
+            with self._queued_jobs_lock:
+                self._fanout_pending.pop(job_name, None)
+            # The job may have been created despite the error (e.g., a 5xx or a dropped connection)
+            self.job_gc.collect(job_name)
+            raise
+
+        launched_at = time.time()
+        with self._starting_runs_lock:
+            for index, run in enumerate(runs):
+                self._starting_runs[str(run.run_id)] = StartingRun(
+                    task_id=run.task_info["id"],
+                    parent_id=get_parent_id(run.task_info),
+                    launched_at=launched_at,
+                    deadline=launched_at + POD_START_TIMEOUT,
+                    fanout_job=job_name,
+                    fanout_index=index,
+                )
+                statuses[run.run_id] = TaskStatus.INITIALIZING
 
-        Returns: a tuple with (1) the created volume names and their corresponding volume mounts and (2) the list
-        of the environment variables required by the algorithms to use such mounts.
+        # The PODs may have been reported before the runs were registered as starting
+        for pod in self.informer.get_pods_by_job_name(job_name):
+            self.__track_pod_phase(pod)
 
-         Note: in the following Volume-claims could be used insted of 'host_path' volumes to decouple vantage6 file
-          management from the storage provider (NFS, GCP, etc). However, persitent-volumes (from which 
-          volume-claims are be created), present a risk when used on local file systems. In particular,
-          if two VC are created from the same PV, both would end sharing the same files. 
+        return statuses
 
-          e.g. : Define the volume for temporal data 
-          tmp_volume = client.V1Volume(
-            name=f'task-{str_run_id}-tmp',
-            persistent_volume_claim=client.V1PersistentVolumeClaimVolumeSource(claim_name=tmp_vol_name)
-          )
 
+    def __get_pod_run_id(self, pod: client.V1Pod) -> str | None:
         """
-        volumes :List[client.V1Volume] = []
-        vol_mounts:List[client.V1VolumeMount] = []
-        io_env_vars:List[V1EnvVar] = []
-        
-        # This method creates the folders required for the required tasks (subfolders
-        # of the 'tasks-dir' defined in the v6 node configuration file), and then
-        # bind these as host-volume mounts. The folder is created from the context
-        # of the running node, so the target folder dependes on whether the node
-        # is running from the host or from a POD.
-
-        # If running whithin the POD, use the tas
-        if (self.running_on_guest_env):        
-            task_base_path = pod_node_constants.TASK_FILES_ROOT
-        # If running withn the host, use the value defined by the v6-config file
-        else:            
-            task_base_path = self.v6_config['task_dir']
-
-        _input_file_path = os.path.join(task_base_path,run_id,'input')
-        _token_file_path = os.path.join(task_base_path,run_id,'token')
-        _output_file_path = os.path.join(task_base_path,run_id,'output')
-        
-        #Create algorithm's input and token files before creating volume mounts with them (relative to the node's file system: POD or host)
-        self._create_io_files(
-            alg_input_file_path=_input_file_path,
-            docker_input=docker_input,
-            token_file_path=_token_file_path,
-            token=token,
-            output_file_path=_output_file_path
-        )
+        run_id of the run of a POD: its 'app' label, or for the PODs of a fan-out job, the run of its
+        completion index
+        """
+        labels = pod.metadata.labels or {}
+        index = get_completion_index(pod)
+        if index is None:
+            return labels.get("app")
+        job = self.informer.get_job(labels.get("job-name"))
+        fanout_runs = get_fanout_runs(job) if job is not None else None
+        return str(fanout_runs[index]["run_id"]) if fanout_runs and index < len(fanout_runs) else None
 
 
-        # Binding the required files and folders to the Job POD as HostPathVolume (using actual host path folder 
-        # as this is made by the K8S server).
+    def __discard_run(self, run_id: str, starting_run: StartingRun) -> None:
+        """
+        Remove the job of a run that failed to start. The job of a fan-out run is only removed once
+        none of its runs is left to be harvested.
+        """
+        if starting_run.fanout_job is None:
+            if self.result_spool:
+                self.result_spool.release(run_id)
+            self.job_gc.collect(run_id)
+        else:
+            self.__release_fanout_index(starting_run.fanout_job, starting_run.fanout_index)
 
-        host_task_base_path = self.v6_config['task_dir']
 
-        _host_input_file_path = os.path.join(host_task_base_path,run_id,'input')
-        _host_token_file_path = os.path.join(host_task_base_path,run_id,'token')
-        _host_output_file_path = os.path.join(host_task_base_path,run_id,'output')
-        _host_tmp_folder_path = os.path.join(host_task_base_path,run_id,'tmp')
+    def __release_fanout_index(self, job_name: str, index: int) -> None:
+        """
+        Register that the run of an index of a fan-out job was harvested (or failed to start), and
+        remove the job once none of its runs is left
+        """
+        with self._queued_jobs_lock:
+            pending = self._fanout_pending.get(job_name)
+            if pending is None:
+                return
+            pending.discard(index)
+            if pending:
+                return
+            del self._fanout_pending[job_name]
+        self.job_gc.collect(job_name)
+
+
+    def __track_pod_phase(self, pod: client.V1Pod) -> None:
+        """
+        Report a starting run as ACTIVE once its POD leaves the 'Pending' phase (i.e., its container
+        was kicked off), or as failed to start as soon as its 'Pending' POD is known not to be able to
+        start (see get_pod_start_failure).
 
-        # Define a volume for input/output for this run. Following v6 convention, this is a volume bind to a
-        # sub-folder created for the given run_id (i.e., the content will be shared by all the
-        # algorithm instances of the same 'run' within this node).
+                                                              / Succeded
+        Potential statuses of a Job POD: Pending -> Running - - Failed
+                                                              \ Unknown
+        """
+        run_id = self.__get_pod_run_id(pod)
+        phase = pod.status.phase if pod.status else None
+        if run_id is None or phase in (None, "Unknown"):
+            return
+
+        failure = get_pod_start_failure(pod) if phase == "Pending" else None
+        if phase == "Pending" and failure is None:
+            return
+
+        with self._starting_runs_lock:
+            starting_run = self._starting_runs.pop(run_id, None)
+        if starting_run is None:
+            if failure is not None:
+                # E.g., the POD that retries a run already reported as ACTIVE can't pull its image
+                self.__fail_started_run(pod, *failure)
+            return
+
+        if failure is None:
+            self.log.info(f"Job POD with label app={run_id} is now on a {phase} state.")
+            status = TaskStatus.ACTIVE
+        else:
+            status, description = failure
+            self.log.error(f"Job POD {pod.metadata.name} of run_id={run_id} failed to start: {description}")
+            self.__discard_run(run_id, starting_run)
+        now = time.time()
+        POD_START_SECONDS.observe(now - starting_run.launched_at, status=status)
+        pod_start_span = TRACER.start_span("pod_start", parent=TRACER.get_run_context(run_id),
+                                           attributes={"k8s.pod.name": pod.metadata.name},
+                                           start_time=starting_run.launched_at)
+        if failure is None:
+            self._algorithm_spans[run_id] = TRACER.start_span(
+                "algorithm", parent=TRACER.get_run_context(run_id), start_time=now)
+        else:
+            pod_start_span.set_error(description)
+        pod_start_span.end(end_time=now)
 
-        # Files or folders will be automatically created as described on https://kubernetes.io/docs/concepts/storage/volumes/#hostpath-volume-types
+        self._status_changes.put(RunStatusChange(
+            run_id=int(run_id),
+            task_id=starting_run.task_id,
+            parent_id=starting_run.parent_id,
+            status=status,
+        ))
 
-        ##### Volume for the output file (this creates an empty file)        
-        output_volume = client.V1Volume(
-            name=f'task-{run_id}-output',                    
-            host_path=client.V1HostPathVolumeSource(path=_host_output_file_path),
-        )
-        volumes.append(output_volume)
-        # Volume mount path for i/o data (/app is the WORKDIR path of v6-node's container)
-        output_volume_mount = client.V1VolumeMount(
-            #standard containers volume mount location
-            name=f'task-{run_id}-output',
-            mount_path=pod_job_constants.JOB_POD_OUTPUT_PATH,
-        )
 
-        vol_mounts.append(output_volume_mount)
-        io_env_vars.append(client.V1EnvVar(name="OUTPUT_FILE", value=pod_job_constants.JOB_POD_OUTPUT_PATH))
+    def __fail_started_run(self, pod: client.V1Pod, status: TaskStatus, description: str) -> None:
+        """
+        Report as failed the run of a 'Pending' POD that is not going to start, once the run is no
+        longer starting (e.g., the POD retries a run that crashed). Otherwise its unfinished job
+        would be left pending forever, holding the run's in-flight slot. The job is removed (the
+        one of a fan-out run, once none of its runs is left), and it is not harvested.
+        """
+        job_name = (pod.metadata.labels or {}).get("job-name")
+        job = self.informer.get_job(job_name) if job_name else None
+        if job is None or is_job_finished(job):
+            return
+
+        index = get_completion_index(pod)
+        if index is None:
+            run = job.metadata.annotations or {}
+            key = job_name
+        else:
+            fanout_runs = get_fanout_runs(job) or []
+            if index >= len(fanout_runs):
+                return
+            run = {name: str(value) for name, value in fanout_runs[index].items()}
+            key = get_fanout_key(job_name, index)
+        if "run_id" not in run:
+            # A warm runner not assigned to a run yet (see WarmPool)
+            return
+
+        with self._queued_jobs_lock:
+            if key in self._queued_jobs:
+                return
+            self._queued_jobs.add(key)
+
+        run_id = run["run_id"]
+        self.log.error(f"Job POD {pod.metadata.name} of run_id={run_id} failed to start: {description}")
+        if index is None:
+            if self.result_spool:
+                self.result_spool.release(run_id)
+            self.job_gc.collect(job_name)
+        else:
+            self.__release_fanout_index(job_name, index)
 
-        ##### Volume for the INPUT file (this creates an empty file, in which the input parameters user by the algorithm
-        # will be written before starting the task.
+        algorithm_span = self._algorithm_spans.pop(run_id, None)
+        if algorithm_span is not None:
+            algorithm_span.set_error(description)
+            algorithm_span.end()
 
-        alg_input_volume = client.V1Volume(
-            name=f'task-{run_id}-input',                    
-            host_path=client.V1HostPathVolumeSource(path=_host_input_file_path),
-        )
-        volumes.append(alg_input_volume)
-                
-        alg_input_volume_mount = client.V1VolumeMount(
-            #standard containers volume mount location
-            name=f'task-{run_id}-input',
-            mount_path=pod_job_constants.JOB_POD_INPUT_PATH
-        )
+        parent_id = run.get("task_parent_id")
+        self._status_changes.put(RunStatusChange(
+            run_id=int(run_id),
+            task_id=int(run["task_id"]),
+            parent_id=int(parent_id) if parent_id not in (None, "None") else None,
+            status=status,
+        ))
 
-        vol_mounts.append(alg_input_volume_mount)
-        io_env_vars.append(client.V1EnvVar(name="INPUT_FILE", value=pod_job_constants.JOB_POD_INPUT_PATH))
 
+    def __failed_start_worker(self) -> None:
+        """
+        Report as failed to start the runs whose POD has not reported a running state within
+        POD_START_TIMEOUT seconds (their jobs are removed by the job GC), and the runs no longer
+        starting whose (retry) POD has been 'Pending' for as long (see __fail_started_run).
+        """
+        while True:
+            time.sleep(POD_START_CHECK_INTERVAL)
+            now = time.time()
+            with self._starting_runs_lock:
+                expired = [(run_id, r) for run_id, r in self._starting_runs.items() if r.deadline < now]
+                for run_id, _ in expired:
+                    del self._starting_runs[run_id]
+                starting = set(self._starting_runs)
+
+            for run_id, starting_run in expired:
+                self.log.error(f"Timeout while waiting Job POD with label app={run_id} to report a running state.")
+                POD_START_SECONDS.observe(now - starting_run.launched_at, status=TaskStatus.START_FAILED)
+                pod_start_span = TRACER.start_span("pod_start", parent=TRACER.get_run_context(run_id),
+                                                   start_time=starting_run.launched_at)
+                pod_start_span.set_error(f"POD not running after {POD_START_TIMEOUT}s")
+                pod_start_span.end(end_time=now)
+                self.__discard_run(run_id, starting_run)
+                self._status_changes.put(RunStatusChange(
+                    run_id=int(run_id),
+                    task_id=starting_run.task_id,
+                    parent_id=starting_run.parent_id,
+                    status=TaskStatus.START_FAILED,
+                ))
+
+            for pod in self.informer.get_pods():
+                if (pod.status is None or pod.status.phase != "Pending" or pod.metadata.creation_timestamp is None
+                        or self.__get_pod_run_id(pod) in starting):
+                    continue
+                pending_seconds = now - pod.metadata.creation_timestamp.timestamp()
+                if pending_seconds > POD_START_TIMEOUT:
+                    self.__fail_started_run(pod, TaskStatus.START_FAILED, f"POD not running after {POD_START_TIMEOUT}s")
+
+
+    def get_status_changes(self, timeout: float | None = None) -> List[RunStatusChange]:
+        """
+        Returns the status changes of the launched runs detected since the last call. Blocks until
+        at least one change is available (or the timeout expires).
+        """
+        try:
+            changes = [self._status_changes.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                changes.append(self._status_changes.get_nowait())
+            except queue.Empty:
+                return changes
 
-        ####### Volume and volume mount for the TOKEN file. This creates an empty file first, 
-        # the Token should be written on it before launching the Job
 
-        token_volume = client.V1Volume(
-            name=f'token-{run_id}-input',                    
-            host_path=client.V1HostPathVolumeSource(path=_host_token_file_path),
-        )
-        volumes.append(token_volume)
-                
-        token_volume_mount = client.V1VolumeMount(
-            #standard containers volume mount location
-            name=f'token-{run_id}-input',
-            mount_path=pod_job_constants.JOB_POD_TOKEN_PATH
-        )
+    def _create_warm_job(self, image: str, command: List[str] | None) -> str:
+        """
+        Create a warm runner job for the given image (see WarmPool). Its container waits until a 'ready' file
+        shows up on its slot folder (a sub-folder of the tasks folder named after the job, mounted on
+        JOB_POD_WARM_SLOT_PATH), and then runs the given command (the algorithm's entrypoint) as a fresh process.
+        The input, token, output files and temporary folder of the run are placed on that slot folder.
 
-        vol_mounts.append(token_volume_mount)
-        io_env_vars.append(client.V1EnvVar(name="TOKEN_FILE", value=pod_job_constants.JOB_POD_TOKEN_PATH))
+        Limitations: the image must provide /bin/sh (the wait loop is a shell script), the run starts up to
+        0.1s after its 'ready' file is written (polling interval), and the runner has no result_upload sidecar:
+        its output is always read from the slot folder (the harvest falls back to the tasks folder when the
+        output was not uploaded).
 
+        Returns: the name of the created job
+        """
+        job_name = f"warm-{hashlib.sha1(image.encode()).hexdigest()[:8]}-{uuid.uuid4().hex[:8]}"
+        slot_path = pod_job_constants.JOB_POD_WARM_SLOT_PATH
+
+        # Create the slot folder before the job, so that it is owned by the node
+        Path(os.path.join(self._get_task_base_path(), job_name, 'tmp')).mkdir(parents=True, exist_ok=True)
+
+        volumes = [client.V1Volume(
+            name=f'{job_name}-slot',
+            host_path=client.V1HostPathVolumeSource(path=os.path.join(self.v6_config['task_dir'], job_name)),
+        )]
+        vol_mounts = [client.V1VolumeMount(name=f'{job_name}-slot', mount_path=slot_path)]
+        env_vars = self._create_proxy_env_vars()
+        env_vars.extend([
+            client.V1EnvVar(name="INPUT_FILE", value=f"{slot_path}/input"),
+            client.V1EnvVar(name="OUTPUT_FILE", value=f"{slot_path}/output"),
+            client.V1EnvVar(name="TOKEN_FILE", value=f"{slot_path}/token"),
+            client.V1EnvVar(name="TEMPORARY_FOLDER", value=f"{slot_path}/tmp"),
+        ])
+
+        _db_volumes, _db_volume_mounts, _db_env_vars = self._create_database_mounts(databases_to_use=self.__get_warm_databases())
+        volumes.extend(_db_volumes)
+        vol_mounts.extend(_db_volume_mounts)
+        env_vars.extend(_db_env_vars)
+
+        wait_for_run = f'while [ ! -f {slot_path}/ready ]; do sleep 0.1; done; exec "$@"'
 
-        ######## Volume for temporal data folder        
-        tmp_volume = client.V1Volume(
-            name=f'task-{run_id}-tmp',
-            host_path=client.V1HostPathVolumeSource(path=_host_tmp_folder_path),
+        container = client.V1Container(
+            name="runner",
+            image=image,
+            tty=True,
+            command=["/bin/sh", "-c", wait_for_run, "runner"],
+            args=command,
+            volume_mounts=vol_mounts,
+            env=env_vars,
+            resources=self._create_resource_requirements(image),
         )
 
-        volumes.append(tmp_volume)
-
-        tmp_volume_mount = client.V1VolumeMount(
-            #standard containers volume mount location
-            name=f'task-{run_id}-tmp',
-            mount_path=pod_job_constants.JOB_POD_TMP_FOLDER_PATH
+        job = client.V1Job(
+            api_version="batch/v1",
+            kind="Job",
+            metadata=client.V1ObjectMeta(
+                name=job_name,
+                labels={"role": WARM_RUNNER_ROLE},
+                annotations={WARM_IMAGE_ANNOTATION: image},
+            ),
+            spec=client.V1JobSpec(
+                template=client.V1PodTemplateSpec(
+                    metadata=client.V1ObjectMeta(labels={"app": job_name, "role": "v6_alg_runner"}),
+                    spec=client.V1PodSpec(
+                        containers=[container],
+                        volumes=volumes,
+                        restart_policy="Never",
+                    ),
+                ),
+                backoff_limit=3,
+                ttl_seconds_after_finished=self.job_ttl_seconds,
+            ),
         )
+        self.batch_api.create_namespaced_job(namespace="v6-jobs", body=job)
+        return job_name
 
-        vol_mounts.append(tmp_volume_mount)
 
-        io_env_vars.append(client.V1EnvVar(name="TEMPORARY_FOLDER", value=pod_job_constants.JOB_POD_TMP_FOLDER_PATH))
+    def _delete_warm_job(self, job_name: str) -> None:
+        try:
+            self.batch_api.delete_namespaced_job(name=job_name, namespace="v6-jobs", propagation_policy="Background")
+        except ApiException as e:
+            if e.status != 404:
+                self.log.warn(f"Warning: warm runner job {job_name} couldn't be deleted (status {e.status}).")
 
 
-        ##### Environment variable with the labels of the databases to be used
-        labels_list = []
-        for db in databases_to_use:
-            labels_list.append(db["label"])
-        labels_str = ",".join(labels_list)
-        io_env_vars.append(client.V1EnvVar(name="USER_REQUESTED_DATABASE_LABELS", value='default'))
-        #io_env_vars.append(client.V1EnvVar(name="USER_REQUESTED_DATABASE_LABELS", value=labels_str))
+    def __get_warm_databases(self) -> list[str]:
+        """
+        Labels of the databases mounted on the warm runners ('databases' of the warm pool configuration)
+        """
+        return list((self.v6_config.get("warm_pool") or {}).get("databases") or [])
 
 
-        # Bind-mounting all the CSV files (read only) defined on the configuration file 
-        # TODO bind other input data types
-        # TODO include only the ones given in the 'databases_to_use parameter
-        csv_input_files = list(filter(lambda o: (o['type']=='csv'), self.v6_config['databases']))
+    def __assign_warm_job(self, job_name: str, run_id: str, task_id: str, parent_id: str, docker_input: bytes, token: str) -> bool:
+        """
+        Hand a run to a warm runner: annotate its job with the run details (so that its results are harvested
+        as the ones of the run), write the run's input and token on its slot folder, and signal the runner to
+        start the algorithm.
 
-        for csv_input in csv_input_files:
+        Returns False if the run couldn't be assigned (so that it is started on a new job). The runner is then
+        returned to the pool if its job was not annotated yet, or removed otherwise.
+        """
+        self.log.info(f"Assigning run_id={run_id} (task_id={task_id}) to warm runner {job_name}")
 
-            _volume = client.V1Volume(
-                name=f"task-{run_id}-input-{csv_input['label']}",
-                host_path=client.V1HostPathVolumeSource(csv_input['uri']),
+        try:
+            self.batch_api.patch_namespaced_job(
+                name=job_name, namespace="v6-jobs",
+                body={"metadata": {"annotations": {"run_id": run_id, "task_id": task_id, "task_parent_id": parent_id}}},
             )
+        except Exception:
+            self.log.exception(f"Couldn't assign run_id={run_id} to warm runner {job_name}, starting it on a new job")
+            self.warm_pool.release(job_name)
+            return False
 
-            volumes.append(_volume)
-
-            _volume_mount = client.V1VolumeMount(            
-                mount_path=f"/mnt/{csv_input['label']}",
-                name=f"task-{run_id}-input-{csv_input['label']}",
-                read_only=True
+        try:
+            slot_dir = os.path.join(self._get_task_base_path(), job_name)
+            self._create_io_files(
+                alg_input_file_path=os.path.join(slot_dir, 'input'),
+                docker_input=docker_input,
+                token_file_path=os.path.join(slot_dir, 'token'),
+                token=token,
+                output_file_path=os.path.join(slot_dir, 'output'),
             )
+            with open(os.path.join(slot_dir, 'ready'), 'wb') as ready_file:
+                ready_file.write(b"")
+        except Exception:
+            self.log.exception(f"Couldn't hand run_id={run_id} to warm runner {job_name}, removing the runner "
+                               f"and starting the run on a new job")
+            self.warm_pool.discard(job_name)
+            return False
+        return True
 
-            vol_mounts.append(_volume_mount)
-
-            io_env_vars.append(client.V1EnvVar(name=f"{csv_input['label'].upper()}_DATABASE_URI", value=f"/mnt/{csv_input['label']}"))
-            io_env_vars.append(client.V1EnvVar(name=f"{csv_input['label'].upper()}_DATABASE_TYPE", value="csv"))
-
-        return volumes,vol_mounts,io_env_vars
-    
 
-    
     def create_volume(self,volume_name:str)->None:
         """
         This method creates a persistent volume through volume claims. However, this method is not being
@@ -649,33 +1759,46 @@ class ContainerManager:
 
 
     
-    def is_docker_image_allowed(self, docker_image_name: str, task_info: dict) -> bool:
+    def _image_pull_policy(self, image_ref: str) -> str | None:
         """
-        Checks the docker image name.
+        With the image pre-puller, the images run by tag are always checked against the registry, so that
+        an updated tag is picked up (and its digest resolved again, see ImagePrePuller.resolve)
+        """
+        if self.image_prepuller and "@" not in image_ref:
+            return "Always"
+        return super()._image_pull_policy(image_ref)
 
-        Against a list of regular expressions as defined in the configuration
-        file. If no expressions are defined, all docker images are accepted.
+
+    def admit(self, task_incl_run: dict) -> bool:
+        """
+        Check whether the resources requested by a run fit on the cluster (and on the namespace
+        quota). If so, these are reserved for the run. Always true when the admission control
+        is not enabled.
 
         Parameters
         ----------
-        docker_image_name: str
-            uri to the docker image
-        task_info: dict
-            Dictionary with information about the task
+        task_incl_run: dict
+            Run, including its task
 
         Returns
         -------
         bool
-            Whether docker image is allowed or not
+            Whether the run can be started
         """
-        
-        #TODO use original v6 implementation
-        
-        return True
-        
-    
+        if self.admission is None:
+            return True
+        resources = self.get_algorithm_resources(task_incl_run["task"]["image"]) or {}
+        return self.admission.try_admit(task_incl_run["id"], resources.get("requests"))
+
+
+    def release_admission(self, run_id: int) -> None:
+        """
+        Release the resources reserved by the admission of a run (if any)
+        """
+        if self.admission is not None:
+            self.admission.release(run_id)
+
 
-    
     def is_running(self, run_id: int) -> bool:
         """
         
@@ -700,114 +1823,265 @@ class ContainerManager:
         Given the above What would be the expected return value if the task was already completed or failed?
         
         """
-        pods = self.core_api.list_namespaced_pod(namespace="v6-jobs", label_selector=f"app={run_id}")
-        if pods.items:
+        self.informer.wait_until_synced()
+        if self.informer.get_jobs_by_run_id(run_id) or self.informer.get_pods_by_run_id(run_id):
             return True
         else:
             return False
 
 
-    def get_result(self) -> Result:    
+    def __on_informer_event(self, kind: str, event_type: str, obj) -> None:
+        """
+        Informer listener: follows the phase of the PODs of the starting runs, and pushes the jobs
+        that reach a finished state (Complete or Failed) onto the completion queue, once per job.
         """
-        * Original description:
-            Returns the oldest (FIFO) finished docker container.
-            This is a blocking method until a finished container shows up. Once the
-            container is obtained and the results are read, the container is
-            removed from the docker environment.
+        if kind == "pod":
+            if event_type != "DELETED":
+                self.__track_pod_phase(obj)
+            return
+
+        job_id = obj.metadata.name
+
+        if event_type == "DELETED":
+            with self._queued_jobs_lock:
+                self._queued_jobs.discard(job_id)
+                if job_id.startswith(FANOUT_JOB_PREFIX):
+                    self._fanout_pending.pop(job_id, None)
+                    self._queued_jobs = {key for key in self._queued_jobs if split_fanout_key(key)[0] != job_id}
+            return
+
+        fanout_runs = get_fanout_runs(obj)
+        if fanout_runs is not None:
+            self.__queue_fanout_completions(obj, fanout_runs)
+            return
+
+        if not is_job_finished(obj):
+            return
+
+        with self._queued_jobs_lock:
+            if job_id in self._queued_jobs:
+                return
+            if "run_id" not in (obj.metadata.annotations or {}):
+                # A warm runner that finished without being assigned to a run: there is nothing to harvest
+                self.log.warning(f"Warm runner {job_id} finished without a run assigned, removing it")
+                self._queued_jobs.add(job_id)
+                self.job_gc.collect(job_id)
+                return
+            try:
+                self._completed_jobs.put_nowait(job_id)
+                self._queued_jobs.add(job_id)
+            except queue.Full:
+                self.log.warning(f"Completion queue is full, job {job_id} will be harvested on a later pass")
 
-        * Proposed (more accurate) description:
-            proposed name: process_next_completed_job
-            Process the next completed job (which can be either finsihed or failed), as soon any of these is shown (not necesarily FIFO):
 
-                When failed-job found (after N attempts handled by kubernetes (N = job backoffLimit) ) => 
-                    Cleanup POD/containers
-                    return Result with:
-                        TaskStatus.CRASHED
-                        Result: empty
-                        Log error: Logs from the N pods (backoff limit)
+    def __queue_fanout_completions(self, job: client.V1Job, fanout_runs: list[dict]) -> None:
+        """
+        Push onto the completion queue the runs of a fan-out job whose index completed or failed (after
+        its last retry), or all its remaining runs once the job reached a finished state, once per run
+        """
+        job_id = job.metadata.name
+        finished = is_job_finished(job)
+        completed = parse_indexes(job.status.completed_indexes if job.status else None)
+        completed |= parse_indexes(job.status.failed_indexes if job.status else None)
+        with self._queued_jobs_lock:
+            # (Re)built from the job for the fan-out jobs launched before the node (re)started
+            pending = self._fanout_pending.setdefault(job_id, set(range(len(fanout_runs))))
+            for index in sorted(pending):
+                key = get_fanout_key(job_id, index)
+                if key in self._queued_jobs or not (finished or index in completed):
+                    continue
+                try:
+                    self._completed_jobs.put_nowait(key)
+                    self._queued_jobs.add(key)
+                except queue.Full:
+                    self.log.warning(f"Completion queue is full, index {index} of job {job_id} will be harvested on a later pass")
+                    return
+
+
+    def __requeue_missed_completions(self) -> None:
+        """
+        Queue the finished jobs on the informer's cache that could not be queued when their
+        completion was reported (because the completion queue was full).
+        """
+        for job in self.informer.get_jobs():
+            if is_job_finished(job) or get_fanout_runs(job) is not None:
+                self.__on_informer_event("job", "MODIFIED", job)
 
-                When Successful POD found =>
-                    return Result with:
-                        TaskStatus.COMPLETED
-                        Result: file content
-                        Log: Logs from the N pods (backoff limit)
 
+    def get_results(self, timeout: float | None = None) -> List[Result]:
+        """
+        Harvest all the finished jobs (which can be either successful or failed). This method blocks
+        until at least one job has finished (or the timeout expires), and then drains all the completions
+        reported so far, so that jobs that finish at the same time are processed on the same pass. The
+        jobs of a pass are harvested in parallel, on a pool of 'harvest_workers' threads.
 
-                                                              / Succeded
-        Potential statuses of a Job POD: Pending -> Running - - Failed
-                                                              \ Unknown
+        Returns
+        -------
+        List[Result]
+            The results of the harvested jobs. Empty if the timeout expired. A job that failed (after
+            the retries allowed by its backoffLimit) gives a TaskStatus.CRASHED result with an empty
+            output, a successful job a TaskStatus.COMPLETED result with the content of its output
+            file. In both cases the result includes the logs of the PODs of the job.
+        """
+        try:
+            job_ids = [self._completed_jobs.get(timeout=timeout)]
+        except queue.Empty:
+            return []
 
-        """        
-        jobs = []
+        while True:
+            try:
+                job_ids.append(self._completed_jobs.get_nowait())
+            except queue.Empty:
+                break
+
+        self.__requeue_missed_completions()
+
+        started_at = time.perf_counter()
+        harvests = {}
+        for job_id in job_ids:
+            job_name, index = split_fanout_key(job_id)
+            job = self.informer.get_job(job_name)
+            if job is None:
+                self.log.warning(f"Finished job {job_id} is no longer available, its results are discarded")
+                continue
+            harvests[self._harvest_executor.submit(self.__harvest_job, job, index)] = job_id
+
+        results = []
+        for harvest in concurrent.futures.as_completed(harvests):
+            try:
+                results.append(harvest.result())
+            except Exception:
+                self.log.exception(f"Error while harvesting the results of job {harvests[harvest]}")
 
-        #wait until there is at least one completed job available (successful or failed)
-        #other statuses (pending/running/unknown) are ignored (for the moment)
-        
-        completed_job = False
+        self.log.info(f"Harvested {len(results)} finished job(s) in {time.perf_counter() - started_at:.3f}s")
+        return results
 
-        while not completed_job:
-            jobs = self.batch_api.list_namespaced_job("v6-jobs")
-            
-            if not jobs:
-                time.sleep(1)
-            else:
-                for job in jobs.items:
-
-                    if job.status.succeeded:
-                        job_id = job.metadata.name
-                        self.log.info(f"Found a completed job with a (k8s) Succeded status: {job_id}. Returning result with v6-COMPLETED status")          
-
-                        #get results by reading the output file created by the 'algorithm' container runned by the job (provisional convention: /output/avg.txt)
-                        results = self.__get_job_result(job_id)
-                                
-                        #get PODs logs 
-                        pod_tty_output = self.__get_job_pod_logs(job_id=job_id,namespace="v6-jobs")
-
-                        #destroy job and related POD(s)
-                        self.log.info(f"Cleaning up kubernetes Job {job.metadata.name} (job id = {job_id}) and related PODs")
-                        self.batch_api.delete_namespaced_job(name=job_id, namespace="v6-jobs")
-                        self.__delete_job_related_pods(job_id=job_id,namespace="v6-jobs")
-
-
-                        self.log.info(f"Sending results of run_id={job.metadata.annotations['run_id']} and task_id={job.metadata.annotations['task_id']} back to the server")
-                        
-                        result = Result(
-                                run_id=job.metadata.annotations["run_id"],
-                                task_id=job.metadata.annotations["task_id"],
-                                logs=pod_tty_output,  
-                                data=results,   
-                                status=TaskStatus.COMPLETED,
-                                parent_id=job.metadata.annotations["task_parent_id"],
-                            )
-                        completed_job = True    
+
+    def __harvest_job(self, job: client.V1Job, index: int | None = None) -> Result:
+        """
+        Collect the output and logs of a finished job, and remove the job and its PODs. The duration
+        of each stage is recorded (see HARVEST_STAGES).
+
+        For a fan-out job, the run of the given completion index is harvested (from the PODs and the
+        task sub-folder of that index), and the job is removed once all its runs were harvested.
+        """
+        job_id = job.metadata.name
+        stage_seconds = {}
+
+        if index is None:
+            run = job.metadata.annotations
+            succeeded = bool(job.status.succeeded)
+            output_folder, pod_names = job_id, None
+        else:
+            run = {key: str(value) for key, value in get_fanout_runs(job)[index].items()}
+            succeeded = index in parse_indexes(job.status.completed_indexes)
+            output_folder = os.path.join(job_id, str(index))
+            pod_names = {pod.metadata.name for pod in self.informer.get_pods_by_job_name(job_id)
+                         if get_completion_index(pod) == index}
+
+        run_id = run["run_id"]
+        finished_at = get_job_finished_at(job)
+        if finished_at is not None:
+            stage_seconds["wait"] = max(0.0, (datetime.datetime.now(datetime.timezone.utc) - finished_at).total_seconds())
+
+        algorithm_span = self._algorithm_spans.pop(run_id, None)
+        if algorithm_span is not None:
+            if not succeeded:
+                algorithm_span.set_error("job failed")
+            algorithm_span.end(end_time=finished_at.timestamp() if finished_at is not None else None)
+        harvest_span = TRACER.start_span("harvest", parent=TRACER.get_run_context(run_id),
+                                         attributes={"k8s.job.name": job_id})
+
+        # A job may finish before its POD was seen running (e.g., a very short algorithm)
+        with self._starting_runs_lock:
+            self._starting_runs.pop(run_id, None)
+
+        if succeeded:
+            self.log.info(f"Found a completed job with a (k8s) Succeded status: {job_id}. Returning result with v6-COMPLETED status")          
+
+            #get results: uploaded by the job's POD, or else by reading the output file created by the 'algorithm' container runned by the job (provisional convention: /output/avg.txt)
+            stage_start = time.perf_counter()
+            results = self.result_spool.take(run_id) if self.result_spool else None
+            if results is None:
+                try:
+                    results = self.__get_job_result(output_folder)
+                except FileNotFoundError:
+                    if not self.result_spool:
+                        raise
+                    self.log.warning(f"The output of run_id={run_id} was not uploaded, returning an empty result")
+                    results = b""
+            stage_seconds["output"] = time.perf_counter() - stage_start
                     
-                    elif job.status.failed:
-                        job_id = job.metadata.name
-                                                
-                        self.log.info(f"Found a completed job with a (k8s) Failed status: {job.metadata.name} (job_id = {job_id}). Returning result with v6-CRASHED status")
-                        
-                        #get PODs logs 
-                        pod_tty_output = self.__get_job_pod_logs(job_id=job_id,namespace="v6-jobs")
-
-                        #destroy POD
-                        #Should the POD be cleaned up in this case too?
-                        self.log.info(f"Cleaning up container & job POD {job.metadata.name} / {job_id}")
-                        self.batch_api.delete_namespaced_job(name=job_id, namespace="v6-jobs")
-                        self.__delete_job_related_pods(job_id=job_id,namespace="v6-jobs")
-                        self.log.info(f"Sending failure details of run_id={job.metadata.annotations['run_id']} and task_id={job.metadata.annotations['task_id']} back to the server")
-                        result = Result(
-                                run_id=job.metadata.annotations["run_id"],
-                                task_id=job.metadata.annotations["task_id"],
-                                logs=pod_tty_output,  
-                                data=b"",   
-                                status=TaskStatus.CRASHED,
-                                parent_id=job.metadata.annotations["task_parent_id"],
-                            )    
-                        completed_job = True
+            #get PODs logs 
+            stage_start = time.perf_counter()
+            pod_tty_output = self.__get_job_pod_logs(job_id=job_id,namespace="v6-jobs",pod_names=pod_names)
+            stage_seconds["logs"] = time.perf_counter() - stage_start
+
+            #destroy job, related POD(s) and task folder (in the background)
+            self.log.info(f"Cleaning up kubernetes Job {job.metadata.name} (job id = {job_id}) and related PODs")
+            stage_start = time.perf_counter()
+            self.__collect_harvested(job_id, index)
+            stage_seconds["cleanup"] = time.perf_counter() - stage_start
+
+
+            self.log.info(f"Sending results of run_id={run['run_id']} and task_id={run['task_id']} back to the server")
+            
+            result = Result(
+                    run_id=run["run_id"],
+                    task_id=run["task_id"],
+                    logs=pod_tty_output,  
+                    data=results,   
+                    status=TaskStatus.COMPLETED,
+                    parent_id=run["task_parent_id"],
+                )
+        
+        else:
+            self.log.info(f"Found a completed job with a (k8s) Failed status: {job.metadata.name} (job_id = {job_id}). Returning result with v6-CRASHED status")
+            
+            #get PODs logs 
+            stage_start = time.perf_counter()
+            pod_tty_output = self.__get_job_pod_logs(job_id=job_id,namespace="v6-jobs",pod_names=pod_names)
+            stage_seconds["logs"] = time.perf_counter() - stage_start
+
+            #destroy POD
+            #Should the POD be cleaned up in this case too?
+            self.log.info(f"Cleaning up container & job POD {job.metadata.name} / {job_id}")
+            stage_start = time.perf_counter()
+            self.__collect_harvested(job_id, index)
+            stage_seconds["cleanup"] = time.perf_counter() - stage_start
+            self.log.info(f"Sending failure details of run_id={run['run_id']} and task_id={run['task_id']} back to the server")
+            result = Result(
+                    run_id=run["run_id"],
+                    task_id=run["task_id"],
+                    logs=pod_tty_output,  
+                    data=b"",   
+                    status=TaskStatus.CRASHED,
+                    parent_id=run["task_parent_id"],
+                )    
+
+        if self.result_spool:
+            self.result_spool.release(run_id)
+
+        for stage, seconds in stage_seconds.items():
+            HARVEST_SECONDS.observe(seconds, stage=stage)
+            harvest_span.set_attribute(f"v6.harvest.{stage}_seconds", seconds)
+        harvest_span.end()
+        self.log.debug(f"Harvest stages of job {job_id} (seconds): "
+                       + ", ".join(f"{stage}={seconds:.3f}" for stage, seconds in stage_seconds.items()))
                     
         return result
 
 
+    def __collect_harvested(self, job_id: str, index: int | None) -> None:
+        """
+        Hand a harvested job over to the job GC (for a fan-out job, once all its runs were harvested)
+        """
+        if index is None:
+            self.job_gc.collect(job_id)
+        else:
+            self.__release_fanout_index(job_id, index)
+
+
 
 
     def __get_job_result(self,job_id:str)->bytes:
@@ -837,43 +2111,15 @@ class ContainerManager:
 
 
 
-    def __get_job_pod_logs(self,job_id:str,namespace="v6-jobs") -> List[str]:
+    def __get_job_pod_logs(self,job_id:str,namespace="v6-jobs",pod_names:set[str] | None = None) -> List[str]:
         """"
         Get the logs generated by the PODs created by a job.
         
         If there are multiple PODs created by the job (e.g., due to multiple failed execution attempts -see 
-        backofflimit setting-) all the POD logs are merged as one.
+        backofflimit setting-) the log of each POD is returned. The logs are streamed while the PODs run
+        (see PodLogCapture), and only a bounded excerpt of each one is kept in memory.
         """        
-
-        pods_tty_logs = []
-
-        job_selector = f"job-name={job_id}"
-        job_pods_list = self.core_api.list_namespaced_pod(namespace, label_selector=job_selector)
-
-        for job_pod in job_pods_list.items:
-
-            self.log.info(f"Getting logs from POD {job_pod.metadata.name}, created by job {job_id}")            
-            
-            pod_log = self.core_api.read_namespaced_pod_log(name=job_pod.metadata.name, namespace="v6-jobs", _preload_content=True)
-            
-            pods_tty_logs.append(f"LOGS of POD {job_pod.metadata.name} (created by job {job_id}) \n {pod_log}")
-            
-        return pods_tty_logs
-    
-
-    def __delete_job_related_pods(self,job_id,namespace="v6-job"):
-        """
-        Deletes all the PODs created by a Kubernetes job in a given namespace
-        """
-        job_selector = f"job-name={job_id}"
-        job_pods_list = self.core_api.list_namespaced_pod(namespace, label_selector=job_selector)
-        for job_pod in job_pods_list.items:
-            try:
-                self.log.info(f"Deleting pod {job_pod.metadata.name} of job {job_id}")
-                self.core_api.delete_namespaced_pod(job_pod.metadata.name, namespace)
-                self.log.info(f"Pod {job_pod.metadata.name} of job {job_id} deleted.")
-            except ApiException as e:
-                self.log.warn(f"Warning: POD {job_pod.metadata.name} of job {job_id} couldn't be deleted.")
+        return self.log_capture.get_logs(job_id, pod_names)
 
 
 
@@ -927,11 +2173,6 @@ class ContainerManager:
         """
 
 
-    #def kill_selected_tasks(
-    #    self, org_id: int, kill_list: list[ToBeKilled] = None
-    #) -> list[KilledRun]:
-
-
     def kill_tasks(
         self, org_id: int, kill_list: list[ToBeKilled] = None
     ) -> list[KilledRun]:
@@ -951,25 +2192,33 @@ class ContainerManager:
         list[KilledRun]
             List of dictionaries with information on killed tasks
         """
-        """
         if kill_list:
-            killed_runs = self.kill_selected_tasks(org_id=org_id, kill_list=kill_list)
-        else:
-            # received instruction to kill all tasks on this node
+            return self.kill_selected_tasks(org_id=org_id, kill_list=kill_list)
+
+        # received instruction to kill all tasks on this node
+        self.log.warn(
+            "Received instruction from server to kill all algorithms "
+            "running on this node. Executing that now..."
+        )
+        run_ids = set()
+        for job in self.informer.get_jobs():
+            if is_job_finished(job):
+                continue
+            fanout_runs = get_fanout_runs(job)
+            if fanout_runs is not None:
+                run_ids.update(str(run["run_id"]) for run in fanout_runs)
+            elif "run_id" in (job.metadata.annotations or {}):
+                run_ids.add(job.metadata.annotations["run_id"])
+        killed_runs = [killed_run for killed_run in map(self.__kill_run, sorted(run_ids, key=int)) if killed_run]
+        if len(killed_runs):
             self.log.warn(
-                "Received instruction from server to kill all algorithms "
-                "running on this node. Executing that now..."
+                "Killed the following run ids as instructed via socket:"
+                f" {', '.join([str(r.run_id) for r in killed_runs])}"
             )
-            killed_runs = self.cleanup_tasks()
-            if len(killed_runs):
-                self.log.warn(
-                    "Killed the following run ids as instructed via socket:"
-                    f" {', '.join([str(r.run_id) for r in killed_runs])}"
-                )
-            else:
-                self.log.warn("Instructed to kill tasks but none were running")
+        else:
+            self.log.warn("Instructed to kill tasks but none were running")
         return killed_runs
-        """
+
 
     def kill_selected_tasks(
         self, org_id: int, kill_list: list[ToBeKilled] = None
@@ -990,31 +2239,13 @@ class ContainerManager:
         list[KilledRun]
             List with information on killed tasks
         """
-        """
         killed_list = []
         for container_to_kill in kill_list:
             if container_to_kill["organization_id"] != org_id:
                 continue  # this run is on another node
-            # find the task
-            task = next(
-                (
-                    t
-                    for t in self.active_tasks
-                    if t.run_id == container_to_kill["run_id"]
-                ),
-                None,
-            )
-            if task:
-                self.log.info(f"Killing containers for run_id={task.run_id}")
-                self.active_tasks.remove(task)
-                task.cleanup()
-                killed_list.append(
-                    KilledRun(
-                        run_id=task.run_id,
-                        task_id=task.task_id,
-                        parent_id=task.parent_id,
-                    )
-                )
+            killed_run = self.__kill_run(container_to_kill["run_id"])
+            if killed_run:
+                killed_list.append(killed_run)
             else:
                 self.log.warn(
                     "Received instruction to kill run_id="
@@ -1022,7 +2253,54 @@ class ContainerManager:
                     "found running on this node."
                 )
         return killed_list
+
+
+    def __kill_run(self, run_id) -> KilledRun | None:
+        """
+        Stop a run that has not finished: its job is handed over to the job GC, and it is not
+        harvested. The run of a fan-out job index is not harvested either, but its POD keeps
+        running until the job is removed, once none of its runs is left (the PODs of a single
+        index of an Indexed job can't be stopped).
         """
+        run_id = str(run_id)
+        job = next(iter(self.informer.get_jobs_by_run_id(run_id)), None)
+        if job is None:
+            return None
+
+        job_name = job.metadata.name
+        fanout_runs = get_fanout_runs(job)
+        if fanout_runs is None:
+            index = None
+            run = job.metadata.annotations or {}
+            key = job_name
+        else:
+            index = next(i for i, r in enumerate(fanout_runs) if str(r["run_id"]) == run_id)
+            run = {name: str(value) for name, value in fanout_runs[index].items()}
+            key = get_fanout_key(job_name, index)
+
+        with self._queued_jobs_lock:
+            if key in self._queued_jobs:
+                # Already finished (and being harvested), failed to start, or killed
+                return None
+            self._queued_jobs.add(key)
+
+        self.log.info(f"Killing job and PODs of run_id={run_id}")
+        with self._starting_runs_lock:
+            self._starting_runs.pop(run_id, None)
+        algorithm_span = self._algorithm_spans.pop(run_id, None)
+        if algorithm_span is not None:
+            algorithm_span.set_error("killed")
+            algorithm_span.end()
+        if index is None and self.result_spool:
+            self.result_spool.release(run_id)
+        self.__collect_harvested(job_name, index)
+
+        parent_id = run.get("task_parent_id")
+        return KilledRun(
+            run_id=int(run_id),
+            task_id=int(run["task_id"]),
+            parent_id=int(parent_id) if parent_id not in (None, "None") else None,
+        )
 
 
     #def get_column_names(self, label: str, type_: str) -> list[str]:
@@ -0,0 +1,143 @@
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+from vantage6.common import logger_name
+from database_mounts import get_database_labels, is_file_database
+
+import logging
+import threading
+import time
+
+
+# Prefix of the labels of the cluster nodes that hold a copy of a node database, followed by
+# the database label (e.g., 'kubectl label node worker-1 v6.database/default=true')
+DEFAULT_NODE_LABEL_PREFIX = "v6.database/"
+
+# Well-known label with the name of each cluster node
+HOSTNAME_LABEL = "kubernetes.io/hostname"
+
+# Seconds between refreshes of the cluster nodes (and their database labels)
+LOCALITY_REFRESH_INTERVAL = 60
+
+
+class DataLocality:
+    """
+    Placement of the algorithm PODs next to the data they use: a run that requests a node
+    database stored on the cluster nodes' filesystems (i.e., mounted through a hostPath, see
+    database_mounts.DatabaseMountPlanner) can only run on the cluster nodes that hold it.
+
+    Which cluster nodes hold each database is given by the 'registry' of the configuration
+    (database label -> cluster node names), or else by the labels of the cluster nodes
+    (<node_label_prefix><database label>). The nodeAffinity of the runs' PODs is built from
+    these (see get_affinity): required, or only preferred with 'required: false'.
+
+    The cluster nodes and their labels are refreshed every LOCALITY_REFRESH_INTERVAL seconds,
+    so that the runs whose data is on none of the (schedulable) nodes are reported right away
+    instead of waiting for a POD that can't be scheduled (see get_candidate_nodes).
+    """
+
+    def __init__(self, core_api: client.CoreV1Api, locality_config: dict, databases: list[dict]):
+        """
+        Parameters
+        ----------
+        core_api: client.CoreV1Api
+            K8S Core API, to list the cluster nodes
+        locality_config: dict
+            'data_locality' section of the node configuration, with the optional keys
+            'node_label_prefix', 'registry', 'required' and 'refresh_interval'
+        databases: list[dict]
+            'databases' section of the node configuration
+        """
+        self.log = logging.getLogger(logger_name(__name__))
+
+        self.core_api = core_api
+        self.node_label_prefix = locality_config.get("node_label_prefix", DEFAULT_NODE_LABEL_PREFIX)
+        self.registry: dict[str, list[str]] = {
+            label: list(nodes) for label, nodes in (locality_config.get("registry") or {}).items()
+        }
+        self.required = locality_config.get("required", True)
+        self.refresh_interval = locality_config.get("refresh_interval", LOCALITY_REFRESH_INTERVAL)
+
+        # Databases stored on the cluster nodes' filesystems (not reached through a URL, e.g. SQL servers)
+        self.local_labels = {db["label"] for db in databases or [] if is_file_database(db)}
+        self.local_labels.update(self.registry)
+
+        self._lock = threading.Lock()
+        self._refreshed_at = 0.0
+        # Schedulable cluster node name -> its labels (None until the nodes could be listed)
+        self._nodes: dict[str, dict[str, str]] | None = None
+
+
+    def get_local_labels(self, databases_to_use: list) -> list[str]:
+        """
+        Labels of the requested databases that constrain the placement of the run (sorted)
+        """
+        return sorted({label for label in get_database_labels(databases_to_use) if label in self.local_labels})
+
+
+    def get_affinity(self, databases_to_use: list) -> client.V1Affinity | None:
+        """
+        nodeAffinity of the PODs of a run, so that they land on the cluster nodes that hold all
+        the (local) databases it requests. None if the run doesn't request any local database.
+        """
+        labels = self.get_local_labels(databases_to_use)
+        if not labels:
+            return None
+
+        # The expressions of a term are ANDed: nodes that hold every requested database
+        expressions = []
+        for label in labels:
+            if label in self.registry:
+                expressions.append(client.V1NodeSelectorRequirement(
+                    key=HOSTNAME_LABEL, operator="In", values=self.registry[label]))
+            else:
+                expressions.append(client.V1NodeSelectorRequirement(
+                    key=f"{self.node_label_prefix}{label}", operator="Exists"))
+        term = client.V1NodeSelectorTerm(match_expressions=expressions)
+
+        if self.required:
+            node_affinity = client.V1NodeAffinity(
+                required_during_scheduling_ignored_during_execution=client.V1NodeSelector(node_selector_terms=[term]))
+        else:
+            node_affinity = client.V1NodeAffinity(
+                preferred_during_scheduling_ignored_during_execution=[
+                    client.V1PreferredSchedulingTerm(weight=100, preference=term)])
+        return client.V1Affinity(node_affinity=node_affinity)
+
+
+    def get_candidate_nodes(self, databases_to_use: list) -> set[str] | None:
+        """
+        Schedulable cluster nodes that hold all the (local) databases requested by a run, or None
+        if the run doesn't request any local database or the cluster nodes couldn't be listed
+        """
+        labels = self.get_local_labels(databases_to_use)
+        if not labels:
+            return None
+        with self._lock:
+            self.__refresh_if_stale()
+            if self._nodes is None:
+                return None
+            candidates = set(self._nodes)
+            for label in labels:
+                if label in self.registry:
+                    candidates &= set(self.registry[label])
+                else:
+                    candidates = {node for node in candidates
+                                  if f"{self.node_label_prefix}{label}" in self._nodes[node]}
+            return candidates
+
+
+    def __refresh_if_stale(self) -> None:
+        if time.time() - self._refreshed_at < self.refresh_interval:
+            return
+        self._refreshed_at = time.time()
+        try:
+            nodes = {}
+            for node in self.core_api.list_node().items:
+                if node.spec and node.spec.unschedulable:
+                    continue
+                nodes[node.metadata.name] = dict(node.metadata.labels or {})
+        except ApiException as e:
+            self.log.warning(f"Couldn't refresh the cluster nodes (status {e.status}), using the previous ones")
+            return
+        self._nodes = nodes
+        self.log.debug(f"Cluster nodes refreshed: {sorted(nodes)}")
@@ -0,0 +1,123 @@
+from kubernetes import client
+from kubernetes.client import V1EnvVar
+from vantage6.common import logger_name
+from typing import NamedTuple
+
+import functools
+import hashlib
+import logging
+import re
+
+
+# Database types whose 'uri' is a file (or folder) on the cluster nodes, mounted (read only) on the
+# algorithm PODs. The URIs of the other types (e.g., 'sql', 'sparql', 'omop') are given as they are.
+# 'other' databases are mounted when their URI is a path, not a URL.
+FILE_DATABASE_TYPES = ("csv", "parquet", "excel", "sqlite")
+
+# Folder of the algorithm PODs on which the file databases are mounted (as /mnt/<label>)
+DATABASE_MOUNT_ROOT = "/mnt"
+
+# Maximum number of (distinct requested label lists) mount plans kept
+MOUNT_PLAN_CACHE_SIZE = 256
+
+
+class DatabaseMounts(NamedTuple):
+    """Volumes, volume mounts and environment variables of the databases requested by a run"""
+
+    volumes: tuple[client.V1Volume, ...]
+    volume_mounts: tuple[client.V1VolumeMount, ...]
+    env_vars: tuple[V1EnvVar, ...]
+
+
+def get_database_labels(databases_to_use: list) -> list[str]:
+    """
+    Labels of the databases requested by a run (given as labels, or as {'label': ...} dicts)
+    """
+    return [db["label"] if isinstance(db, dict) else db for db in databases_to_use or []]
+
+
+def is_file_database(database: dict) -> bool:
+    """
+    Whether a node database (entry of the 'databases' configuration) is a file on the cluster nodes
+    """
+    if database.get("type") in FILE_DATABASE_TYPES:
+        return True
+    return database.get("type", "other") == "other" and "://" not in str(database.get("uri", ""))
+
+
+def get_volume_name(label: str) -> str:
+    """
+    Name of the volume of a database: a valid (DNS-1123) name, unique per label
+    """
+    name = re.sub(r"[^a-z0-9-]+", "-", label.lower()).strip("-")[:40]
+    return f"db-{name}-{hashlib.sha1(label.encode('utf-8')).hexdigest()[:8]}"
+
+
+class DatabaseMountPlanner:
+    """
+    Mounts of the node databases ('databases' section of the node configuration) requested by a
+    run, and the environment variables that describe them to the algorithm, following the v6
+    conventions:
+
+        USER_REQUESTED_DATABASE_LABELS  labels of the requested databases (comma separated)
+        <LABEL>_DATABASE_URI            mount path of a file database, or URI of the others
+        <LABEL>_DATABASE_TYPE           type of the database
+        <LABEL>_DB_PARAM_<KEY>          each entry of the 'env' of the database
+
+    Only the requested databases are mounted. The requested labels that are not defined on the
+    node are left out (the container managers don't start such runs, see get_undefined_labels).
+    The plans are cached by list of requested labels, as most runs of a node request the same
+    few databases. The returned Kubernetes objects are shared by the runs, so they must not be
+    modified.
+    """
+
+    def __init__(self, databases: list[dict] | None):
+        self.log = logging.getLogger(logger_name(__name__))
+        self.databases = {db["label"]: db for db in databases or []}
+        self.plan = functools.lru_cache(maxsize=MOUNT_PLAN_CACHE_SIZE)(self._plan)
+
+
+    def get_mounts(self, databases_to_use: list) -> DatabaseMounts:
+        """
+        Mount plan of the databases requested by a run (see plan)
+        """
+        return self.plan(tuple(get_database_labels(databases_to_use)))
+
+
+    def get_undefined_labels(self, databases_to_use: list) -> list[str]:
+        """
+        Labels of the databases requested by a run that are not defined on this node
+        """
+        return [label for label in get_database_labels(databases_to_use) if label not in self.databases]
+
+
+    def _plan(self, labels: tuple[str, ...]) -> DatabaseMounts:
+        volumes = []
+        volume_mounts = []
+        defined_labels = [label for label in dict.fromkeys(labels) if label in self.databases]
+        if len(defined_labels) < len(set(labels)):
+            self.log.warning(f"Requested databases {sorted(set(labels) - set(defined_labels))} are not defined "
+                             f"on this node, they are not mounted")
+        env_vars = [V1EnvVar(name="USER_REQUESTED_DATABASE_LABELS", value=",".join(defined_labels))]
+
+        for label in defined_labels:
+            database = self.databases[label]
+            env_prefix = label.upper()
+            if is_file_database(database):
+                mount_path = f"{DATABASE_MOUNT_ROOT}/{label}"
+                volumes.append(client.V1Volume(
+                    name=get_volume_name(label),
+                    host_path=client.V1HostPathVolumeSource(path=database["uri"]),
+                ))
+                volume_mounts.append(client.V1VolumeMount(
+                    name=get_volume_name(label), mount_path=mount_path, read_only=True,
+                ))
+                env_vars.append(V1EnvVar(name=f"{env_prefix}_DATABASE_URI", value=mount_path))
+            else:
+                env_vars.append(V1EnvVar(name=f"{env_prefix}_DATABASE_URI", value=str(database["uri"])))
+            env_vars.append(V1EnvVar(name=f"{env_prefix}_DATABASE_TYPE", value=database.get("type", "other")))
+
+            for key, value in (database.get("env") or {}).items():
+                env_vars.append(V1EnvVar(name=f"{env_prefix}_DB_PARAM_{key.upper()}", value=str(value)))
+
+        return DatabaseMounts(tuple(volumes), tuple(volume_mounts), tuple(env_vars))
@@ -0,0 +1,117 @@
+from kubernetes import client, config, watch
+from vantage6.common import logger_name
+from abc import ABC, abstractmethod
+
+import logging
+import os
+import pod_node_constants
+
+
+class ExecutionBackend(ABC):
+    """
+    Execution backend of the ContainerManager: the K8S API clients used to run the algorithm
+    jobs and to watch their state.
+
+    Attributes
+    ----------
+    batch_api, core_api, apps_api
+        Batch/v1, core/v1 and apps/v1 API clients
+    running_on_guest_env: bool
+        Whether the node runs within a POD (the tasks folder is then mapped on
+        pod_node_constants.TASK_FILES_ROOT), or on a regular host
+    """
+
+    batch_api: client.BatchV1Api
+    core_api: client.CoreV1Api
+    apps_api: client.AppsV1Api
+    running_on_guest_env: bool = False
+
+
+    @abstractmethod
+    def new_watch(self) -> watch.Watch:
+        """
+        A new watch on the backend's API (see JobInformer)
+        """
+
+
+class KubernetesBackend(ExecutionBackend):
+    """
+    Backend on a real K8S cluster, configured from the kube config file of the host or, when
+    the node runs within a POD, from the one mounted on pod_node_constants.KUBE_CONFIG_FILE_PATH
+    """
+
+    def __init__(self):
+
+        self.log = logging.getLogger(logger_name(__name__))
+
+        #minik8s config, by default in the user's home directory root
+        home_dir = os.path.expanduser('~')
+        kube_config_file_path = os.path.join(home_dir, '.kube', 'config')
+
+        #Instanced within the host
+        if os.path.exists(kube_config_file_path):
+
+            self.running_on_guest_env = False
+            #default microk8s config
+            config.load_kube_config(kube_config_file_path)
+            self.log.info('>>> Loading K8S configuration file from the host filesystem (Node running on a regular host)')
+
+        #Instanced within a pod
+        elif os.path.exists(pod_node_constants.KUBE_CONFIG_FILE_PATH):
+
+            self.running_on_guest_env = True
+            #Default mount location defined on POD configuration
+            config.load_kube_config(pod_node_constants.KUBE_CONFIG_FILE_PATH)
+            self.log.info('>>> Loading K8S configuration file from a hostPath volume (Node running within a POD)')
+
+        # K8S Batch API instance
+        self.batch_api = client.BatchV1Api()
+        # K8S Core API instance
+        self.core_api = client.CoreV1Api()
+        # K8S Apps API instance
+        self.apps_api = client.AppsV1Api()
+
+
+    def new_watch(self) -> watch.Watch:
+        return watch.Watch()
+
+
+class FakeBackend(ExecutionBackend):
+    """
+    Backend on an in-memory simulated cluster (see fake_kubernetes.FakeKubernetes), to run and
+    load test the node without a K8S cluster. The node runs as on a regular host: the task
+    files are written on the 'task_dir' of the node configuration.
+    """
+
+    def __init__(self, cluster_config: dict | None = None):
+        # Imported here, as it is only needed for benchmarking
+        from fake_kubernetes import FakeKubernetes, FakeWatch
+
+        self.log = logging.getLogger(logger_name(__name__))
+        self.server = FakeKubernetes(cluster_config)
+        self._watch_class = FakeWatch
+
+        self.running_on_guest_env = False
+        self.batch_api = self.server.batch_api
+        self.core_api = self.server.core_api
+        self.apps_api = self.server.apps_api
+        self.log.info(f'>>> Using a simulated K8S cluster: {self.server.config}')
+
+
+    def new_watch(self):
+        return self._watch_class(self.server)
+
+
+def create_backend(v6_config: dict) -> ExecutionBackend:
+    """
+    Create the execution backend given on the 'execution_backend' section of the node
+    configuration: 'kubernetes' (default) or 'fake' (with the simulated cluster settings on
+    its 'fake_cluster' entry)
+    """
+    backend_config = v6_config.get("execution_backend") or {}
+    backend_type = backend_config.get("type", "kubernetes")
+    if backend_type == "kubernetes":
+        return KubernetesBackend()
+    if backend_type == "fake":
+        return FakeBackend(backend_config.get("fake_cluster"))
+    raise ValueError(f"Unknown execution backend type: {backend_type}")
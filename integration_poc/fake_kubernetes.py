@@ -0,0 +1,834 @@
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+from vantage6.common import logger_name
+from indexed_jobs import COMPLETION_INDEX_ANNOTATION, parse_indexes
+from result_spool import RESULT_UPLOADER_NAME
+from typing import Callable, Iterator
+
+import base64
+import copy
+import datetime
+import functools
+import heapq
+import itertools
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+
+import requests
+
+
+# Default behaviour of the simulated cluster (see FakeKubernetes)
+DEFAULT_FAKE_CLUSTER_CONFIG = {
+    # Seconds (mean) each API call takes
+    "api_latency": 0.005,
+    # Seconds from the creation of a POD until it is bound to a node
+    "scheduling_delay": 0.5,
+    # Seconds it takes to pull an image on a node (only the first time, with an IfNotPresent policy)
+    "pull_time": 5.0,
+    # Seconds (mean) the algorithm container runs
+    "run_time": 2.0,
+    # Probability that an algorithm container fails (exit code 1)
+    "failure_rate": 0.0,
+    # Probability that the image of a POD can't be pulled (ErrImagePull)
+    "pull_failure_rate": 0.0,
+    # Simulated cluster nodes and their allocatable resources
+    "nodes": 3,
+    "node_cpu": "8",
+    "node_memory": "32Gi",
+    # Labels of the simulated nodes, by node name (e.g., {'fake-node-0': {'v6.database/default': 'true'}})
+    "node_labels": {},
+    # Lines written by each algorithm container, and content of its output file
+    "log_lines": 20,
+    "output": "{}",
+    # Number of watch events kept: older resourceVersions are answered with 410 Gone
+    "event_history": 100000,
+}
+
+# Seconds between the attempts to mount the ConfigMaps/Secrets of a POD that don't exist yet
+MOUNT_RETRY_INTERVAL = 0.5
+
+
+def now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class FakeLogStream:
+    """
+    Stand-in for the (urllib3) response of a POD log request with _preload_content=False
+    """
+
+    def __init__(self, read_log: Callable[[], bytes]):
+        self._read_log = read_log
+
+
+    def stream(self, amt: int = 2 ** 16) -> Iterator[bytes]:
+        data = self._read_log()
+        for i in range(0, len(data), amt):
+            yield data[i:i + amt]
+
+
+    def release_conn(self) -> None:
+        pass
+
+
+class FakeKubernetes:
+    """
+    In-memory stand-in for the K8S API server and the Job/POD controllers, used to run (and
+    load test) the ContainerManager without a cluster (see execution_backend.FakeBackend).
+
+    It keeps Jobs, PODs, DaemonSets, ConfigMaps and Secrets (removed with the job that owns
+    them) with resourceVersions and a history of watch events (see FakeWatch), and simulates
+    the lifecycle of the jobs' PODs on a single thread: POD creation, scheduling on a node
+    (after 'scheduling_delay'), the mount of its ConfigMaps/Secrets, image pull (the first time an
+    image is used on a node, 'pull_time'), execution ('run_time', failing with probability
+    'failure_rate', and retried up to the job's backoffLimit), Job completion, and removal
+    of the finished Jobs with ttlSecondsAfterFinished. On success, the 'output' is written on
+    the job's output hostPath volume (if its folder exists). Every API call takes
+    'api_latency' seconds (mean).
+
+    Warm runner jobs (see WarmPool) stay running until a run is assigned to them.
+    """
+
+    def __init__(self, cluster_config: dict | None = None):
+
+        self.log = logging.getLogger(logger_name(__name__))
+
+        self.config = dict(DEFAULT_FAKE_CLUSTER_CONFIG, **(cluster_config or {}))
+        self.nodes = [f"fake-node-{i}" for i in range(self.config["nodes"])]
+
+        self._changed = threading.Condition()
+        self._resource_version = itertools.count(1)
+        self._last_resource_version = 0
+        # kind -> name -> object
+        self._objects: dict[str, dict[str, object]] = {"job": {}, "pod": {}, "daemonset": {}, "configmap": {}, "secret": {}}
+        # (resourceVersion, kind, event type, object snapshot)
+        self._events: list[tuple[int, str, str, object]] = []
+        # node -> images already pulled
+        self._pulled: dict[str, set[str]] = {node: set() for node in self.nodes}
+        self._next_node = itertools.cycle(self.nodes)
+        self.node_labels = {node: dict(self.config["node_labels"].get(node) or {}, **{"kubernetes.io/hostname": node})
+                            for node in self.nodes}
+        self._random = random.Random(self.config.get("seed"))
+
+        # Number of calls per API method
+        self.calls: dict[str, int] = {}
+
+        self.batch_api = FakeBatchV1Api(self)
+        self.core_api = FakeCoreV1Api(self)
+        self.apps_api = FakeAppsV1Api(self)
+
+        # Simulated controllers: (time, sequence, action)
+        self._timers: list[tuple[float, int, Callable[[], None]]] = []
+        self._timer_seq = itertools.count()
+        threading.Thread(target=self.__controller_worker, name="fake-k8s-controller", daemon=True).start()
+
+
+    # ---------------------------------------------------------------- store
+
+    def api_call(self, method: str) -> None:
+        """
+        Account for a call to the API, taking the simulated latency
+        """
+        with self._changed:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        latency = self.config["api_latency"]
+        if latency:
+            time.sleep(self._random.uniform(0.5 * latency, 1.5 * latency))
+
+
+    def list_objects(self, kind: str, namespace: str | None = None) -> tuple[list, str]:
+        with self._changed:
+            items = [copy.deepcopy(obj) for obj in self._objects[kind].values()
+                     if namespace is None or obj.metadata.namespace == namespace]
+            return items, str(self._last_resource_version)
+
+
+    def get(self, kind: str, name: str):
+        with self._changed:
+            obj = self._objects[kind].get(name)
+            if obj is None:
+                raise ApiException(status=404, reason="NotFound")
+            return copy.deepcopy(obj)
+
+
+    def put(self, kind: str, obj, event_type: str) -> None:
+        """
+        Store (a new version of) an object, and record the corresponding watch event
+        """
+        with self._changed:
+            obj.metadata.resource_version = str(self.__next_resource_version())
+            self._objects[kind][obj.metadata.name] = obj
+            self.__record_event(kind, event_type, obj)
+
+
+    def update(self, kind: str, name: str, mutate: Callable[[object], None]):
+        """
+        Apply a change to (a copy of) a stored object, atomically
+
+        Returns
+        -------
+        object | None
+            A copy of the updated object, or None if it doesn't exist
+        """
+        with self._changed:
+            obj = self._objects[kind].get(name)
+            if obj is None:
+                return None
+            obj = copy.deepcopy(obj)
+            mutate(obj)
+            self.put(kind, obj, "MODIFIED")
+            return copy.deepcopy(obj)
+
+
+    def replace(self, kind: str, obj) -> bool:
+        """
+        Store a new version of an object, unless it was removed meanwhile
+        """
+        with self._changed:
+            if obj.metadata.name not in self._objects[kind]:
+                return False
+            self.put(kind, obj, "MODIFIED")
+            return True
+
+
+    def mark_pulled(self, image: str) -> None:
+        """
+        Make an image available on every node (e.g., pre-pulled by a DaemonSet)
+        """
+        with self._changed:
+            for pulled in self._pulled.values():
+                pulled.add(image)
+
+
+    def remove(self, kind: str, name: str):
+        with self._changed:
+            obj = self._objects[kind].pop(name, None)
+            if obj is None:
+                raise ApiException(status=404, reason="NotFound")
+            obj.metadata.resource_version = str(self.__next_resource_version())
+            self.__record_event(kind, "DELETED", obj)
+            return obj
+
+
+    def events_after(self, kind: str, resource_version: int, timeout: float) -> list[tuple[int, str, object]]:
+        """
+        Watch events of a kind after the given resourceVersion, waiting up to 'timeout' seconds
+        for one. Raises a 410 (Gone) ApiException if the resourceVersion is no longer kept.
+        """
+        with self._changed:
+            if self._events and resource_version < self._events[0][0] - 1:
+                raise ApiException(status=410, reason="Expired")
+            events = self.__find_events(kind, resource_version)
+            if not events and timeout > 0:
+                self._changed.wait(timeout)
+                events = self.__find_events(kind, resource_version)
+            return events
+
+
+    def __find_events(self, kind: str, resource_version: int) -> list[tuple[int, str, object]]:
+        if not self._events or self._events[-1][0] <= resource_version:
+            return []
+        # Events are ordered by resourceVersion
+        low, high = 0, len(self._events)
+        while low < high:
+            mid = (low + high) // 2
+            if self._events[mid][0] <= resource_version:
+                low = mid + 1
+            else:
+                high = mid
+        return [(rv, event_type, obj) for rv, k, event_type, obj in self._events[low:] if k == kind]
+
+
+    def __next_resource_version(self) -> int:
+        self._last_resource_version = next(self._resource_version)
+        return self._last_resource_version
+
+
+    def __record_event(self, kind: str, event_type: str, obj) -> None:
+        self._events.append((int(obj.metadata.resource_version), kind, event_type, copy.deepcopy(obj)))
+        if len(self._events) > self.config["event_history"]:
+            del self._events[:len(self._events) - self.config["event_history"]]
+        self._changed.notify_all()
+
+
+    # ---------------------------------------------------------- controllers
+
+    def schedule(self, delay: float, action: Callable[[], None]) -> None:
+        with self._changed:
+            heapq.heappush(self._timers, (time.time() + delay, next(self._timer_seq), action))
+            self._changed.notify_all()
+
+
+    def __controller_worker(self) -> None:
+        while True:
+            with self._changed:
+                while not self._timers or self._timers[0][0] > time.time():
+                    self._changed.wait(self._timers[0][0] - time.time() if self._timers else None)
+                _, _, action = heapq.heappop(self._timers)
+            try:
+                action()
+            except Exception:
+                self.log.exception("Fake K8S: error while simulating a job")
+
+
+    def create_job(self, job: client.V1Job, namespace: str) -> client.V1Job:
+        job = copy.deepcopy(job)
+        job.metadata.namespace = namespace
+        job.metadata.uid = str(uuid.uuid4())
+        job.metadata.creation_timestamp = now()
+        job.status = client.V1JobStatus()
+        with self._changed:
+            if job.metadata.name in self._objects["job"]:
+                raise ApiException(status=409, reason="AlreadyExists")
+            self.put("job", job, "ADDED")
+        if job.spec.completion_mode == "Indexed":
+            # A POD per completion index (parallelism = completions)
+            for index in range(job.spec.completions):
+                self.schedule(0, functools.partial(self.__create_pod, job.metadata.name, index))
+        else:
+            self.schedule(0, lambda: self.__create_pod(job.metadata.name))
+        return copy.deepcopy(job)
+
+
+    def create_object(self, kind: str, obj, namespace: str):
+        """
+        Store a new ConfigMap or Secret
+        """
+        obj = copy.deepcopy(obj)
+        obj.metadata.namespace = namespace
+        obj.metadata.uid = str(uuid.uuid4())
+        obj.metadata.creation_timestamp = now()
+        with self._changed:
+            if obj.metadata.name in self._objects[kind]:
+                raise ApiException(status=409, reason="AlreadyExists")
+            self.put(kind, obj, "ADDED")
+        return copy.deepcopy(obj)
+
+
+    def delete_job(self, name: str, propagation_policy: str | None) -> None:
+        job = self.remove("job", name)
+        # The API default for Jobs is to orphan their PODs
+        if propagation_policy in ("Background", "Foreground"):
+            for pod in self.pods_of_job(name):
+                self.delete_pod(pod.metadata.name)
+        # The objects owned by the job (e.g., the input/token of its run) are garbage collected
+        for kind in ("configmap", "secret"):
+            with self._changed:
+                owned = [obj.metadata.name for obj in self._objects[kind].values()
+                         if any(ref.uid == job.metadata.uid for ref in obj.metadata.owner_references or [])]
+            for obj_name in owned:
+                try:
+                    self.remove(kind, obj_name)
+                except ApiException:
+                    pass
+
+
+    def delete_pod(self, name: str) -> None:
+        try:
+            self.remove("pod", name)
+        except ApiException:
+            pass
+
+
+    def pods_of_job(self, job_name: str) -> list:
+        with self._changed:
+            return [pod for pod in self._objects["pod"].values() if pod.metadata.labels.get("job-name") == job_name]
+
+
+    def __job(self, name: str) -> client.V1Job | None:
+        with self._changed:
+            job = self._objects["job"].get(name)
+            return copy.deepcopy(job) if job else None
+
+
+    def __pod(self, name: str) -> client.V1Pod | None:
+        with self._changed:
+            pod = self._objects["pod"].get(name)
+            return copy.deepcopy(pod) if pod else None
+
+
+    def __create_pod(self, job_name: str, index: int | None = None) -> None:
+        job = self.__job(job_name)
+        if job is None:
+            return
+        template = job.spec.template
+        pod = client.V1Pod(
+            api_version="v1",
+            kind="Pod",
+            metadata=client.V1ObjectMeta(
+                name=f"{job_name}-{'' if index is None else f'{index}-'}{uuid.uuid4().hex[:5]}",
+                namespace=job.metadata.namespace,
+                labels=dict(template.metadata.labels or {}, **{"job-name": job_name}),
+                annotations={COMPLETION_INDEX_ANNOTATION: str(index)} if index is not None else None,
+                uid=str(uuid.uuid4()),
+                creation_timestamp=now(),
+            ),
+            spec=copy.deepcopy(template.spec),
+            # The PodScheduled condition is only set once the scheduler made a decision
+            status=client.V1PodStatus(phase="Pending"),
+        )
+        self.put("pod", pod, "ADDED")
+
+        def add_active(job):
+            job.status.active = (job.status.active or 0) + 1
+        self.update("job", job_name, add_active)
+        self.schedule(self.config["scheduling_delay"], lambda: self.__bind_pod(pod.metadata.name))
+
+
+    def __bind_pod(self, pod_name: str) -> None:
+        pod = self.__pod(pod_name)
+        if pod is None:
+            return
+        node = self.__select_node(pod)
+        if node is None:
+            # Unschedulable (e.g., no node matches its nodeAffinity): retried as the K8S scheduler does
+            self.schedule(self.config["scheduling_delay"], lambda: self.__bind_pod(pod_name))
+            return
+        pod.spec.node_name = node
+        pod.status.conditions = [client.V1PodCondition(type="PodScheduled", status="True", last_transition_time=now())]
+        container = pod.spec.containers[0]
+        pod.status.container_statuses = [client.V1ContainerStatus(
+            name=container.name, image=container.image, image_id="", ready=False, restart_count=0,
+            state=client.V1ContainerState(waiting=client.V1ContainerStateWaiting(reason="ContainerCreating")),
+        )]
+
+        if self._random.random() < self.config["pull_failure_rate"]:
+            pod.status.container_statuses[0].state = client.V1ContainerState(waiting=client.V1ContainerStateWaiting(
+                reason="ErrImagePull", message=f"simulated pull failure of {container.image}"
+            ))
+            self.replace("pod", pod)
+            return
+
+        if not self.replace("pod", pod):
+            return
+        with self._changed:
+            pulled = container.image in self._pulled[node] and container.image_pull_policy != "Always"
+            self._pulled[node].add(container.image)
+        self.schedule(0 if pulled else self.config["pull_time"], lambda: self.__start_pod(pod_name))
+
+
+    def __select_node(self, pod: client.V1Pod) -> str | None:
+        """
+        Next node (round robin) that matches the required nodeAffinity of a POD, if any
+        """
+        node_affinity = pod.spec.affinity.node_affinity if pod.spec.affinity else None
+        required = node_affinity.required_during_scheduling_ignored_during_execution if node_affinity else None
+        for _ in range(len(self.nodes)):
+            node = next(self._next_node)
+            if required is None or any(self.__matches(node, term) for term in required.node_selector_terms):
+                return node
+        return None
+
+
+    def __matches(self, node: str, term: client.V1NodeSelectorTerm) -> bool:
+        labels = self.node_labels[node]
+        for expression in term.match_expressions or []:
+            value = labels.get(expression.key)
+            if expression.operator == "In" and value not in (expression.values or []):
+                return False
+            if expression.operator == "NotIn" and value in (expression.values or []):
+                return False
+            if expression.operator == "Exists" and expression.key not in labels:
+                return False
+            if expression.operator == "DoesNotExist" and expression.key in labels:
+                return False
+        return True
+
+
+    def __start_pod(self, pod_name: str) -> None:
+        pod = self.__pod(pod_name)
+        if pod is None:
+            return
+        if not self.__volumes_available(pod):
+            # The kubelet retries the mount of the missing ConfigMaps/Secrets
+            self.schedule(MOUNT_RETRY_INTERVAL, lambda: self.__start_pod(pod_name))
+            return
+        image = pod.spec.containers[0].image
+        digest = "sha256:" + uuid.uuid5(uuid.NAMESPACE_URL, image.split("@")[0]).hex * 2
+        pod.status.phase = "Running"
+        pod.status.start_time = now()
+        pod.status.container_statuses[0].image_id = f"{image.split('@')[0]}@{digest}"
+        pod.status.container_statuses[0].ready = True
+        pod.status.container_statuses[0].state = client.V1ContainerState(
+            running=client.V1ContainerStateRunning(started_at=now())
+        )
+        if not self.replace("pod", pod):
+            return
+
+        job = self.__job(pod.metadata.labels["job-name"])
+        if job is None:
+            return
+        if (job.metadata.labels or {}).get("role") == "v6_warm_runner" and "run_id" not in (job.metadata.annotations or {}):
+            # A warm runner waits until a run is assigned (see patch_job)
+            return
+        self.__schedule_finish(pod_name)
+
+
+    def __volumes_available(self, pod: client.V1Pod) -> bool:
+        with self._changed:
+            for volume in pod.spec.volumes or []:
+                if volume.config_map and volume.config_map.name not in self._objects["configmap"]:
+                    return False
+                if volume.secret and volume.secret.secret_name not in self._objects["secret"]:
+                    return False
+        return True
+
+
+    def __schedule_finish(self, pod_name: str) -> None:
+        run_time = self._random.expovariate(1 / self.config["run_time"]) if self.config["run_time"] else 0
+        self.schedule(run_time, lambda: self.__finish_pod(pod_name))
+
+
+    def __finish_pod(self, pod_name: str) -> None:
+        pod = self.__pod(pod_name)
+        if pod is None:
+            return
+        failed = self._random.random() < self.config["failure_rate"]
+        pod.status.phase = "Failed" if failed else "Succeeded"
+        pod.status.container_statuses[0].ready = False
+        pod.status.container_statuses[0].state = client.V1ContainerState(terminated=client.V1ContainerStateTerminated(
+            exit_code=1 if failed else 0, reason="Error" if failed else "Completed", finished_at=now(),
+            started_at=pod.status.container_statuses[0].state.running.started_at,
+        ))
+        if not failed:
+            self.__write_output(pod)
+        # The POD only finishes once its result uploader (sidecar) exits
+        self.__upload_output(pod)
+        if not self.replace("pod", pod):
+            return
+
+        index = pod.metadata.annotations.get(COMPLETION_INDEX_ANNOTATION) if pod.metadata.annotations else None
+
+        def record_index_result(job):
+            # Indexed job with a backoff limit per index: each index is retried on its own, and the job
+            # finishes once all its indexes either completed or failed
+            job.status.active = max((job.status.active or 1) - 1, 0) or None
+            completed = parse_indexes(job.status.completed_indexes)
+            failed_indexes = parse_indexes(job.status.failed_indexes)
+            if failed:
+                job.status.failed = (job.status.failed or 0) + 1
+                index_failures = sum(1 for p in self.pods_of_job(job.metadata.name)
+                                     if p.metadata.annotations.get(COMPLETION_INDEX_ANNOTATION) == index
+                                     and p.status.phase == "Failed")
+                if index_failures > job.spec.backoff_limit_per_index:
+                    failed_indexes.add(int(index))
+            else:
+                completed.add(int(index))
+            job.status.completed_indexes = ",".join(str(i) for i in sorted(completed)) or None
+            job.status.failed_indexes = ",".join(str(i) for i in sorted(failed_indexes)) or None
+            job.status.succeeded = len(completed) or None
+            if len(completed) + len(failed_indexes) < job.spec.completions:
+                return
+            if failed_indexes:
+                job.status.conditions = [client.V1JobCondition(
+                    type="Failed", status="True", reason="FailedIndexes", last_transition_time=now()
+                )]
+            else:
+                job.status.completion_time = now()
+                job.status.conditions = [client.V1JobCondition(type="Complete", status="True", last_transition_time=now())]
+
+        def record_pod_result(job):
+            if index is not None and job.spec.backoff_limit_per_index is not None:
+                record_index_result(job)
+                return
+            job.status.active = max((job.status.active or 1) - 1, 0) or None
+            if not failed and index is not None:
+                completed = parse_indexes(job.status.completed_indexes) | {int(index)}
+                job.status.completed_indexes = ",".join(str(i) for i in sorted(completed))
+                job.status.succeeded = len(completed)
+                if len(completed) < job.spec.completions:
+                    return
+            if not failed:
+                job.status.succeeded = job.status.succeeded or 1
+                job.status.completion_time = now()
+                job.status.conditions = [client.V1JobCondition(type="Complete", status="True", last_transition_time=now())]
+                return
+            job.status.failed = (job.status.failed or 0) + 1
+            backoff_limit = job.spec.backoff_limit if job.spec.backoff_limit is not None else 6
+            if job.status.failed > backoff_limit:
+                job.status.conditions = [client.V1JobCondition(
+                    type="Failed", status="True", reason="BackoffLimitExceeded", last_transition_time=now()
+                )]
+
+        job = self.update("job", pod.metadata.labels["job-name"], record_pod_result)
+        if job is None:
+            return
+        if failed and not job.status.conditions and (index is None or int(index) not in parse_indexes(job.status.failed_indexes)):
+            # Retry (backoffLimit, or the index's backoffLimitPerIndex, not reached yet)
+            self.schedule(0, lambda: self.__create_pod(job.metadata.name, None if index is None else int(index)))
+        if job.status.conditions and job.spec.ttl_seconds_after_finished is not None:
+            self.schedule(job.spec.ttl_seconds_after_finished, lambda: self.__expire_job(job.metadata.name))
+
+
+    def __expire_job(self, job_name: str) -> None:
+        try:
+            self.delete_job(job_name, propagation_policy="Background")
+        except ApiException:
+            pass
+
+
+    def __write_output(self, pod: client.V1Pod) -> None:
+        for volume in pod.spec.volumes or []:
+            if not volume.host_path:
+                continue
+            if volume.name.endswith("-output"):
+                path = volume.host_path.path
+            elif volume.name.endswith("-slot"):
+                path = os.path.join(volume.host_path.path, "output")
+            elif volume.name.endswith("-runs"):
+                # Fan-out job: the folder of the POD's completion index
+                path = os.path.join(volume.host_path.path, pod.metadata.annotations[COMPLETION_INDEX_ANNOTATION], "output")
+            else:
+                continue
+            if os.path.isdir(os.path.dirname(path)):
+                with open(path, "w") as output_file:
+                    output_file.write(self.config["output"])
+
+
+    def __upload_output(self, pod: client.V1Pod) -> None:
+        """
+        Simulate the result uploader sidecar of a POD (if any): PUT the 'output' (empty if the
+        algorithm failed) to the node proxy, authenticated with the token mounted on the sidecar
+        """
+        uploader = next((c for c in pod.spec.init_containers or [] if c.name == RESULT_UPLOADER_NAME), None)
+        if uploader is None:
+            return
+        env = {env_var.name: env_var.value for env_var in uploader.env or []}
+        volumes = {volume.name: volume for volume in pod.spec.volumes or []}
+        token = None
+        for mount in uploader.volume_mounts or []:
+            volume = volumes.get(mount.name)
+            if volume is None or mount.mount_path != env.get("TOKEN_FILE"):
+                continue
+            if volume.host_path:
+                with open(volume.host_path.path) as token_file:
+                    token = token_file.read()
+            elif volume.secret:
+                with self._changed:
+                    secret = self._objects["secret"].get(volume.secret.secret_name)
+                token = base64.b64decode(secret.data[mount.sub_path]).decode("ascii") if secret else None
+        output = self.config["output"] if pod.status.phase == "Succeeded" else ""
+        try:
+            requests.put(f"http://{env.get('HOST')}:{env.get('PORT')}/output", data=output.encode("utf-8"),
+                         headers={"Authorization": f"Bearer {token}"}, timeout=5).raise_for_status()
+        except Exception as e:
+            self.log.warning(f"Fake K8S: could not upload the output of POD {pod.metadata.name}: {e}")
+
+
+    def patch_job(self, name: str, body: dict) -> client.V1Job:
+        annotations = ((body.get("metadata") or {}).get("annotations")) or {}
+        was_assigned = []
+
+        def merge_annotations(job):
+            was_assigned.append("run_id" in (job.metadata.annotations or {}))
+            job.metadata.annotations = dict(job.metadata.annotations or {}, **annotations)
+
+        job = self.update("job", name, merge_annotations)
+        if job is None:
+            raise ApiException(status=404, reason="NotFound")
+
+        if not was_assigned[0] and "run_id" in annotations:
+            for pod in self.pods_of_job(name):
+                if pod.status.phase == "Running":
+                    self.__schedule_finish(pod.metadata.name)
+        return job
+
+
+    def read_pod_log(self, name: str, follow: bool, tail_lines: int | None, limit_bytes: int | None) -> bytes:
+        """
+        Log of a POD. When following, it is returned once the POD finished.
+        """
+        with self._changed:
+            if follow:
+                self._changed.wait_for(lambda: name not in self._objects["pod"]
+                                       or self._objects["pod"][name].status.phase in ("Succeeded", "Failed"))
+            pod = self._objects["pod"].get(name)
+            if pod is None:
+                raise ApiException(status=404, reason="NotFound")
+        lines = [f"[{pod.metadata.name}] simulated algorithm log line {i}\n" for i in range(self.config["log_lines"])]
+        if pod.status.phase == "Pending":
+            lines = []
+        if tail_lines is not None:
+            lines = lines[-tail_lines:] if tail_lines else []
+        data = "".join(lines).encode("utf-8")
+        return data[:limit_bytes] if limit_bytes is not None else data
+
+
+class FakeWatch:
+    """
+    Stand-in for kubernetes.watch.Watch, streaming the events recorded by a FakeKubernetes
+    """
+
+    def __init__(self, server: FakeKubernetes):
+        self.server = server
+        self._stopped = False
+
+
+    def stop(self) -> None:
+        self._stopped = True
+
+
+    def stream(self, func: Callable, *args, resource_version: str | None = None,
+               timeout_seconds: int | None = None, **kwargs) -> Iterator[dict]:
+        kind = func.__self__.kind_of(func.__name__)
+        deadline = time.time() + (timeout_seconds or 300)
+        resource_version = int(resource_version or 0)
+        while not self._stopped and time.time() < deadline:
+            for rv, event_type, obj in self.server.events_after(kind, resource_version, min(1.0, deadline - time.time())):
+                resource_version = rv
+                yield {"type": event_type, "object": copy.deepcopy(obj), "raw_object": {}}
+                if self._stopped:
+                    return
+
+
+class FakeBatchV1Api:
+
+    def __init__(self, server: FakeKubernetes):
+        self.server = server
+
+
+    def kind_of(self, method: str) -> str:
+        return "job"
+
+
+    def list_namespaced_job(self, namespace: str, **kwargs) -> client.V1JobList:
+        self.server.api_call("list_namespaced_job")
+        items, resource_version = self.server.list_objects("job", namespace)
+        return client.V1JobList(items=items, metadata=client.V1ListMeta(resource_version=resource_version))
+
+
+    def create_namespaced_job(self, namespace: str, body: client.V1Job, **kwargs) -> client.V1Job:
+        self.server.api_call("create_namespaced_job")
+        return self.server.create_job(body, namespace)
+
+
+    def patch_namespaced_job(self, name: str, namespace: str, body: dict, **kwargs) -> client.V1Job:
+        self.server.api_call("patch_namespaced_job")
+        return self.server.patch_job(name, body)
+
+
+    def delete_namespaced_job(self, name: str, namespace: str, propagation_policy: str | None = None, **kwargs) -> None:
+        self.server.api_call("delete_namespaced_job")
+        self.server.delete_job(name, propagation_policy)
+
+
+class FakeCoreV1Api:
+
+    def __init__(self, server: FakeKubernetes):
+        self.server = server
+
+
+    def kind_of(self, method: str) -> str:
+        return "pod"
+
+
+    def list_namespaced_pod(self, namespace: str, **kwargs) -> client.V1PodList:
+        self.server.api_call("list_namespaced_pod")
+        items, resource_version = self.server.list_objects("pod", namespace)
+        return client.V1PodList(items=items, metadata=client.V1ListMeta(resource_version=resource_version))
+
+
+    def list_pod_for_all_namespaces(self, field_selector: str | None = None, **kwargs) -> client.V1PodList:
+        self.server.api_call("list_pod_for_all_namespaces")
+        items, resource_version = self.server.list_objects("pod")
+        if field_selector:
+            excluded = re.findall(r"status\.phase!=(\w+)", field_selector)
+            items = [pod for pod in items if pod.status.phase not in excluded]
+        return client.V1PodList(items=items, metadata=client.V1ListMeta(resource_version=resource_version))
+
+
+    def read_namespaced_pod_log(self, name: str, namespace: str, follow: bool = False, tail_lines: int | None = None,
+                                limit_bytes: int | None = None, _preload_content: bool = True, **kwargs):
+        self.server.api_call("read_namespaced_pod_log")
+        if _preload_content:
+            return self.server.read_pod_log(name, follow, tail_lines, limit_bytes).decode("utf-8")
+        if not follow:
+            data = self.server.read_pod_log(name, follow, tail_lines, limit_bytes)
+            return FakeLogStream(lambda: data)
+        self.server.get("pod", name)
+        return FakeLogStream(lambda: self.server.read_pod_log(name, follow, tail_lines, limit_bytes))
+
+
+    def delete_namespaced_pod(self, name: str, namespace: str, **kwargs) -> None:
+        self.server.api_call("delete_namespaced_pod")
+        self.server.remove("pod", name)
+
+
+    def delete_collection_namespaced_pod(self, namespace: str, label_selector: str = "", **kwargs) -> None:
+        self.server.api_call("delete_collection_namespaced_pod")
+        match = re.fullmatch(r"job-name in \((.*)\)", label_selector)
+        job_names = set(match.group(1).split(",")) if match else set()
+        for job_name in job_names:
+            for pod in self.server.pods_of_job(job_name):
+                self.server.delete_pod(pod.metadata.name)
+
+
+    def list_node(self, **kwargs) -> client.V1NodeList:
+        self.server.api_call("list_node")
+        config = self.server.config
+        return client.V1NodeList(items=[
+            client.V1Node(
+                metadata=client.V1ObjectMeta(name=node, labels=dict(self.server.node_labels[node])),
+                spec=client.V1NodeSpec(unschedulable=False),
+                status=client.V1NodeStatus(allocatable={"cpu": config["node_cpu"], "memory": config["node_memory"]}),
+            )
+            for node in self.server.nodes
+        ])
+
+
+    def list_namespaced_resource_quota(self, namespace: str, **kwargs) -> client.V1ResourceQuotaList:
+        self.server.api_call("list_namespaced_resource_quota")
+        return client.V1ResourceQuotaList(items=[])
+
+
+    def create_namespaced_config_map(self, namespace: str, body: client.V1ConfigMap, **kwargs) -> client.V1ConfigMap:
+        self.server.api_call("create_namespaced_config_map")
+        return self.server.create_object("configmap", body, namespace)
+
+
+    def create_namespaced_secret(self, namespace: str, body: client.V1Secret, **kwargs) -> client.V1Secret:
+        self.server.api_call("create_namespaced_secret")
+        return self.server.create_object("secret", body, namespace)
+
+
+class FakeAppsV1Api:
+
+    def __init__(self, server: FakeKubernetes):
+        self.server = server
+
+
+    def read_namespaced_daemon_set(self, name: str, namespace: str, **kwargs) -> client.V1DaemonSet:
+        self.server.api_call("read_namespaced_daemon_set")
+        return self.server.get("daemonset", name)
+
+
+    def create_namespaced_daemon_set(self, namespace: str, body: client.V1DaemonSet, **kwargs) -> client.V1DaemonSet:
+        self.server.api_call("create_namespaced_daemon_set")
+        return self.__store(namespace, body, "ADDED")
+
+
+    def replace_namespaced_daemon_set(self, name: str, namespace: str, body: client.V1DaemonSet,
+                                      **kwargs) -> client.V1DaemonSet:
+        self.server.api_call("replace_namespaced_daemon_set")
+        self.server.get("daemonset", name)
+        return self.__store(namespace, body, "MODIFIED")
+
+
+    def __store(self, namespace: str, body: client.V1DaemonSet, event_type: str) -> client.V1DaemonSet:
+        daemon_set = copy.deepcopy(body)
+        daemon_set.metadata.namespace = namespace
+        # The images of the DaemonSet are available on every node right away
+        nodes = len(self.server.nodes)
+        daemon_set.status = client.V1DaemonSetStatus(
+            current_number_scheduled=nodes, desired_number_scheduled=nodes, number_misscheduled=0,
+            number_ready=nodes, updated_number_scheduled=nodes,
+        )
+        for container in daemon_set.spec.template.spec.containers:
+            self.server.mark_pulled(container.image)
+        self.server.put("daemonset", daemon_set, event_type)
+        return copy.deepcopy(daemon_set)
@@ -0,0 +1,290 @@
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+from vantage6.common import logger_name
+from vantage6.common.metrics import Counter, Gauge, Histogram
+from job_informer import JobInformer
+
+import logging
+import re
+import threading
+import time
+
+
+# Seconds between two updates of the pre-pull DaemonSet
+PREPULL_RECONCILE_INTERVAL = 60
+
+# Default number of (most recently used) images kept warm on the cluster nodes
+DEFAULT_MAX_IMAGES = 10
+
+# Default seconds an image is kept warm after its last run
+DEFAULT_RETENTION_SECONDS = 24 * 60 * 60
+
+# Default seconds the jobs of an image are pinned to the digest resolved from its last run by
+# tag, after which a job runs the tag again so that the digest is checked against the registry
+DEFAULT_DIGEST_TTL_SECONDS = 60 * 60
+
+# Image providing the (static) binary used to keep the pre-pulled images' containers idle
+DEFAULT_HELPER_IMAGE = "busybox:1.36"
+
+PREPULL_DAEMONSET_NAME = "v6-image-prepull"
+
+# 'role' labels of the PODs running algorithm images (regular and warm runners)
+ALGORITHM_POD_ROLES = ("v6_alg_runner", "v6_warm_runner")
+
+# Path where the helper binary is copied, within the pre-pull containers
+PREPULL_BIN_PATH = "/prepull"
+
+IMAGE_CACHE_REQUESTS = Counter(
+    "v6_node_image_cache_requests_total",
+    "Runs whose image was (hit) or was not (miss) kept warm on the cluster nodes", ["result"],
+)
+WARM_IMAGES = Gauge("v6_node_warm_images", "Images kept warm on the cluster nodes by the pre-pull DaemonSet")
+POD_CONTAINER_START_SECONDS = Histogram(
+    "v6_node_pod_container_start_seconds",
+    "Time from the scheduling of an algorithm POD until its container starts (mostly, the image pull)",
+)
+
+
+def get_pod_start_seconds(pod: client.V1Pod) -> float | None:
+    """
+    Seconds between the scheduling of a POD and the start of its (first) container, i.e., the
+    time spent pulling the image (if needed) and creating the container. None if the POD has
+    not started yet.
+    """
+    if not pod.status:
+        return None
+    scheduled_at = next(
+        (c.last_transition_time for c in pod.status.conditions or []
+         if c.type == "PodScheduled" and c.status == "True"),
+        None
+    )
+    started_at = next(
+        (cs.state.running.started_at for cs in pod.status.container_statuses or []
+         if cs.state and cs.state.running and cs.state.running.started_at),
+        None
+    )
+    if scheduled_at is None or started_at is None:
+        return None
+    return (started_at - scheduled_at).total_seconds()
+
+
+class ImagePrePuller:
+    """
+    Keeps the recently used algorithm images warm on every cluster node.
+
+    The images run through ContainerManager.run are recorded, and their digests are resolved
+    from the imageID reported by K8S on the status of their PODs. The (max_images) most
+    recently used images, pinned to their digest, are kept on every cluster node by a
+    managed DaemonSet with one idle container per image.
+
+    The jobs of the images whose tags are immutable (matching one of the 'immutable_tags'
+    regular expressions, none by default) reference the pinned digest with an 'IfNotPresent'
+    pull policy, so these don't wait for the image to be pulled (or checked against the
+    registry). A pinned digest is only used for 'digest_ttl' seconds after it was resolved:
+    then, the next job runs the tag, so that a tag pushed again is picked up. The jobs of the
+    other images run their tag (checked against the registry, with an 'Always' pull policy),
+    so that the node doesn't keep running an outdated algorithm once a mutable tag (e.g.,
+    'latest') is updated. Their layers are still kept on the cluster nodes by the DaemonSet.
+
+    Cache hits (runs of an image already warm on the cluster) and the time the algorithm
+    PODs take to start after being scheduled (mostly, the image pull) are exported as metrics.
+    """
+
+    def __init__(self, apps_api: client.AppsV1Api, informer: JobInformer, prepull_config: dict,
+                 namespace: str = "v6-jobs"):
+
+        self.log = logging.getLogger(logger_name(__name__))
+
+        self.apps_api = apps_api
+        self.informer = informer
+        self.namespace = namespace
+
+        self.max_images = prepull_config.get("max_images", DEFAULT_MAX_IMAGES)
+        self.retention = prepull_config.get("retention", DEFAULT_RETENTION_SECONDS)
+        self.helper_image = prepull_config.get("helper_image", DEFAULT_HELPER_IMAGE)
+        self.immutable_tags = [re.compile(pattern) for pattern in prepull_config.get("immutable_tags") or []]
+        self.digest_ttl = prepull_config.get("digest_ttl", DEFAULT_DIGEST_TTL_SECONDS)
+
+        self._lock = threading.Lock()
+        # image -> timestamp of its last run
+        self._last_used: dict[str, float] = {}
+        # image -> digest (sha256:...), and when it was resolved from a POD running the image by tag
+        self._digests: dict[str, tuple[str, float]] = {}
+        # pinned references on the pre-pull DaemonSet, and whether it is ready on all the nodes
+        self._warm_refs: set[str] = set()
+        self._daemonset_ready = False
+
+        # PODs whose start time was already measured
+        self._measured_pods: set[str] = set()
+
+        informer.add_listener(self.__on_informer_event)
+
+
+    def start(self) -> None:
+        threading.Thread(target=self.__reconcile_worker, name="image-prepull", daemon=True).start()
+
+
+    def resolve(self, image: str) -> str:
+        """
+        Register a run of the given image, and get the reference to be used on its job: pinned to
+        the image digest when its tag is immutable and its digest was resolved less than
+        'digest_ttl' seconds ago, or the image as given otherwise.
+        """
+        now = time.time()
+        with self._lock:
+            self._last_used[image] = now
+            digest, resolved_at = self._digests.get(image, (None, 0.0))
+            is_hit = digest is not None and pin_image(image, digest) in self._warm_refs and self._daemonset_ready
+        IMAGE_CACHE_REQUESTS.inc(result="hit" if is_hit else "miss")
+        if digest is None or not self.is_immutable(image) or now - resolved_at >= self.digest_ttl:
+            return image
+        return pin_image(image, digest)
+
+
+    def is_immutable(self, image: str) -> bool:
+        """
+        Whether the tag of an image is configured as immutable (see 'immutable_tags')
+        """
+        return any(pattern.fullmatch(image) for pattern in self.immutable_tags)
+
+
+    def __on_informer_event(self, kind: str, event_type: str, obj) -> None:
+        """
+        Resolve the digests of the images from the status of the algorithm PODs, and measure their
+        start time
+        """
+        if kind != "pod" or event_type == "DELETED" or not obj.status:
+            return
+        # Only the algorithm PODs (e.g., not the ones of the pre-pull DaemonSet itself)
+        if (obj.metadata.labels or {}).get("role") not in ALGORITHM_POD_ROLES:
+            return
+
+        spec_images = {c.name: c.image for c in obj.spec.containers or []}
+        with self._lock:
+            for container_status in obj.status.container_statuses or []:
+                image = spec_images.get(container_status.name)
+                image_id = container_status.image_id or ""
+                if image and "@" not in image and "@sha256:" in image_id:
+                    self._digests[image] = (image_id.split("@", 1)[1], time.time())
+
+            if obj.metadata.name not in self._measured_pods:
+                start_seconds = get_pod_start_seconds(obj)
+                if start_seconds is not None:
+                    self._measured_pods.add(obj.metadata.name)
+                    POD_CONTAINER_START_SECONDS.observe(start_seconds)
+                    self.log.debug(f"POD {obj.metadata.name} started {start_seconds:.1f}s after being scheduled")
+
+
+    def __reconcile_worker(self) -> None:
+        while True:
+            try:
+                self.__reconcile()
+            except Exception:
+                self.log.exception("Error while updating the image pre-pull DaemonSet")
+            time.sleep(PREPULL_RECONCILE_INTERVAL)
+
+
+    def __reconcile(self) -> None:
+        """
+        Update the pre-pull DaemonSet with the most recently used images (with a known digest)
+        """
+        now = time.time()
+        with self._lock:
+            for image in [i for i, used in self._last_used.items() if now - used > self.retention]:
+                del self._last_used[image]
+            recent = sorted(self._last_used, key=self._last_used.get, reverse=True)
+            refs = set(list(dict.fromkeys(
+                pin_image(i, self._digests[i][0]) for i in recent if i in self._digests
+            ))[:self.max_images])
+            # Pods measured that are no longer cached don't need to be remembered
+            self._measured_pods.intersection_update(p.metadata.name for p in self.informer.get_pods())
+
+        try:
+            current = self.apps_api.read_namespaced_daemon_set(PREPULL_DAEMONSET_NAME, self.namespace)
+        except ApiException as e:
+            if e.status != 404:
+                raise
+            current = None
+
+        if refs != self._warm_refs or current is None:
+            body = self.__create_daemonset(sorted(refs))
+            if current is None:
+                self.apps_api.create_namespaced_daemon_set(self.namespace, body)
+            else:
+                self.apps_api.replace_namespaced_daemon_set(PREPULL_DAEMONSET_NAME, self.namespace, body)
+            self.log.info(f"Pre-pull DaemonSet updated with {len(refs)} image(s): {sorted(refs)}")
+            ready = False
+        else:
+            status = current.status
+            ready = bool(status) and status.desired_number_scheduled == status.number_ready \
+                and status.updated_number_scheduled == status.desired_number_scheduled
+
+        with self._lock:
+            self._warm_refs = refs
+            self._daemonset_ready = ready
+        WARM_IMAGES.set(len(refs) if ready else 0)
+
+
+    def __create_daemonset(self, refs: list[str]) -> client.V1DaemonSet:
+        """
+        DaemonSet keeping the given images on every cluster node: an init container copies a static
+        binary (from the helper image) to a shared volume, which is used by the container of each image
+        to stay idle (the algorithm images may not have a shell or a sleep command).
+        """
+        labels = {"app": PREPULL_DAEMONSET_NAME}
+        bin_volume = client.V1Volume(name="prepull-bin", empty_dir=client.V1EmptyDirVolumeSource())
+        bin_mount = client.V1VolumeMount(name="prepull-bin", mount_path=PREPULL_BIN_PATH)
+        idle_resources = client.V1ResourceRequirements(
+            requests={"cpu": "1m", "memory": "8Mi"}, limits={"cpu": "10m", "memory": "16Mi"}
+        )
+
+        containers = [
+            client.V1Container(
+                name=f"image-{i}",
+                image=ref,
+                image_pull_policy="IfNotPresent",
+                command=[f"{PREPULL_BIN_PATH}/busybox", "sleep", "2147483647"],
+                volume_mounts=[bin_mount],
+                resources=idle_resources,
+            )
+            for i, ref in enumerate(refs)
+        ]
+        if not containers:
+            # A DaemonSet needs at least one container
+            containers = [client.V1Container(
+                name="idle", image=self.helper_image, command=["sleep", "2147483647"], resources=idle_resources
+            )]
+
+        return client.V1DaemonSet(
+            api_version="apps/v1",
+            kind="DaemonSet",
+            metadata=client.V1ObjectMeta(name=PREPULL_DAEMONSET_NAME, labels=labels),
+            spec=client.V1DaemonSetSpec(
+                selector=client.V1LabelSelector(match_labels=labels),
+                template=client.V1PodTemplateSpec(
+                    metadata=client.V1ObjectMeta(labels=labels),
+                    spec=client.V1PodSpec(
+                        init_containers=[client.V1Container(
+                            name="copy-bin",
+                            image=self.helper_image,
+                            command=["cp", "/bin/busybox", f"{PREPULL_BIN_PATH}/busybox"],
+                            volume_mounts=[bin_mount],
+                        )],
+                        containers=containers,
+                        volumes=[bin_volume],
+                    ),
+                ),
+            ),
+        )
+
+
+def pin_image(image: str, digest: str) -> str:
+    """
+    Reference to an image pinned to the given digest (e.g., 'registry/repo@sha256:...'). The tag, if
+    any, is dropped, as it is ignored once a digest is given.
+    """
+    name = image
+    last_part = image.rsplit("/", 1)[-1]
+    if ":" in last_part:
+        name = image[:image.rindex(":")]
+    return f"{name}@{digest}"
@@ -0,0 +1,62 @@
+from kubernetes import client
+
+import json
+
+
+# Job annotation with the runs of a fan-out (Indexed) job, as a JSON list with the run_id,
+# task_id and task_parent_id of the run of each completion index
+FANOUT_RUNS_ANNOTATION = "v6/fanout-runs"
+
+# POD annotation set by K8S with the completion index of the PODs of an Indexed job
+COMPLETION_INDEX_ANNOTATION = "batch.kubernetes.io/job-completion-index"
+
+# Prefix of the names of the fan-out jobs (followed by the run_id of their first run)
+FANOUT_JOB_PREFIX = "fanout-"
+
+# Environment variable of the fan-out job containers with their completion index (from the POD
+# annotation), which selects the run folder mounted on the POD
+FANOUT_INDEX_ENV_VAR = "V6_COMPLETION_INDEX"
+
+
+def get_fanout_runs(job: client.V1Job) -> list[dict] | None:
+    """
+    Runs of a fan-out job, by completion index (None if the job runs a single run)
+    """
+    runs = (job.metadata.annotations or {}).get(FANOUT_RUNS_ANNOTATION)
+    return json.loads(runs) if runs else None
+
+
+def get_completion_index(pod: client.V1Pod) -> int | None:
+    """
+    Completion index of a POD of an Indexed job (None for the PODs of the other jobs)
+    """
+    index = (pod.metadata.annotations or {}).get(COMPLETION_INDEX_ANNOTATION)
+    return int(index) if index is not None else None
+
+
+def parse_indexes(value: str | None) -> set[int]:
+    """
+    Indexes of an Indexed job status field (e.g., completedIndexes: '1,3-5,7')
+    """
+    indexes = set()
+    for interval in (value or "").split(","):
+        if not interval:
+            continue
+        first, _, last = interval.partition("-")
+        indexes.update(range(int(first), int(last or first) + 1))
+    return indexes
+
+
+def get_fanout_key(job_name: str, index: int) -> str:
+    """
+    Key of the run of a fan-out job index on the completion queue (see ContainerManager.get_results)
+    """
+    return f"{job_name}#{index}"
+
+
+def split_fanout_key(key: str) -> tuple[str, int | None]:
+    """
+    Job name and completion index of a completion queue key (no index for single run jobs)
+    """
+    job_name, _, index = key.partition("#")
+    return job_name, int(index) if index else None
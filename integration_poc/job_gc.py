@@ -0,0 +1,159 @@
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+from vantage6.common import logger_name
+from job_informer import JobInformer
+from typing import List
+
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+
+
+# Seconds the GC worker waits for more jobs to collect before removing a batch
+GC_INTERVAL = 2
+
+# Maximum number of jobs removed on each GC pass
+GC_BATCH_SIZE = 50
+
+# Default seconds after which K8S removes a finished job by itself, as a safety net for the jobs
+# that are not collected by the node (e.g., the node is down). It must be longer than the time a
+# finished job may wait to be harvested, as the results of a removed job are lost.
+DEFAULT_JOB_TTL_SECONDS = 3600
+
+
+class JobGarbageCollector:
+    """
+    Removes, in the background, the resources left by the harvested (or failed to start) runs:
+    their Job, their PODs and their folder on the tasks directory (named after the job).
+
+    The jobs to remove are queued through collect(), so that the harvesting of the results
+    doesn't wait for the API server, and removed in batches: the jobs are deleted with a
+    'Background' propagation policy, and their leftover PODs with a single collection delete.
+
+    When started, the resources orphaned by a previous node process (e.g., one that crashed
+    after harvesting a job) are swept: PODs whose job no longer exists, and task folders that
+    don't belong to any existing job.
+    """
+
+    def __init__(self, batch_api: client.BatchV1Api, core_api: client.CoreV1Api, informer: JobInformer,
+                 task_base_path: str, namespace: str = "v6-jobs",
+                 interval: float = GC_INTERVAL, batch_size: int = GC_BATCH_SIZE):
+
+        self.log = logging.getLogger(logger_name(__name__))
+
+        self.batch_api = batch_api
+        self.core_api = core_api
+        self.informer = informer
+        self.task_base_path = task_base_path
+        self.namespace = namespace
+        self.interval = interval
+        self.batch_size = batch_size
+
+        self._pending: queue.Queue[str] = queue.Queue()
+        self._started_at = time.time()
+
+
+    def start(self) -> None:
+        threading.Thread(target=self.__gc_worker, name="job-gc", daemon=True).start()
+
+
+    def collect(self, job_name: str) -> None:
+        """
+        Queue the job with the given name (and its PODs and task folder) for removal
+        """
+        self._pending.put(job_name)
+
+
+    def __gc_worker(self) -> None:
+        try:
+            self.informer.wait_until_synced()
+            self.__sweep_orphans()
+        except Exception:
+            self.log.exception("Error while sweeping the resources orphaned by a previous run of the node")
+
+        while True:
+            batch = [self._pending.get()]
+            # Let the jobs harvested at about the same time join the batch
+            time.sleep(self.interval)
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.__remove(batch)
+            except Exception:
+                self.log.exception(f"Error while removing jobs {batch}")
+
+
+    def __remove(self, job_names: List[str]) -> None:
+        """
+        Delete the given jobs, their leftover PODs and their task folders
+        """
+        for job_name in job_names:
+            try:
+                self.batch_api.delete_namespaced_job(name=job_name, namespace=self.namespace,
+                                                     propagation_policy="Background")
+            except ApiException as e:
+                if e.status != 404:
+                    self.log.warning(f"Job {job_name} couldn't be deleted (status {e.status})")
+
+        if any(self.informer.get_pods_by_job_name(job_name) for job_name in job_names):
+            self.__delete_pods(job_names)
+
+        for job_name in job_names:
+            self.__delete_task_folder(job_name)
+
+        self.log.info(f"Removed {len(job_names)} finished job(s): {job_names}")
+
+
+    def __delete_pods(self, job_names: List[str]) -> None:
+        try:
+            self.core_api.delete_collection_namespaced_pod(
+                namespace=self.namespace,
+                label_selector=f"job-name in ({','.join(job_names)})",
+                propagation_policy="Background",
+            )
+        except ApiException as e:
+            self.log.warning(f"PODs of jobs {job_names} couldn't be deleted (status {e.status})")
+
+
+    def __delete_task_folder(self, job_name: str) -> None:
+        task_folder = os.path.join(self.task_base_path, job_name)
+        if not os.path.isdir(task_folder):
+            return
+        try:
+            shutil.rmtree(task_folder)
+        except OSError as e:
+            self.log.warning(f"Task folder {task_folder} couldn't be removed: {e}")
+
+
+    def __sweep_orphans(self) -> None:
+        """
+        Remove the PODs whose job no longer exists, and the task folders (created before this node
+        process started) that don't belong to any existing job
+        """
+        job_names = {job.metadata.name for job in self.informer.get_jobs()}
+
+        orphan_pods_jobs = sorted({
+            (pod.metadata.labels or {}).get("job-name") for pod in self.informer.get_pods()
+        } - job_names - {None})
+        for i in range(0, len(orphan_pods_jobs), self.batch_size):
+            self.__delete_pods(orphan_pods_jobs[i:i + self.batch_size])
+
+        orphan_folders = []
+        if os.path.isdir(self.task_base_path):
+            for entry in os.scandir(self.task_base_path):
+                # Folders starting with '_' (which can't be a job name) are not task folders
+                if entry.name.startswith("_"):
+                    continue
+                if entry.is_dir() and entry.name not in job_names and entry.stat().st_mtime < self._started_at:
+                    orphan_folders.append(entry.name)
+        for folder in orphan_folders:
+            self.__delete_task_folder(folder)
+
+        self.log.info(f"Swept the PODs of {len(orphan_pods_jobs)} removed job(s) and {len(orphan_folders)} "
+                      f"orphaned task folder(s)")
@@ -0,0 +1,335 @@
+from kubernetes import client, watch
+from kubernetes.client.rest import ApiException
+from vantage6.common import logger_name
+from indexed_jobs import get_fanout_runs, get_completion_index
+from typing import Callable, List
+
+import logging
+import threading
+import time
+
+
+# Server-side timeout of each watch request. When it expires, the watch is
+# re-opened from the last seen resourceVersion (no full re-list is needed).
+WATCH_TIMEOUT_SECONDS = 300
+
+# Client-side read timeout, so that a silently dropped connection is detected
+# instead of blocking the watch thread forever.
+WATCH_REQUEST_TIMEOUT_SECONDS = WATCH_TIMEOUT_SECONDS + 30
+
+# Seconds to wait before retrying after an unexpected watch error
+WATCH_RETRY_INTERVAL = 2
+
+JOB = "job"
+POD = "pod"
+
+
+class JobInformer:
+    """
+    In-process informer for the Jobs and PODs of the algorithm runs.
+
+    A single long-lived watch is kept for each resource kind (Jobs and PODs)
+    on the jobs namespace. Each watch starts with a full list of the
+    resources and then resumes from the last seen resourceVersion, so the
+    API server is only queried again in full when the resourceVersion has
+    expired (410 Gone). The current state of the resources is kept in a
+    local cache, indexed by run_id, task_id and job-name, from which the
+    ContainerManager answers its queries without reaching the API server.
+
+    Listeners can be registered to be notified of every change applied to
+    the cache (see add_listener).
+    """
+
+    def __init__(self, batch_api: client.BatchV1Api, core_api: client.CoreV1Api,
+                 namespace: str = "v6-jobs", watch_factory: Callable[[], watch.Watch] = watch.Watch):
+
+        self.log = logging.getLogger(logger_name(__name__))
+
+        self.batch_api = batch_api
+        self.core_api = core_api
+        self.namespace = namespace
+        # Creates the watch objects (e.g., a simulated watch, see execution_backend.FakeBackend)
+        self.watch_factory = watch_factory
+
+        # Notified every time the cache changes, so that consumers can wait
+        # for a given state (see wait_for)
+        self._changed = threading.Condition()
+
+        self._jobs: dict[str, client.V1Job] = {}
+        self._pods: dict[str, client.V1Pod] = {}
+
+        # Indexes: key -> set of job/pod names
+        self._jobs_by_run_id: dict[str, set[str]] = {}
+        self._jobs_by_task_id: dict[str, set[str]] = {}
+        self._pods_by_run_id: dict[str, set[str]] = {}
+        self._pods_by_job_name: dict[str, set[str]] = {}
+
+        self._synced = {JOB: threading.Event(), POD: threading.Event()}
+        self._listeners: List[Callable[[str, str, object], None]] = []
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+
+    def start(self) -> None:
+        """
+        Start the watch threads (one per resource kind)
+        """
+        watched = [
+            (JOB, self.batch_api.list_namespaced_job),
+            (POD, self.core_api.list_namespaced_pod),
+        ]
+        for kind, list_func in watched:
+            t = threading.Thread(target=self.__watch_worker, args=(kind, list_func),
+                                 name=f"informer-{kind}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+
+    def stop(self) -> None:
+        """
+        Stop the watch threads. These finish once their current watch request
+        returns.
+        """
+        self._stopped.set()
+
+
+    def add_listener(self, listener: Callable[[str, str, object], None]) -> None:
+        """
+        Register a callback that is invoked, from the watch thread, after each
+        change applied to the cache.
+
+        Parameters
+        ----------
+        listener: Callable[[str, str, object], None]
+            Callback receiving the resource kind ('job' or 'pod'), the event
+            type ('ADDED', 'MODIFIED' or 'DELETED') and the K8S object. It
+            should return quickly, as it blocks the processing of the next
+            watch events.
+        """
+        self._listeners.append(listener)
+
+
+    def wait_until_synced(self, timeout: float | None = None) -> bool:
+        """
+        Block until the initial list of both Jobs and PODs has been loaded.
+
+        Returns
+        -------
+        bool
+            False if the timeout expired before the cache was synced
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        for event in self._synced.values():
+            remaining = None if deadline is None else max(0, deadline - time.time())
+            if not event.wait(remaining):
+                return False
+        return True
+
+
+    def wait_for(self, predicate: Callable[[], object], timeout: float | None = None):
+        """
+        Block until the given predicate (evaluated against the cache) returns
+        a truthy value, or the timeout expires.
+
+        Returns
+        -------
+        object
+            The last value returned by the predicate
+        """
+        with self._changed:
+            return self._changed.wait_for(predicate, timeout)
+
+
+    def get_job(self, job_name: str) -> client.V1Job | None:
+        with self._changed:
+            return self._jobs.get(job_name)
+
+
+    def get_jobs(self) -> List[client.V1Job]:
+        with self._changed:
+            return list(self._jobs.values())
+
+
+    def get_pods(self) -> List[client.V1Pod]:
+        with self._changed:
+            return list(self._pods.values())
+
+
+    def get_jobs_by_run_id(self, run_id) -> List[client.V1Job]:
+        with self._changed:
+            return [self._jobs[n] for n in self._jobs_by_run_id.get(str(run_id), ())]
+
+
+    def get_jobs_by_task_id(self, task_id) -> List[client.V1Job]:
+        with self._changed:
+            return [self._jobs[n] for n in self._jobs_by_task_id.get(str(task_id), ())]
+
+
+    def get_pods_by_run_id(self, run_id) -> List[client.V1Pod]:
+        with self._changed:
+            return [self._pods[n] for n in self._pods_by_run_id.get(str(run_id), ())]
+
+
+    def get_pods_by_job_name(self, job_name: str) -> List[client.V1Pod]:
+        with self._changed:
+            return [self._pods[n] for n in self._pods_by_job_name.get(job_name, ())]
+
+
+    def get_run_pods(self, run_id) -> List[client.V1Pod]:
+        """
+        PODs of a run: the ones labelled with its run_id, and the ones of its job(s) that are not
+        (e.g., the PODs of a warm runner assigned to the run, or the ones of its completion index
+        on a fan-out job)
+        """
+        run_id = str(run_id)
+        with self._changed:
+            pods = {pod.metadata.name: pod for pod in self.get_pods_by_run_id(run_id)}
+            for job in self.get_jobs_by_run_id(run_id):
+                fanout_runs = get_fanout_runs(job)
+                index = None
+                if fanout_runs is not None:
+                    index = next((i for i, run in enumerate(fanout_runs) if str(run["run_id"]) == run_id), None)
+                for pod in self.get_pods_by_job_name(job.metadata.name):
+                    if fanout_runs is None or get_completion_index(pod) == index:
+                        pods[pod.metadata.name] = pod
+            return list(pods.values())
+
+
+    def __watch_worker(self, kind: str, list_func: Callable) -> None:
+        """
+        List the resources of the given kind once, and then keep watching them
+        from the last seen resourceVersion. A full re-list is only done when
+        the resourceVersion is no longer available on the API server.
+        """
+        resource_version = None
+
+        while not self._stopped.is_set():
+            try:
+                if resource_version is None:
+                    listing = list_func(namespace=self.namespace)
+                    resource_version = listing.metadata.resource_version
+                    self.__replace(kind, listing.items)
+                    self._synced[kind].set()
+                    self.log.info(f"Informer: {len(listing.items)} {kind}(s) listed on {self.namespace} "
+                                  f"(resourceVersion={resource_version})")
+
+                w = self.watch_factory()
+                for event in w.stream(list_func,
+                                      namespace=self.namespace,
+                                      resource_version=resource_version,
+                                      allow_watch_bookmarks=True,
+                                      timeout_seconds=WATCH_TIMEOUT_SECONDS,
+                                      _request_timeout=WATCH_REQUEST_TIMEOUT_SECONDS):
+
+                    if self._stopped.is_set():
+                        w.stop()
+                        break
+
+                    event_type = event["type"]
+                    obj = event["object"]
+
+                    if event_type == "BOOKMARK":
+                        # BOOKMARK events are not deserialized, and only move the resourceVersion forward
+                        resource_version = event["raw_object"]["metadata"]["resourceVersion"]
+                        continue
+
+                    resource_version = obj.metadata.resource_version
+
+                    if event_type in ("ADDED", "MODIFIED"):
+                        self.__upsert(kind, obj)
+                    elif event_type == "DELETED":
+                        self.__remove(kind, obj.metadata.name)
+                    else:
+                        continue
+
+                    self.__notify(kind, event_type, obj)
+
+            except ApiException as e:
+                if e.status == 410:
+                    self.log.info(f"Informer: resourceVersion {resource_version} of {kind}s expired, re-listing")
+                    resource_version = None
+                else:
+                    self.log.warning(f"Informer: {kind} watch failed with status {e.status}, retrying")
+                    time.sleep(WATCH_RETRY_INTERVAL)
+            except Exception:
+                self.log.exception(f"Informer: unexpected error while watching {kind}s, retrying")
+                time.sleep(WATCH_RETRY_INTERVAL)
+
+
+    def __notify(self, kind: str, event_type: str, obj) -> None:
+        for listener in self._listeners:
+            try:
+                listener(kind, event_type, obj)
+            except Exception:
+                self.log.exception(f"Informer: listener failed while handling {event_type} {kind} event")
+
+
+    def __replace(self, kind: str, items: list) -> None:
+        """
+        Replace the cached resources of the given kind with a fresh listing.
+        Resources that are no longer listed are notified as DELETED.
+        """
+        with self._changed:
+            cache = self._jobs if kind == JOB else self._pods
+            listed = {item.metadata.name for item in items}
+            gone = [cache[name] for name in cache if name not in listed]
+            for obj in gone:
+                self.__remove(kind, obj.metadata.name)
+            for item in items:
+                self.__upsert(kind, item)
+
+        for obj in gone:
+            self.__notify(kind, "DELETED", obj)
+        for item in items:
+            self.__notify(kind, "MODIFIED", item)
+
+
+    def __index_keys(self, kind: str, obj) -> List[tuple[dict, str]]:
+        """
+        Index entries of a Job or a POD, as (index, key) tuples.
+        Jobs are indexed by their run_id and task_id annotations (or by the ones of
+        each of their runs, for the fan-out jobs), and PODs by their 'app' (run_id,
+        or job name for the fan-out jobs) and 'job-name' labels.
+        """
+        if kind == JOB:
+            annotations = obj.metadata.annotations or {}
+            keys = [(self._jobs_by_run_id, annotations.get("run_id")),
+                    (self._jobs_by_task_id, annotations.get("task_id"))]
+            for run in get_fanout_runs(obj) or []:
+                keys.extend([(self._jobs_by_run_id, str(run["run_id"])),
+                             (self._jobs_by_task_id, str(run["task_id"]))])
+        else:
+            labels = obj.metadata.labels or {}
+            keys = [(self._pods_by_run_id, labels.get("app")),
+                    (self._pods_by_job_name, labels.get("job-name"))]
+        return [(index, key) for index, key in keys if key is not None]
+
+
+    def __upsert(self, kind: str, obj) -> None:
+        with self._changed:
+            cache = self._jobs if kind == JOB else self._pods
+            name = obj.metadata.name
+            if name in cache:
+                self.__unindex(kind, cache[name])
+            cache[name] = obj
+            for index, key in self.__index_keys(kind, obj):
+                index.setdefault(key, set()).add(name)
+            self._changed.notify_all()
+
+
+    def __remove(self, kind: str, name: str) -> None:
+        with self._changed:
+            cache = self._jobs if kind == JOB else self._pods
+            obj = cache.pop(name, None)
+            if obj is not None:
+                self.__unindex(kind, obj)
+            self._changed.notify_all()
+
+
+    def __unindex(self, kind: str, obj) -> None:
+        for index, key in self.__index_keys(kind, obj):
+            names = index.get(key)
+            if names is not None:
+                names.discard(obj.metadata.name)
+                if not names:
+                    del index[key]
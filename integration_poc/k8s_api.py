@@ -0,0 +1,211 @@
+from kubernetes.client.rest import ApiException
+from vantage6.common import logger_name
+from vantage6.common.metrics import Counter, Histogram
+from functools import wraps
+from typing import Callable
+
+import logging
+import random
+import threading
+import time
+import urllib3
+
+
+# Default sustained rate (requests per second) and burst of the requests to the K8S API server.
+# The defaults of client-go (5 qps, burst 10) are too low for the node's dispatch bursts, but an
+# unbounded rate triggers the API Priority and Fairness limits of managed clusters.
+DEFAULT_QPS = 50
+
+# Default burst, as a multiple of the configured qps
+DEFAULT_BURST_FACTOR = 2
+
+# Default maximum number of concurrent requests of each verb
+DEFAULT_MAX_CONCURRENCY = 10
+
+# Retries of the failed requests: exponential backoff (base * 2^attempt, capped) with full jitter
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30
+
+# Verbs of the API client methods, by method name prefix (e.g., 'create_namespaced_job')
+VERBS = ("create", "list", "read", "patch", "replace", "delete", "connect")
+
+# HTTP status codes of the responses that are retried: 429 (API Priority and Fairness, or
+# rate limited) and the transient server-side errors
+RETRIED_STATUSES = (429, 500, 502, 503, 504)
+
+# Verbs whose requests are only retried when throttled (429, i.e., rejected before being
+# processed): after a 5xx or a connection error the object may have been created, and the
+# retry would fail with a 409 (AlreadyExists) hiding the outcome of the first request
+THROTTLE_RETRY_ONLY_VERBS = ("create",)
+
+API_THROTTLED = Counter(
+    "v6_node_k8s_api_throttled_total",
+    "K8S API requests delayed by the client-side limits (rate or concurrency), or throttled by the API server (429)",
+    ["reason"],
+)
+API_RETRIES = Counter(
+    "v6_node_k8s_api_retries_total", "Retried K8S API requests, by verb and cause", ["verb", "reason"],
+)
+API_FAILURES = Counter(
+    "v6_node_k8s_api_failures_total", "K8S API requests that failed after the last retry", ["verb", "reason"],
+)
+API_WAIT_SECONDS = Histogram(
+    "v6_node_k8s_api_wait_seconds",
+    "Time the K8S API requests waited for the client-side rate and concurrency limits", ["verb"],
+)
+
+
+def get_verb(method_name: str) -> str | None:
+    """Verb of an API client method (None if it isn't a request to the API server)"""
+    prefix = method_name.split("_", 1)[0]
+    return prefix if prefix in VERBS else None
+
+
+def get_retry_reason(e: Exception) -> str | None:
+    """
+    Reason to retry a failed request ('429', '5xx' or 'connection'), or None if it must not be
+    retried
+    """
+    if isinstance(e, ApiException):
+        if e.status == 429:
+            return "429"
+        if e.status in RETRIED_STATUSES:
+            return "5xx"
+        # status 0: the request didn't get a response
+        return "connection" if not e.status else None
+    if isinstance(e, (urllib3.exceptions.HTTPError, ConnectionError, TimeoutError)):
+        return "connection"
+    return None
+
+
+def get_retry_after(e: Exception) -> float | None:
+    """Seconds to wait given by the Retry-After header of a 429/503 response (if any)"""
+    headers = getattr(e, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter: 'rate' tokens per second, up to 'capacity' tokens. A request
+    reserves its token upfront (the balance can go negative), so that the waiting requests
+    are served in order without waking up to compete for each token.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take a token, waiting until it is available. Returns the seconds waited.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class ApiRateLimiter:
+    """
+    Single access point of the node to the K8S API server: every request takes a token from a
+    shared token bucket, holds a slot of its verb (e.g., at most N concurrent creates) while it
+    runs, and is retried with exponential backoff and full jitter when it fails with a 429,
+    a transient 5xx or a connection error (honoring the Retry-After of the response, if any).
+    Creates are only retried on a 429 (see THROTTLE_RETRY_ONLY_VERBS).
+    """
+
+    def __init__(self, api_config: dict | None = None):
+        """
+        Parameters
+        ----------
+        api_config: dict, optional
+            'kubernetes_api' section of the node configuration, with the optional keys 'qps',
+            'burst' (default: twice the qps), 'max_concurrency' (verb -> limit, and 'default'), 'max_retries',
+            'backoff_base' and 'backoff_max' (seconds)
+        """
+        self.log = logging.getLogger(logger_name(__name__))
+        api_config = api_config or {}
+        qps = api_config.get("qps", DEFAULT_QPS)
+        self._bucket = TokenBucket(qps, api_config.get("burst", qps * DEFAULT_BURST_FACTOR))
+        concurrency = api_config.get("max_concurrency") or {}
+        default_concurrency = concurrency.get("default", DEFAULT_MAX_CONCURRENCY)
+        self._slots = {verb: threading.BoundedSemaphore(concurrency.get(verb, default_concurrency)) for verb in VERBS}
+        self.max_retries = api_config.get("max_retries", DEFAULT_MAX_RETRIES)
+        self.backoff_base = api_config.get("backoff_base", DEFAULT_BACKOFF_BASE)
+        self.backoff_max = api_config.get("backoff_max", DEFAULT_BACKOFF_MAX)
+
+
+    def call(self, verb: str, method: Callable, *args, **kwargs):
+        """
+        Make a request to the API server (a call to an API client method) within the limits
+        """
+        attempt = 0
+        while True:
+            waited = self._bucket.acquire()
+            if waited > 0:
+                API_THROTTLED.inc(reason="rate_limit")
+            slots = self._slots[verb]
+            if not slots.acquire(blocking=False):
+                API_THROTTLED.inc(reason="concurrency")
+                started_at = time.monotonic()
+                slots.acquire()
+                waited += time.monotonic() - started_at
+            API_WAIT_SECONDS.observe(waited, verb=verb)
+            try:
+                return method(*args, **kwargs)
+            except Exception as e:
+                reason = get_retry_reason(e)
+                if reason is None:
+                    raise
+                if reason == "429":
+                    API_THROTTLED.inc(reason="server_429")
+                if attempt >= self.max_retries or (reason != "429" and verb in THROTTLE_RETRY_ONLY_VERBS):
+                    API_FAILURES.inc(verb=verb, reason=reason)
+                    raise
+                backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                backoff = max(backoff, get_retry_after(e) or 0)
+                self.log.warning(f"K8S API {getattr(method, '__name__', verb)} failed ({reason}), "
+                                 f"retry {attempt + 1}/{self.max_retries} in {backoff:.2f}s")
+                API_RETRIES.inc(verb=verb, reason=reason)
+            finally:
+                slots.release()
+            time.sleep(backoff)
+            attempt += 1
+
+
+class ThrottledApi:
+    """
+    Proxy of a K8S API client (e.g., BatchV1Api) whose requests go through an ApiRateLimiter.
+    The wrapped methods keep the name and docstring of the original ones (kubernetes.watch.Watch
+    reads the return type from the latter) and are bound to the proxy.
+    """
+
+    def __init__(self, api, limiter: ApiRateLimiter):
+        self._api = api
+        self._limiter = limiter
+
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._api, name)
+        verb = get_verb(name)
+        if verb is None or not callable(attribute):
+            return attribute
+
+        @wraps(attribute)
+        def throttled(*args, **kwargs):
+            return self._limiter.call(verb, attribute, *args, **kwargs)
+
+        throttled.__self__ = self
+        return throttled
@@ -0,0 +1,89 @@
+from typing import List, NamedTuple
+
+
+# Default maximum size (bytes, UTF-8) of the log uploaded with the result of a run
+DEFAULT_MAX_UPLOAD_LOG_BYTES = 256 * 1024
+
+
+class PackagedLog(NamedTuple):
+    """Data class to store the log of a run, as uploaded to the server"""
+
+    log: str
+    original_bytes: int
+    packaged_bytes: int
+    repeated_lines: int
+    truncated: bool
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - self.packaged_bytes
+
+
+def dedupe_lines(text: str) -> tuple[str, int]:
+    """
+    Collapse the consecutive repetitions of a line into a single line followed by a
+    '[previous line repeated N more times]' marker
+
+    Returns
+    -------
+    tuple[str, int]
+        The resulting text, and the number of lines dropped
+    """
+    lines = text.split("\n")
+    packed = []
+    dropped = 0
+    i = 0
+    while i < len(lines):
+        j = i + 1
+        while j < len(lines) and lines[j] == lines[i]:
+            j += 1
+        packed.append(lines[i])
+        if j - i > 1:
+            packed.append(f"[previous line repeated {j - i - 1} more times]")
+            dropped += j - i - 1
+        i = j
+    return "\n".join(packed), dropped
+
+
+def truncate(text: str, max_bytes: int) -> tuple[str, bool]:
+    """
+    Cap the UTF-8 size of a text, keeping its beginning and its end around a truncation marker. If
+    'max_bytes' doesn't fit the marker, only the (cut) marker is kept.
+    """
+    data = text.encode("utf-8")
+    if len(data) <= max_bytes:
+        return text, False
+    marker = f"\n[... log truncated: {len(data) - max_bytes} bytes omitted ...]\n".encode("utf-8")
+    if len(marker) >= max_bytes:
+        return marker[:max(0, max_bytes)].decode("utf-8", errors="ignore"), True
+    keep = max_bytes - len(marker)
+    head, tail = data[:keep // 2], data[len(data) - (keep - keep // 2):]
+    return (head + marker + tail).decode("utf-8", errors="ignore"), True
+
+
+def package_logs(logs: List[str], max_bytes: int = DEFAULT_MAX_UPLOAD_LOG_BYTES) -> PackagedLog:
+    """
+    Prepare the logs of the PODs of a run (see ContainerManager.get_results) for their upload to the
+    server: repeated lines are collapsed, and the size is capped (with a truncation marker). The log
+    is uploaded as plain text, as the server, UI and clients show it as is.
+
+    Parameters
+    ----------
+    logs: List[str]
+        Logs of the PODs of the run
+    max_bytes: int
+        Maximum size (bytes) of the uploaded log
+    """
+    text = "\n".join(logs)
+    original_bytes = len(text.encode("utf-8"))
+
+    text, repeated_lines = dedupe_lines(text)
+    text, truncated = truncate(text, max_bytes)
+
+    return PackagedLog(
+        log=text,
+        original_bytes=original_bytes,
+        packaged_bytes=len(text.encode("utf-8")),
+        repeated_lines=repeated_lines,
+        truncated=truncated,
+    )
@@ -4,4 +4,7 @@
 JOB_POD_INPUT_PATH = '/app/output'
 JOB_POD_OUTPUT_PATH = '/app/input'
 JOB_POD_TOKEN_PATH = '/app/token'
-JOB_POD_TMP_FOLDER_PATH = '/app/tmp'
\ No newline at end of file
+JOB_POD_TMP_FOLDER_PATH = '/app/tmp'
+JOB_POD_WARM_SLOT_PATH = '/app/slot'
+JOB_POD_FANOUT_RUN_PATH = '/app/run'
+JOB_POD_OUTPUT_FOLDER_PATH = '/app/results'
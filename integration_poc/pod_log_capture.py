@@ -0,0 +1,274 @@
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+from vantage6.common import logger_name
+from job_informer import JobInformer
+from typing import List
+
+import collections
+import gzip
+import logging
+import os
+import shutil
+import threading
+import time
+
+
+# Default maximum number of bytes of a POD log kept in memory (head and tail)
+DEFAULT_MAX_LOG_BYTES = 1024 * 1024
+
+# Default number of bytes, from the beginning of a POD log, kept in memory. The rest of the
+# in-memory budget holds the most recent bytes of the log.
+DEFAULT_HEAD_LOG_BYTES = 64 * 1024
+
+# Size of the chunks read from the POD log streams
+LOG_CHUNK_SIZE = 16 * 1024
+
+# Seconds to wait, when a job is harvested, for the log streams of its (finished) PODs to end
+LOG_CAPTURE_FINISH_TIMEOUT = 10
+
+# Default maximum number of POD logs followed at the same time (each one holds a thread and an
+# HTTP stream to the API server)
+DEFAULT_MAX_FOLLOWERS = 100
+
+# Sub-folder of the tasks folder where the full (compressed) POD logs are spilled, one folder per
+# job. Its name can't clash with a job name (which can't start with '_').
+SPILLED_LOGS_FOLDER = "_logs"
+
+# Default seconds the spilled logs are kept
+DEFAULT_SPILL_RETENTION_SECONDS = 7 * 24 * 60 * 60
+
+
+class LogRingBuffer:
+    """
+    In-memory excerpt of a log of unbounded size: its first 'head_bytes' bytes, and its most
+    recent bytes up to a total of 'max_bytes'. The bytes in between are only counted.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_LOG_BYTES, head_bytes: int = DEFAULT_HEAD_LOG_BYTES):
+        self.head_bytes = min(head_bytes, max_bytes)
+        self.tail_bytes = max_bytes - self.head_bytes
+        self._head = bytearray()
+        self._tail: collections.deque[bytes] = collections.deque()
+        self._tail_size = 0
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+
+
+    def write(self, data: bytes) -> None:
+        with self._lock:
+            self.__write(data)
+
+
+    def __write(self, data: bytes) -> None:
+        self.total_bytes += len(data)
+
+        if len(self._head) < self.head_bytes:
+            taken = self.head_bytes - len(self._head)
+            self._head.extend(data[:taken])
+            data = data[taken:]
+        if not data or not self.tail_bytes:
+            return
+
+        self._tail.append(data)
+        self._tail_size += len(data)
+        while self._tail_size > self.tail_bytes:
+            excess = self._tail_size - self.tail_bytes
+            oldest = self._tail[0]
+            if len(oldest) <= excess:
+                self._tail.popleft()
+                self._tail_size -= len(oldest)
+            else:
+                self._tail[0] = oldest[excess:]
+                self._tail_size -= excess
+
+
+    @property
+    def omitted_bytes(self) -> int:
+        return self.total_bytes - len(self._head) - self._tail_size
+
+
+    def excerpt(self, spill_path: str | None = None) -> str:
+        """
+        The log kept in memory, with a marker where bytes were omitted
+        """
+        with self._lock:
+            head = bytes(self._head).decode("utf-8", errors="replace")
+            tail = b"".join(self._tail).decode("utf-8", errors="replace")
+            omitted_bytes = self.omitted_bytes
+        if not omitted_bytes:
+            return head + tail
+        marker = f"\n[... {omitted_bytes} bytes omitted"
+        marker += f", full log at {spill_path} ...]\n" if spill_path else " ...]\n"
+        return head + marker + tail
+
+
+class PodLogCapture:
+    """
+    Streams the logs of the algorithm PODs while they run.
+
+    As soon as a POD of a job starts running (or has finished, if it was never seen running),
+    its log is followed on a dedicated thread. The streamed bytes go to a LogRingBuffer, so the
+    memory used per POD is bounded by 'max_bytes' whatever the algorithm prints, and (with
+    'spill') to a gzip file under the SPILLED_LOGS_FOLDER of the tasks folder, which keeps the
+    full log. The 'tail_lines' and 'limit_bytes' options of the K8S log API are only used when
+    the logs are not spilled, as these would cut the spilled log.
+
+    At most 'max_followers' logs are followed at the same time. The log of a POD started beyond
+    that is followed on its next status change below the cap (e.g., once it finishes), or read
+    when its job is harvested.
+
+    When a job is harvested, get_logs waits for the streams of its PODs to end and returns the
+    in-memory excerpt of each one.
+    """
+
+    def __init__(self, core_api: client.CoreV1Api, informer: JobInformer, task_base_path: str,
+                 log_config: dict, namespace: str = "v6-jobs"):
+
+        self.log = logging.getLogger(logger_name(__name__))
+
+        self.core_api = core_api
+        self.informer = informer
+        self.task_base_path = task_base_path
+        self.namespace = namespace
+
+        self.max_bytes = log_config.get("max_bytes", DEFAULT_MAX_LOG_BYTES)
+        self.head_bytes = log_config.get("head_bytes", DEFAULT_HEAD_LOG_BYTES)
+        self.tail_lines = log_config.get("tail_lines")
+        self.limit_bytes = log_config.get("limit_bytes")
+        self.spill = log_config.get("spill", True)
+        self.spill_retention = log_config.get("spill_retention", DEFAULT_SPILL_RETENTION_SECONDS)
+        self.max_followers = log_config.get("max_followers", DEFAULT_MAX_FOLLOWERS)
+
+        self._lock = threading.Lock()
+        # Number of log streams open
+        self._followers = 0
+        # job name -> pod name -> (buffer, capture thread, spill path)
+        self._captures: dict[str, dict[str, tuple[LogRingBuffer, threading.Thread, str | None]]] = {}
+        # jobs whose logs were already collected (until their deletion)
+        self._collected: set[str] = set()
+
+        informer.add_listener(self.__on_informer_event)
+        if self.spill:
+            threading.Thread(target=self.__prune_spilled_logs_worker, name="log-spill-pruning", daemon=True).start()
+
+
+    def get_logs(self, job_name: str, pod_names: set[str] | None = None) -> List[str]:
+        """
+        Excerpts of the logs of the PODs of a (finished) job, one per POD (e.g., the retries of a
+        failed algorithm). The captures of the job are released afterwards. With 'pod_names' (e.g.,
+        the PODs of an index of a fan-out job), only the captures of these PODs are collected and
+        released, and the ones of the other PODs of the job are kept.
+        """
+        for pod in self.informer.get_pods_by_job_name(job_name):
+            if pod_names is None or pod.metadata.name in pod_names:
+                # The PODs are finished, so their streams end once their logs are read
+                self.__start_capture(job_name, pod.metadata.name, capped=False)
+
+        with self._lock:
+            if pod_names is None:
+                captures = self._captures.pop(job_name, {})
+                self._collected.add(job_name)
+            else:
+                job_captures = self._captures.get(job_name, {})
+                captures = {name: job_captures.pop(name) for name in pod_names if name in job_captures}
+
+        deadline = time.time() + LOG_CAPTURE_FINISH_TIMEOUT
+        logs = []
+        for pod_name, (buffer, thread, spill_path) in sorted(captures.items()):
+            thread.join(max(0, deadline - time.time()))
+            if thread.is_alive():
+                self.log.warning(f"Log stream of POD {pod_name} (job {job_name}) has not ended, its log may be incomplete")
+            self.log.info(f"Captured {buffer.total_bytes} bytes of logs from POD {pod_name}, created by job {job_name}")
+            logs.append(f"LOGS of POD {pod_name} (created by job {job_name}) \n {buffer.excerpt(spill_path)}")
+        return logs
+
+
+    def __on_informer_event(self, kind: str, event_type: str, obj) -> None:
+        if kind == "job":
+            if event_type == "DELETED":
+                # A job removed without being harvested (e.g., it failed to start)
+                with self._lock:
+                    self._captures.pop(obj.metadata.name, None)
+                    self._collected.discard(obj.metadata.name)
+            return
+        if event_type == "DELETED" or not obj.status:
+            return
+        job_name = (obj.metadata.labels or {}).get("job-name")
+        if job_name and obj.status.phase in ("Running", "Succeeded", "Failed"):
+            self.__start_capture(job_name, obj.metadata.name)
+
+
+    def __start_capture(self, job_name: str, pod_name: str, capped: bool = True) -> None:
+        """
+        Start streaming the log of a POD, unless it is already streamed or ('capped') the maximum
+        number of followed logs was reached
+        """
+        with self._lock:
+            if job_name in self._collected:
+                return
+            job_captures = self._captures.setdefault(job_name, {})
+            if pod_name in job_captures:
+                return
+            if capped and self._followers >= self.max_followers:
+                self.log.debug(f"Not following the log of POD {pod_name} yet ({self._followers} logs followed)")
+                return
+            self._followers += 1
+            buffer = LogRingBuffer(self.max_bytes, self.head_bytes)
+            spill_path = os.path.join(self.task_base_path, SPILLED_LOGS_FOLDER, job_name, f"{pod_name}.log.gz") \
+                if self.spill else None
+            thread = threading.Thread(target=self.__capture, args=(pod_name, buffer, spill_path),
+                                      name=f"log-{pod_name}", daemon=True)
+            job_captures[pod_name] = (buffer, thread, spill_path)
+        thread.start()
+
+
+    def __capture(self, pod_name: str, buffer: LogRingBuffer, spill_path: str | None) -> None:
+        """
+        Follow the log of a POD until its container finishes
+        """
+        spill_file = None
+        try:
+            if spill_path:
+                os.makedirs(os.path.dirname(spill_path), exist_ok=True)
+                spill_file = gzip.open(spill_path, "wb")
+
+            # The spilled log is the full one
+            response = self.core_api.read_namespaced_pod_log(
+                name=pod_name, namespace=self.namespace, follow=True,
+                tail_lines=None if spill_file else self.tail_lines,
+                limit_bytes=None if spill_file else self.limit_bytes,
+                _preload_content=False,
+            )
+            try:
+                for chunk in response.stream(LOG_CHUNK_SIZE):
+                    buffer.write(chunk)
+                    if spill_file:
+                        spill_file.write(chunk)
+            finally:
+                response.release_conn()
+
+        except ApiException as e:
+            self.log.warning(f"Log of POD {pod_name} couldn't be read (status {e.status})")
+        except Exception:
+            self.log.exception(f"Error while streaming the log of POD {pod_name}")
+        finally:
+            if spill_file:
+                spill_file.close()
+            with self._lock:
+                self._followers -= 1
+
+
+    def __prune_spilled_logs_worker(self) -> None:
+        """
+        Remove the spilled logs of the jobs older than 'spill_retention' seconds
+        """
+        spilled_logs_path = os.path.join(self.task_base_path, SPILLED_LOGS_FOLDER)
+        while True:
+            try:
+                if os.path.isdir(spilled_logs_path):
+                    for entry in os.scandir(spilled_logs_path):
+                        if entry.is_dir() and time.time() - entry.stat().st_mtime > self.spill_retention:
+                            shutil.rmtree(entry.path, ignore_errors=True)
+            except OSError:
+                self.log.exception("Error while pruning the spilled POD logs")
+            time.sleep(60 * 60)
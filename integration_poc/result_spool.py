@@ -0,0 +1,131 @@
+from vantage6.common import logger_name
+from typing import BinaryIO
+
+import hashlib
+import logging
+import os
+import threading
+
+
+# Default maximum size (bytes) of an uploaded result
+DEFAULT_MAX_RESULT_BYTES = 1024 ** 3
+
+# Size of the chunks in which the uploads are read and written to the spool
+UPLOAD_CHUNK_SIZE = 2 ** 16
+
+# Sidecar (see the 'result_upload' configuration) that uploads the output of the algorithm to the node
+# proxy once the algorithm exits: as a native sidecar (an init container that is always restarted, K8S
+# 1.29+), it is sent a SIGTERM once the algorithm container terminated, and the POD only finishes after it.
+RESULT_UPLOADER_NAME = "result-upload"
+DEFAULT_RESULT_UPLOADER_IMAGE = "curlimages/curl:8.5.0"
+RESULT_UPLOAD_SCRIPT = (
+    'upload() {'
+    ' [ -f "$OUTPUT_FILE" ] || : > "$OUTPUT_FILE";'
+    ' curl -sS --fail --retry 5 --retry-all-errors -X PUT -T "$OUTPUT_FILE"'
+    ' -H "Authorization: Bearer $(cat "$TOKEN_FILE")" -H "Content-Type: application/octet-stream"'
+    ' "http://$HOST:$PORT/output";'
+    ' exit 0; };'
+    ' trap upload TERM;'
+    ' while true; do sleep 1 & wait $!; done'
+)
+
+
+class ResultTooLarge(ValueError):
+    """The uploaded result exceeds the maximum size of the spool"""
+
+
+class ResultSpool:
+    """
+    Results of the runs uploaded by their algorithm PODs to the node proxy (PUT /output), kept on
+    a local folder of the node until they are harvested, so that the algorithm PODs don't need to
+    share a filesystem with the node to return their output.
+
+    The uploads are authenticated with the container token of the run, registered when its job
+    is created: the token is only kept as a (SHA-256) digest. A result is written to a temporary
+    file and renamed once complete, so that a failed (or repeated) upload never leaves a partial
+    result behind.
+    """
+
+    def __init__(self, spool_dir: str, max_bytes: int = DEFAULT_MAX_RESULT_BYTES):
+        self.log = logging.getLogger(logger_name(__name__))
+        self.spool_dir = spool_dir
+        self.max_bytes = max_bytes
+        os.makedirs(spool_dir, exist_ok=True)
+        # Registered runs (by token digest), and the token digest of each run
+        self._runs: dict[str, str] = {}
+        self._digests: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+
+    @staticmethod
+    def __digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+    def register(self, run_id: str, token: str) -> None:
+        """
+        Accept the uploads of the result of a run, authenticated with its container token
+        """
+        digest = self.__digest(token)
+        with self._lock:
+            self._runs[digest] = str(run_id)
+            self._digests[str(run_id)] = digest
+
+
+    def authenticate(self, token: str) -> str | None:
+        """
+        Run (run_id) whose result can be uploaded with the given token, if any
+        """
+        with self._lock:
+            return self._runs.get(self.__digest(token))
+
+
+    def write(self, run_id: str, stream: BinaryIO) -> int:
+        """
+        Store the result of a run read from a stream, replacing the previous upload (if any).
+        Returns the size of the result, or raises ResultTooLarge (keeping the previous upload).
+        """
+        path = os.path.join(self.spool_dir, str(run_id))
+        partial_path = f"{path}.{threading.get_ident()}.part"
+        size = 0
+        try:
+            with open(partial_path, "wb") as spool_file:
+                while chunk := stream.read(UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ResultTooLarge(f"result of run_id={run_id} exceeds {self.max_bytes} bytes")
+                    spool_file.write(chunk)
+            os.replace(partial_path, path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+        self.log.debug(f"Result of run_id={run_id} uploaded ({size} bytes)")
+        return size
+
+
+    def take(self, run_id: str) -> bytes | None:
+        """
+        Uploaded result of a run (None if it wasn't uploaded), which is removed from the spool
+        """
+        path = os.path.join(self.spool_dir, str(run_id))
+        try:
+            with open(path, "rb") as spool_file:
+                result = spool_file.read()
+        except FileNotFoundError:
+            return None
+        os.remove(path)
+        return result
+
+
+    def release(self, run_id: str) -> None:
+        """
+        Stop accepting the uploads of a run (e.g., once harvested), and drop its result, if any
+        """
+        with self._lock:
+            digest = self._digests.pop(str(run_id), None)
+            if digest is not None:
+                self._runs.pop(digest, None)
+        try:
+            os.remove(os.path.join(self.spool_dir, str(run_id)))
+        except FileNotFoundError:
+            pass
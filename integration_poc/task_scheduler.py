@@ -0,0 +1,390 @@
+from vantage6.common import logger_name
+from vantage6.common.metrics import Histogram
+from vantage6.node.util import get_parent_id
+
+from typing import Callable
+
+import itertools
+import json
+import logging
+import threading
+import time
+
+
+# Priority levels (lower value = higher priority)
+PRIORITY_CHILD = 0      # subtask of a run already executing on this node
+PRIORITY_DEFAULT = 1
+
+PRIORITY_NAMES = {
+    PRIORITY_CHILD: "child",
+    PRIORITY_DEFAULT: "default",
+}
+
+# Seconds a queued task has to wait to be promoted by one priority level, so that
+# the tasks with a lower priority are not starved
+AGING_SECONDS = 60
+
+# Seconds between admission checks while none of the queued tasks is admitted
+ADMISSION_RETRY_INTERVAL = 5
+
+QUEUE_WAIT_SECONDS = Histogram(
+    "v6_node_queue_wait_seconds", "Time the runs waited in the node's queue before being dispatched",
+)
+
+
+def get_init_org_id(task_incl_run: dict) -> int | None:
+    """
+    Id of the organization that created the task of a run (if included)
+    """
+    init_org = task_incl_run["task"].get("init_org")
+    return init_org.get("id") if init_org else None
+
+
+def get_init_user_id(task_incl_run: dict) -> int | None:
+    """
+    Id of the user that created the task of a run (if included)
+    """
+    init_user = task_incl_run["task"].get("init_user")
+    return init_user.get("id") if init_user else None
+
+
+def get_sibling_key(task_incl_run: dict) -> tuple | None:
+    """
+    Key shared by the runs that can be started on the same (fan-out) job: the ones of the
+    tasks with the same parent, image and databases. None for the tasks without a parent.
+    """
+    task = task_incl_run["task"]
+    parent_id = get_parent_id(task)
+    if parent_id is None:
+        return None
+    return parent_id, task["image"], json.dumps(task.get("databases") or [], sort_keys=True)
+
+
+class TaskScheduler:
+    """
+    Parent/child-aware priority queue for the tasks (runs) to be dispatched by the node.
+
+    In federated workflows a central algorithm run waits for the subtasks it creates
+    (through the proxy). When these subtasks queue behind unrelated work, the parent's
+    POD sits idle while holding resources. Hence, the queued tasks that are children
+    (by parent id or job_id) of the runs currently executing on this node are handed out
+    first. Priorities are evaluated when a task is taken (as the parent may have started
+    after the child was queued) and queued tasks are promoted one level every
+    AGING_SECONDS, so that the other tasks are not starved.
+
+    Within a priority level, tasks are handed out following a weighted fair queuing
+    policy across the initiating organizations (init_org) and, within an organization,
+    across the initiating users (init_user), so that a party submitting hundreds of runs
+    doesn't delay the small tasks of the others. Each organization/user has a virtual
+    time that advances 1/weight per dispatched task, and the one with the lowest virtual
+    time goes first. An organization can also be capped on the number of runs it has in
+    flight on this node.
+
+    The number of runs in flight on the whole node can be capped as well ('max_inflight').
+    The tasks that would exceed a cap are held in the queue (instead of being handed out to
+    a dispatch worker that would wait for a run to finish), except for the subtasks of the
+    runs executing on this node, whose parents may be waiting for them.
+
+    A run is handed out once: it is registered as executing on this node when it is taken,
+    until run_finished is called, and the tasks of a run already queued or executing are
+    not queued again.
+
+    Optionally, an admission check (e.g., whether the run fits on the cluster) is applied
+    to the selected task, and the tasks that are not admitted are held in the queue.
+
+    It offers the subset of the queue.Queue interface used by the node (put, get and
+    qsize).
+    """
+
+    def __init__(self, aging_seconds: float = AGING_SECONDS, fair_share: dict | None = None,
+                 admission: Callable[[dict], bool] | None = None, max_inflight: int | None = None):
+        """
+        Parameters
+        ----------
+        aging_seconds: float
+            Seconds a queued task has to wait to be promoted by one priority level
+        fair_share: dict, optional
+            'fair_share' section of the node configuration, with the optional keys
+            'organization_weights' and 'user_weights' (id -> weight, default 1),
+            'max_inflight_per_organization' (default cap, none by default) and
+            'organization_max_inflight' (id -> cap)
+        admission: Callable[[dict], bool], optional
+            Check applied to the task selected to be handed out. If it returns False, the
+            task is kept in the queue and the next one is selected. It is called while the
+            queue is locked, so it must only read local state (see AdmissionController)
+        max_inflight: int, optional
+            Maximum number of runs (other than the subtasks of the runs executing on this node)
+            in flight on this node at the same time. No limit by default
+        """
+        self.log = logging.getLogger(logger_name(__name__))
+        self.aging_seconds = aging_seconds
+        self.admission = admission
+        self.max_inflight = max_inflight
+
+        fair_share = fair_share or {}
+        self._org_weights: dict[int, float] = fair_share.get("organization_weights") or {}
+        self._user_weights: dict[int, float] = fair_share.get("user_weights") or {}
+        self._default_org_cap: int | None = fair_share.get("max_inflight_per_organization")
+        self._org_caps: dict[int, int] = fair_share.get("organization_max_inflight") or {}
+
+        # Virtual times of the organizations, of the users (by organization), and of the last
+        # dispatched task (the ones of the idle parties are brought up to the latter, so these
+        # can't accumulate credit while idle)
+        self._org_vtime: dict[int | None, float] = {}
+        self._user_vtime: dict[tuple[int | None, int | None], float] = {}
+        self._org_vclock = 0.0
+        self._user_vclock: dict[int | None, float] = {}
+
+        self._available = threading.Condition()
+        # (sequence number, enqueue time, task_incl_run)
+        self._queued: list[tuple[int, float, dict]] = []
+        self._queued_run_ids: set[int] = set()
+        self._sequence = itertools.count()
+
+        # run_id -> (task_id, job_id, init_org id) of the runs executing on this node (handed out,
+        # and not finished yet)
+        self._running: dict[int, tuple[int, int | None, int | None]] = {}
+        # Number of runs executing on this node by initiating organization
+        self._inflight_by_org: dict[int | None, int] = {}
+        # run_ids of the runs counted against 'max_inflight' (i.e., not handed out as subtasks)
+        self._inflight_slots: set[int] = set()
+
+
+    def put(self, task_incl_run: dict) -> bool:
+        """
+        Add a task (run including its task) to the queue, unless its run is already queued or
+        executing on this node
+
+        Returns
+        -------
+        bool
+            Whether the task was queued
+        """
+        run_id = task_incl_run["id"]
+        with self._available:
+            if run_id in self._queued_run_ids or run_id in self._running:
+                return False
+            self._queued_run_ids.add(run_id)
+            self._queued.append((next(self._sequence), time.time(), task_incl_run))
+            self._available.notify_all()
+        return True
+
+
+    def get(self) -> dict:
+        """
+        Remove and return the next task to be dispatched, blocking until there is one: the
+        task of the organization and user with the lowest virtual time, on the priority level
+        whose candidate has the highest aged priority. Tasks of organizations that reached
+        their in-flight cap (or, if the node reached its own cap, all the tasks but the subtasks
+        of the runs executing on this node) are held in the queue. Remaining ties are broken in
+        FIFO order. The run of the returned task is registered as executing on this node.
+        """
+        with self._available:
+            while True:
+                now = time.time()
+                not_admitted: set[int] = set()
+                selected = self.__select(now, not_admitted)
+                while selected is not None and self.admission and not self.admission(self._queued[selected][2]):
+                    not_admitted.add(self._queued[selected][0])
+                    selected = self.__select(now, not_admitted)
+                if selected is not None:
+                    break
+                # Woken up when a task is queued or a run finishes (freeing a cap), or periodically
+                # to check again the tasks that were not admitted
+                self._available.wait(ADMISSION_RETRY_INTERVAL if not_admitted else None)
+
+            _, queued_at, task_incl_run = self._queued.pop(selected)
+            self.__hand_out(task_incl_run)
+
+        QUEUE_WAIT_SECONDS.observe(now - queued_at)
+
+        self.log.debug(f"Dequeued run_id={task_incl_run['id']} after {now - queued_at:.1f}s "
+                       f"(priority: {PRIORITY_NAMES[self.priority(task_incl_run)]}, "
+                       f"init_org: {get_init_org_id(task_incl_run)}, init_user: {get_init_user_id(task_incl_run)})")
+        return task_incl_run
+
+
+    def take_siblings(self, task_incl_run: dict, max_count: int) -> list[dict]:
+        """
+        Remove and return up to 'max_count' queued tasks that are siblings of a task taken with
+        get (see get_sibling_key), in FIFO order, so that they are started together with it.
+        Siblings that are not admitted, or that would exceed an in-flight cap, are kept in the
+        queue.
+        """
+        key = get_sibling_key(task_incl_run)
+        if key is None or max_count <= 0:
+            return []
+
+        now = time.time()
+        siblings = []
+        with self._available:
+            for queued in list(self._queued):
+                if len(siblings) >= max_count:
+                    break
+                _, queued_at, sibling = queued
+                if get_sibling_key(sibling) != key:
+                    continue
+                if self.__is_capped(self.priority(sibling), get_init_org_id(sibling)):
+                    continue
+                if self.admission and not self.admission(sibling):
+                    continue
+                self._queued.remove(queued)
+                self.__hand_out(sibling)
+                siblings.append(sibling)
+                QUEUE_WAIT_SECONDS.observe(now - queued_at)
+
+        if siblings:
+            self.log.debug(f"Dequeued {len(siblings)} sibling(s) of run_id={task_incl_run['id']}: "
+                           f"{[sibling['id'] for sibling in siblings]}")
+        return siblings
+
+
+    def __select(self, now: float, excluded: set[int]) -> int | None:
+        """
+        Index of the next queued task to be handed out (ignoring the tasks whose sequence
+        number is in 'excluded'), or None if there is no eligible task.
+
+        The fair queuing policy picks a candidate for each priority level (so that the aging
+        of the tasks of a party flooding the node doesn't push them ahead of the others), and
+        the candidate with the highest aged priority is selected.
+        """
+        candidates: dict[int, tuple[tuple, int, float]] = {}
+        for i, (sequence, queued_at, task_incl_run) in enumerate(self._queued):
+            if sequence in excluded:
+                continue
+            priority = self.priority(task_incl_run)
+            org_id = get_init_org_id(task_incl_run)
+            if self.__is_capped(priority, org_id):
+                continue
+
+            user_id = get_init_user_id(task_incl_run)
+            key = (
+                max(self._org_vtime.get(org_id, 0.0), self._org_vclock),
+                max(self._user_vtime.get((org_id, user_id), 0.0), self._user_vclock.get(org_id, 0.0)),
+                sequence,
+            )
+            if priority not in candidates or key < candidates[priority][0]:
+                candidates[priority] = (key, i, queued_at)
+
+        if not candidates:
+            return None
+
+        best_priority = min(
+            candidates,
+            key=lambda p: (p - (now - candidates[p][2]) / self.aging_seconds, p),
+        )
+        return candidates[best_priority][1]
+
+
+    def __hand_out(self, task_incl_run: dict) -> None:
+        """
+        Register a task taken from the queue: its party is charged, and its run is registered as
+        executing on this node (so that its subtasks get prioritized), holding an in-flight slot
+        unless it is a subtask of a run executing on this node
+        """
+        run_id = task_incl_run["id"]
+        holds_slot = self.priority(task_incl_run) != PRIORITY_CHILD
+        org_id = get_init_org_id(task_incl_run)
+        task = task_incl_run["task"]
+
+        self._queued_run_ids.discard(run_id)
+        self.__charge(task_incl_run)
+        self._running[run_id] = (task["id"], task.get("job_id"), org_id)
+        self._inflight_by_org[org_id] = self._inflight_by_org.get(org_id, 0) + 1
+        if holds_slot:
+            self._inflight_slots.add(run_id)
+
+
+    def __charge(self, task_incl_run: dict) -> None:
+        """
+        Advance the virtual times of the organization and user of a dispatched task
+        """
+        org_id = get_init_org_id(task_incl_run)
+        user_id = get_init_user_id(task_incl_run)
+
+        org_start = max(self._org_vtime.get(org_id, 0.0), self._org_vclock)
+        self._org_vclock = org_start
+        self._org_vtime[org_id] = org_start + 1.0 / self._org_weights.get(org_id, 1)
+
+        user_start = max(self._user_vtime.get((org_id, user_id), 0.0), self._user_vclock.get(org_id, 0.0))
+        self._user_vclock[org_id] = user_start
+        self._user_vtime[(org_id, user_id)] = user_start + 1.0 / self._user_weights.get(user_id, 1)
+
+
+    def __is_capped(self, priority: int, org_id: int | None) -> bool:
+        """
+        Whether a task with the given priority must be held in the queue because its organization,
+        or the node, reached its in-flight cap. The subtasks of the runs executing on this node are
+        never held, as their parents may be holding all the slots while waiting for them.
+        """
+        if priority == PRIORITY_CHILD:
+            return False
+        if self.max_inflight is not None and len(self._inflight_slots) >= self.max_inflight:
+            return True
+        cap = self._org_caps.get(org_id, self._default_org_cap)
+        return cap is not None and self._inflight_by_org.get(org_id, 0) >= cap
+
+
+    def qsize(self) -> int:
+        with self._available:
+            return len(self._queued)
+
+
+    def depth_by_priority(self) -> dict[str, int]:
+        """
+        Number of queued tasks per (non-aged) priority level
+        """
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        with self._available:
+            for _, _, task_incl_run in self._queued:
+                depth[PRIORITY_NAMES[self.priority(task_incl_run)]] += 1
+        return depth
+
+
+    def run_finished(self, run_id: int) -> None:
+        """
+        Unregister a run handed out by get (or take_siblings): it finished, or it was not started
+        """
+        with self._available:
+            running = self._running.pop(run_id, None)
+            if running is not None:
+                self._inflight_by_org[running[2]] -= 1
+                self._inflight_slots.discard(run_id)
+                self._available.notify_all()
+
+
+    def running_count(self) -> int:
+        """
+        Number of runs executing on this node
+        """
+        with self._available:
+            return len(self._running)
+
+
+    def inflight_by_organization(self) -> dict[int | None, int]:
+        """
+        Number of runs executing on this node by initiating organization
+        """
+        with self._available:
+            return {org_id: n for org_id, n in self._inflight_by_org.items() if n}
+
+
+    def is_child_of_running(self, task_incl_run: dict) -> bool:
+        """
+        Whether the task was created by (or belongs to the same job of) a run executing on
+        this node
+        """
+        task = task_incl_run["task"]
+        parent_id = get_parent_id(task)
+        job_id = task.get("job_id")
+        with self._available:
+            for task_id, running_job_id, _ in self._running.values():
+                if parent_id is not None and parent_id == task_id:
+                    return True
+                if job_id is not None and job_id == running_job_id:
+                    return True
+        return False
+
+
+    def priority(self, task_incl_run: dict) -> int:
+        return PRIORITY_CHILD if self.is_child_of_running(task_incl_run) else PRIORITY_DEFAULT
@@ -0,0 +1,49 @@
+import os
+import sys
+import types
+
+import pytest
+import yaml
+
+# The PoC modules are imported by name, as when the node is run from its folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from container_manager import ContainerManager
+from execution_backend import FakeBackend
+
+
+# Fast simulated cluster (seconds)
+FAST_CLUSTER = {"api_latency": 0, "scheduling_delay": 0.02, "pull_time": 0.05, "run_time": 0.1, "seed": 1}
+
+
+@pytest.fixture
+def fake_backend():
+    """
+    Backend on a fast simulated cluster (see FakeBackend), with the given 'fake_cluster' settings
+    """
+    def create(**cluster_config) -> FakeBackend:
+        return FakeBackend(dict(FAST_CLUSTER, **cluster_config))
+    return create
+
+
+@pytest.fixture
+def container_manager(tmp_path, fake_backend):
+    """
+    ContainerManager on a simulated cluster, with its tasks folder and a CSV database on tmp_path.
+    Extra node configuration entries and 'fake_cluster' settings can be given.
+    """
+    def create(node_config: dict | None = None, **cluster_config) -> ContainerManager:
+        data_file = tmp_path / "data.csv"
+        data_file.write_text("a,b\n1,2\n")
+        config = {
+            "task_dir": str(tmp_path / "tasks"),
+            "databases": [{"label": "default", "uri": str(data_file), "type": "csv"}],
+            **(node_config or {}),
+        }
+        config_file = tmp_path / "node.yaml"
+        config_file.write_text(yaml.safe_dump(config))
+        manager = ContainerManager(types.SimpleNamespace(config_file=str(config_file)),
+                                   backend=fake_backend(**cluster_config))
+        manager.informer.wait_until_synced()
+        return manager
+    return create
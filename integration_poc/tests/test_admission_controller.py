@@ -0,0 +1,84 @@
+import threading
+import time
+
+from kubernetes import client
+
+from admission_controller import AdmissionController
+
+from test_job_informer import build_job, start_informer
+
+
+def start_controller(backend) -> AdmissionController:
+    controller = AdmissionController(backend.core_api, start_informer(backend), refresh_interval=0.05)
+    controller.start()
+    assert controller.wait_until_refreshed(timeout=5)
+    return controller
+
+
+def create_run_job(backend, run_id: int, cpu: str) -> None:
+    job = build_job(str(run_id), {"run_id": str(run_id), "task_id": str(run_id + 1000)})
+    job.spec.template.metadata.labels["app"] = str(run_id)
+    job.spec.template.spec.containers[0].resources = client.V1ResourceRequirements(requests={"cpu": cpu})
+    backend.batch_api.create_namespaced_job("v6-jobs", job)
+
+
+def test_runs_are_admitted_while_they_fit_on_a_node(fake_backend):
+    controller = start_controller(fake_backend(nodes=2, node_cpu="2"))
+
+    assert controller.try_admit(1, {"cpu": "2"})
+    assert controller.try_admit(2, {"cpu": "2"})
+    # Already reserved
+    assert controller.try_admit(1, {"cpu": "2"})
+    assert not controller.try_admit(3, {"cpu": "1"})
+
+    controller.release(2)
+    assert controller.try_admit(3, {"cpu": "1"})
+
+
+def test_runs_must_fit_on_a_single_node(fake_backend):
+    controller = start_controller(fake_backend(nodes=2, node_cpu="2"))
+
+    assert not controller.try_admit(1, {"cpu": "3"})
+
+
+def test_capacity_is_freed_when_the_pods_of_a_run_terminate(fake_backend):
+    backend = fake_backend(nodes=1, node_cpu="2", run_time=0.3)
+    controller = start_controller(backend)
+
+    assert controller.try_admit(1, {"cpu": "2"})
+    create_run_job(backend, 1, cpu="2")
+    # The reservation is replaced by the requests of the POD, until it terminates
+    assert controller.informer.wait_for(lambda: controller.informer.get_run_pods(1), timeout=5)
+    assert not controller.try_admit(2, {"cpu": "1"})
+
+    assert controller.informer.wait_for(
+        lambda: controller.informer.get_run_pods(1)[0].status.phase == "Succeeded", timeout=5)
+    assert controller.try_admit(2, {"cpu": "1"})
+
+
+def test_admission_does_not_call_the_api_and_survives_refresh_errors(fake_backend, monkeypatch):
+    backend = fake_backend(nodes=1, node_cpu="2")
+    controller = start_controller(backend)
+    callers = set()
+
+    def unreachable(*args, **kwargs):
+        callers.add(threading.current_thread().name)
+        raise ConnectionError("K8S API unreachable")
+    for method in ("list_node", "list_pod_for_all_namespaces", "list_namespaced_resource_quota"):
+        monkeypatch.setattr(backend.core_api, method, unreachable)
+
+    assert controller.try_admit(1, {"cpu": "2"})
+    assert not controller.try_admit(2, {"cpu": "1"})
+
+    # The refresh keeps failing: the previous capacity is used
+    time.sleep(0.3)
+    assert callers == {"admission-refresh"}
+    controller.release(1)
+    assert controller.try_admit(2, {"cpu": "1"})
+    assert not controller.try_admit(3, {"cpu": "2"})
+
+    # Once the API is reachable, the capacity is refreshed again
+    monkeypatch.undo()
+    backend.server.config["node_cpu"] = "4"
+    time.sleep(0.3)
+    assert controller.try_admit(3, {"cpu": "2"})
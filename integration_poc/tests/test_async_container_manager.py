@@ -0,0 +1,249 @@
+import asyncio
+import json
+import time
+import types
+
+import pytest
+import yaml
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+
+import async_container_manager
+from async_container_manager import ContainerManagerBridge
+from container_manager import IndexedRun, KilledRun
+from fake_kubernetes import FakeWatch
+from vantage6.common.task_status import TaskStatus
+
+from test_container_manager import collect_results, collect_status_changes, start_run
+
+# Models of the bodies of the create requests, deserialized as the API server would
+BODY_MODELS = {
+    "create_namespaced_job": "V1Job",
+    "create_namespaced_config_map": "V1ConfigMap",
+    "create_namespaced_secret": "V1Secret",
+}
+
+
+class AsyncApi:
+    """
+    kubernetes_asyncio stand-in of a (fake) K8S API client: its requests run on a worker thread
+    """
+
+    def __init__(self, api):
+        self._api = api
+        self._serializer = client.ApiClient()
+
+    def __getattr__(self, name: str):
+        method = getattr(self._api, name)
+
+        async def call(*args, **kwargs):
+            kwargs.pop("_request_timeout", None)
+            if name in BODY_MODELS:
+                response = types.SimpleNamespace(data=json.dumps(kwargs["body"]))
+                kwargs["body"] = self._serializer.deserialize(response, BODY_MODELS[name])
+            return await asyncio.to_thread(method, *args, **kwargs)
+        call.__name__ = name
+        call.sync = method
+        return call
+
+
+class AsyncWatch:
+    """
+    kubernetes_asyncio stand-in of a watch, streaming the events of a FakeWatch
+    """
+
+    def __init__(self, server):
+        self._watch = FakeWatch(server)
+        self._events = None
+
+    def stream(self, func, resource_version: str | None = None, timeout_seconds: int | None = None, **kwargs):
+        self._events = self._watch.stream(func.sync, resource_version=resource_version,
+                                          timeout_seconds=timeout_seconds)
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._watch.stop()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await asyncio.to_thread(next, self._events, None)
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+
+class AsyncApiClient:
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def async_manager(tmp_path, fake_backend, monkeypatch):
+    """
+    ContainerManagerBridge (and its AsyncContainerManager) on a simulated cluster, with its
+    tasks folder and a CSV database on tmp_path. 'fake_cluster' settings can be given.
+    """
+    bridges = []
+
+    def create(**cluster_config) -> ContainerManagerBridge:
+        backend = fake_backend(**cluster_config)
+
+        async def load_kube_config(path):
+            pass
+        monkeypatch.setattr(async_container_manager, "async_config",
+                            types.SimpleNamespace(load_kube_config=load_kube_config))
+        monkeypatch.setattr(async_container_manager, "async_client", types.SimpleNamespace(
+            ApiClient=AsyncApiClient,
+            BatchV1Api=lambda api_client: AsyncApi(backend.batch_api),
+            CoreV1Api=lambda api_client: AsyncApi(backend.core_api),
+        ))
+        monkeypatch.setattr(async_container_manager, "async_watch",
+                            types.SimpleNamespace(Watch=lambda: AsyncWatch(backend.server)))
+        monkeypatch.setattr(async_container_manager, "AsyncApiException", ApiException)
+        # Run as on a host (with a kube config), with the tasks folder of the configuration
+        (tmp_path / ".kube").mkdir(exist_ok=True)
+        (tmp_path / ".kube" / "config").write_text("")
+        monkeypatch.setenv("HOME", str(tmp_path))
+
+        data_file = tmp_path / "data.csv"
+        data_file.write_text("a,b\n1,2\n")
+        config_file = tmp_path / "node.yaml"
+        config_file.write_text(yaml.safe_dump({
+            "task_dir": str(tmp_path / "tasks"),
+            "databases": [{"label": "default", "uri": str(data_file), "type": "csv"}],
+            "container_manager": {"type": "async"},
+        }))
+        bridge = ContainerManagerBridge(types.SimpleNamespace(config_file=str(config_file)))
+        bridge.server = backend.server
+        bridges.append(bridge)
+        return bridge
+
+    yield create
+    for bridge in bridges:
+        bridge.close()
+
+
+def wait_for_no_jobs(manager, timeout: float = 10) -> bool:
+    deadline = time.time() + timeout
+    while manager.server.list_objects("job")[0] and time.time() < deadline:
+        time.sleep(0.05)
+    return not manager.server.list_objects("job")[0]
+
+
+def test_runs_are_started_and_harvested(async_manager):
+    manager = async_manager(log_lines=3)
+
+    assert [start_run(manager, run_id) for run_id in (1, 2)] == [TaskStatus.INITIALIZING] * 2
+    assert manager.is_running(1)
+
+    statuses = {}
+    deadline = time.time() + 10
+    while len(statuses) < 2 and time.time() < deadline:
+        statuses.update({change.run_id: change.status for change in manager.get_status_changes(timeout=0.5)})
+    assert statuses == {1: TaskStatus.ACTIVE, 2: TaskStatus.ACTIVE}
+
+    results = collect_results(manager, 2)
+    assert sorted(results) == [1, 2]
+    for run_id, result in results.items():
+        assert result.status == TaskStatus.COMPLETED
+        assert result.data == b"{}"
+        assert result.logs[0].count("simulated algorithm log line") == 3
+    assert wait_for_no_jobs(manager)
+
+
+def test_failed_jobs_are_harvested_as_crashed(async_manager):
+    manager = async_manager(failure_rate=1.0)
+
+    start_run(manager, 1)
+
+    assert collect_results(manager, 1)[1].status == TaskStatus.CRASHED
+
+
+def test_runs_whose_image_cant_be_pulled_fail_to_start(async_manager):
+    manager = async_manager(pull_failure_rate=1.0)
+
+    start_run(manager, 1)
+
+    assert collect_status_changes(manager, 1) == {1: TaskStatus.NO_DOCKER_IMAGE}
+    assert wait_for_no_jobs(manager)
+    assert collect_results(manager, 1, timeout=1) == {}
+
+
+def test_runs_whose_retry_pod_cant_start_are_failed(async_manager):
+    # Every run crashes, and its retries are pulled on other nodes, where some pulls fail
+    manager = async_manager(failure_rate=1.0, pull_failure_rate=0.5, nodes=6, seed=5)
+
+    for run_id in range(1, 9):
+        start_run(manager, run_id, image=f"img-{run_id}")
+
+    statuses = {}
+    results = {}
+    active = set()
+    deadline = time.time() + 30
+    while len(statuses.keys() | results.keys()) < 8 and time.time() < deadline:
+        results.update({int(result.run_id): result for result in manager.get_results(timeout=0.2)})
+        for change in manager.get_status_changes(timeout=0.2):
+            if change.status == TaskStatus.ACTIVE:
+                active.add(change.run_id)
+            else:
+                statuses[change.run_id] = change.status
+
+    assert sorted(statuses.keys() | results.keys()) == list(range(1, 9))
+    assert not statuses.keys() & results.keys()
+    assert set(statuses.values()) <= {TaskStatus.NO_DOCKER_IMAGE}
+    assert statuses.keys() & active
+    assert wait_for_no_jobs(manager)
+
+
+def test_a_sibling_run_that_cant_be_started_does_not_fail_the_others(async_manager):
+    manager = async_manager()
+    run = manager.manager.run
+
+    async def run_fails_for_run_2(run_id, *args, **kwargs):
+        if run_id == 2:
+            raise OSError("No space left on device")
+        return await run(run_id, *args, **kwargs)
+    manager.manager.run = run_fails_for_run_2
+
+    statuses = manager.run_indexed(
+        runs=[IndexedRun(run_id=run_id, task_info={"id": run_id + 1000, "parent": None}, docker_input=b"input",
+                         token="token") for run_id in (1, 2, 3)],
+        image="img", databases_to_use=[{"label": "default"}],
+    )
+
+    assert statuses == {1: TaskStatus.INITIALIZING, 2: TaskStatus.START_FAILED, 3: TaskStatus.INITIALIZING}
+    assert sorted(collect_results(manager, 2)) == [1, 3]
+
+
+def test_killed_runs_are_removed_without_being_harvested(async_manager):
+    manager = async_manager(run_time=1)
+    start_run(manager, 1)
+    start_run(manager, 2)
+    deadline = time.time() + 5
+    while not manager.is_running(1) and time.time() < deadline:
+        time.sleep(0.05)
+
+    killed = manager.kill_tasks(org_id=1, kill_list=[
+        {"run_id": 1, "task_id": 1001, "organization_id": 1},
+        {"run_id": 2, "task_id": 1002, "organization_id": 2},
+    ])
+
+    assert killed == [KilledRun(run_id=1, task_id=1001, parent_id=None)]
+    assert list(collect_results(manager, 2, timeout=4)) == [2]
+    assert wait_for_no_jobs(manager)
+
+
+def test_runs_that_request_undefined_databases_fail_to_start(async_manager):
+    manager = async_manager()
+
+    status, _ = manager.run(run_id=1, task_info={"id": 1001, "parent": None}, image="img", docker_input=b"input",
+                            tmp_vol_name="", token="token", databases_to_use=[{"label": "x"}])
+
+    assert status == TaskStatus.START_FAILED
+    assert not manager.is_running(1)
@@ -0,0 +1,178 @@
+import time
+from collections import Counter
+
+import container_manager as container_manager_module
+from container_manager import IndexedRun
+from indexed_jobs import get_completion_index
+from vantage6.common.task_status import TaskStatus, has_task_failed
+
+
+def start_run(manager, run_id: int, image: str = "img") -> TaskStatus:
+    status, _ = manager.run(run_id=run_id, task_info={"id": run_id + 1000, "parent": None}, image=image,
+                            docker_input=b"input", tmp_vol_name="", token="token",
+                            databases_to_use=[{"label": "default"}])
+    return status
+
+
+def collect_results(manager, count: int, timeout: float = 20) -> dict:
+    """
+    Results harvested until 'count' runs were collected (or the timeout expired), by run_id
+    """
+    results = {}
+    deadline = time.time() + timeout
+    while len(results) < count and time.time() < deadline:
+        for result in manager.get_results(timeout=0.5):
+            results[int(result.run_id)] = result
+    return results
+
+
+def collect_status_changes(manager, count: int, timeout: float = 20) -> dict:
+    """
+    Final status of each run reported through get_status_changes, until 'count' runs failed
+    """
+    statuses = {}
+    deadline = time.time() + timeout
+    while sum(has_task_failed(s) for s in statuses.values()) < count and time.time() < deadline:
+        for change in manager.get_status_changes(timeout=0.5):
+            statuses[change.run_id] = change.status
+    return statuses
+
+
+def test_finished_jobs_are_harvested_and_removed(container_manager):
+    manager = container_manager(log_lines=3)
+
+    assert [start_run(manager, run_id) for run_id in (1, 2)] == [TaskStatus.INITIALIZING] * 2
+
+    results = collect_results(manager, 2)
+
+    assert sorted(results) == [1, 2]
+    for run_id, result in results.items():
+        assert result.status == TaskStatus.COMPLETED
+        assert result.data == b"{}"
+        assert result.task_id == str(run_id + 1000)
+        assert result.logs and result.logs[0].count("simulated algorithm log line") == 3
+    assert manager.informer.wait_for(lambda: not manager.informer.get_jobs() and not manager.is_running(1),
+                                     timeout=10)
+
+
+def test_failed_jobs_are_harvested_as_crashed(container_manager):
+    manager = container_manager(failure_rate=1.0)
+
+    start_run(manager, 1)
+
+    assert collect_results(manager, 1)[1].status == TaskStatus.CRASHED
+
+
+def test_completions_that_did_not_fit_on_the_queue_are_requeued(container_manager, monkeypatch):
+    monkeypatch.setattr(container_manager_module, "COMPLETION_QUEUE_SIZE", 1)
+    manager = container_manager()
+
+    for run_id in range(1, 6):
+        start_run(manager, run_id)
+    # Let all the jobs finish before the first harvest, so that most completions are dropped
+    assert manager.informer.wait_for(
+        lambda: sum(bool(job.status and job.status.succeeded) for job in manager.informer.get_jobs()) == 5,
+        timeout=10)
+
+    results = collect_results(manager, 5)
+
+    assert sorted(results) == [1, 2, 3, 4, 5]
+    assert all(result.status == TaskStatus.COMPLETED for result in results.values())
+
+
+def test_runs_whose_image_cant_be_pulled_fail_to_start(container_manager):
+    manager = container_manager(pull_failure_rate=1.0)
+
+    start_run(manager, 1)
+
+    assert collect_status_changes(manager, 1) == {1: TaskStatus.NO_DOCKER_IMAGE}
+    assert manager.informer.wait_for(lambda: not manager.informer.get_jobs(), timeout=10)
+    assert collect_results(manager, 1, timeout=1) == {}
+
+
+def test_runs_whose_retry_pod_cant_start_are_failed(container_manager):
+    # Every run crashes, and its retries are pulled on other nodes, where some pulls fail
+    manager = container_manager(failure_rate=1.0, pull_failure_rate=0.5, nodes=6, seed=5)
+
+    for run_id in range(1, 9):
+        start_run(manager, run_id, image=f"img-{run_id}")
+
+    statuses = {}
+    results = {}
+    active = set()
+    deadline = time.time() + 30
+    while len(statuses.keys() | results.keys()) < 8 and time.time() < deadline:
+        results.update({int(result.run_id): result for result in manager.get_results(timeout=0.2)})
+        for change in manager.get_status_changes(timeout=0.2):
+            if has_task_failed(change.status):
+                statuses[change.run_id] = change.status
+            elif change.status == TaskStatus.ACTIVE:
+                active.add(change.run_id)
+
+    # Each run is either failed to start (first POD or a retry) or harvested, never left pending
+    assert sorted(statuses.keys() | results.keys()) == list(range(1, 9))
+    assert not statuses.keys() & results.keys()
+    assert set(statuses.values()) <= {TaskStatus.NO_DOCKER_IMAGE}
+    # Some of them failed on a retry, after their first POD ran
+    assert statuses.keys() & active
+    assert manager.informer.wait_for(lambda: not manager.informer.get_jobs(), timeout=10)
+
+
+def test_killed_runs_are_removed_without_being_harvested(container_manager):
+    manager = container_manager(run_time=1)
+    start_run(manager, 1)
+    start_run(manager, 2)
+    assert manager.informer.wait_for(lambda: manager.informer.get_job("1"), timeout=5)
+
+    killed = manager.kill_tasks(org_id=1, kill_list=[
+        {"run_id": 1, "task_id": 1001, "organization_id": 1},
+        {"run_id": 2, "task_id": 1002, "organization_id": 2},
+    ])
+
+    assert killed == [container_manager_module.KilledRun(run_id=1, task_id=1001, parent_id=None)]
+    assert list(collect_results(manager, 2, timeout=4)) == [2]
+    assert manager.informer.wait_for(lambda: manager.informer.get_job("1") is None, timeout=5)
+    assert manager.kill_tasks(org_id=1, kill_list=[{"run_id": 1, "task_id": 1001, "organization_id": 1}]) == []
+
+
+def test_all_unfinished_runs_are_killed_without_a_kill_list(container_manager):
+    manager = container_manager(run_time=60)
+    for run_id in (1, 2):
+        start_run(manager, run_id)
+    assert manager.informer.wait_for(lambda: len(manager.informer.get_jobs()) == 2, timeout=5)
+
+    assert [killed.run_id for killed in manager.kill_tasks(org_id=1)] == [1, 2]
+    assert manager.informer.wait_for(lambda: not manager.informer.get_jobs(), timeout=5)
+
+
+def test_sibling_runs_are_harvested_by_index(container_manager):
+    manager = container_manager()
+    runs = [IndexedRun(run_id=10 + i, task_info={"id": 20 + i, "parent": {"id": 7}},
+                       docker_input=b"input", token="token") for i in range(4)]
+
+    statuses = manager.run_indexed(runs, image="img", databases_to_use=[{"label": "default"}])
+
+    assert statuses == {run.run_id: TaskStatus.INITIALIZING for run in runs}
+    results = collect_results(manager, 4)
+    assert {run_id: result.status for run_id, result in results.items()} == {
+        run.run_id: TaskStatus.COMPLETED for run in runs}
+    assert {result.parent_id for result in results.values()} == {"7"}
+    assert manager.informer.wait_for(lambda: not manager.informer.get_jobs(), timeout=10)
+
+
+def test_failed_indexes_do_not_use_up_the_retries_of_their_siblings(container_manager):
+    manager = container_manager(failure_rate=1.0)
+    pods_by_index = Counter()
+    manager.informer.add_listener(lambda kind, event_type, obj: kind == "pod" and event_type == "ADDED"
+                                  and pods_by_index.update([get_completion_index(obj)]))
+    runs = [IndexedRun(run_id=10 + i, task_info={"id": 20 + i, "parent": {"id": 7}},
+                       docker_input=b"input", token="token") for i in range(4)]
+
+    manager.run_indexed(runs, image="img", databases_to_use=[{"label": "default"}])
+    results = collect_results(manager, 4)
+
+    assert {run_id: result.status for run_id, result in results.items()} == {
+        run.run_id: TaskStatus.CRASHED for run in runs}
+    # Each index is retried on its own (backoff_limit_per_index=3)
+    assert pods_by_index == {index: 4 for index in range(4)}
+    assert manager.informer.wait_for(lambda: not manager.informer.get_jobs(), timeout=10)
@@ -0,0 +1,75 @@
+from kubernetes.client.rest import ApiException
+
+from data_locality import DataLocality
+from vantage6.common.task_status import TaskStatus
+
+from test_container_manager import start_run
+
+DATABASES = [
+    {"label": "default", "uri": "/data/default.csv", "type": "csv"},
+    {"label": "other", "uri": "/data/other.parquet", "type": "parquet"},
+    {"label": "sql", "uri": "postgresql://db:5432/v6", "type": "sql"},
+]
+
+
+def test_affinity_requires_the_nodes_that_hold_every_local_database(fake_backend):
+    locality = DataLocality(fake_backend().core_api, {"registry": {"other": ["fake-node-1"]}}, DATABASES)
+
+    assert locality.get_affinity([{"label": "sql"}]) is None
+    affinity = locality.get_affinity([{"label": "other"}, {"label": "default"}, {"label": "sql"}])
+    term, = affinity.node_affinity.required_during_scheduling_ignored_during_execution.node_selector_terms
+    assert [(e.key, e.operator, e.values) for e in term.match_expressions] == [
+        ("v6.database/default", "Exists", None),
+        ("kubernetes.io/hostname", "In", ["fake-node-1"]),
+    ]
+
+
+def test_affinity_is_only_preferred_when_not_required(fake_backend):
+    locality = DataLocality(fake_backend().core_api, {"required": False}, DATABASES)
+
+    node_affinity = locality.get_affinity([{"label": "default"}]).node_affinity
+
+    assert node_affinity.required_during_scheduling_ignored_during_execution is None
+    preferred, = node_affinity.preferred_during_scheduling_ignored_during_execution
+    assert preferred.preference.match_expressions[0].key == "v6.database/default"
+
+
+def test_candidate_nodes_hold_all_the_requested_databases(fake_backend):
+    backend = fake_backend(nodes=3, node_labels={"fake-node-0": {"v6.database/default": "true"},
+                                                 "fake-node-1": {"v6.database/default": "true"}})
+    locality = DataLocality(backend.core_api, {"registry": {"other": ["fake-node-1", "fake-node-2"]}}, DATABASES)
+
+    assert locality.get_candidate_nodes([{"label": "sql"}]) is None
+    assert locality.get_candidate_nodes([{"label": "default"}]) == {"fake-node-0", "fake-node-1"}
+    assert locality.get_candidate_nodes([{"label": "default"}, {"label": "other"}]) == {"fake-node-1"}
+    # Cached until the next refresh
+    assert backend.server.calls["list_node"] == 1
+
+
+def test_previous_nodes_are_used_when_they_cant_be_refreshed(fake_backend, monkeypatch):
+    backend = fake_backend(nodes=2, node_labels={"fake-node-0": {"v6.database/default": "true"}})
+    locality = DataLocality(backend.core_api, {"refresh_interval": 0}, DATABASES)
+    assert locality.get_candidate_nodes([{"label": "default"}]) == {"fake-node-0"}
+
+    def list_node_fails(**kwargs):
+        raise ApiException(status=503)
+    monkeypatch.setattr(backend.core_api, "list_node", list_node_fails)
+
+    assert locality.get_candidate_nodes([{"label": "default"}]) == {"fake-node-0"}
+
+
+def test_runs_are_placed_next_to_their_data(container_manager):
+    manager = container_manager(node_config={"data_locality": {"enabled": True}},
+                                nodes=3, node_labels={"fake-node-2": {"v6.database/default": "true"}})
+
+    assert start_run(manager, 1) == TaskStatus.INITIALIZING
+
+    assert manager.informer.wait_for(
+        lambda: [pod.spec.node_name for pod in manager.informer.get_pods_by_run_id(1)] == ["fake-node-2"], timeout=5)
+
+
+def test_runs_whose_data_is_on_no_node_fail_to_start(container_manager):
+    manager = container_manager(node_config={"data_locality": {"enabled": True}}, nodes=2)
+
+    assert start_run(manager, 1) == TaskStatus.START_FAILED
+    assert not manager.informer.get_jobs()
@@ -0,0 +1,77 @@
+from container_manager import IndexedRun
+from database_mounts import DatabaseMountPlanner
+from vantage6.common.task_status import TaskStatus
+
+DATABASES = [
+    {"label": "default", "uri": "/data/default.csv", "type": "csv"},
+    {"label": "sql", "uri": "postgresql://db:5432/v6", "type": "sql", "env": {"user": "v6"}},
+]
+
+
+def env_of(mounts) -> dict:
+    return {env_var.name: env_var.value for env_var in mounts.env_vars}
+
+
+def test_undefined_databases_are_not_listed_as_requested():
+    planner = DatabaseMountPlanner(DATABASES)
+
+    mounts = planner.get_mounts([{"label": "missing"}, {"label": "default"}])
+
+    assert planner.get_undefined_labels([{"label": "missing"}, {"label": "default"}]) == ["missing"]
+    assert env_of(mounts)["USER_REQUESTED_DATABASE_LABELS"] == "default"
+    assert "MISSING_DATABASE_URI" not in env_of(mounts)
+
+
+def test_runs_that_request_undefined_databases_fail_to_start(container_manager):
+    manager = container_manager()
+
+    status, _ = manager.run(run_id=1, task_info={"id": 1001, "parent": None}, image="img", docker_input=b"input",
+                            tmp_vol_name="", token="token", databases_to_use=[{"label": "default"}, {"label": "x"}])
+    statuses = manager.run_indexed(
+        [IndexedRun(run_id=run_id, task_info={"id": run_id + 1000, "parent": {"id": 7}}, docker_input=b"input",
+                    token="token") for run_id in (2, 3)],
+        image="img", databases_to_use=[{"label": "x"}],
+    )
+
+    assert status == TaskStatus.START_FAILED
+    assert statuses == {2: TaskStatus.START_FAILED, 3: TaskStatus.START_FAILED}
+    assert not manager.informer.get_jobs()
+
+
+def test_only_the_requested_databases_are_described():
+    mounts = DatabaseMountPlanner(DATABASES).get_mounts(["sql"])
+
+    assert mounts.volumes == () and mounts.volume_mounts == ()
+    assert env_of(mounts) == {
+        "USER_REQUESTED_DATABASE_LABELS": "sql",
+        "SQL_DATABASE_URI": "postgresql://db:5432/v6",
+        "SQL_DATABASE_TYPE": "sql",
+        "SQL_DB_PARAM_USER": "v6",
+    }
+
+
+def test_file_databases_are_mounted_read_only():
+    mounts = DatabaseMountPlanner(DATABASES).get_mounts([{"label": "default"}, {"label": "default"}])
+
+    volume, = mounts.volumes
+    volume_mount, = mounts.volume_mounts
+    assert volume.host_path.path == "/data/default.csv"
+    assert (volume_mount.name, volume_mount.mount_path, volume_mount.read_only) == (volume.name, "/mnt/default", True)
+    assert env_of(mounts)["DEFAULT_DATABASE_URI"] == "/mnt/default"
+
+
+def test_volume_names_are_valid_and_unique_per_label():
+    planner = DatabaseMountPlanner([{"label": "My_DB", "uri": "/a.csv", "type": "csv"},
+                                    {"label": "my-db", "uri": "/b.csv", "type": "csv"}])
+
+    names = [volume.name for volume in planner.get_mounts(["My_DB", "my-db"]).volumes]
+
+    assert len(set(names)) == 2
+    assert all(name.startswith("db-my-db-") and len(name) <= 63 for name in names)
+
+
+def test_plans_are_cached_by_requested_labels():
+    planner = DatabaseMountPlanner(DATABASES)
+
+    assert planner.get_mounts(["default"]) is planner.get_mounts([{"label": "default"}])
+    assert planner.get_mounts(["default"]) is not planner.get_mounts(["default", "sql"])
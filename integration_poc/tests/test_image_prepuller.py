@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+import image_prepuller
+from image_prepuller import PREPULL_DAEMONSET_NAME, pin_image
+
+from test_container_manager import start_run
+
+
+@pytest.fixture
+def prepull_manager(container_manager, monkeypatch):
+    """
+    ContainerManager with the image pre-puller, given its 'image_prepull' settings
+    """
+    monkeypatch.setattr(image_prepuller, "PREPULL_RECONCILE_INTERVAL", 0.05)
+
+    def create(**prepull_config):
+        return container_manager(node_config={"image_prepull": dict(enabled=True, **prepull_config)})
+    return create
+
+
+def run_image(manager, run_id: int, image: str):
+    """
+    Start a run of the given image, and wait until its POD finished. Returns the container of its job.
+    """
+    start_run(manager, run_id, image=image)
+    informer = manager.informer
+    assert informer.wait_for(
+        lambda: [pod.status.phase for pod in informer.get_pods_by_run_id(run_id)] == ["Succeeded"], timeout=5)
+    return informer.get_job(str(run_id)).spec.template.spec.containers[0]
+
+
+def test_images_are_pinned_to_their_digest():
+    digest = "sha256:" + "0" * 64
+
+    assert pin_image("img:1.0", digest) == f"img@{digest}"
+    assert pin_image("img", digest) == f"img@{digest}"
+    assert pin_image("localhost:5000/org/img:1.0", digest) == f"localhost:5000/org/img@{digest}"
+
+
+def test_mutable_tags_are_run_by_tag(prepull_manager):
+    manager = prepull_manager()
+
+    run_image(manager, 1, "img:latest")
+    container = run_image(manager, 2, "img:latest")
+
+    assert (container.image, container.image_pull_policy) == ("img:latest", "Always")
+
+
+def test_immutable_tags_are_pinned_until_their_digest_expires(prepull_manager):
+    manager = prepull_manager(immutable_tags=[r"img:1\.\d+"], digest_ttl=1)
+
+    first = run_image(manager, 1, "img:1.0")
+    pinned = run_image(manager, 2, "img:1.0")
+    time.sleep(1)
+    expired = run_image(manager, 3, "img:1.0")
+
+    assert (first.image, first.image_pull_policy) == ("img:1.0", "Always")
+    assert pinned.image.startswith("img@sha256:") and pinned.image_pull_policy == "IfNotPresent"
+    assert (expired.image, expired.image_pull_policy) == ("img:1.0", "Always")
+
+
+def test_recent_images_are_kept_on_the_cluster_nodes(prepull_manager):
+    manager = prepull_manager(max_images=1)
+
+    run_image(manager, 1, "img-a:1.0")
+    run_image(manager, 2, "img-b:1.0")
+
+    def warm_images():
+        try:
+            daemon_set = manager.apps_api.read_namespaced_daemon_set(PREPULL_DAEMONSET_NAME, "v6-jobs")
+        except Exception:
+            return []
+        return [container.image for container in daemon_set.spec.template.spec.containers]
+    deadline = time.time() + 5
+    while [image.split("@")[0] for image in warm_images()] != ["img-b"] and time.time() < deadline:
+        time.sleep(0.05)
+    assert [image.split("@")[0] for image in warm_images()] == ["img-b"]
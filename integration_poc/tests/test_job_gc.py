@@ -0,0 +1,57 @@
+import os
+import time
+
+from job_gc import JobGarbageCollector
+
+from test_job_informer import build_job, start_informer
+
+
+def create_job(backend, informer, job_name: str, task_base_path) -> None:
+    """
+    Create a (long running) job with its task folder, and wait until its POD is cached
+    """
+    os.makedirs(task_base_path / job_name)
+    backend.batch_api.create_namespaced_job("v6-jobs", build_job(job_name, {"run_id": job_name}))
+    assert informer.wait_for(lambda: informer.get_pods_by_job_name(job_name), timeout=5)
+
+
+def wait_until(condition, timeout: float = 5) -> bool:
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+def test_collected_jobs_are_removed_in_batches(fake_backend, tmp_path):
+    backend = fake_backend(run_time=60)
+    informer = start_informer(backend)
+    gc = JobGarbageCollector(backend.batch_api, backend.core_api, informer, str(tmp_path), interval=0.1)
+    for job_name in ("1", "2", "3"):
+        create_job(backend, informer, job_name, tmp_path)
+    gc.start()
+
+    gc.collect("1")
+    gc.collect("2")
+
+    assert informer.wait_for(lambda: not informer.get_job("1") and not informer.get_job("2"), timeout=5)
+    assert informer.wait_for(lambda: [pod.metadata.labels["job-name"] for pod in informer.get_pods()] == ["3"],
+                             timeout=5)
+    assert wait_until(lambda: os.listdir(tmp_path) == ["3"])
+    assert backend.server.calls.get("delete_collection_namespaced_pod", 0) <= 1
+
+
+def test_resources_orphaned_by_a_previous_node_are_swept(fake_backend, tmp_path):
+    backend = fake_backend(run_time=60)
+    informer = start_informer(backend)
+    create_job(backend, informer, "1", tmp_path)
+    create_job(backend, informer, "2", tmp_path)
+    # Job removed without its PODs (e.g., the node crashed after deleting it)
+    backend.batch_api.delete_namespaced_job("2", "v6-jobs")
+    os.makedirs(tmp_path / "_logs")
+    time.sleep(0.05)
+
+    JobGarbageCollector(backend.batch_api, backend.core_api, informer, str(tmp_path)).start()
+
+    assert informer.wait_for(lambda: [pod.metadata.labels["job-name"] for pod in informer.get_pods()] == ["1"],
+                             timeout=5)
+    assert wait_until(lambda: sorted(os.listdir(tmp_path)) == ["1", "_logs"])
@@ -0,0 +1,78 @@
+import json
+
+from kubernetes import client
+
+from fake_kubernetes import FakeWatch
+from indexed_jobs import FANOUT_RUNS_ANNOTATION
+from job_informer import JobInformer
+
+
+def build_job(name: str, annotations: dict, completions: int | None = None) -> client.V1Job:
+    return client.V1Job(
+        metadata=client.V1ObjectMeta(name=name, annotations=annotations),
+        spec=client.V1JobSpec(
+            completion_mode="Indexed" if completions else None,
+            completions=completions,
+            backoff_limit_per_index=3 if completions else None,
+            template=client.V1PodTemplateSpec(
+                metadata=client.V1ObjectMeta(labels={"app": name, "role": "v6_alg_runner"}),
+                spec=client.V1PodSpec(containers=[client.V1Container(name=name, image="img")],
+                                      restart_policy="Never"),
+            ),
+        ),
+    )
+
+
+def start_informer(backend) -> JobInformer:
+    informer = JobInformer(backend.batch_api, backend.core_api, watch_factory=lambda: FakeWatch(backend.server))
+    informer.start()
+    assert informer.wait_until_synced(timeout=5)
+    return informer
+
+
+def test_jobs_and_pods_are_indexed_by_run(fake_backend):
+    backend = fake_backend(run_time=60)
+    informer = start_informer(backend)
+
+    backend.batch_api.create_namespaced_job("v6-jobs", build_job("10", {"run_id": "10", "task_id": "20"}))
+
+    assert informer.wait_for(lambda: informer.get_pods_by_run_id(10), timeout=5)
+    assert [job.metadata.name for job in informer.get_jobs_by_run_id(10)] == ["10"]
+    assert [job.metadata.name for job in informer.get_jobs_by_task_id(20)] == ["10"]
+    assert len(informer.get_pods_by_job_name("10")) == 1
+
+
+def test_cache_follows_updates_and_deletions(fake_backend):
+    backend = fake_backend()
+    informer = start_informer(backend)
+    events = []
+    informer.add_listener(lambda kind, event_type, obj: events.append((kind, event_type, obj.metadata.name)))
+
+    backend.batch_api.create_namespaced_job("v6-jobs", build_job("10", {"run_id": "10", "task_id": "20"}))
+    assert informer.wait_for(
+        lambda: (job := informer.get_job("10")) is not None and job.status.succeeded
+        and [pod.status.phase for pod in informer.get_pods_by_run_id(10)] == ["Succeeded"], timeout=5)
+
+    backend.batch_api.delete_namespaced_job("10", "v6-jobs", propagation_policy="Background")
+    assert informer.wait_for(lambda: informer.get_job("10") is None and not informer.get_pods(), timeout=5)
+    assert informer.get_jobs_by_run_id(10) == []
+    assert informer.get_pods_by_job_name("10") == []
+    assert ("job", "DELETED", "10") in events
+
+
+def test_pods_of_fanout_runs_are_found_by_completion_index(fake_backend):
+    backend = fake_backend(run_time=60)
+    informer = start_informer(backend)
+
+    fanout_runs = [{"run_id": 10 + i, "task_id": 20 + i, "task_parent_id": "7"} for i in range(3)]
+    backend.batch_api.create_namespaced_job(
+        "v6-jobs", build_job("fanout-10", {FANOUT_RUNS_ANNOTATION: json.dumps(fanout_runs)}, completions=3))
+
+    assert informer.wait_for(lambda: len(informer.get_pods_by_job_name("fanout-10")) == 3, timeout=5)
+    for i in range(3):
+        assert [job.metadata.name for job in informer.get_jobs_by_run_id(10 + i)] == ["fanout-10"]
+        # The PODs are labelled with the job name, not with the run_id
+        assert informer.get_pods_by_run_id(10 + i) == []
+        pods = informer.get_run_pods(10 + i)
+        assert len(pods) == 1
+        assert pods[0].metadata.name.startswith(f"fanout-10-{i}-")
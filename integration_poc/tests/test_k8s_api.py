@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+from kubernetes.client.rest import ApiException
+
+from k8s_api import ApiRateLimiter, ThrottledApi, TokenBucket, get_retry_reason, get_verb
+
+RETRY_CONFIG = {"max_retries": 3, "backoff_base": 0.01, "backoff_max": 0.01}
+
+
+class FlakyApi:
+    """
+    API client whose requests fail with the given errors, in order, before they succeed
+    """
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def create_namespaced_job(self, namespace: str, body: dict):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return body
+
+    def read_namespaced_job(self, name: str, namespace: str):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return name
+
+
+def test_requests_are_classified():
+    assert get_verb("create_namespaced_job") == "create"
+    assert get_verb("api_client") is None
+    assert get_retry_reason(ApiException(status=429)) == "429"
+    assert get_retry_reason(ApiException(status=503)) == "5xx"
+    assert get_retry_reason(ApiException(status=0)) == "connection"
+    assert get_retry_reason(ConnectionError()) == "connection"
+    assert get_retry_reason(ApiException(status=404)) is None
+    assert get_retry_reason(ValueError()) is None
+
+
+def test_requests_beyond_the_burst_wait_for_the_rate():
+    bucket = TokenBucket(rate=20, capacity=2)
+
+    started_at = time.monotonic()
+    waits = [bucket.acquire() for _ in range(4)]
+
+    # The burst is served at once, then a token every 1/rate seconds
+    assert waits[:2] == [0.0, 0.0]
+    assert all(wait == pytest.approx(0.05, abs=0.02) for wait in waits[2:])
+    assert time.monotonic() - started_at >= 0.09
+
+
+def test_reads_are_retried_on_transient_errors():
+    api = FlakyApi(ApiException(status=429), ApiException(status=503), ConnectionError())
+
+    assert ThrottledApi(api, ApiRateLimiter(RETRY_CONFIG)).read_namespaced_job("job", "v6-jobs") == "job"
+    assert api.calls == 4
+
+
+def test_requests_fail_after_the_last_retry():
+    api = FlakyApi(*[ApiException(status=500)] * 5)
+
+    with pytest.raises(ApiException):
+        ThrottledApi(api, ApiRateLimiter(RETRY_CONFIG)).read_namespaced_job("job", "v6-jobs")
+    assert api.calls == 4
+
+
+def test_creates_are_only_retried_when_throttled():
+    throttled = FlakyApi(ApiException(status=429))
+    failed = FlakyApi(ApiException(status=500))
+    limiter = ApiRateLimiter(RETRY_CONFIG)
+
+    assert ThrottledApi(throttled, limiter).create_namespaced_job("v6-jobs", {"name": "1"}) == {"name": "1"}
+    with pytest.raises(ApiException):
+        ThrottledApi(failed, limiter).create_namespaced_job("v6-jobs", {"name": "2"})
+    assert (throttled.calls, failed.calls) == (2, 1)
+
+
+def test_non_transient_errors_are_not_retried():
+    api = FlakyApi(ApiException(status=404))
+
+    with pytest.raises(ApiException):
+        ThrottledApi(api, ApiRateLimiter(RETRY_CONFIG)).read_namespaced_job("job", "v6-jobs")
+    assert api.calls == 1
+
+
+def test_retry_after_is_honored():
+    throttled = ApiException(status=429)
+    throttled.headers = {"Retry-After": "0.2"}
+    api = FlakyApi(throttled)
+
+    started_at = time.monotonic()
+    ThrottledApi(api, ApiRateLimiter(RETRY_CONFIG)).read_namespaced_job("job", "v6-jobs")
+
+    assert time.monotonic() - started_at >= 0.2
+
+
+def test_concurrent_requests_of_a_verb_are_limited():
+    running, max_running = 0, 0
+    lock = threading.Lock()
+
+    class SlowApi:
+        def read_namespaced_job(self, name: str, namespace: str):
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+
+    api = ThrottledApi(SlowApi(), ApiRateLimiter({"max_concurrency": {"read": 2}}))
+    threads = [threading.Thread(target=api.read_namespaced_job, args=(str(i), "v6-jobs")) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max_running == 2
+
+
+def test_other_attributes_are_not_throttled():
+    api = FlakyApi()
+    api.api_client = object()
+
+    throttled = ThrottledApi(api, ApiRateLimiter())
+
+    assert throttled.api_client is api.api_client
+    assert throttled.read_namespaced_job.__name__ == "read_namespaced_job"
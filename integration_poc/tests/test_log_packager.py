@@ -0,0 +1,48 @@
+from log_packager import dedupe_lines, package_logs, truncate
+
+
+def test_repeated_lines_are_collapsed():
+    text, dropped = dedupe_lines("start\nretrying\nretrying\nretrying\ndone\ndone")
+
+    assert text == ("start\nretrying\n[previous line repeated 2 more times]\n"
+                    "done\n[previous line repeated 1 more times]")
+    assert dropped == 3
+
+
+def test_truncation_keeps_the_beginning_and_the_end():
+    text = "A" * 1000 + "B" * 1000
+
+    truncated, is_truncated = truncate(text, 500)
+
+    assert is_truncated
+    assert len(truncated.encode("utf-8")) <= 500
+    assert truncated.startswith("A") and truncated.endswith("B")
+    assert "log truncated: 1500 bytes omitted" in truncated
+    assert truncate("short", 500) == ("short", False)
+
+
+def test_truncation_never_exceeds_the_cap():
+    for max_bytes in (0, 1, 10, 40):
+        truncated, is_truncated = truncate("A" * 1000, max_bytes)
+
+        assert is_truncated
+        assert len(truncated.encode("utf-8")) <= max_bytes
+
+
+def test_multibyte_characters_are_not_split():
+    truncated, _ = truncate("é" * 1000, 301)
+
+    assert len(truncated.encode("utf-8")) <= 301
+    truncated.encode("utf-8").decode("utf-8")
+
+
+def test_logs_of_the_pods_are_packaged():
+    logs = ["pod-1\n" + "epoch\n" * 50, "pod-2"]
+
+    packaged = package_logs(logs, max_bytes=10000)
+
+    assert packaged.log == "pod-1\nepoch\n[previous line repeated 49 more times]\n\npod-2"
+    assert packaged.original_bytes == len("\n".join(logs))
+    assert packaged.packaged_bytes == len(packaged.log)
+    assert packaged.repeated_lines == 49
+    assert not packaged.truncated
@@ -0,0 +1,61 @@
+from vantage6.common.metrics import Counter, Gauge, Histogram, Registry, wsgi_app
+
+
+def test_metrics_are_rendered_in_the_text_exposition_format():
+    registry = Registry()
+    runs = Counter("v6_runs_total", "Runs started", ["status"], registry=registry)
+    queued = Gauge("v6_queued_runs", "Runs waiting to be started", registry=registry)
+    runs.inc(status="active")
+    runs.inc(2, status="active")
+    queued.set(3)
+
+    assert registry.render() == (
+        "# HELP v6_runs_total Runs started\n"
+        "# TYPE v6_runs_total counter\n"
+        'v6_runs_total{status="active"} 3\n'
+        "# HELP v6_queued_runs Runs waiting to be started\n"
+        "# TYPE v6_queued_runs gauge\n"
+        "v6_queued_runs 3\n"
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    durations = Histogram("v6_duration_seconds", "Durations", ["stage"], buckets=(1, 0.5), registry=registry)
+    for value in (0.1, 0.7, 3):
+        durations.observe(value, stage="pull")
+
+    assert registry.render().splitlines()[2:] == [
+        'v6_duration_seconds_bucket{stage="pull",le="0.5"} 1',
+        'v6_duration_seconds_bucket{stage="pull",le="1"} 2',
+        'v6_duration_seconds_bucket{stage="pull",le="+Inf"} 3',
+        'v6_duration_seconds_sum{stage="pull"} 3.8',
+        'v6_duration_seconds_count{stage="pull"} 3',
+    ]
+
+
+def test_label_values_and_help_are_escaped():
+    registry = Registry()
+    errors = Counter("v6_errors_total", 'Errors, by "reason"\nof C:\\ failures', ["reason"], registry=registry)
+    errors.inc(reason='image "x"\nnot found in C:\\')
+
+    assert registry.render().splitlines() == [
+        '# HELP v6_errors_total Errors, by "reason"\\nof C:\\\\ failures',
+        "# TYPE v6_errors_total counter",
+        'v6_errors_total{reason="image \\"x\\"\\nnot found in C:\\\\"} 1',
+    ]
+
+
+def test_metrics_are_served_on_their_path():
+    responses = []
+
+    def start_response(status, headers):
+        responses.append((status, dict(headers)))
+
+    body = b"".join(wsgi_app({"PATH_INFO": "/metrics"}, start_response))
+    wsgi_app({"PATH_INFO": "/other"}, start_response)
+
+    assert responses[0][0] == "200 OK"
+    assert responses[0][1]["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert int(responses[0][1]["Content-Length"]) == len(body)
+    assert responses[1][0] == "404 Not Found"
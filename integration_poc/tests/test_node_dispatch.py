@@ -0,0 +1,72 @@
+import logging
+import threading
+import time
+import types
+
+import v6_k8s_node
+from task_scheduler import TaskScheduler
+from v6_k8s_node import NodePod
+from vantage6.common.task_status import TaskStatus
+
+from test_task_scheduler import make_task
+
+
+class StubContainerManager:
+    """
+    Container manager of a NodePod under test: is_running fails for the given run_ids
+    """
+
+    def __init__(self, failing_run_ids: set[int]):
+        self.failing_run_ids = failing_run_ids
+        self.released = []
+
+    def is_running(self, run_id: int) -> bool:
+        if run_id in self.failing_run_ids:
+            raise ConnectionError("K8S API unreachable")
+        return False
+
+    def release_admission(self, run_id: int) -> None:
+        self.released.append(run_id)
+
+
+def start_dispatch_worker(monkeypatch, container_manager) -> tuple[NodePod, list, list]:
+    """
+    Dispatch worker of a NodePod (with an in-flight cap of 1) on a background thread. Returns the
+    node, the run_ids it started and the status patches it sent to the server.
+    """
+    started, patches = [], []
+    monkeypatch.setattr(v6_k8s_node, "DISPATCH_ERROR_BACKOFF", 0)
+    monkeypatch.setattr(NodePod, "_NodePod__start_task",
+                        lambda self, task_incl_run: started.append(task_incl_run["id"]) or TaskStatus.INITIALIZING)
+    node = NodePod.__new__(NodePod)
+    node.log = logging.getLogger("test_node_dispatch")
+    node.queue = TaskScheduler(max_inflight=1)
+    node.k8s_container_manager = container_manager
+    node.client = types.SimpleNamespace(run=types.SimpleNamespace(
+        patch=lambda id_, data: patches.append((id_, data["status"]))))
+    node.fanout_max_runs = 1
+    threading.Thread(target=node._NodePod__process_tasks_queue, daemon=True).start()
+    return node, started, patches
+
+
+def wait_for(condition, timeout: float = 5) -> bool:
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_dispatch_worker_survives_errors_and_releases_the_run(monkeypatch):
+    container_manager = StubContainerManager(failing_run_ids={1})
+    node, started, patches = start_dispatch_worker(monkeypatch, container_manager)
+
+    node.queue.put(make_task(1, 10))
+    node.queue.put(make_task(2, 20))
+
+    # Run 2 only gets the in-flight slot once the failed run 1 released it
+    assert wait_for(lambda: started == [2])
+    assert patches == [(1, TaskStatus.START_FAILED)]
+    assert container_manager.released == [1]
+    assert node.queue.running_count() == 1
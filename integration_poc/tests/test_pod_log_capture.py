@@ -0,0 +1,37 @@
+import glob
+import gzip
+
+from pod_log_capture import LogRingBuffer
+
+from test_container_manager import collect_results, start_run
+
+
+def test_ring_buffer_keeps_the_head_and_the_tail():
+    buffer = LogRingBuffer(max_bytes=10, head_bytes=4)
+    for chunk in (b"0123", b"4567", b"89abcdef"):
+        buffer.write(chunk)
+
+    assert buffer.total_bytes == 16
+    assert buffer.omitted_bytes == 6
+    assert buffer.excerpt("/spill/1.log.gz") == "0123\n[... 6 bytes omitted, full log at /spill/1.log.gz ...]\nabcdef"
+
+
+def test_spilled_log_is_the_full_log(container_manager, tmp_path):
+    manager = container_manager(node_config={"pod_logs": {"tail_lines": 2}}, log_lines=5)
+
+    start_run(manager, 1)
+
+    assert collect_results(manager, 1)[1].logs
+    spilled = glob.glob(str(tmp_path / "tasks" / "_logs" / "1" / "*.log.gz"))
+    assert len(spilled) == 1
+    with gzip.open(spilled[0], "rt") as spilled_log:
+        assert len(spilled_log.read().splitlines()) == 5
+
+
+def test_logs_are_read_at_harvest_beyond_the_followers_cap(container_manager):
+    manager = container_manager(node_config={"pod_logs": {"max_followers": 0, "spill": False}}, log_lines=3)
+
+    start_run(manager, 1)
+
+    result = collect_results(manager, 1)[1]
+    assert result.logs[0].count("simulated algorithm log line") == 3
@@ -0,0 +1,111 @@
+import io
+import os
+import threading
+
+import pytest
+from werkzeug.serving import make_server
+
+from result_spool import ResultSpool, ResultTooLarge
+from vantage6.common.task_status import TaskStatus
+from vantage6.node import proxy_server
+
+from test_container_manager import collect_results, start_run
+
+
+@pytest.fixture
+def proxy(tmp_path, monkeypatch):
+    """
+    Test client of the node proxy, with a result spool on which run 1 is registered
+    """
+    spool = ResultSpool(str(tmp_path / "spool"), max_bytes=8)
+    spool.register("1", "token-1")
+    monkeypatch.setitem(proxy_server.app.config, "RESULT_SPOOL", spool)
+    return proxy_server.app.test_client(), spool
+
+
+def test_results_are_taken_once(tmp_path):
+    spool = ResultSpool(str(tmp_path), max_bytes=8)
+
+    assert spool.write("1", io.BytesIO(b"first")) == 5
+    assert spool.write("1", io.BytesIO(b"second")) == 6
+
+    assert spool.take("1") == b"second"
+    assert spool.take("1") is None
+
+
+def test_results_over_the_limit_keep_the_previous_upload(tmp_path):
+    spool = ResultSpool(str(tmp_path), max_bytes=8)
+    spool.write("1", io.BytesIO(b"previous"))
+
+    with pytest.raises(ResultTooLarge):
+        spool.write("1", io.BytesIO(b"too large!"))
+
+    assert os.listdir(tmp_path) == ["1"]
+    assert spool.take("1") == b"previous"
+
+
+def test_released_runs_are_no_longer_accepted(tmp_path):
+    spool = ResultSpool(str(tmp_path))
+    spool.register("1", "token-1")
+    spool.write("1", io.BytesIO(b"{}"))
+
+    assert spool.authenticate("token-1") == "1"
+    spool.release("1")
+
+    assert spool.authenticate("token-1") is None
+    assert spool.take("1") is None
+
+
+def test_outputs_are_uploaded_with_the_token_of_their_run(proxy):
+    client, spool = proxy
+
+    response = client.put("/output", data=b"{}", headers={"Authorization": "Bearer token-1"})
+
+    assert response.status_code == 200
+    assert response.json == {"run_id": "1", "size": 2}
+    assert spool.take("1") == b"{}"
+
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": "Bearer"}, {"Authorization": "Bearer token-2"}])
+def test_outputs_with_an_unknown_token_are_rejected(proxy, headers):
+    client, spool = proxy
+
+    response = client.put("/output", data=b"{}", headers=headers)
+
+    assert response.status_code == 401
+    assert spool.take("1") is None
+
+
+def test_outputs_over_the_limit_are_rejected(proxy):
+    client, spool = proxy
+
+    response = client.put("/output", data=b"too large!", headers={"Authorization": "Bearer token-1"})
+
+    assert response.status_code == 413
+    assert spool.take("1") is None
+
+
+def test_outputs_are_not_accepted_without_spool(monkeypatch):
+    monkeypatch.setitem(proxy_server.app.config, "RESULT_SPOOL", None)
+
+    response = proxy_server.app.test_client().put("/output", data=b"{}", headers={"Authorization": "Bearer token-1"})
+
+    assert response.status_code == 404
+
+
+def test_uploaded_outputs_are_harvested(container_manager, monkeypatch):
+    server = make_server("127.0.0.1", 0, proxy_server.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("PROXY_SERVER_HOST", "127.0.0.1")
+    monkeypatch.setenv("PROXY_SERVER_PORT", str(server.server_port))
+    manager = container_manager(node_config={"result_upload": {"enabled": True}}, output='{"uploaded": true}')
+    monkeypatch.setitem(proxy_server.app.config, "RESULT_SPOOL", manager.result_spool)
+
+    try:
+        start_run(manager, 1)
+        result = collect_results(manager, 1)[1]
+    finally:
+        server.shutdown()
+
+    assert (result.status, result.data) == (TaskStatus.COMPLETED, b'{"uploaded": true}')
+    assert manager.result_spool.authenticate("token") is None
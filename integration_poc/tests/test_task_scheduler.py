@@ -0,0 +1,157 @@
+import threading
+import time
+
+from task_scheduler import TaskScheduler
+
+
+def make_task(run_id: int, task_id: int, org_id: int = 1, user_id: int = 1, parent_id: int | None = None,
+              job_id: int | None = None) -> dict:
+    return {
+        "id": run_id,
+        "task": {
+            "id": task_id,
+            "image": "img",
+            "parent": {"id": parent_id} if parent_id is not None else None,
+            "job_id": job_id,
+            "init_org": {"id": org_id},
+            "init_user": {"id": user_id},
+        },
+    }
+
+
+class PendingGet:
+    """
+    Call to TaskScheduler.get on a background thread, to check whether it blocks
+    """
+
+    def __init__(self, scheduler: TaskScheduler):
+        self._taken = []
+        self._thread = threading.Thread(target=lambda: self._taken.append(scheduler.get()), daemon=True)
+        self._thread.start()
+
+    def result(self, timeout: float = 1) -> dict | None:
+        """
+        Task handed out, or None if the call is still blocked after the timeout
+        """
+        self._thread.join(timeout)
+        return self._taken[0] if self._taken else None
+
+
+def test_inflight_cap_does_not_hold_the_subtasks_of_running_runs():
+    scheduler = TaskScheduler(max_inflight=1)
+    scheduler.put(make_task(1, 10))
+    scheduler.put(make_task(2, 20))
+    assert scheduler.get()["id"] == 1
+
+    # Queued after the node reached its cap: its parent (run 1) is waiting for it
+    scheduler.put(make_task(3, 30, parent_id=10))
+    assert PendingGet(scheduler).result()["id"] == 3
+    pending = PendingGet(scheduler)
+    assert pending.result(timeout=0.2) is None
+    assert scheduler.running_count() == 2
+
+    scheduler.run_finished(1)
+    assert pending.result()["id"] == 2
+
+
+def test_subtasks_of_running_runs_go_first():
+    scheduler = TaskScheduler()
+    scheduler.put(make_task(1, 10))
+    assert scheduler.get()["id"] == 1
+
+    scheduler.put(make_task(2, 20))
+    scheduler.put(make_task(3, 30, parent_id=10))
+    scheduler.put(make_task(4, 40))
+
+    assert scheduler.depth_by_priority() == {"child": 1, "default": 2}
+    assert [scheduler.get()["id"] for _ in range(3)] == [3, 2, 4]
+
+
+def test_aged_tasks_are_not_starved():
+    scheduler = TaskScheduler(aging_seconds=0.05)
+    scheduler.put(make_task(1, 10))
+    scheduler.get()
+
+    scheduler.put(make_task(2, 20))
+    time.sleep(0.2)
+    scheduler.put(make_task(3, 30, parent_id=10))
+
+    assert scheduler.get()["id"] == 2
+
+
+def test_runs_are_handed_out_once():
+    scheduler = TaskScheduler()
+    assert scheduler.put(make_task(1, 10))
+    assert not scheduler.put(make_task(1, 10))
+    assert scheduler.get()["id"] == 1
+    # Still executing
+    assert not scheduler.put(make_task(1, 10))
+    assert scheduler.qsize() == 0
+
+    scheduler.run_finished(1)
+    assert scheduler.put(make_task(1, 10))
+
+
+def test_organizations_share_the_node_by_weight():
+    scheduler = TaskScheduler(fair_share={"organization_weights": {1: 2}})
+    for i in range(6):
+        scheduler.put(make_task(100 + i, 100 + i, org_id=1))
+    for i in range(6):
+        scheduler.put(make_task(200 + i, 200 + i, org_id=2))
+
+    orgs = [scheduler.get()["task"]["init_org"]["id"] for _ in range(6)]
+
+    # Organization 1 (weight 2) gets twice the dispatches of organization 2, interleaved
+    assert orgs.count(1) == 4 and orgs.count(2) == 2
+    assert orgs[:3].count(2) == 1
+
+
+def test_users_share_their_organization():
+    scheduler = TaskScheduler()
+    for i in range(4):
+        scheduler.put(make_task(100 + i, 100 + i, user_id=1))
+    scheduler.put(make_task(200, 200, user_id=2))
+
+    users = [scheduler.get()["task"]["init_user"]["id"] for _ in range(2)]
+
+    assert sorted(users) == [1, 2]
+
+
+def test_organization_cap_holds_its_tasks_in_the_queue():
+    scheduler = TaskScheduler(fair_share={"organization_max_inflight": {1: 1}})
+    scheduler.put(make_task(1, 10, org_id=1))
+    scheduler.put(make_task(2, 20, org_id=1))
+    scheduler.put(make_task(3, 30, org_id=2))
+
+    assert [scheduler.get()["id"] for _ in range(2)] == [1, 3]
+    pending = PendingGet(scheduler)
+    assert pending.result(timeout=0.2) is None
+
+    scheduler.run_finished(1)
+    assert pending.result()["id"] == 2
+
+
+def test_not_admitted_tasks_are_held_in_the_queue():
+    admitted = {2}
+    scheduler = TaskScheduler(admission=lambda task: task["id"] in admitted)
+    scheduler.put(make_task(1, 10))
+    scheduler.put(make_task(2, 20))
+
+    assert scheduler.get()["id"] == 2
+    assert scheduler.qsize() == 1
+
+
+def test_siblings_are_taken_together():
+    scheduler = TaskScheduler()
+    scheduler.put(make_task(1, 10))
+    scheduler.get()
+    for i in range(3):
+        scheduler.put(make_task(100 + i, 100 + i, parent_id=10))
+    scheduler.put(make_task(200, 200, parent_id=99))
+
+    first = scheduler.get()
+    siblings = scheduler.take_siblings(first, max_count=5)
+
+    assert first["id"] == 100
+    assert [sibling["id"] for sibling in siblings] == [101, 102]
+    assert scheduler.qsize() == 1
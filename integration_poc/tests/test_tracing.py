@@ -0,0 +1,105 @@
+import json
+import time
+
+import pytest
+
+from vantage6.common import tracing
+from vantage6.common.task_status import TaskStatus
+from vantage6.common.tracing import KIND_SERVER, STATUS_ERROR, SpanContext, Tracer
+
+
+def read_spans(path, count: int, timeout: float = 5) -> list[dict]:
+    """
+    Spans exported to the given file, once there are (at least) count of them
+    """
+    deadline = time.time() + timeout
+    while True:
+        spans = []
+        if path.exists():
+            for line in path.read_text().splitlines():
+                for resource_spans in json.loads(line)["resourceSpans"]:
+                    for scope_spans in resource_spans["scopeSpans"]:
+                        spans.extend(scope_spans["spans"])
+        if len(spans) >= count or time.time() > deadline:
+            return spans
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def tracer(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "EXPORT_INTERVAL", 0.05)
+    tracer = Tracer()
+    tracer.configure({"enabled": True, "file": str(tmp_path / "spans.jsonl"), "service_name": "test-node"})
+    return tracer
+
+
+def test_traceparent_is_parsed():
+    context = SpanContext("0af7651916cd43dd8448eb211c80319c", "b7ad6b7169203331")
+
+    assert context.traceparent == "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+    assert SpanContext.from_traceparent(context.traceparent.upper()) == context
+    assert SpanContext.from_traceparent("00-invalid") is None
+    assert SpanContext.from_traceparent(None) is None
+
+
+def test_spans_are_exported_in_the_otlp_json_format(tracer, tmp_path):
+    parent = SpanContext.from_traceparent("00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01")
+    with tracer.span("request", parent=parent, kind=KIND_SERVER,
+                     attributes={"retries": 2, "cached": True, "ratio": 0.5, "status": TaskStatus.ACTIVE}):
+        pass
+
+    span, = read_spans(tmp_path / "spans.jsonl", 1)
+    request = json.loads((tmp_path / "spans.jsonl").read_text())
+    assert request["resourceSpans"][0]["resource"]["attributes"] == [
+        {"key": "service.name", "value": {"stringValue": "test-node"}}]
+    assert span["traceId"] == parent.trace_id and span["parentSpanId"] == parent.span_id
+    assert span["kind"] == KIND_SERVER
+    assert int(span["startTimeUnixNano"]) <= int(span["endTimeUnixNano"])
+    assert span["attributes"] == [
+        {"key": "retries", "value": {"intValue": "2"}},
+        {"key": "cached", "value": {"boolValue": True}},
+        {"key": "ratio", "value": {"doubleValue": 0.5}},
+        {"key": "status", "value": {"stringValue": TaskStatus.ACTIVE.value}},
+    ]
+    assert "status" not in span
+
+
+def test_failed_blocks_mark_their_span_as_failed(tracer, tmp_path):
+    with pytest.raises(ValueError):
+        with tracer.span("pull"):
+            raise ValueError("no such image")
+
+    span, = read_spans(tmp_path / "spans.jsonl", 1)
+    assert span["status"] == {"code": STATUS_ERROR, "message": "ValueError: no such image"}
+    assert "parentSpanId" not in span
+
+
+def test_run_spans_are_found_by_run_and_task(tracer, tmp_path):
+    run_span = tracer.start_span("run")
+    tracer.bind_run(1, task_id=10, span=run_span)
+
+    assert tracer.get_run_context(1) == run_span.context
+    assert tracer.get_task_context(10) == run_span.context
+    with tracer.span("start", parent=tracer.get_run_context(1)):
+        pass
+    tracer.end_run(1, status=TaskStatus.COMPLETED)
+    tracer.end_run(1)
+
+    assert tracer.get_run_context(1) is None and tracer.get_task_context(10) is None
+    start, run = read_spans(tmp_path / "spans.jsonl", 2)
+    assert start["parentSpanId"] == run["spanId"] and start["traceId"] == run["traceId"]
+    assert {"key": "v6.run.status", "value": {"stringValue": TaskStatus.COMPLETED.value}} in run["attributes"]
+    # Ended once
+    time.sleep(0.2)
+    assert len(read_spans(tmp_path / "spans.jsonl", 2)) == 2
+
+
+def test_spans_are_dropped_without_exporter(tmp_path):
+    tracer = Tracer()
+    tracer.configure({"enabled": False, "file": str(tmp_path / "spans.jsonl")})
+
+    with tracer.span("request"):
+        pass
+
+    assert not tracer.enabled
+    assert not (tmp_path / "spans.jsonl").exists()
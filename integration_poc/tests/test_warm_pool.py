@@ -0,0 +1,92 @@
+import pytest
+from kubernetes.client.rest import ApiException
+
+import warm_pool
+from warm_pool import WarmPool
+from vantage6.common.task_status import TaskStatus
+
+from test_container_manager import start_run
+
+WARM_POOL_CONFIG = {
+    "enabled": True,
+    "databases": ["default"],
+    "images": [{"image": "img", "command": ["run"], "min_size": 1, "max_size": 1}],
+}
+
+
+@pytest.fixture
+def warm_manager(container_manager, monkeypatch):
+    """
+    ContainerManager with a warm pool of one runner for 'img', once its runner is running
+    """
+    monkeypatch.setattr(warm_pool, "WARM_POOL_RECONCILE_INTERVAL", 0.05)
+    # Runners (and jobs) keep running during the test
+    manager = container_manager(node_config={"warm_pool": WARM_POOL_CONFIG}, run_time=60)
+    assert manager.informer.wait_for(lambda: idle_runner(manager), timeout=10)
+    return manager
+
+
+def idle_runner(manager) -> str | None:
+    """
+    Name of the idle runner of the pool, if it is running (it is not taken from the pool)
+    """
+    runner = manager.warm_pool.acquire("img")
+    if runner:
+        manager.warm_pool.release(runner)
+    return runner
+
+
+def test_pool_size_follows_the_demand():
+    pool = WarmPool(informer=None, create_runner=None, delete_runner=None, pool_config={
+        "demand_window": 300,
+        "images": [{"image": "img", "command": ["run"], "max_size": 3, "startup_seconds": 300}],
+    })
+
+    assert pool.target_size("img") == 0
+    pool.record_demand("img")
+    assert pool.target_size("img") == 1
+    for _ in range(5):
+        pool.record_demand("img")
+    assert pool.target_size("img") == 3
+
+
+def test_images_must_have_a_command():
+    with pytest.raises(ValueError):
+        WarmPool(informer=None, create_runner=None, delete_runner=None,
+                 pool_config={"images": [{"image": "img"}]})
+
+
+def test_runs_are_handed_to_idle_runners(warm_manager):
+    runner = idle_runner(warm_manager)
+
+    assert start_run(warm_manager, 1) == TaskStatus.ACTIVE
+    assert warm_manager.informer.wait_for(
+        lambda: warm_manager.informer.get_job(runner).metadata.annotations.get("run_id") == "1", timeout=5)
+    assert idle_runner(warm_manager) != runner
+
+
+def test_runner_is_returned_to_the_pool_when_its_job_cant_be_annotated(warm_manager, monkeypatch):
+    runner = idle_runner(warm_manager)
+
+    def patch_fails(*args, **kwargs):
+        raise ApiException(status=500)
+    monkeypatch.setattr(warm_manager.batch_api, "patch_namespaced_job", patch_fails)
+
+    # Started on a job of its own
+    assert start_run(warm_manager, 1) == TaskStatus.INITIALIZING
+    assert warm_manager.informer.wait_for(lambda: warm_manager.informer.get_job("1") is not None, timeout=5)
+    assert idle_runner(warm_manager) == runner
+
+
+def test_runner_is_removed_when_the_run_cant_be_handed_to_it(warm_manager, monkeypatch):
+    runner = idle_runner(warm_manager)
+    create_io_files = warm_manager._create_io_files
+
+    def slot_write_fails(alg_input_file_path: str, **kwargs):
+        if runner in alg_input_file_path:
+            raise OSError("No space left on device")
+        return create_io_files(alg_input_file_path=alg_input_file_path, **kwargs)
+    monkeypatch.setattr(warm_manager, "_create_io_files", slot_write_fails)
+
+    assert start_run(warm_manager, 1) == TaskStatus.INITIALIZING
+    assert warm_manager.informer.wait_for(lambda: warm_manager.informer.get_job(runner) is None, timeout=5)
@@ -7,7 +7,10 @@ from vantage6.common.exceptions import AuthenticationException
 from vantage6.common import logger_name
 from vantage6.node.socket import NodeTaskNamespace
 from vantage6.cli.context.node import NodeContext
-from vantage6.common.task_status import TaskStatus
+from vantage6.common.task_status import TaskStatus, has_task_failed
+from vantage6.common import metrics
+from vantage6.common.metrics import Counter, Gauge, Histogram
+from vantage6.common.tracing import TRACER, SpanContext, KIND_CLIENT
 from vantage6.node.util import get_parent_id
 from log_manager import logs_setup
 from csv_utils import get_csv_column_names
@@ -19,7 +22,9 @@ from vantage6.node.globals import (
     TIME_LIMIT_INITIAL_CONNECTION_WEBSOCKET,
 )
 
-from container_manager import ContainerManager
+from container_manager import ContainerManager, IndexedRun
+from task_scheduler import TaskScheduler
+from log_packager import package_logs, DEFAULT_MAX_UPLOAD_LOG_BYTES
 
 from socketio import Client as SocketIO
 import logging
@@ -39,14 +44,39 @@ import pod_node_constants
 
 # Based on https://github.com/vantage6/vantage6/blob/be2e82b33e68db74304ea01c778094e6b40e671a/vantage6-node/vantage6/node/__init__.py#L1
 
+QUEUE_DEPTH = Gauge("v6_node_queue_depth", "Runs waiting in the node's queue to be dispatched")
+INFLIGHT_RUNS = Gauge("v6_node_inflight_runs", "Runs dispatched by the node and not finished yet")
+# Default maximum number of sibling runs started on a single fan-out job
+DEFAULT_FANOUT_MAX_RUNS = 50
+# Seconds a dispatch worker waits after an unexpected error before it takes the next task
+DISPATCH_ERROR_BACKOFF = 1.0
+
+DISPATCH_SECONDS = Histogram(
+    "v6_node_dispatch_seconds",
+    "Duration of the dispatch of a run (status update, container token request and job creation)",
+    ["status"],
+)
+LOG_UPLOAD_BYTES = Counter(
+    "v6_node_log_upload_bytes_total",
+    "Size of the run logs uploaded with the results, before (original) and after (uploaded) packaging", ["kind"],
+)
+RESULT_UPLOAD_SECONDS = Histogram(
+    "v6_node_result_upload_seconds", "Duration of the upload of a run's result and log to the server (run.patch)",
+)
+
 class NodePod:
 
     def __init__(self, ctx: NodeContext):
         self.log = logging.getLogger(logger_name(__name__))
         self.ctx = ctx
 
-        # Added for the PoC
-        self.k8s_container_manager = ContainerManager(ctx)
+        # Added for the PoC. The asyncio container manager (optional) is used through a
+        # thread-safe bridge, with the same interface as the threaded one
+        if (ctx.config.get("container_manager") or {}).get("type", "threaded") == "async":
+            from async_container_manager import ContainerManagerBridge
+            self.k8s_container_manager = ContainerManagerBridge(ctx)
+        else:
+            self.k8s_container_manager = ContainerManager(ctx)
 
         # Initialize the node. If it crashes, shut down the parts that started
         # already
@@ -69,7 +99,41 @@ class NodePod:
                     path=self.config.get("api_path"),
                 )
         self.log.info(f"Connecting server: {self.client.base_path}")
-        self.queue = queue.Queue()
+        # Number of threads dispatching the queued tasks concurrently, and maximum number
+        # of runs (jobs) that can be in flight on this node at the same time.
+        self.max_concurrent_dispatch: int = self.config.get("max_concurrent_dispatch", 1)
+        self.max_inflight_jobs: int | None = self.config.get("max_inflight_jobs")
+        # Queue of the tasks to be dispatched, prioritizing the subtasks of the runs
+        # already executing on this node, sharing the node fairly across the
+        # initiating organizations and users. Runs that don't fit on the cluster (when
+        # the admission control is enabled), or that would exceed the in-flight caps,
+        # are held in the queue. A run is handed out to a single dispatch worker, and
+        # it is not queued again (e.g., by both a sync and a new_task event) until it
+        # is released (see __release_run).
+        self.queue = TaskScheduler(
+            fair_share=self.config.get("fair_share"),
+            admission=self.k8s_container_manager.admit,
+            max_inflight=self.max_inflight_jobs,
+        )
+        # Sibling runs (tasks with the same parent, image and databases) started together on a single
+        # Indexed job, up to 'max_runs' per job (optional). The dispatch worker waits 'collect_seconds'
+        # for the siblings still on their way to the queue.
+        fanout_config = self.config.get("fanout") or {}
+        self.fanout_max_runs: int = (
+            fanout_config.get("max_runs", DEFAULT_FANOUT_MAX_RUNS) if fanout_config.get("enabled", False) else 1
+        )
+        self.fanout_collect_seconds: float = fanout_config.get("collect_seconds", 0)
+        # Packaging of the run logs uploaded with the results (size cap)
+        log_upload_config = self.config.get("log_upload") or {}
+        self.log_upload_max_bytes: int = log_upload_config.get("max_bytes", DEFAULT_MAX_UPLOAD_LOG_BYTES)
+        # Spans of each run, from the socket event to the result upload (optional)
+        TRACER.configure(self.config.get("tracing"))
+        QUEUE_DEPTH.set_function(self.queue.qsize)
+        INFLIGHT_RUNS.set_function(self.queue.running_count)
+        # Optional Prometheus endpoint (/metrics) on its own port
+        self.metrics_config: dict = self.config.get("metrics") or {}
+        if self.metrics_config.get("enabled", False):
+            Thread(target=self.__metrics_server_worker, daemon=True).start()
         self.log.debug("Authenticating")
         self.authenticate()
 
@@ -188,6 +252,8 @@ class NodePod:
             self.log.debug("Debug mode enabled for proxy server")
             proxy_server.app.debug = True
         proxy_server.app.config["SERVER_IO"] = self.client
+        # Results uploaded by the algorithm PODs (only with the threaded container manager)
+        proxy_server.app.config["RESULT_SPOOL"] = getattr(self.k8s_container_manager, "result_spool", None)
         
         #The value on the module variable 'server_url' defines the target of the 'make_request' method.
         #TODO improve encapsulation here - why proxy_server.server_url, and proxy_host?
@@ -232,6 +298,19 @@ class NodePod:
 
             
 
+    def __metrics_server_worker(self) -> None:
+        """
+        Serve the node metrics (see vantage6.common.metrics) in the Prometheus text format on
+        /metrics, on the 'metrics.port' port
+        """
+        metrics_port = self.metrics_config.get("port", pod_node_constants.V6_NODE_METRICS_PORT)
+        self.log.info("Starting metrics endpoint at port %s", metrics_port)
+        try:
+            WSGIServer(("0.0.0.0", metrics_port), metrics.wsgi_app, log=None).serve_forever()
+        except Exception:
+            self.log.exception("Metrics endpoint could not be started or crashed!")
+
+
     def connect_to_socket(self) -> None:
         """
         Create long-lasting websocket connection with the server. The
@@ -320,7 +399,7 @@ class NodePod:
 
 
 
-    def sync_task_queue_with_server(self) -> None:
+    def sync_task_queue_with_server(self, trace_parent: SpanContext | None = None) -> None:
         """Get all unprocessed tasks from the server for this node.
             Method Linked to a Socket.io event : on_sync)    
             This method:
@@ -331,16 +410,17 @@ class NodePod:
         assert self.client.cryptor, "Encrpytion has not been setup"
 
         # request open tasks from the server
-        task_results = self.client.run.list(state="open", include_task=True)
+        with TRACER.span("run.list", parent=trace_parent, kind=KIND_CLIENT):
+            task_results = self.client.run.list(state="open", include_task=True)
         self.log.debug("task_results: %s", task_results)
 
         # add the tasks to the queue
-        self.__add_tasks_to_queue(task_results)
-        self.log.info("Received %s tasks", self.queue._qsize())
+        self.__add_tasks_to_queue(task_results, trace_parent)
+        self.log.info("Received %s tasks (queued by priority: %s)", self.queue.qsize(), self.queue.depth_by_priority())
 
 
 
-    def get_task_and_add_to_queue(self, task_id: int) -> None:            
+    def get_task_and_add_to_queue(self, task_id: int, trace_parent: SpanContext | None = None) -> None:
             """
             Fetches (open) task with task_id from the server. The `task_id` is
             delivered by the websocket-connection.
@@ -351,18 +431,22 @@ class NodePod:
             ----------
             task_id : int
                 Task identifier
+            trace_parent : SpanContext, optional
+                Context of the span of the socket event, parent of the spans of the runs
             """
             # fetch open algorithm runs for this node
-            task_runs = self.client.run.list(
-                include_task=True, state="open", task_id=task_id
-            )
+            with TRACER.span("run.list", parent=trace_parent, kind=KIND_CLIENT,
+                             attributes={"v6.task_id": task_id}):
+                task_runs = self.client.run.list(
+                    include_task=True, state="open", task_id=task_id
+                )
 
             # add the tasks to the queue
-            self.__add_tasks_to_queue(task_runs)
+            self.__add_tasks_to_queue(task_runs, trace_parent)
 
 
 
-    def __add_tasks_to_queue(self, task_results: list[dict]) -> None:
+    def __add_tasks_to_queue(self, task_results: list[dict], trace_parent: SpanContext | None = None) -> None:
         """
         Add a task to the queue.
 
@@ -373,15 +457,26 @@ class NodePod:
         taskresult : list[dict]
             A list of dictionaries with information required to run the
             algorithm
+        trace_parent : SpanContext, optional
+            Context of the span of the socket event that delivered the tasks. A
+            'run' span is started for each queued run, as its child
         """
         for task_result in task_results:
 
             try:
-                print(f"K8S >>>>> Is task {task_result['id']} running?:{self.k8s_container_manager.is_running(task_result['id'])}")             
-                
-                if not self.k8s_container_manager.is_running(task_result['id']):
-                    self.queue.put(task_result)
+                if self.k8s_container_manager.is_running(task_result['id']):
+                    is_queued = False
                 else:
+                    if not TRACER.is_bound(task_result['id']):
+                        TRACER.bind_run(task_result['id'], task_result['task']['id'], TRACER.start_span(
+                            "run", parent=trace_parent,
+                            attributes={"v6.run_id": task_result['id'], "v6.task_id": task_result['task']['id'],
+                                        "v6.image": task_result['task']['image']},
+                        ))
+                    # False if the run is already queued, or being dispatched
+                    is_queued = self.queue.put(task_result)
+
+                if not is_queued:
                     self.log.info(
                         f"Not starting task {task_result['task']['id']} - "
                         f"{task_result['task']['name']} as it is already "
@@ -503,14 +598,19 @@ class NodePod:
 
     def start_processing_threads(self) -> None:
         """
-        Start the threads that (1) consumes the queue with the requests produced by the server, and 
-        (2) polls the K8S server for finished jobs, collects their output, and send it to the server;  
+        Start the threads that (1) consumes the queue with the requests produced by the server, 
+        (2) polls the K8S server for finished jobs, collects their output, and send it to the server, and
+        (3) reports the status of the launched jobs (started or failed to start) to the server;  
         """
-        self.log.info("Starting threads")
+        self.log.info(f"Starting threads ({self.max_concurrent_dispatch} dispatch workers, "
+                      f"max. in-flight jobs: {self.max_inflight_jobs or 'unlimited'})")
         results_polling_thread = threading.Thread(target=self.__poll_task_results)
-        queue_processing_thread = threading.Thread(target=self.__process_tasks_queue)
         results_polling_thread.start()
-        queue_processing_thread.start()
+        status_reporting_thread = threading.Thread(target=self.__report_run_status_changes)
+        status_reporting_thread.start()
+        for i in range(self.max_concurrent_dispatch):
+            queue_processing_thread = threading.Thread(target=self.__process_tasks_queue, name=f"dispatch-{i}")
+            queue_processing_thread.start()
         
     
     def __poll_task_results(self):
@@ -523,56 +623,127 @@ class NodePod:
 
         self.log.info("Starting node's task results polling thread")
         try:        
-            while True:    
-                time.sleep(1)
-                next_result = self.k8s_container_manager.get_result()
-                self.log.info(f"""
-                    *********************************************************************************  
-                    EVENT @ NODE - task result reported. The following will be notified to the server:
-                    {next_result}
-                    *********************************************************************************  
-                    """)
-                
-                # notify other nodes about algorithm status change
-                self.socketIO.emit(
-                    "algorithm_status_change",
-                    data={
-                        "node_id": self.client.whoami.id_,
-                        "status": next_result.status,
-                        "run_id": next_result.run_id,
-                        "task_id": next_result.task_id,
-                        "collaboration_id": self.client.collaboration_id,
-                        "organization_id": self.client.whoami.organization_id,
-                        "parent_id": next_result.parent_id,
-                    },
-                    namespace="/tasks",
-                )
+            while True:
+                # Blocks until at least one job finishes, then drains every completion reported so far
+                for next_result in self.k8s_container_manager.get_results():
+                    self.__report_task_result(next_result)
+
+        except (KeyboardInterrupt, InterruptedError):
+            self.log.info("Node is interrupted, shutting down...")
+            self.cleanup()
+            sys.exit()
+
 
+    def __report_run_status_changes(self) -> None:
+        """
+        Report to the server (and the other nodes) the status changes of the launched runs
+        detected in the background by the container manager (i.e., the POD of the run started
+        running, or failed to start).
+        """
+        self.log.info("Starting node's run status reporting thread")
+        try:
+            while True:
+                for change in self.k8s_container_manager.get_status_changes():
+                    self.log.info(f"Run {change.run_id} (task {change.task_id}) status changed to: {change.status}")
+                    try:
+                        update = {"status": change.status}
+                        if has_task_failed(change.status):
+                            update["finished_at"] = datetime.datetime.now().isoformat()
+                            self.__release_run(change.run_id)
+                            TRACER.end_run(change.run_id, status=change.status, error="POD failed to start")
+                        self.client.run.patch(id_=change.run_id, data=update)
+
+                        self.socketIO.emit(
+                            "algorithm_status_change",
+                            data={
+                                "node_id": self.client.whoami.id_,
+                                "status": change.status,
+                                "run_id": change.run_id,
+                                "task_id": change.task_id,
+                                "collaboration_id": self.client.collaboration_id,
+                                "organization_id": self.client.whoami.organization_id,
+                                "parent_id": change.parent_id,
+                            },
+                            namespace="/tasks",
+                        )
+                    except Exception:
+                        self.log.exception(f"Error while reporting the status of run_id={change.run_id} to the server")
 
-                #Notify other nodes about algorithm status change
-                self.log.info(f"Sending result (run={next_result.run_id}) to the server!")
+        except (KeyboardInterrupt, InterruptedError):
+            self.log.info("Node is interrupted, shutting down...")
+            self.cleanup()
+            sys.exit()
 
-                response = self.client.request(f"task/{next_result.task_id}")
 
-                init_org = response.get("init_org")            
+    def __report_task_result(self, next_result) -> None:
+        """
+        Notify the server (and the other nodes) of the result of a finished algorithm run
+        """
+        self.__release_run(int(next_result.run_id))
+        try:
+            self.log.info(f"""
+                *********************************************************************************  
+                EVENT @ NODE - task result reported. The following will be notified to the server:
+                {next_result}
+                *********************************************************************************  
+                """)
+
+            # notify other nodes about algorithm status change
+            self.socketIO.emit(
+                "algorithm_status_change",
+                data={
+                    "node_id": self.client.whoami.id_,
+                    "status": next_result.status,
+                    "run_id": next_result.run_id,
+                    "task_id": next_result.task_id,
+                    "collaboration_id": self.client.collaboration_id,
+                    "organization_id": self.client.whoami.organization_id,
+                    "parent_id": next_result.parent_id,
+                },
+                namespace="/tasks",
+            )
 
+
+            #Notify other nodes about algorithm status change
+            self.log.info(f"Sending result (run={next_result.run_id}) to the server!")
+
+            response = self.client.request(f"task/{next_result.task_id}")
+
+            init_org = response.get("init_org")            
+
+            # The logs of all the PODs of the run (e.g., its retries), deduplicated and capped
+            packaged_log = package_logs(next_result.logs, max_bytes=self.log_upload_max_bytes)
+
+            upload_started_at = time.perf_counter()
+            with TRACER.span("result_upload", parent=TRACER.get_run_context(next_result.run_id), kind=KIND_CLIENT,
+                             attributes={"v6.log_bytes": packaged_log.packaged_bytes}):
                 self.client.run.patch(
                     id_=next_result.run_id,
                     data={
                         "result": next_result.data,
-                        "log":next_result.logs[0],
+                        "log": packaged_log.log,
                         "status": next_result.status,
                         "finished_at": datetime.datetime.now().isoformat(),
                     },
                     init_org_id=init_org.get("id"),
                 )
+            self.__record_log_upload(next_result.run_id, packaged_log, time.perf_counter() - upload_started_at)
+            TRACER.end_run(next_result.run_id, status=next_result.status,
+                           error="algorithm crashed" if has_task_failed(next_result.status) else None)
+        except Exception:
+            self.log.exception(f"Error while reporting the result of run_id={next_result.run_id} to the server")
+            TRACER.end_run(next_result.run_id, status=next_result.status, error="result upload failed")
 
 
-                
-        except (KeyboardInterrupt, InterruptedError):
-            self.log.info("Node is interrupted, shutting down...")
-            self.cleanup()
-            sys.exit()
+    def __record_log_upload(self, run_id, packaged_log, upload_seconds: float) -> None:
+        self.log.info(
+            f"Result of run_id={run_id} uploaded in {upload_seconds:.3f}s. Log: {packaged_log.original_bytes} bytes, "
+            f"{packaged_log.packaged_bytes} uploaded ({packaged_log.bytes_saved} saved; "
+            f"{packaged_log.repeated_lines} repeated lines, truncated={packaged_log.truncated})"
+        )
+        LOG_UPLOAD_BYTES.inc(packaged_log.original_bytes, kind="original")
+        LOG_UPLOAD_BYTES.inc(packaged_log.packaged_bytes, kind="uploaded")
+        RESULT_UPLOAD_SECONDS.observe(upload_seconds)
 
 
     def __process_tasks_queue(self) -> None:
@@ -594,11 +765,25 @@ class NodePod:
          
         try:
             while True:
-                self.log.info("********************  Waiting for new tasks....")
-                taskresult = self.queue.get()
-                self.log.info(">>>>> New task received")
-                pprint.pp(taskresult)
-                self.__start_task(taskresult)
+                # Tasks taken from the queue on this iteration (which hold an in-flight slot)
+                taken = []
+                try:
+                    self.log.info("********************  Waiting for new tasks....")
+                    taken.append(self.queue.get())
+                    self.log.info(">>>>> New task received")
+                    pprint.pp(taken[0])
+                    taken += self.__take_siblings(taken[0])
+                    if len(taken) > 1:
+                        self.__dispatch_fanout(taken)
+                    else:
+                        self.__dispatch_task(taken[0])
+                except (KeyboardInterrupt, InterruptedError):
+                    raise
+                except Exception:
+                    # The worker keeps running: an error on a task must not stop the dispatch
+                    self.log.exception(f"Unexpected error while dispatching run_ids {[t['id'] for t in taken]}")
+                    self.__abandon_runs(taken)
+                    time.sleep(DISPATCH_ERROR_BACKOFF)
 
         except (KeyboardInterrupt, InterruptedError):
             self.log.info("Node is interrupted, shutting down...")
@@ -606,9 +791,152 @@ class NodePod:
             sys.exit()
 
 
+    def __abandon_runs(self, tasks_incl_run: list[dict]) -> None:
+        """
+        Release the runs a dispatch worker took from the queue before it failed unexpectedly. The
+        runs that have no job are reported as failed to start, so that they are not left
+        initializing on the server.
+        """
+        for task_incl_run in tasks_incl_run:
+            run_id = task_incl_run["id"]
+            try:
+                started = self.k8s_container_manager.is_running(run_id)
+            except Exception:
+                self.log.exception(f"Error while checking whether run_id={run_id} was started")
+                started = False
+            if not started:
+                self.__report_start_failure(run_id)
+                TRACER.end_run(run_id, status=TaskStatus.START_FAILED, error="run failed to start")
+            self.__release_run(run_id)
+
+
+    def __take_siblings(self, task_incl_run: dict) -> list[dict]:
+        """
+        Take from the queue the siblings of a task to be started together with it on a fan-out
+        job (if enabled)
+        """
+        if self.fanout_max_runs <= 1 or get_parent_id(task_incl_run["task"]) is None:
+            return []
+        if self.fanout_collect_seconds:
+            time.sleep(self.fanout_collect_seconds)
+        return self.queue.take_siblings(task_incl_run, self.fanout_max_runs - 1)
+
+
+    def __claim_run(self, task_incl_run: dict) -> None:
+        """
+        Record the time a run taken from the queue by this dispatch worker waited in it. The
+        run holds its in-flight slot (see TaskScheduler) until its result is reported, or
+        until it fails to start.
+        """
+        run_span = TRACER.get_run_span(task_incl_run["id"])
+        if run_span is not None:
+            # The run span starts when the run is queued
+            TRACER.start_span("queue", parent=run_span.context, start_time=run_span.start_time).end()
+
+
+    def __is_started(self, task_incl_run: dict) -> bool:
+        """
+        Whether a run taken from the queue was already started (e.g., a duplicate of a run
+        launched before the node restarted) or finished. Checked before the run is reported to
+        the server as initializing, so that its status is not overwritten. The run is released
+        if so, as there is nothing to be started.
+        """
+        run_id = task_incl_run["id"]
+        if task_incl_run.get("finished_at") is None and not self.k8s_container_manager.is_running(run_id):
+            return False
+        self.log.info(f"Not starting run_id={run_id} as it is already running or finished")
+        self.__release_run(run_id)
+        return True
+
+
+    def __report_start_failure(self, run_id: int) -> None:
+        """
+        Report to the server a run that failed to start before its status was announced (see
+        __announce_task_status), so that it is not left initializing
+        """
+        try:
+            self.client.run.patch(id_=run_id, data={
+                "status": TaskStatus.START_FAILED,
+                "finished_at": datetime.datetime.now().isoformat(),
+            })
+        except Exception:
+            self.log.exception(f"Error while reporting the start failure of run_id={run_id} to the server")
+
+
+    def __dispatch_task(self, task_incl_run: dict) -> None:
+        """
+        Start a task taken from the queue
+        """
+        run_id = task_incl_run["id"]
+        if self.__is_started(task_incl_run):
+            return
+        self.__claim_run(task_incl_run)
+
+        started_at = time.perf_counter()
+        try:
+            with TRACER.span("dispatch", parent=TRACER.get_run_context(run_id)) as span:
+                task_status = self.__start_task(task_incl_run)
+                span.set_attribute("v6.run.status", task_status)
+        except Exception:
+            self.log.exception(f"Error while starting run_id={run_id}")
+            task_status = TaskStatus.START_FAILED
+            self.__report_start_failure(run_id)
+        DISPATCH_SECONDS.observe(time.perf_counter() - started_at, status=task_status)
+
+        if has_task_failed(task_status):
+            self.__release_run(run_id)
+            TRACER.end_run(run_id, status=task_status, error="run failed to start")
+
+
+    def __dispatch_fanout(self, tasks_incl_run: list[dict]) -> None:
+        """
+        Start sibling tasks (see TaskScheduler.take_siblings) together, as the indexes of a single
+        fan-out job. Each run is claimed, and reported, on its own (as in __dispatch_task).
+        """
+        tasks_incl_run = [task_incl_run for task_incl_run in tasks_incl_run if not self.__is_started(task_incl_run)]
+        if not tasks_incl_run:
+            return
+        for task_incl_run in tasks_incl_run:
+            self.__claim_run(task_incl_run)
+
+        spans = {
+            task_incl_run["id"]: TRACER.start_span("dispatch", parent=TRACER.get_run_context(task_incl_run["id"]),
+                                                   attributes={"v6.fanout.size": len(tasks_incl_run)})
+            for task_incl_run in tasks_incl_run
+        }
+        started_at = time.perf_counter()
+        try:
+            statuses = self.__start_fanout(tasks_incl_run)
+        except Exception:
+            self.log.exception(f"Error while starting the fan-out of run_ids {list(spans)}")
+            statuses = {}
+        dispatch_seconds = time.perf_counter() - started_at
+
+        for run_id, span in spans.items():
+            task_status = statuses.get(run_id)
+            if task_status is None:
+                task_status = TaskStatus.START_FAILED
+                self.__report_start_failure(run_id)
+            span.set_attribute("v6.run.status", task_status)
+            if has_task_failed(task_status):
+                span.set_error("run failed to start")
+            span.end()
+            DISPATCH_SECONDS.observe(dispatch_seconds, status=task_status)
+            if has_task_failed(task_status):
+                self.__release_run(run_id)
+                TRACER.end_run(run_id, status=task_status, error="run failed to start")
+
+
+    def __release_run(self, run_id: int) -> None:
+        """
+        Release the in-flight slot (if any) and the admission reservation held by a run
+        """
+        self.queue.run_finished(run_id)
+        self.k8s_container_manager.release_admission(run_id)
+
 
-    def kill_containers(self, kill_info: dict) -> list[dict]:
 
+    def kill_containers(self, kill_info: dict) -> list[dict]:
         """
         Kill containers on instruction from socket event
 
@@ -616,7 +944,8 @@ class NodePod:
         ----------
         kill_info: dict
             Dictionary received over websocket with instructions for which
-            tasks to kill
+            tasks to kill, e.g.:
+            {"kill_list": [{"task_id": 3, "run_id": 3, "organization_id": 2}], "collaboration_id": 1}
 
         Returns
         -------
@@ -624,8 +953,6 @@ class NodePod:
             List of dictionaries with information on killed task (keys:
             run_id, task_id and parent_id)
         """
-        
-        """
         if kill_info["collaboration_id"] != self.client.collaboration_id:
             self.log.debug(
                 "Not killing tasks as this node is in another collaboration."
@@ -641,35 +968,20 @@ class NodePod:
         # kill specific task if specified, else kill all algorithms
         kill_list = kill_info.get("kill_list")
 
-        killed_algos = self.__docker.kill_tasks(
+        killed_algos = self.k8s_container_manager.kill_tasks(
             org_id=self.client.whoami.organization_id, kill_list=kill_list
         )
         # update status of killed tasks
         for killed_algo in killed_algos:
+            self.__release_run(killed_algo.run_id)
+            TRACER.end_run(killed_algo.run_id, status=TaskStatus.KILLED)
             self.client.run.patch(
                 id_=killed_algo.run_id, data={"status": TaskStatus.KILLED}
             )
         return killed_algos
-        """
-        #PoC TODO, using k8s container manager
-        print(f">>>>>>>Here I'm supposed to kill a runnin job pod given this info: {json.dumps(kill_info, indent = 4)}")
-        return []
-        
-        """"
-        kill_info:
-            "kill_list": [
-                {
-                    "task_id": 3,
-                    "run_id": 3,
-                    "organization_id": 2
-                }
-            ],
-            "collaboration_id": 1
-    
-        """
 
 
-    def __start_task(self, task_incl_run: dict) -> None:
+    def __start_task(self, task_incl_run: dict) -> TaskStatus:
         """
         Start the docker image and notify the server that the task has been
         started.
@@ -678,14 +990,95 @@ class NodePod:
         ----------
         task_incl_run : dict
             A dictionary with information required to run the algorithm
+
+        Returns
+        -------
+        TaskStatus
+            Status of the task after starting it
+        """
+        task = task_incl_run["task"]
+        token = self.__prepare_task(task_incl_run)
+
+        # Run the container. This adds the created container/task to the list
+        # __docker.active_tasks
+        # PoC running with K8S Container Manager
+        task_status, vpn_ports = self.k8s_container_manager.run(
+            run_id=task_incl_run["id"],
+            task_info=task,
+            image=task["image"],
+            docker_input=task_incl_run["input"],
+            tmp_vol_name="****tmp_vol_name key is deprecated",
+            token=token,
+            databases_to_use=task.get("databases", []),
+        )
+
+        self.__announce_task_status(task_incl_run, task_status, vpn_ports)
+        return task_status
+
+
+    def __start_fanout(self, tasks_incl_run: list[dict]) -> dict[int, TaskStatus]:
+        """
+        Start sibling tasks on a single fan-out job (see ContainerManager.run_indexed)
+
+        Returns
+        -------
+        dict[int, TaskStatus]
+            Status of each run (by run_id) after starting it
+        """
+        statuses = {}
+        runs = []
+        for task_incl_run in tasks_incl_run:
+            try:
+                token = self.__prepare_task(task_incl_run)
+            except Exception:
+                self.log.exception(f"Error while preparing run_id={task_incl_run['id']}")
+                statuses[task_incl_run["id"]] = TaskStatus.START_FAILED
+                self.__report_start_failure(task_incl_run["id"])
+                continue
+            runs.append(IndexedRun(run_id=task_incl_run["id"], task_info=task_incl_run["task"],
+                                   docker_input=task_incl_run["input"], token=token))
+        if not runs:
+            return statuses
+
+        task = tasks_incl_run[0]["task"]
+        statuses.update(self.k8s_container_manager.run_indexed(
+            runs=runs, image=task["image"], databases_to_use=task.get("databases", []),
+        ))
+        started = {run.run_id for run in runs}
+        for task_incl_run in tasks_incl_run:
+            if task_incl_run["id"] in started:
+                self.__announce_task_status(task_incl_run, statuses[task_incl_run["id"]], None)
+        return statuses
+
+
+    def __prepare_task(self, task_incl_run: dict) -> str:
+        """
+        Notify the server that the task is being started, and get the container token of the
+        algorithm
+
+        Returns
+        -------
+        str
+            Container token
         """
         task = task_incl_run["task"]
         self.log.info("Starting task {id} - {name}".format(**task))
 
-        # notify that we are processing this task
-        self.client.set_task_start_time(task_incl_run["id"])
+        run_context = TRACER.get_run_context(task_incl_run["id"])
+
+        # notify that we are processing this task. The job is launched asynchronously, so the
+        # run is reported as initializing until its POD starts (see __report_run_status_changes)
+        with TRACER.span("run.patch", parent=run_context, kind=KIND_CLIENT, attributes={"v6.run.status": "initializing"}):
+            self.client.run.patch(
+                id_=task_incl_run["id"],
+                data={
+                    "started_at": datetime.datetime.now().isoformat(),
+                    "status": TaskStatus.INITIALIZING,
+                },
+            )
 
-        token = self.client.request_token_for_container(task["id"], task["image"])
+        with TRACER.span("token.container", parent=run_context, kind=KIND_CLIENT):
+            token = self.client.request_token_for_container(task["id"], task["image"])
         token = token["container_token"]
 
         # create a temporary volume for each job_id
@@ -700,28 +1093,24 @@ class NodePod:
         if type(task_incl_run["input"]) == dict:
             task_incl_run["input"] = json.dumps(task_incl_run["input"])
 
-        # Run the container. This adds the created container/task to the list
-        # __docker.active_tasks
-        # PoC running with K8S Container Manager
-        
-        task_status, vpn_ports = self.k8s_container_manager.run(
-            run_id=task_incl_run["id"],
-            task_info=task,
-            image=task["image"],
-            docker_input=task_incl_run["input"],
-            tmp_vol_name="****tmp_vol_name key is deprecated",
-            token=token,
-            databases_to_use=task.get("databases", []),
-        )
+        return token
 
-        # save task status to the server
-        update = {"status": task_status}
-        if task_status == TaskStatus.NOT_ALLOWED:
-            # set finished_at to now, so that the task is not picked up again
-            # (as the task is not started at all, unlike other crashes, it will
-            # never finish and hence not be set to finished)
-            update["finished_at"] = datetime.datetime.now().isoformat()
-        self.client.run.patch(id_=task_incl_run["id"], data=update)
+
+    def __announce_task_status(self, task_incl_run: dict, task_status: TaskStatus, vpn_ports: list[dict] | None) -> None:
+        """
+        Save the status of a started task to the server, and notify the other nodes
+        """
+        task = task_incl_run["task"]
+
+        # save task status to the server (the 'initializing' status was already set)
+        if task_status != TaskStatus.INITIALIZING:
+            update = {"status": task_status}
+            if has_task_failed(task_status):
+                # set finished_at to now, so that the task is not picked up again
+                # (as the task is not started at all, unlike other crashes, it will
+                # never finish and hence not be set to finished)
+                update["finished_at"] = datetime.datetime.now().isoformat()
+            self.client.run.patch(id_=task_incl_run["id"], data=update)
 
         # ensure that the /tasks namespace is connected. This may take a while
         # (usually < 5s) when the socket just (re)connected
@@ -762,6 +1151,7 @@ class NodePod:
                 self.client.request("port", method="POST", json=port)
 
 
+
 if __name__ == '__main__':
     logs_setup()
 
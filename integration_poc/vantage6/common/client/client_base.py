@@ -1,4 +1,5 @@
 import logging
+import re
 import time
 import requests
 import json as json_lib
@@ -9,9 +10,21 @@ from vantage6.common.exceptions import AuthenticationException
 from vantage6.common.encryption import RSACryptor, DummyCryptor
 from vantage6.common.globals import STRING_ENCODING
 from vantage6.common.client.utils import print_qr_code
+from vantage6.common.metrics import Histogram
 
 module_name = __name__.split(".")[1]
 
+SERVER_REQUEST_SECONDS = Histogram(
+    "v6_node_server_request_seconds",
+    "Duration of the HTTP requests to the vantage6 server, by endpoint (ids replaced by '<id>')",
+    ["method", "endpoint", "status"],
+)
+
+
+def endpoint_label(endpoint: str) -> str:
+    """Endpoint without its query string and with the resource ids replaced by '<id>'"""
+    return re.sub(r"/\d+(?=/|$)", "/<id>", endpoint.split("?")[0].strip("/"))
+
 
 class ClientBase(object):
     """Common interface to the central server.
@@ -235,10 +248,19 @@ class ClientBase(object):
 
         timeout_attempts = 0
         while True:
+            started_at = time.perf_counter()
             try:
                 response = rest_method(url, json=json, headers=headers, params=params)
+                SERVER_REQUEST_SECONDS.observe(
+                    time.perf_counter() - started_at, method=method.lower(),
+                    endpoint=endpoint_label(endpoint), status=response.status_code,
+                )
                 break
             except requests.exceptions.ConnectionError as exc:
+                SERVER_REQUEST_SECONDS.observe(
+                    time.perf_counter() - started_at, method=method.lower(),
+                    endpoint=endpoint_label(endpoint), status="connection_error",
+                )
                 # we can safely retry as this is a connection error. And we
                 # keep trying (unless a max number of attempts is given)!
                 timeout_attempts += 1
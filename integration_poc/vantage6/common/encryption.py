@@ -17,7 +17,9 @@ these public keys is outside the scope of this module).
 import os
 import logging
 import json
+import time
 
+from functools import wraps
 from pathlib import Path
 
 from cryptography.hazmat.backends import default_backend
@@ -31,9 +33,38 @@ from cryptography.hazmat.primitives.serialization import (
 )
 
 from vantage6.common import Singleton, logger_name, bytes_to_base64s, base64s_to_bytes
+from vantage6.common.metrics import Counter, Histogram
 
 SEPARATOR = "$"
 
+CRYPTO_SECONDS = Histogram(
+    "v6_node_crypto_seconds", "Duration of the encryption/decryption of inputs and results",
+    ["operation"],
+)
+CRYPTO_BYTES = Counter(
+    "v6_node_crypto_bytes_total", "Plaintext bytes encrypted/decrypted", ["operation"]
+)
+
+
+def _measured(operation: str):
+    """
+    Record the duration and the plaintext size (the data to encrypt, or the decrypted data) of
+    an encryption or decryption method
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, data, *args, **kwargs):
+            started_at = time.perf_counter()
+            result = method(self, data, *args, **kwargs)
+            CRYPTO_SECONDS.observe(time.perf_counter() - started_at, operation=operation)
+            CRYPTO_BYTES.inc(len(data if operation == "encrypt" else result), operation=operation)
+            return result
+
+        return wrapper
+
+    return decorator
+
 
 # ------------------------------------------------------------------------------
 # CryptorBase
@@ -79,6 +110,7 @@ class CryptorBase(metaclass=Singleton):
         """
         return base64s_to_bytes(data)
 
+    @_measured("encrypt")
     def encrypt_bytes_to_str(self, data: bytes, pubkey_base64: str) -> str:
         """
         Encrypt bytes in `data` using a (base64 encoded) public key.
@@ -101,6 +133,7 @@ class CryptorBase(metaclass=Singleton):
         """
         return self.bytes_to_str(data)
 
+    @_measured("decrypt")
     def decrypt_str_to_bytes(self, data: str) -> bytes:
         """
         Decrypt base64 encoded *string* data.
@@ -264,6 +297,7 @@ class RSACryptor(CryptorBase):
         """
         return bytes_to_base64s(self.public_key_bytes)
 
+    @_measured("encrypt")
     def encrypt_bytes_to_str(self, data: bytes, pubkey_base64s: str) -> str:
         """
         Encrypt bytes in `data` using a (base64 encoded) public key.
@@ -308,6 +342,7 @@ class RSACryptor(CryptorBase):
         encrypted_msg = self.bytes_to_str(encrypted_msg_bytes)
         return SEPARATOR.join([encrypted_key, iv, encrypted_msg])
 
+    @_measured("decrypt")
     def decrypt_str_to_bytes(self, data: str) -> bytes:
         """
         Decrypt base64 encoded *string* data.
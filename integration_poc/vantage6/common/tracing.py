@@ -0,0 +1,268 @@
+"""
+Minimal distributed tracing: spans with W3C trace context, exported in the
+OTLP/JSON format to a local file (one export request per line) or to the
+OTLP/HTTP endpoint of a collector (POST <endpoint>/v1/traces).
+
+Spans are passed their parent explicitly (a SpanContext), as the stages of a
+run are executed by different threads. Each algorithm run carries the context
+of its 'run' span, registered with bind_run, so that the components that only
+know the run_id (the container manager) or the task_id (the proxy server, from
+the container token of the algorithm) can attach their spans to it.
+
+Without an exporter (see configure), spans are still created but dropped when
+they end.
+"""
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+
+from contextlib import contextmanager
+from enum import Enum
+from typing import Iterator, NamedTuple
+
+import requests
+
+from vantage6.common import logger_name
+
+# Span kinds (as in the OTLP protocol)
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+# Span status codes (as in the OTLP protocol)
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+# Maximum number of ended spans waiting to be exported. Further spans are dropped.
+EXPORT_QUEUE_SIZE = 10000
+
+# Spans are exported in batches of up to EXPORT_BATCH_SIZE spans, at least every
+# EXPORT_INTERVAL seconds
+EXPORT_BATCH_SIZE = 512
+EXPORT_INTERVAL = 5
+
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+log = logging.getLogger(logger_name(__name__))
+
+
+class SpanContext(NamedTuple):
+    """Identifiers of a span, propagated to its children"""
+
+    trace_id: str
+    span_id: str
+
+    @property
+    def traceparent(self) -> str:
+        """W3C 'traceparent' header value"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @staticmethod
+    def from_traceparent(value: str | None) -> "SpanContext | None":
+        match = TRACEPARENT_PATTERN.match((value or "").strip().lower())
+        return SpanContext(match.group(1), match.group(2)) if match else None
+
+
+class Span:
+    """A timed operation, ended (and exported) with end()"""
+
+    def __init__(self, tracer: "Tracer", name: str, parent: SpanContext | None, kind: int,
+                 attributes: dict | None, start_time: float | None):
+        self.tracer = tracer
+        self.name = name
+        self.parent = parent
+        self.kind = kind
+        self.context = SpanContext(parent.trace_id if parent else os.urandom(16).hex(), os.urandom(8).hex())
+        self.attributes = dict(attributes or {})
+        self.start_time = start_time if start_time is not None else time.time()
+        self.end_time: float | None = None
+        self.status: tuple[int, str] | None = None
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.status = (STATUS_ERROR, message)
+
+    def end(self, end_time: float | None = None) -> None:
+        """End the span (only its first call has an effect)"""
+        if self.end_time is not None:
+            return
+        self.end_time = end_time if end_time is not None else time.time()
+        self.tracer._export(self)
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(int(self.start_time * 1e9)),
+            "endTimeUnixNano": str(int(self.end_time * 1e9)),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+        }
+        if self.parent:
+            span["parentSpanId"] = self.parent.span_id
+        if self.status:
+            span["status"] = {"code": self.status[0], "message": self.status[1]}
+        return span
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class FileExporter:
+    """Appends each batch of spans to a file, as an OTLP/JSON export request per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, request: dict) -> None:
+        with open(self.path, "a") as file:
+            file.write(json.dumps(request) + "\n")
+
+
+class OTLPHttpExporter:
+    """Sends each batch of spans to the OTLP/HTTP (JSON) endpoint of a collector"""
+
+    def __init__(self, endpoint: str, timeout: float = 10):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.timeout = timeout
+
+    def export(self, request: dict) -> None:
+        requests.post(self.url, json=request, timeout=self.timeout).raise_for_status()
+
+
+class Tracer:
+
+    def __init__(self):
+        self.service_name = "v6-node"
+        self._exporters: list = []
+        self._ended: queue.Queue[Span] = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self._export_thread: threading.Thread | None = None
+        # Open 'run' spans, by run_id, and the run_id of the (last) run of each task
+        self._runs: dict[int, Span] = {}
+        self._run_by_task: dict[int, int] = {}
+        self._runs_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._exporters)
+
+    def configure(self, config: dict | None) -> None:
+        """
+        Set up the exporters from the 'tracing' section of the node configuration: 'file'
+        (path of the OTLP/JSON lines file) and/or 'otlp_endpoint' (URL of a collector)
+        """
+        config = config or {}
+        if not config.get("enabled", False):
+            return
+        self.service_name = config.get("service_name", self.service_name)
+        if config.get("file"):
+            self._exporters.append(FileExporter(config["file"]))
+        if config.get("otlp_endpoint"):
+            self._exporters.append(OTLPHttpExporter(config["otlp_endpoint"]))
+        if self._exporters and self._export_thread is None:
+            self._export_thread = threading.Thread(target=self.__export_worker, name="trace-export", daemon=True)
+            self._export_thread.start()
+
+    def start_span(self, name: str, parent: SpanContext | None = None, kind: int = KIND_INTERNAL,
+                   attributes: dict | None = None, start_time: float | None = None) -> Span:
+        return Span(self, name, parent, kind, attributes, start_time)
+
+    @contextmanager
+    def span(self, name: str, parent: SpanContext | None = None, kind: int = KIND_INTERNAL,
+             attributes: dict | None = None) -> Iterator[Span]:
+        """Span of the enclosed block, marked as failed if the block raises"""
+        span = self.start_span(name, parent, kind, attributes)
+        try:
+            yield span
+        except Exception as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.end()
+
+    def bind_run(self, run_id: int, task_id: int, span: Span) -> None:
+        """Register the (open) 'run' span of a run"""
+        with self._runs_lock:
+            self._runs[int(run_id)] = span
+            self._run_by_task[int(task_id)] = int(run_id)
+
+    def is_bound(self, run_id: int) -> bool:
+        with self._runs_lock:
+            return int(run_id) in self._runs
+
+    def get_run_span(self, run_id: int) -> Span | None:
+        with self._runs_lock:
+            return self._runs.get(int(run_id))
+
+    def get_run_context(self, run_id: int) -> SpanContext | None:
+        span = self.get_run_span(run_id)
+        return span.context if span else None
+
+    def get_task_context(self, task_id: int) -> SpanContext | None:
+        """Context of the 'run' span of the run of a task on this node"""
+        with self._runs_lock:
+            run_id = self._run_by_task.get(int(task_id))
+            span = self._runs.get(run_id) if run_id is not None else None
+        return span.context if span else None
+
+    def end_run(self, run_id: int, status=None, error: str | None = None) -> None:
+        """End the 'run' span of a run, and unregister it"""
+        with self._runs_lock:
+            span = self._runs.pop(int(run_id), None)
+            for task_id in [t for t, r in self._run_by_task.items() if r == int(run_id)]:
+                del self._run_by_task[task_id]
+        if span is None:
+            return
+        if status is not None:
+            span.set_attribute("v6.run.status", status)
+        if error:
+            span.set_error(error)
+        span.end()
+
+    def _export(self, span: Span) -> None:
+        if not self._exporters:
+            return
+        try:
+            self._ended.put_nowait(span)
+        except queue.Full:
+            pass
+
+    def __export_worker(self) -> None:
+        while True:
+            batch = []
+            deadline = time.monotonic() + EXPORT_INTERVAL
+            while len(batch) < EXPORT_BATCH_SIZE:
+                try:
+                    batch.append(self._ended.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if not batch:
+                continue
+            request = {"resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{"scope": {"name": "vantage6.node"}, "spans": [s.to_otlp() for s in batch]}],
+            }]}
+            for exporter in self._exporters:
+                try:
+                    exporter.export(request)
+                except Exception:
+                    log.exception(f"Could not export {len(batch)} spans with {type(exporter).__name__}")
+
+
+TRACER = Tracer()
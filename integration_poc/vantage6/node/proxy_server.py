@@ -7,18 +7,22 @@ methods to handle tasks and results, including their encryption and decryption.
 to access other places in the network.
 """
 
+import base64
 import requests
 import logging
 import traceback
+import json as json_lib
 
-from time import sleep
+from time import sleep, perf_counter
 from http import HTTPStatus
 from requests import Response
 
-from flask import Flask, request
+from flask import Flask, g, request
 
 from vantage6.common import bytes_to_base64s, base64s_to_bytes, logger_name #Checked
+from vantage6.common.tracing import TRACER, SpanContext, KIND_SERVER
 from vantage6.common.client.node_client import NodeClient
+from vantage6.common.metrics import Histogram
 
 # Initialize FLASK
 app = Flask(__name__)
@@ -27,10 +31,65 @@ log = logging.getLogger(logger_name(__name__))
 # Need to be set when the proxy server is initialized
 app.config["SERVER_IO"] = None
 server_url = None
+# Spool of the results uploaded by the algorithm PODs (see result_spool.ResultSpool), if enabled
+app.config["RESULT_SPOOL"] = None
 
 # Number of times the request is retried before the proxy server gives up
 RETRY = 3
 
+PROXY_REQUEST_SECONDS = Histogram(
+    "v6_node_proxy_request_seconds",
+    "Duration of the requests of the algorithm containers to the node proxy, by route",
+    ["method", "route", "status"],
+)
+
+
+def get_container_task_id() -> int | None:
+    """
+    Id of the task of the algorithm container making the request, read (not verified: the
+    server does it) from the identity of its container token
+    """
+    try:
+        payload = request.headers["Authorization"].split(" ")[-1].split(".")[1]
+        claims = json_lib.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        identity = claims.get("sub") or claims.get("identity") or {}
+        return int(identity["task_id"])
+    except Exception:
+        return None
+
+
+@app.before_request
+def start_request_timer() -> None:
+    g.request_started_at = perf_counter()
+    # Span of the request, linked to the run of the algorithm that made it: by the trace
+    # context it propagated, or else by the task of its container token
+    parent = SpanContext.from_traceparent(request.headers.get("traceparent"))
+    if parent is None:
+        task_id = get_container_task_id()
+        parent = TRACER.get_task_context(task_id) if task_id is not None else None
+    g.request_span = TRACER.start_span(
+        f"proxy {request.method} {request.url_rule.rule if request.url_rule else 'unmatched'}",
+        parent=parent, kind=KIND_SERVER,
+    )
+
+
+@app.after_request
+def record_request_duration(response):
+    started_at = g.get("request_started_at")
+    if started_at is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        PROXY_REQUEST_SECONDS.observe(
+            perf_counter() - started_at,
+            method=request.method.lower(), route=route, status=response.status_code,
+        )
+    span = g.get("request_span")
+    if span is not None:
+        span.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.set_error(f"status {response.status_code}")
+        span.end()
+    return response
+
 
 def get_method(method: str) -> callable:
     """
@@ -387,6 +446,39 @@ def proxy_results(id_: int) -> Response:
     return result, response.status_code
 
 
+@app.route("/output", methods=["PUT"])
+def upload_output() -> Response:
+    """
+    Store the output of an algorithm run, streamed by its POD (see the
+    'result_upload' configuration) when the algorithm exits, on the node's
+    result spool. The upload is authenticated with the container token of the
+    run, and is not forwarded to the server.
+
+    Returns
+    -------
+    requests.Response
+        Size of the stored result, or the reason it was rejected
+    """
+    spool = app.config.get("RESULT_SPOOL")
+    if not spool:
+        return {"msg": "Result uploads are not enabled on this node"}, HTTPStatus.NOT_FOUND
+
+    token = request.headers.get("Authorization", "").split(" ")[-1]
+    run_id = spool.authenticate(token) if token else None
+    if run_id is None:
+        return {"msg": "Unknown container token"}, HTTPStatus.UNAUTHORIZED
+
+    try:
+        size = spool.write(run_id, request.stream)
+    except ValueError as e:
+        # Over the size limit of the spool
+        return {"msg": str(e)}, HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+    except Exception:
+        log.exception(f"Could not store the output of run_id={run_id}")
+        return {"msg": "Upload failed, see node logs"}, HTTPStatus.INTERNAL_SERVER_ERROR
+    return {"run_id": run_id, "size": size}, HTTPStatus.OK
+
+
 @app.route(
     "/<path:central_server_path>", methods=["GET", "POST", "PATCH", "PUT", "DELETE"]
 )
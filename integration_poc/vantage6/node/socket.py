@@ -3,8 +3,16 @@ import json
 from socketio import ClientNamespace
 
 from vantage6.common import logger_name
+from vantage6.common.metrics import Counter
+from vantage6.common.tracing import TRACER, KIND_SERVER
 from vantage6.common.task_status import TaskStatus, has_task_failed
 
+SOCKET_EVENTS = Counter(
+    "v6_node_socket_events_total",
+    "Connections, reconnections and disconnections of the websocket channel with the server",
+    ["event"],
+)
+
 
 class NodeTaskNamespace(ClientNamespace):
     """Class that handles incoming websocket events."""
@@ -13,6 +21,9 @@ class NodeTaskNamespace(ClientNamespace):
     # node instance.
     node_worker_ref = None
 
+    # whether the node was connected before (i.e., the next connection is a reconnection)
+    connected_before = False
+
     def __init__(self, *args, **kwargs):
         """Handler for a websocket namespace."""
         super().__init__(*args, **kwargs)
@@ -34,6 +45,8 @@ class NodeTaskNamespace(ClientNamespace):
         Alert the node that the websocket connection has been established.
         """
         self.log.info("Websocket connection established")
+        SOCKET_EVENTS.inc(event="reconnect" if NodeTaskNamespace.connected_before else "connect")
+        NodeTaskNamespace.connected_before = True
 
     def on_sync(self):
         """
@@ -41,7 +54,8 @@ class NodeTaskNamespace(ClientNamespace):
         the server when the node connects to the socket namespace.
         """
         self.log.info("(Re)Connected to the /tasks namespace")
-        self.node_worker_ref.sync_task_queue_with_server()
+        with TRACER.span("on_sync", kind=KIND_SERVER) as span:
+            self.node_worker_ref.sync_task_queue_with_server(trace_parent=span.context)
         self.log.debug("Tasks synced again with the server...")
         self.node_worker_ref.share_node_details()
 
@@ -49,6 +63,7 @@ class NodeTaskNamespace(ClientNamespace):
         """Actions to be taken on socket disconnect event."""
         # self.node_worker_ref.socketIO.disconnect()
         self.log.info("Disconnected from the server")
+        SOCKET_EVENTS.inc(event="disconnect")
 
     def on_new_task(self, data: dict):
         """
@@ -64,8 +79,9 @@ class NodeTaskNamespace(ClientNamespace):
                 ID of the parent task (if any)
         """
         if self.node_worker_ref:
-            task_id = data.get("id")            
-            self.node_worker_ref.get_task_and_add_to_queue(task_id)
+            task_id = data.get("id")
+            with TRACER.span("on_new_task", kind=KIND_SERVER, attributes={"v6.task_id": task_id}) as span:
+                self.node_worker_ref.get_task_and_add_to_queue(task_id, trace_parent=span.context)
             self.log.info(f"New task has been added task_id={task_id}")
         else:
             self.log.critical(
@@ -0,0 +1,224 @@
+from vantage6.common import logger_name
+from job_informer import JobInformer
+from typing import Callable, List
+
+import collections
+import logging
+import math
+import threading
+import time
+
+
+# Seconds between two adjustments of the pool sizes
+WARM_POOL_RECONCILE_INTERVAL = 5
+
+# Window (seconds) over which the demand of an image is measured
+DEMAND_WINDOW_SECONDS = 300
+
+# Default seconds it takes a new runner to get ready (scheduled, image available, volumes mounted)
+RUNNER_STARTUP_SECONDS = 30
+
+# Annotations of the warm runner jobs
+WARM_IMAGE_ANNOTATION = "warm_image"
+WARM_RUNNER_ROLE = "v6_warm_runner"
+
+
+class WarmPool:
+    """
+    Pool of pre-started runner PODs for the frequently used algorithm images.
+
+    Each warm runner is a Job whose POD is scheduled, created and has its volumes mounted
+    in advance, and whose container waits until a run is assigned to it (see
+    ContainerManager._create_warm_job). A warm runner serves a single run: its container
+    is started as a fresh process once the run's input and token are handed to it, and
+    the Job completes (and is harvested) as any other algorithm Job. The pool is then
+    replenished.
+
+    The number of idle runners kept for an image follows its recent demand: the runs of
+    that image expected to arrive while a new runner gets ready (its 'startup_seconds'),
+    given the rate of runs of the last 'demand_window' seconds, bounded by the 'min_size'
+    and 'max_size' of the image.
+    """
+
+    def __init__(self, informer: JobInformer, pool_config: dict,
+                 create_runner: Callable[[str, list[str] | None], str],
+                 delete_runner: Callable[[str], None]):
+        """
+        Parameters
+        ----------
+        informer: JobInformer
+            Cache of the jobs namespace, from which the runners' state is read
+        pool_config: dict
+            'warm_pool' section of the node configuration
+        create_runner: Callable[[str, list[str] | None], str]
+            Creates a warm runner Job for the given image and command, returning its name
+        delete_runner: Callable[[str], None]
+            Deletes the warm runner Job with the given name
+        """
+        self.log = logging.getLogger(logger_name(__name__))
+
+        self.informer = informer
+        self.create_runner = create_runner
+        self.delete_runner = delete_runner
+
+        self.demand_window = pool_config.get("demand_window", DEMAND_WINDOW_SECONDS)
+        # image -> pool settings. The runner waits for its run instead of the image's entrypoint,
+        # so the entrypoint must be given as the 'command' of the image
+        self.images: dict[str, dict] = {}
+        for entry in pool_config.get("images", []):
+            if not entry.get("command"):
+                raise ValueError(f"Warm pool image {entry.get('image')} has no 'command' (its entrypoint)")
+            self.images[entry["image"]] = entry
+
+        self._lock = threading.Lock()
+        # image -> timestamps of the recent runs
+        self._demand: dict[str, collections.deque] = {image: collections.deque() for image in self.images}
+        # names of the runners handed to a run (until the informer reports their assignment)
+        self._assigned: set[str] = set()
+        # names of the runners being removed (scale down)
+        self._removing: set[str] = set()
+
+
+    def start(self) -> None:
+        threading.Thread(target=self.__reconcile_worker, name="warm-pool", daemon=True).start()
+
+
+    def is_pooled(self, image: str) -> bool:
+        return image in self.images
+
+
+    def record_demand(self, image: str) -> None:
+        """
+        Register a run of the given image, used to size its pool
+        """
+        if image in self._demand:
+            with self._lock:
+                self._demand[image].append(time.time())
+
+
+    def acquire(self, image: str) -> str | None:
+        """
+        Take an idle runner (whose POD is already running) of the given image
+
+        Returns
+        -------
+        str | None
+            Name of the runner's Job, or None if there is no idle runner
+        """
+        if image not in self.images:
+            return None
+        with self._lock:
+            for job_name in self.__runners(image, idle_only=True):
+                if self.__is_ready(job_name):
+                    self._assigned.add(job_name)
+                    return job_name
+        return None
+
+
+    def release(self, job_name: str) -> None:
+        """
+        Return to the pool a runner taken with acquire that was not assigned to its run
+        """
+        with self._lock:
+            self._assigned.discard(job_name)
+
+
+    def discard(self, job_name: str) -> None:
+        """
+        Remove a runner taken with acquire that can't serve its run (e.g., it was only partially
+        assigned to it). The pool is replenished on the next adjustment.
+        """
+        with self._lock:
+            self._assigned.discard(job_name)
+            self._removing.add(job_name)
+        try:
+            self.delete_runner(job_name)
+        except Exception:
+            self.log.exception(f"Error while removing warm runner {job_name}")
+
+
+    def is_runner(self, job) -> bool:
+        return (job.metadata.labels or {}).get("role") == WARM_RUNNER_ROLE
+
+
+    def target_size(self, image: str) -> int:
+        """
+        Number of idle runners to be kept for an image, following its recent demand
+        """
+        settings = self.images[image]
+        with self._lock:
+            demand = self._demand[image]
+            while demand and demand[0] < time.time() - self.demand_window:
+                demand.popleft()
+            recent_runs = len(demand)
+        # Runs expected while a new runner gets ready (at least one runner while there is demand)
+        rate = recent_runs / self.demand_window
+        expected = math.ceil(rate * settings.get("startup_seconds", RUNNER_STARTUP_SECONDS))
+        expected = max(expected, 1 if recent_runs else 0)
+        return max(settings.get("min_size", 0), min(settings.get("max_size", 1), expected))
+
+
+    def __runners(self, image: str, idle_only: bool) -> List[str]:
+        """
+        Names of the (non finished) runner jobs of an image
+        """
+        names = []
+        for job in self.informer.get_jobs():
+            annotations = job.metadata.annotations or {}
+            if not self.is_runner(job) or annotations.get(WARM_IMAGE_ANNOTATION) != image:
+                continue
+            if job.status and (job.status.succeeded or job.status.failed):
+                continue
+            if idle_only and ("run_id" in annotations or job.metadata.name in self._assigned | self._removing):
+                continue
+            names.append(job.metadata.name)
+        return names
+
+
+    def __is_ready(self, job_name: str) -> bool:
+        return any(
+            pod.status and pod.status.phase == "Running" for pod in self.informer.get_pods_by_job_name(job_name)
+        )
+
+
+    def __reconcile_worker(self) -> None:
+        """
+        Periodically create (or remove) idle runners so that each pool has its target size
+        """
+        while True:
+            time.sleep(WARM_POOL_RECONCILE_INTERVAL)
+            try:
+                self.__reconcile()
+            except Exception:
+                self.log.exception("Error while adjusting the warm runner pools")
+
+
+    def __reconcile(self) -> None:
+        with self._lock:
+            # Forget the assignments that the informer already reports (or of removed runners)
+            known = {job.metadata.name: job for job in self.informer.get_jobs()}
+            self._assigned = {
+                name for name in self._assigned
+                if name in known and "run_id" not in (known[name].metadata.annotations or {})
+            }
+            self._removing &= known.keys()
+
+        for image, settings in self.images.items():
+            target = self.target_size(image)
+            with self._lock:
+                idle = self.__runners(image, idle_only=True)
+
+            if len(idle) < target:
+                for _ in range(target - len(idle)):
+                    name = self.create_runner(image, settings.get("command"))
+                    self.log.info(f"Warm runner {name} created for image {image} (pool target: {target})")
+            elif len(idle) > target:
+                # Remove the runners that are not running yet first
+                idle.sort(key=self.__is_ready)
+                for name in idle[:len(idle) - target]:
+                    with self._lock:
+                        if name in self._assigned:
+                            continue
+                        self._removing.add(name)
+                    self.log.info(f"Removing warm runner {name} of image {image} (pool target: {target})")
+                    self.delete_runner(name)